@@ -1,22 +1,20 @@
 # In app.py
 
-from flask import Flask, render_template, jsonify, request
-from flask_socketio import SocketIO
+from flask import Flask, Response, render_template, jsonify, request
+from flask_socketio import SocketIO, join_room, leave_room
 import time
 import threading
 import json
+import os
+import hmac
+from functools import wraps
 
 # Import your existing monitoring code and data structures
-from chains.ethereum import print_new_erc20_transfers
-from chains.whale_alert import start_whale_thread
-from chains.xrp import start_xrp_thread
-from chains.solana import start_solana_thread
-from chains.solana_grpc import start_solana_grpc_thread
-from chains.polygon import print_new_polygon_transfers
-from chains.bitcoin_alchemy import poll_bitcoin_blocks
-from chains.solana_api import print_new_solana_transfers
-from models.classes import initialize_prices
+# (chain monitors are imported in start_monitors so serving the app stays light)
 from utils.dedup import get_stats as get_dedup_stats, deduplicator, deduped_transactions
+from utils.broadcast import TransactionBroadcaster
+from utils.metrics import register_collector, render_prometheus, snapshot as metrics_snapshot
+from utils.tracing import get_slow_traces, profiler
 from config.settings import (
     GLOBAL_USD_THRESHOLD,
     etherscan_buy_counts,
@@ -37,6 +35,8 @@ from config.settings import (
 
 app = Flask(__name__)
 socketio = SocketIO(app, cors_allowed_origins="*", async_mode="gevent")
+broadcaster = TransactionBroadcaster(socketio)
+register_collector('broadcast', broadcaster.get_stats)
 
 # Home route - render the main template
 @app.route('/')
@@ -201,20 +201,106 @@ def get_stats():
         'monitoring': {
             'active_threads': [t.name for t in threading.enumerate() if t.daemon],
             'min_transaction_value': GLOBAL_USD_THRESHOLD
-        }
+        },
+        'broadcast': broadcaster.get_stats()
     })
 
+# Prometheus scrape endpoint
+@app.route('/metrics')
+def metrics():
+    return Response(render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+# JSON snapshot of the same metrics plus per-module stats
+@app.route('/api/metrics')
+def get_metrics():
+    return jsonify(metrics_snapshot())
+
+# Admin endpoints are disabled unless ADMIN_TOKEN is set; callers send it as X-Admin-Token
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+
+def admin_required(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not ADMIN_TOKEN:
+            return jsonify({'error': 'admin endpoints disabled'}), 404
+        supplied = request.headers.get('X-Admin-Token', '')
+        if not hmac.compare_digest(supplied, ADMIN_TOKEN):
+            return jsonify({'error': 'forbidden'}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+# Span trees of transactions that exceeded WHALE_SLOW_TX_MS
+@app.route('/admin/slow-transactions')
+@admin_required
+def slow_transactions():
+    limit = request.args.get('limit', type=int, default=20)
+    return jsonify({'traces': get_slow_traces(limit)})
+
+# Start an on-demand sampling profile of all threads
+@app.route('/admin/profile', methods=['POST'])
+@admin_required
+def start_profile():
+    seconds = min(request.args.get('seconds', type=float, default=30.0), 300.0)
+    interval_ms = max(request.args.get('interval_ms', type=float, default=5.0), 1.0)
+    if profiler.running:
+        return jsonify({'error': 'profile already running'}), 409
+    profiler.interval = interval_ms / 1000.0
+    profiler.start(seconds)
+    return jsonify({'started': True, 'seconds': seconds, 'interval_ms': interval_ms}), 202
+
+# Latest profile: JSON summary, or collapsed stacks for flamegraph tools
+@app.route('/admin/profile', methods=['GET'])
+@admin_required
+def get_profile():
+    if request.args.get('format') == 'collapsed':
+        return Response(profiler.collapsed(), mimetype='text/plain')
+    return jsonify(profiler.summary(request.args.get('top', type=int, default=25)))
+
+@socketio.on('connect')
+def on_connect():
+    """Put new clients in the unfiltered room until they subscribe"""
+    join_room(broadcaster.subscribe(request.sid))
+
+@socketio.on('subscribe')
+def on_subscribe(data):
+    """Move a client to the room matching its chain / symbol / min USD filter"""
+    data = data or {}
+    try:
+        min_usd = float(data.get('min_usd') or 0)
+    except (TypeError, ValueError):
+        min_usd = 0
+    previous = broadcaster.unsubscribe(request.sid)
+    if previous:
+        leave_room(previous)
+    room = broadcaster.subscribe(request.sid, data.get('chain'), data.get('symbol'), min_usd)
+    join_room(room)
+    return {'room': room}
+
+@socketio.on('disconnect')
+def on_disconnect():
+    broadcaster.unsubscribe(request.sid)
+
 def push_new_transaction(event):
-    """Push a new transaction to all connected clients via SocketIO"""
-    socketio.emit('new_transaction', event)
+    """Queue a new transaction for the next coalesced SocketIO frame"""
+    broadcaster.publish(event)
 
 def start_monitors():
     """Start all transaction monitoring threads"""
+    from chains.ethereum import print_new_erc20_transfers
+    from chains.whale_alert import start_whale_thread
+    from chains.xrp import start_xrp_thread
+    from chains.solana import start_solana_thread
+    from chains.solana_grpc import start_solana_grpc_thread
+    from chains.polygon import print_new_polygon_transfers
+    from chains.bitcoin_alchemy import poll_bitcoin_blocks
+    from models.classes import initialize_prices
+
     # Initialize token prices
     initialize_prices()
 
-    # Register real-time push callback
+    # Register real-time push callback; frames go out from the emitter task
     deduplicator.on_new_transaction = push_new_transaction
+    broadcaster.start()
 
     threads = []
 
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Classification API throughput: per-transaction vs /classify/batch against a
+local stub enrichment service.
+
+Starts a stub enrichment service on localhost (uvicorn, real sockets) that
+answers /enrich-address and /enrich-addresses with a fixed label per address
+after ``--latency-ms`` per request. Like the real service, it looks addresses
+up from its sources at most ``--stub-concurrency`` at a time across all
+requests, each lookup taking ``--source-latency-ms``, so large batches of
+uncached addresses take proportionally longer.
+It then classifies ``--transactions`` transactions whose addresses come from
+a pool of ``--addresses``:
+
+    legacy   per transaction: a new AsyncClient and two sequential
+             /enrich-address calls, as enrich_transaction_addresses did
+             before the pooled client, then the rules
+    single   classify_transaction() per transaction (pooled client)
+    oneshot  classify_batch() sending each batch's addresses in a single
+             /enrich-addresses request under ENRICHMENT_TIMEOUT_SECONDS
+    batch    classify_batch() over chunks of ``--batch-size`` transactions,
+             addresses sent in concurrent ENRICHMENT_BATCH_CHUNK chunks
+
+``meta %`` is the share of transaction sides that got address metadata; a
+timed-out enrichment request shows up there rather than as an error. Results
+are compared against the batch variant, so all paths must classify
+identically unless a variant lost metadata.
+
+Usage:
+    python benchmarks/bench_classify_batch.py [--transactions 1000] [--batch-size 500]
+    python benchmarks/bench_classify_batch.py --transactions 1000 --batch-size 1000 \\
+        --addresses 100000 --source-latency-ms 50 --variants oneshot,batch
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+
+LABELS = ["exchange", "personal", "dex", "bridge", "market_maker", "unknown"]
+
+
+def _stub_app(latency: float, source_latency: float, concurrency: int) -> FastAPI:
+    app = FastAPI()
+
+    def enriched(address: str, chain: str) -> dict:
+        return {
+            "address": address,
+            "chain": chain,
+            "primary_label": LABELS[sum(map(ord, address)) % len(LABELS)],
+            "source": "unknown",
+            "confidence": 0.8,
+        }
+
+    # Shared across requests, like the service's ENRICHMENT_MAX_CONCURRENCY semaphore
+    sources = asyncio.Semaphore(concurrency)
+
+    async def lookup(item: dict) -> dict:
+        if source_latency:
+            async with sources:
+                await asyncio.sleep(source_latency)
+        return enriched(item["address"], item["chain"])
+
+    @app.post("/enrich-address")
+    async def enrich_address(request: dict):
+        await asyncio.sleep(latency)
+        return await lookup(request)
+
+    @app.post("/enrich-addresses")
+    async def enrich_addresses(request: dict):
+        await asyncio.sleep(latency)
+        return {"results": await asyncio.gather(*(lookup(item) for item in request["addresses"]))}
+
+    return app
+
+
+def _start_stub(latency: float, source_latency: float, concurrency: int) -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(_stub_app(latency, source_latency, concurrency), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}"
+
+
+def _transactions(models, count: int, addresses: int, seed: int) -> list:
+    rng = random.Random(seed)
+    pool = [f"0x{rng.getrandbits(160):040x}" for _ in range(addresses)]
+    return [
+        models.TransactionRequest(
+            from_address=rng.choice(pool),
+            to_address=rng.choice(pool),
+            chain="ethereum",
+            token=rng.choice(["eth", "usdt", "pepe"]),
+            amount=rng.random() * 1000,
+        )
+        for _ in range(count)
+    ]
+
+
+async def _legacy(api, transactions: list) -> list:
+    results = []
+    for transaction in transactions:
+        async with httpx.AsyncClient() as client:
+            for side in ("from", "to"):
+                response = await client.post(
+                    f"{api.ENRICHMENT_SERVICE_URL}/enrich-address",
+                    json={"address": getattr(transaction, f"{side}_address"), "chain": transaction.chain.value},
+                    timeout=5.0,
+                )
+                setattr(transaction, f"{side}_address_metadata", api._to_metadata(response.json()))
+        results.append(api.rule_engine.classify(transaction))
+    return results
+
+
+async def _single(api, transactions: list) -> list:
+    return [await api.classify_transaction(transaction) for transaction in transactions]
+
+
+async def _batch(api, models, transactions: list, batch_size: int) -> list:
+    results = []
+    for i in range(0, len(transactions), batch_size):
+        response = await api.classify_batch(
+            models.BatchClassificationRequest(transactions=transactions[i:i + batch_size]))
+        results.extend(response.results)
+    return results
+
+
+async def _oneshot(api, models, transactions: list, batch_size: int) -> list:
+    """Batch with the whole address set in one request under the single-address timeout"""
+    chunk, timeout = api.ENRICHMENT_BATCH_CHUNK, api.ENRICHMENT_BATCH_TIMEOUT_SECONDS
+    api.ENRICHMENT_BATCH_CHUNK, api.ENRICHMENT_BATCH_TIMEOUT_SECONDS = 10 ** 9, api.ENRICHMENT_TIMEOUT_SECONDS
+    try:
+        return await _batch(api, models, transactions, batch_size)
+    finally:
+        api.ENRICHMENT_BATCH_CHUNK, api.ENRICHMENT_BATCH_TIMEOUT_SECONDS = chunk, timeout
+
+
+def _metadata_share(transactions: list) -> float:
+    sides = [t.from_address_metadata for t in transactions] + [t.to_address_metadata for t in transactions]
+    return 100.0 * sum(1 for m in sides if m) / len(sides)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--transactions', type=int, default=1000)
+    parser.add_argument('--addresses', type=int, default=750, help='distinct addresses in the pool')
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--latency-ms', type=float, default=2.0, help='stub service latency per request')
+    parser.add_argument('--source-latency-ms', type=float, default=0.0,
+                        help='stub source lookup latency per address (0 = all cache hits)')
+    parser.add_argument('--stub-concurrency', type=int, default=20,
+                        help='addresses the stub looks up at a time (ENRICHMENT_MAX_CONCURRENCY)')
+    parser.add_argument('--variants', default='legacy,single,oneshot,batch')
+    args = parser.parse_args()
+
+    os.environ["ENRICHMENT_SERVICE_URL"] = _start_stub(
+        args.latency_ms / 1000, args.source_latency_ms / 1000, max(1, args.stub_concurrency))
+    from rule_engine.api import main as api  # noqa: E402 - reads ENRICHMENT_SERVICE_URL at import
+    from rule_engine.models import transaction as models  # noqa: E402
+    logging.disable(logging.WARNING)
+
+    print(f"{args.transactions:,} transactions, {args.addresses:,} addresses, "
+          f"batch {args.batch_size}, stub latency {args.latency_ms}ms + "
+          f"{args.source_latency_ms}ms per source lookup, {args.stub_concurrency} at a time")
+    print(f"{'variant':<8} {'seconds':>9} {'tx/s':>10} {'meta %':>7}")
+
+    shares = {}
+
+    async def run() -> dict:
+        outcomes = {}
+        variants = (
+            ('legacy', lambda txs: _legacy(api, txs)),
+            ('single', lambda txs: _single(api, txs)),
+            ('oneshot', lambda txs: _oneshot(api, models, txs, args.batch_size)),
+            ('batch', lambda txs: _batch(api, models, txs, args.batch_size)),
+        )
+        selected = args.variants.split(',')
+        for name, variant in variants:
+            if name not in selected:
+                continue
+            # classify mutates the transactions, so every variant gets a fresh copy
+            transactions = _transactions(models, args.transactions, args.addresses, seed=3)
+            started = time.perf_counter()
+            results = await variant(transactions)
+            elapsed = time.perf_counter() - started
+            shares[name] = _metadata_share(transactions)
+            print(f"{name:<8} {elapsed:>9.3f} {args.transactions / elapsed:>10.0f} {shares[name]:>7.1f}")
+            outcomes[name] = [(r.triggered_rule, r.classification) for r in results]
+        await api.close_http_client()
+        return outcomes
+
+    outcomes = asyncio.run(run())
+    if 'batch' not in outcomes:
+        return 0
+    failed = shares['batch'] < 100.0
+    for name in outcomes:
+        if name == 'batch':
+            continue
+        mismatches = sum(1 for a, b in zip(outcomes[name], outcomes['batch']) if a != b)
+        print(f"{name} vs batch mismatches: {mismatches}")
+        # A variant that lost metadata is expected to classify differently
+        failed |= bool(mismatches) and shares[name] >= 100.0
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
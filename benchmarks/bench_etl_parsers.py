@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+ETL parser benchmark: rows/sec and peak RSS on a synthetic ethereum-etl export.
+
+Writes a transactions.csv with ``--rows`` rows (ethereum-etl column layout,
+addresses drawn from a pool of ``--addresses``) and parses it with:
+
+    legacy      csv.DictReader + one nested dict per address occurrence,
+                as DirectETLManager did before the streaming parsers
+    streaming   DirectETLManager._parse_ethereum_transactions via csv.reader
+    columnar    the same via pyarrow record batches (skipped without pyarrow)
+
+Each variant runs in a fresh process so its peak RSS is its own.
+
+Usage:
+    python benchmarks/bench_etl_parsers.py [--rows 1000000] [--addresses 100000]
+"""
+
+import argparse
+import csv
+import multiprocessing
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.direct_etl_manager import DirectETLManager, PYARROW_AVAILABLE  # noqa: E402
+
+COLUMNS = ['hash', 'nonce', 'block_hash', 'block_number', 'transaction_index', 'from_address',
+           'to_address', 'value', 'gas', 'gas_price', 'input', 'block_timestamp']
+
+
+def _write_export(path: str, rows: int, pool_size: int) -> None:
+    rng = random.Random(7)
+    pool = [f"0x{rng.getrandbits(160):040X}" for _ in range(pool_size)]
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for i in range(rows):
+            block = 18_000_000 + i // 150
+            writer.writerow([
+                f"0x{i:064x}", i % 500, f"0x{block:064x}", block, i % 150,
+                rng.choice(pool), rng.choice(pool) if i % 20 else '',
+                rng.randrange(10**21), 21000, 30 * 10**9, '0x', 1_700_000_000 + block * 12,
+            ])
+
+
+def _parse_legacy(path: str) -> int:
+    addresses = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            for column, label in (('from_address', 'Transaction Sender'), ('to_address', 'Transaction Recipient')):
+                if row.get(column):
+                    addresses.append({
+                        'address': row[column].lower(),
+                        'label': label,
+                        'source_system': 'direct_etl_ethereum_transactions',
+                        'blockchain': 'ethereum',
+                        'metadata': {
+                            'block_number': row.get('block_number'),
+                            'transaction_hash': row.get('hash'),
+                            'value': row.get('value')
+                        }
+                    })
+    return len({entry['address'] for entry in addresses})
+
+
+def _run(variant: str, path: str, queue) -> None:
+    started = time.perf_counter()
+    if variant == 'legacy':
+        unique = _parse_legacy(path)
+    else:
+        min_bytes = 0 if variant == 'columnar' else sys.maxsize
+        manager = DirectETLManager({'ETL_COLUMNAR_MIN_BYTES': min_bytes})
+        unique = len(manager._parse_ethereum_transactions(path))
+    elapsed = time.perf_counter() - started
+    # ru_maxrss is KiB on Linux
+    queue.put((elapsed, unique, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--addresses', type=int, default=100_000, help='distinct addresses in the export')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_etl_')
+    try:
+        path = os.path.join(workdir, 'transactions.csv')
+        print(f"writing {args.rows:,} rows ...", flush=True)
+        _write_export(path, args.rows, args.addresses)
+        print(f"export size {os.path.getsize(path) / 2**20:,.0f} MiB")
+
+        variants = ['legacy', 'streaming'] + (['columnar'] if PYARROW_AVAILABLE else [])
+        context = multiprocessing.get_context('spawn')
+        print(f"{'variant':<10} {'rows/s':>12} {'seconds':>9} {'peak RSS':>10} {'unique':>9}")
+        for variant in variants:
+            queue = context.Queue()
+            process = context.Process(target=_run, args=(variant, path, queue))
+            process.start()
+            process.join()
+            if process.exitcode != 0:
+                print(f"{variant:<10} failed (exit code {process.exitcode})")
+                continue
+            elapsed, unique, peak_mib = queue.get()
+            print(f"{variant:<10} {args.rows / elapsed:>12,.0f} {elapsed:>9.2f} {peak_mib:>7,.0f} MiB {unique:>9,}")
+        if not PYARROW_AVAILABLE:
+            print("columnar   skipped (pyarrow not installed)")
+    finally:
+        shutil.rmtree(workdir)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
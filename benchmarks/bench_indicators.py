@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Indicator benchmark: EMA + RSI (+ volatility) over many synthetic price series.
+
+Generates ``--series`` random-walk series of ``--points`` 5-minute candles
+and times:
+
+    legacy       chart -> np.array, Python-loop EMA and full-diff RSI per
+                 series, as OpportunityAnalyzer did before indicators.py
+    vectorized   indicators.ema / rsi / volatility per series
+    batch        indicators.*_batch over the whole (series x points) matrix
+    incremental  IndicatorStore.observe per series on the next chart (one new
+                 candle), after the store was seeded with the previous chart;
+                 compared against legacy recomputing that same chart
+
+and reports the largest difference from the legacy EMA and RSI.
+
+Usage:
+    python benchmarks/bench_indicators.py [--series 10000] [--points 288]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from opportunity_engine import indicators  # noqa: E402
+
+EMA_PERIOD = 20
+RSI_PERIOD = 14
+CANDLE_SECONDS = 300
+
+
+def _legacy_ema(prices: np.ndarray, period: int) -> float:
+    if len(prices) < period:
+        return float(np.mean(prices))
+    alpha = 2 / (period + 1)
+    ema = prices[0]
+    for price in prices[1:]:
+        ema = alpha * price + (1 - alpha) * ema
+    return float(ema)
+
+
+def _legacy_rsi(prices: np.ndarray, period: int = 14) -> float:
+    if len(prices) < period + 1:
+        return 50.0
+    deltas = np.diff(prices)
+    gains = np.where(deltas > 0, deltas, 0)
+    losses = np.where(deltas < 0, -deltas, 0)
+    avg_gains = np.mean(gains[-period:])
+    avg_losses = np.mean(losses[-period:])
+    if avg_losses == 0:
+        return 100.0
+    return float(100 - (100 / (1 + avg_gains / avg_losses)))
+
+
+def _legacy(chart):
+    price_data = np.array([p[1] for p in chart])
+    return _legacy_ema(price_data, EMA_PERIOD), _legacy_rsi(price_data, RSI_PERIOD)
+
+
+def _charts(matrix: np.ndarray, start: int, points: int):
+    timestamps = (np.arange(matrix.shape[1]) * CANDLE_SECONDS).tolist()
+    return [[[timestamps[i], row[i]] for i in range(start, start + points)] for row in matrix.tolist()]
+
+
+def _report(name: str, elapsed: float, series: int, ema_diff: float, rsi_diff: float) -> None:
+    print(f"{name:<12} {elapsed:>9.3f} {elapsed / series * 1e6:>10.1f} {ema_diff:>12.2e} {rsi_diff:>12.2e}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--series', type=int, default=10_000)
+    parser.add_argument('--points', type=int, default=288, help='candles per series (288 = one day of 5-min data)')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    # One extra candle for the incremental step
+    walks = np.exp(np.cumsum(rng.normal(0, 0.01, (args.series, args.points + 1)), axis=1)) * 100
+    matrix = walks[:, :args.points]
+    previous_charts = _charts(walks, 0, args.points)
+    next_charts = _charts(walks, 1, args.points)
+
+    print(f"{args.series:,} series x {args.points} points")
+    print(f"{'variant':<12} {'seconds':>9} {'us/series':>10} {'max dEMA':>12} {'max dRSI':>12}")
+
+    started = time.perf_counter()
+    legacy = [_legacy(chart) for chart in previous_charts]
+    _report('legacy', time.perf_counter() - started, args.series, 0.0, 0.0)
+    legacy_ema = np.array([value[0] for value in legacy])
+    legacy_rsi = np.array([value[1] for value in legacy])
+
+    started = time.perf_counter()
+    vectorized = [(indicators.ema(row, EMA_PERIOD), indicators.rsi(row, RSI_PERIOD), indicators.volatility(row))
+                  for row in matrix]
+    elapsed = time.perf_counter() - started
+    _report('vectorized', elapsed, args.series,
+            np.abs(np.array([v[0] for v in vectorized]) - legacy_ema).max(),
+            np.abs(np.array([v[1] for v in vectorized]) - legacy_rsi).max())
+
+    started = time.perf_counter()
+    batch_ema = indicators.ema_batch(matrix, EMA_PERIOD)
+    batch_rsi = indicators.rsi_batch(matrix, RSI_PERIOD)
+    indicators.volatility_batch(matrix)
+    _report('batch', time.perf_counter() - started, args.series,
+            np.abs(batch_ema - legacy_ema).max(), np.abs(batch_rsi - legacy_rsi).max())
+
+    store = indicators.IndicatorStore(EMA_PERIOD, RSI_PERIOD, max_tokens=args.series)
+    for key, chart in enumerate(previous_charts):
+        store.observe(key, chart)
+
+    started = time.perf_counter()
+    legacy_next = [_legacy(chart) for chart in next_charts]
+    _report('legacy+1', time.perf_counter() - started, args.series, 0.0, 0.0)
+
+    started = time.perf_counter()
+    incremental = [store.observe(key, chart) for key, chart in enumerate(next_charts)]
+    elapsed = time.perf_counter() - started
+    _report('incremental', elapsed, args.series,
+            max(abs(value.ema - old[0]) for value, old in zip(incremental, legacy_next)),
+            max(abs(value.rsi - old[1]) for value, old in zip(incremental, legacy_next)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Rule dispatch benchmark: RuleEngine.classify with and without the compiled
+dispatch index.
+
+Generates ``--transactions`` synthetic TransactionRequests with labels drawn
+from the ones the common rules look for plus ``--noise-labels`` unrelated
+ones, random tokens and (sometimes) shared entity names, then classifies
+every transaction with:
+
+    linear     RuleEngine(use_dispatch=False): apply() on every rule in order
+    compiled   RuleEngine(): apply() only on the dispatch candidates
+
+Both engines must produce the same (triggered_rule, classification,
+confidence) for every transaction; the benchmark exits non-zero otherwise.
+It also reports how many apply() calls each variant made.
+
+Usage:
+    python benchmarks/bench_rule_dispatch.py [--transactions 100000] [--noise-labels 200]
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rule_engine.models.transaction import AddressMetadata, ChainType, TransactionRequest  # noqa: E402
+from rule_engine.rules.base import RuleEngine  # noqa: E402
+from rule_engine.rules.common_rules import (  # noqa: E402
+    BridgeTransactionRule,
+    DexSwapRule,
+    ExchangeDepositRule,
+    ExchangeWithdrawalRule,
+    MarketMakerTransferRule,
+)
+
+RULE_LABELS = [
+    "exchange", "cex", "centralized exchange", "personal", "unknown", "individual", "user",
+    "wallet", "dex", "amm", "decentralized exchange", "bridge", "wormhole bridge",
+    "cross-chain router", "market maker", "liquidity provider", "Exchange", "DEX",
+]
+TOKENS = ["eth", "usdt", "usdc", "sol", "pepe", "dai", "link", "wbtc"]
+ENTITIES = ["", "", "", "wintermute", "jump", "binance"]
+
+
+def _build_engine(use_dispatch: bool) -> RuleEngine:
+    engine = RuleEngine(use_dispatch=use_dispatch)
+    engine.register_rules([
+        ExchangeDepositRule(),
+        ExchangeWithdrawalRule(),
+        DexSwapRule(),
+        BridgeTransactionRule(),
+        MarketMakerTransferRule(),
+    ])
+    return engine
+
+
+def _count_applies(engine: RuleEngine) -> list:
+    """Wrap each rule's apply() to count calls; returns the shared counter."""
+    calls = [0]
+    for rule in engine.rules:
+        original = rule.apply
+
+        def counted(transaction, _original=original):
+            calls[0] += 1
+            return _original(transaction)
+
+        rule.apply = counted
+    return calls
+
+
+def _metadata(rng: random.Random, address: str, labels: list) -> AddressMetadata:
+    fields = {'address': address, 'label': rng.choice(labels), 'confidence': round(rng.random(), 2)}
+    entity = rng.choice(ENTITIES)
+    if entity:
+        fields['entity_name'] = entity
+    return AddressMetadata(**fields)
+
+
+def _transactions(count: int, noise_labels: int, seed: int) -> list:
+    rng = random.Random(seed)
+    labels = RULE_LABELS + [f"label_{i}" for i in range(noise_labels)]
+    chains = list(ChainType)
+    transactions = []
+    for i in range(count):
+        from_address, to_address = f"0xfrom{i}", f"0xto{i}"
+        transactions.append(TransactionRequest(
+            from_address=from_address,
+            to_address=to_address,
+            chain=rng.choice(chains),
+            token=rng.choice(TOKENS),
+            amount=rng.random() * 1000,
+            from_address_metadata=_metadata(rng, from_address, labels) if rng.random() > 0.05 else None,
+            to_address_metadata=_metadata(rng, to_address, labels) if rng.random() > 0.05 else None,
+        ))
+    return transactions
+
+
+def _run(engine: RuleEngine, transactions: list):
+    started = time.perf_counter()
+    results = [engine.classify(tx) for tx in transactions]
+    return time.perf_counter() - started, [(r.triggered_rule, r.classification, r.confidence) for r in results]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--transactions', type=int, default=100_000)
+    parser.add_argument('--noise-labels', type=int, default=200, help='labels no rule looks for')
+    parser.add_argument('--seed', type=int, default=11)
+    args = parser.parse_args()
+
+    # classify() logs every transaction at INFO
+    logging.disable(logging.INFO)
+
+    transactions = _transactions(args.transactions, args.noise_labels, args.seed)
+    print(f"{args.transactions:,} transactions, {len(RULE_LABELS) + args.noise_labels} distinct labels")
+    print(f"{'variant':<10} {'seconds':>9} {'us/tx':>8} {'applies/tx':>11}")
+
+    outcomes = {}
+    for name, use_dispatch in (('linear', False), ('compiled', True)):
+        engine = _build_engine(use_dispatch)
+        calls = _count_applies(engine)
+        elapsed, outcomes[name] = _run(engine, transactions)
+        print(f"{name:<10} {elapsed:>9.3f} {elapsed / args.transactions * 1e6:>8.1f} "
+              f"{calls[0] / args.transactions:>11.2f}")
+
+    mismatches = sum(1 for a, b in zip(outcomes['linear'], outcomes['compiled']) if a != b)
+    print(f"mismatches: {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
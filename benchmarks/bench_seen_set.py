@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Seen-set benchmark: throughput, eviction order and Bloom false-positive rate.
+
+Feeds synthetic transaction hashes through ``utils.seen_set.SeenSet`` and
+reports inserts/sec for the LRU-only and LRU+Bloom configurations. It then
+checks that:
+
+    * the LRU evicts the least recently seen hash first (recent hashes are
+      never reported as new), and
+    * the measured Bloom false-positive rate over hashes never inserted is
+      within ``--fp-rate`` (plus sampling error) once both filters are at
+      full load.
+
+Exits non-zero if either check fails.
+
+Usage:
+    python benchmarks/bench_seen_set.py [--window 200000] [--fp-rate 0.001]
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.seen_set import SeenSet  # noqa: E402
+
+
+def _hash(i: int, salt: str = 'a') -> str:
+    return f"0x{salt}{i:063x}"
+
+
+def _throughput(label: str, seen: SeenSet, count: int) -> None:
+    started = time.perf_counter()
+    for i in range(count):
+        seen.check_and_add(_hash(i))
+    elapsed = time.perf_counter() - started
+    print(f"{label:<12} {count / elapsed:>12,.0f} inserts/s   {seen.get_stats()}")
+
+
+def _check_eviction_order(capacity: int) -> bool:
+    seen = SeenSet(capacity=capacity, name='bench_order')
+    for i in range(capacity * 3):
+        seen.check_and_add(_hash(i))
+        # Exactly the most recent `capacity` hashes are kept (`in` does not touch recency)
+        if i >= capacity and (_hash(i - capacity + 1) not in seen or _hash(i - capacity) in seen):
+            print(f"eviction order: wrong entry evicted after inserting hash {i}")
+            return False
+    print(f"eviction order: ok (capacity {capacity})")
+    return True
+
+
+def _check_fp_rate(window: int, fp_rate: float, probes: int) -> bool:
+    seen = SeenSet(capacity=1_000, bloom_window=window, bloom_fp_rate=fp_rate, name='bench_fp')
+    # Fill both generations: rotate once, then fill the new current filter to just below rotation
+    for i in range(window * 2 - 1):
+        seen.check_and_add(_hash(i))
+    false_positives = sum(1 for i in range(probes) if _hash(i, salt='b') in seen)
+    measured = false_positives / probes
+    stats = seen.get_stats()
+    # Allow three standard errors of sampling noise around the budget
+    ok = measured <= fp_rate + 3 * math.sqrt(fp_rate * (1 - fp_rate) / probes)
+    print(f"bloom fp:    measured {measured:.5f}, estimated {stats['bloom_estimated_fp_rate']:.5f}, "
+          f"budget {fp_rate} ({stats['bloom_memory_bytes'] / 1024:,.0f} KiB) {'ok' if ok else 'OVER BUDGET'}")
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=200_000, help='hashes for the throughput runs')
+    parser.add_argument('--window', type=int, default=200_000, help='Bloom window (hashes per generation)')
+    parser.add_argument('--fp-rate', type=float, default=0.001)
+    parser.add_argument('--probes', type=int, default=200_000, help='never-inserted hashes probed for FPs')
+    args = parser.parse_args()
+
+    _throughput('lru', SeenSet(capacity=10_000, name='bench_lru'), args.count)
+    _throughput('lru+bloom', SeenSet(capacity=10_000, bloom_window=args.window,
+                                     bloom_fp_rate=args.fp_rate, name='bench_bloom'), args.count)
+    ok = _check_eviction_order(1_000)
+    ok = _check_fp_rate(args.window, args.fp_rate, args.probes) and ok
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
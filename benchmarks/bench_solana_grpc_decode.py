@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Solana gRPC decode path: updates/sec of _process_transaction_update before
+and after the mint fast path.
+
+Replays a stream of Yellowstone SubscribeUpdate messages, either a recording
+(``--recording PATH``: each message prefixed with its length as a 4-byte
+big-endian integer) or ``--updates`` synthetic ones in which ``--hit-rate``
+of the transactions move a monitored mint. Synthetic updates are serialized
+and parsed back, so both variants see the same messages grpc would hand over.
+``--write-recording PATH`` saves the synthetic stream in the recording format.
+
+    legacy   the previous path: every account key base58-encoded and both
+             token balance maps built for every update
+    fast     chains.solana_grpc._process_transaction_update
+
+Classification, dedup, printing and persistence are replaced with stubs so
+only decoding is timed; both variants must emit the same events.
+
+Usage:
+    python benchmarks/bench_solana_grpc_decode.py [--updates 50000] [--hit-rate 0.05]
+    python benchmarks/bench_solana_grpc_decode.py --recording updates.bin
+"""
+
+import argparse
+import os
+import random
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import base58  # noqa: E402
+
+from chains import solana_grpc  # noqa: E402
+from proto import geyser_pb2  # noqa: E402
+
+OTHER_MINTS = [base58.b58encode(random.Random(i).randbytes(32)).decode() for i in range(500)]
+
+
+def _legacy_process(update):
+    """_process_transaction_update as it was before the fast path."""
+    g = solana_grpc
+    g._stats["transactions_processed"] += 1
+    tx_info = update.transaction.transaction
+    tx_sig = g._bytes_to_base58(tx_info.signature)
+    tx_msg = tx_info.transaction
+    tx_meta = tx_info.meta
+    if tx_meta is None:
+        return
+    if tx_meta.err and tx_meta.err.err:
+        return
+
+    account_keys = [g._bytes_to_base58(k) for k in tx_msg.message.account_keys]
+    for addr in tx_meta.loaded_writable_addresses:
+        account_keys.append(g._bytes_to_base58(addr))
+    for addr in tx_meta.loaded_readonly_addresses:
+        account_keys.append(g._bytes_to_base58(addr))
+
+    pre_balances = {tb.account_index: tb for tb in tx_meta.pre_token_balances}
+    post_balances = {tb.account_index: tb for tb in tx_meta.post_token_balances}
+
+    for idx in set(pre_balances.keys()) | set(post_balances.keys()):
+        pre = pre_balances.get(idx)
+        post = post_balances.get(idx)
+        mint = post.mint if post and post.mint else (pre.mint if pre and pre.mint else None)
+        if not mint or mint not in g.MINT_TO_SYMBOL:
+            continue
+        symbol = g.MINT_TO_SYMBOL[mint]
+        pre_amount = pre.ui_token_amount.ui_amount if pre else 0.0
+        post_amount = post.ui_token_amount.ui_amount if post else 0.0
+        amount_change = post_amount - pre_amount
+        if abs(amount_change) < 0.0001:
+            continue
+        owner = post.owner if post and post.owner else (pre.owner if pre and pre.owner else "")
+        if not owner:
+            continue
+        usd_value = abs(amount_change) * g.TOKEN_PRICES.get(symbol, 0)
+        if usd_value < g.MINT_THRESHOLD.get(mint, 1_000):
+            continue
+        g._stats["whale_transfers_found"] += 1
+        prev_owner = None
+        if owner in g.solana_previous_balances:
+            prev_owner = g.solana_previous_balances.get(owner, {}).get("last_counterparty")
+        event = {
+            "blockchain": "solana",
+            "tx_hash": f"{tx_sig}_{owner}_{amount_change:.6f}",
+            "original_hash": tx_sig,
+            "from": prev_owner or "unknown",
+            "to": owner,
+            "amount": abs(amount_change),
+            "symbol": symbol,
+            "usd_value": usd_value,
+            "timestamp": time.time(),
+            "source": "solana_grpc",
+        }
+        classification, confidence = g.enhanced_solana_classification(
+            owner=owner, prev_owner=prev_owner, amount_change=amount_change,
+            tx_hash=tx_sig, token=symbol, source="solana_grpc")
+        event["classification"] = classification
+        if not g.handle_event(event):
+            continue
+        if owner not in g.solana_previous_balances:
+            g.solana_previous_balances[owner] = {}
+        g.solana_previous_balances[owner][mint] = post_amount
+
+
+def _token_balance(index, mint, amount, owner):
+    return {
+        'account_index': index,
+        'mint': mint,
+        'owner': owner,
+        'program_id': solana_grpc.SPL_TOKEN_PROGRAM,
+        'ui_token_amount': {'ui_amount': amount / 1e6, 'decimals': 6, 'amount': str(amount),
+                            'ui_amount_string': str(amount / 1e6)},
+    }
+
+
+def _synthetic(count: int, hit_rate: float, seed: int) -> list:
+    rng = random.Random(seed)
+    monitored = list(solana_grpc.MINT_TO_SYMBOL)
+    owners = [base58.b58encode(rng.randbytes(32)).decode() for _ in range(2000)]
+    updates = []
+    for slot in range(count):
+        hit = rng.random() < hit_rate
+        keys = [rng.randbytes(32) for _ in range(rng.randint(12, 40))]
+        pre, post = [], []
+        for index in range(rng.randint(2, 6)):
+            mint = rng.choice(monitored) if hit and index < 2 else rng.choice(OTHER_MINTS)
+            before = rng.randrange(10 ** 12)
+            # Most balances in a transaction don't move
+            after = before if rng.random() < 0.6 else rng.randrange(10 ** 13)
+            owner = rng.choice(owners)
+            pre.append(_token_balance(index, mint, before, owner))
+            post.append(_token_balance(index, mint, after, owner))
+        update = geyser_pb2.SubscribeUpdate(transaction={
+            'slot': slot,
+            'transaction': {
+                'signature': rng.randbytes(64),
+                'transaction': {'message': {'account_keys': keys}},
+                'meta': {
+                    'pre_token_balances': pre,
+                    'post_token_balances': post,
+                    'loaded_writable_addresses': [rng.randbytes(32) for _ in range(rng.randint(0, 8))],
+                    'loaded_readonly_addresses': [rng.randbytes(32) for _ in range(rng.randint(0, 8))],
+                },
+            },
+        })
+        updates.append(update.SerializeToString())
+    return updates
+
+
+def _read_recording(path: str) -> list:
+    messages = []
+    with open(path, 'rb') as f:
+        while True:
+            header = f.read(4)
+            if len(header) < 4:
+                break
+            messages.append(f.read(struct.unpack('>I', header)[0]))
+    return messages
+
+
+def _write_recording(path: str, messages: list) -> None:
+    with open(path, 'wb') as f:
+        for message in messages:
+            f.write(struct.pack('>I', len(message)))
+            f.write(message)
+
+
+def _run(process, updates: list):
+    events = []
+    solana_grpc.handle_event = lambda event: events.append(event) or True
+    solana_grpc.solana_previous_balances.clear()
+    started = time.perf_counter()
+    for update in updates:
+        process(update)
+    elapsed = time.perf_counter() - started
+    return elapsed, [(e['tx_hash'], e['from'], e['to'], e['symbol'], e['usd_value']) for e in events]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--updates', type=int, default=50_000)
+    parser.add_argument('--hit-rate', type=float, default=0.05, help='share of updates moving a monitored mint')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--recording', help='replay length-prefixed SubscribeUpdate messages from this file')
+    parser.add_argument('--write-recording', help='save the synthetic updates to this file')
+    args = parser.parse_args()
+
+    if args.recording:
+        messages = _read_recording(args.recording)
+    else:
+        messages = _synthetic(args.updates, args.hit_rate, args.seed)
+        if args.write_recording:
+            _write_recording(args.write_recording, messages)
+    updates = [geyser_pb2.SubscribeUpdate.FromString(message) for message in messages]
+    updates = [u for u in updates if u.WhichOneof("update_oneof") == "transaction"]
+
+    solana_grpc.enhanced_solana_classification = lambda **kwargs: ("transfer", 1)
+    solana_grpc.safe_print = lambda *a, **k: None
+
+    print(f"{len(updates):,} transaction updates")
+    print(f"{'variant':<8} {'seconds':>9} {'updates/s':>11} {'events':>8}")
+    outcomes = {}
+    for name, process in (('legacy', _legacy_process), ('fast', solana_grpc._process_transaction_update)):
+        elapsed, outcomes[name] = _run(process, updates)
+        print(f"{name:<8} {elapsed:>9.3f} {len(updates) / elapsed:>11,.0f} {len(outcomes[name]):>8}")
+
+    stats = solana_grpc.get_grpc_stats()
+    print(f"fast path rejected {stats['fast_rejected']:,} of {len(updates):,} updates")
+    same = outcomes['legacy'] == outcomes['fast']
+    print(f"events match: {same}")
+    return 0 if same else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Import-time startup benchmark for the monitor entry points.
+
+Each entry point is imported in a fresh interpreter under
+``python -X importtime``. The script reports the cumulative import time, the
+heaviest imported modules, and any network activity (socket connect /
+getaddrinfo, caught by an audit hook) that happened during import. It exits
+non-zero if an entry point is over its budget or touches the network.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 3] [--top 10] [entry ...]
+"""
+
+import argparse
+import ast
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative import-time budget per entry point, in milliseconds
+STARTUP_BUDGETS_MS = {
+    'app': 1500,
+    'enhanced_monitor': 4000,
+    'reclassify_transfers': 1200,
+}
+
+# Imports the module with an audit hook that records network activity
+_PROBE = '''
+import sys
+_net = []
+def _hook(event, args):
+    if event in ("socket.connect", "socket.getaddrinfo"):
+        _net.append(f"{event} {args[1] if len(args) > 1 else args}")
+sys.addaudithook(_hook)
+import {module}
+sys.stdout.write("NETWORK:" + repr(_net) + "\\n")
+'''
+
+_IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def _profile(module: str) -> Tuple[int, List[Tuple[int, str]], List[str]]:
+    """Return (cumulative us, [(self us, module)], network events) for one import."""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _PROBE.replace('{module}', module)],
+        cwd=REPO_ROOT, capture_output=True, text=True,
+        env={**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'},
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    total_us = 0
+    modules = []
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        modules.append((int(self_us), name))
+        if name == module and len(indent) == 1:
+            total_us = int(cumulative_us)
+
+    network = []
+    for line in proc.stdout.splitlines():
+        if line.startswith('NETWORK:'):
+            network = ast.literal_eval(line[len("NETWORK:"):])
+    return total_us, modules, network
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('entries', nargs='*', default=list(STARTUP_BUDGETS_MS))
+    parser.add_argument('--runs', type=int, default=3, help='fresh interpreters per entry point')
+    parser.add_argument('--top', type=int, default=10, help='heaviest modules to list')
+    args = parser.parse_args()
+
+    failures = 0
+    for entry in args.entries:
+        budget_ms = STARTUP_BUDGETS_MS.get(entry)
+        runs: List[int] = []
+        heaviest: Dict[str, int] = {}
+        network: List[str] = []
+        for _ in range(args.runs):
+            total_us, modules, network = _profile(entry)
+            runs.append(total_us)
+            for self_us, name in modules:
+                heaviest[name] = min(heaviest.get(name, self_us), self_us)
+
+        best_ms = min(runs) / 1000
+        over = budget_ms is not None and best_ms > budget_ms
+        status = 'OVER BUDGET' if over else 'ok'
+        budget = f"{budget_ms} ms" if budget_ms is not None else 'n/a'
+        print(f"\n{entry}: {best_ms:,.1f} ms (best of {args.runs}, budget {budget}) {status}")
+        for name, self_us in sorted(heaviest.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+            print(f"    {self_us / 1000:>8.1f} ms  {name}")
+        if network:
+            print(f"    network activity during import: {network}")
+        failures += over or bool(network)
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
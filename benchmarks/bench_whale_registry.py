@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+WhaleRegistry persistence: hot-path cost and crash recovery.
+
+Throughput (default): tracks ``--trades`` trades over ``--whales`` addresses
+and reports the per-call latency of track_transaction for
+
+    legacy   the previous behaviour: the whole registry rewritten as indented
+             JSON every 5th trade of a whale (run on ``--legacy-trades``)
+    log      the log-structured registry (append in the background,
+             snapshot every ``--compact-every`` records)
+
+Crash injection (``--crash-rounds N``): a child process tracks a deterministic
+trade stream into a temporary registry as fast as it can, reporting every 100
+trades how many the background writer has made durable; it is SIGKILLed at a
+random moment (possibly mid-append or mid-compaction). After every kill the
+registry is reloaded and must be exactly the state after the first k trades
+of the stream for some k no smaller than the last reported durable count. The next
+round's child resumes from the recovered state.
+
+Usage:
+    python benchmarks/bench_whale_registry.py [--whales 10000] [--trades 50000]
+    python benchmarks/bench_whale_registry.py --crash-rounds 20
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.whale_registry import WhaleRegistry, apply_trade  # noqa: E402
+
+TOKENS = [f"TOKEN{i}" for i in range(20)]
+
+
+def _trade(index: int, seed: int, whales: int):
+    rng = random.Random(seed * 1_000_003 + index)
+    return f"0x{rng.randrange(whales):040x}", {
+        'classification': rng.choice(['BUY', 'SELL', 'TRANSFER']),
+        'token': rng.choice(TOKENS),
+        'usd_value': round(rng.uniform(50_000, 2_000_000), 2),
+        'confidence': round(rng.random(), 3),
+    }
+
+
+def _expected(count: int, seed: int, whales: int) -> dict:
+    registry = {}
+    for i in range(count):
+        address, tx = _trade(i, seed, whales)
+        apply_trade(registry, {'n': i + 1, 'a': address.lower(), 't': '', 'c': tx['classification'],
+                               'k': tx['token'], 'u': tx['usd_value'], 'f': tx['confidence']})
+    return _comparable(registry)
+
+
+def _comparable(registry: dict) -> dict:
+    """Registry without wall-clock timestamps."""
+    return {
+        address: (data['total_trades'], data['buy_count'], data['sell_count'], round(data['total_volume_usd'], 4),
+                  tuple(data['tokens_traded']), data['smart_money_score'], data['is_proven'],
+                  tuple((h['token'], h['usd_value']) for h in data['trade_history']))
+        for address, data in registry.items()
+    }
+
+
+class _LegacyRegistry(WhaleRegistry):
+    """Previous persistence: full indented rewrite every 5th trade of a whale."""
+
+    def track_transaction(self, address, transaction):
+        address = address.lower()
+        apply_trade(self.registry, {'n': 0, 'a': address, 't': '', 'c': transaction['classification'],
+                                    'k': transaction['token'], 'u': transaction['usd_value'],
+                                    'f': transaction['confidence']})
+        if self.registry[address]['total_trades'] % 5 == 0:
+            with open(self.persistence_file, 'w') as f:
+                json.dump(self.registry, f, indent=2, default=str)
+
+
+def _time_calls(registry: WhaleRegistry, trades: list) -> list:
+    latencies = []
+    for address, tx in trades:
+        started = time.perf_counter()
+        registry.track_transaction(address, tx)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def _report(name: str, latencies: list) -> None:
+    ordered = sorted(latencies)
+    print(f"{name:<8} {len(latencies):>8,} {statistics.mean(latencies) * 1e6:>10.1f} "
+          f"{ordered[len(ordered) // 2] * 1e6:>9.1f} {ordered[int(len(ordered) * 0.99)] * 1e6:>9.1f} "
+          f"{ordered[-1] * 1e3:>9.2f}")
+
+
+def _throughput(args) -> int:
+    workdir = tempfile.mkdtemp(prefix='whale_registry_')
+    try:
+        # Warm registry: every whale already known
+        warm = [_trade(i, args.seed, args.whales) for i in range(args.whales * 3)]
+        trades = [_trade(i, args.seed + 1, args.whales) for i in range(args.trades)]
+
+        print(f"{args.whales:,} whales")
+        print(f"{'variant':<8} {'trades':>8} {'mean us':>10} {'p50 us':>9} {'p99 us':>9} {'max ms':>9}")
+
+        legacy = _LegacyRegistry(os.path.join(workdir, 'legacy.json'))
+        for address, tx in warm:
+            apply_trade(legacy.registry, {'n': 0, 'a': address.lower(), 't': '', 'c': tx['classification'],
+                                          'k': tx['token'], 'u': tx['usd_value'], 'f': tx['confidence']})
+        _report('legacy', _time_calls(legacy, trades[:args.legacy_trades]))
+
+        registry = WhaleRegistry(os.path.join(workdir, 'registry.json'), compact_every=args.compact_every)
+        for address, tx in warm:
+            registry.track_transaction(address, tx)
+        registry.save_registry()
+        _report('log', _time_calls(registry, trades))
+        started = time.perf_counter()
+        registry.flush()
+        print(f"flush after run: {(time.perf_counter() - started) * 1e3:.1f}ms, writer stats: "
+              f"{ {k: v for k, v in registry.get_stats().items() if k in ('batches', 'snapshots', 'write_errors')} }")
+        registry.close()
+
+        reloaded = WhaleRegistry(os.path.join(workdir, 'registry.json'))
+        same = _comparable(reloaded.registry) == _comparable(registry.registry)
+        print(f"reload matches in-memory registry: {same}")
+        reloaded.close()
+        return 0 if same else 1
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _child(args) -> int:
+    registry = WhaleRegistry(os.path.join(args.child, 'registry.json'), compact_every=args.compact_every)
+    done = sum(data['total_trades'] for data in registry.registry.values())
+    start_seq = registry.get_stats()['seq']
+    print(f"ready {done}", flush=True)
+    index = done
+    while True:
+        address, tx = _trade(index, args.seed, args.whales)
+        registry.track_transaction(address, tx)
+        index += 1
+        if index % 100 == 0:
+            # Trades the writer has already fsynced (its seq counts from this run's start)
+            print(done + registry.get_stats().get('durable_seq', 0) - start_seq, flush=True)
+
+
+def _crash(args) -> int:
+    workdir = tempfile.mkdtemp(prefix='whale_registry_crash_')
+    rng = random.Random(args.seed)
+    failures = 0
+    try:
+        for round_number in range(1, args.crash_rounds + 1):
+            child = subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), '--child', workdir, '--seed', str(args.seed),
+                 '--whales', str(args.whales), '--compact-every', str(args.compact_every)],
+                stdout=subprocess.PIPE, text=True, cwd=workdir)
+            ready = child.stdout.readline().split()
+            time.sleep(rng.uniform(0.05, 0.6))
+            child.send_signal(signal.SIGKILL)
+            output = child.communicate()[0].split()
+            durable = int(output[-1]) if output else int(ready[1])
+
+            registry = WhaleRegistry(os.path.join(workdir, 'registry.json'))
+            recovered = sum(data['total_trades'] for data in registry.registry.values())
+            ok = recovered >= durable and _comparable(registry.registry) == _expected(recovered, args.seed, args.whales)
+            failures += not ok
+            print(f"round {round_number:>3}: started at {ready[1]:>6}, durable {durable:>6}, "
+                  f"recovered {recovered:>6} {'ok' if ok else 'MISMATCH'}")
+        print(f"{args.crash_rounds - failures}/{args.crash_rounds} rounds recovered without loss")
+        return 1 if failures else 0
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--whales', type=int, default=10_000)
+    parser.add_argument('--trades', type=int, default=50_000)
+    parser.add_argument('--legacy-trades', type=int, default=2_000)
+    parser.add_argument('--compact-every', type=int, default=10_000)
+    parser.add_argument('--seed', type=int, default=5)
+    parser.add_argument('--crash-rounds', type=int, default=0)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return _child(args)
+    if args.crash_rounds:
+        return _crash(args)
+    return _throughput(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -17,6 +17,7 @@ from config.settings import shutdown_flag
 from data.tokens import TOP_100_ERC20_TOKENS, TOKEN_PRICES
 from utils.base_helpers import safe_print, log_error
 from utils.dedup import handle_event
+from utils.metrics import register_collector
 
 logger = logging.getLogger(__name__)
 
@@ -233,3 +234,6 @@ def start_ethereum_ws_thread():
 
 def get_eth_ws_stats():
     return {'received': _eth_ws_received, 'stored': _eth_ws_stored}
+
+
+register_collector('ethereum_ws', get_eth_ws_stats)
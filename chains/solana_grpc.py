@@ -32,6 +32,7 @@ from data.tokens import SOL_TOKENS_TO_MONITOR, TOKEN_PRICES
 from utils.classification_final import enhanced_solana_classification
 from utils.base_helpers import safe_print, log_error
 from utils.dedup import handle_event
+from utils.metrics import register_collector
 
 # --- Configuration ---
 GRPC_ENDPOINT = "solana-mainnet.g.alchemy.com"
@@ -57,6 +58,7 @@ _stats = {
     "updates_received": 0,
     "transactions_processed": 0,
     "whale_transfers_found": 0,
+    "fast_rejected": 0,  # Updates with no monitored mint in their token balances
     "errors": 0,
 }
 
@@ -121,18 +123,17 @@ def _process_transaction_update(update):
 
     Uses pre/post token balances from TransactionStatusMeta — same approach
     as the existing HTTPS poller (solana_api.py) but in real-time.
+
+    Most updates touch none of our mints (the subscription filter matches on
+    any account), so they are rejected from the token balance mints alone.
+    Unchanged balances are skipped by comparing the raw amount strings, and
+    the signature is only base58-encoded once a transfer passes the filters.
     """
     _stats["transactions_processed"] += 1
 
     # update.transaction = SubscribeUpdateTransaction (has .transaction, .slot)
     # update.transaction.transaction = SubscribeUpdateTransactionInfo (has .signature, .transaction, .meta)
-    tx_wrapper = update.transaction           # SubscribeUpdateTransaction
-    tx_info = tx_wrapper.transaction          # SubscribeUpdateTransactionInfo
-
-    sig_bytes = tx_info.signature
-    tx_sig = _bytes_to_base58(sig_bytes)
-
-    tx_msg = tx_info.transaction              # solana.storage.ConfirmedBlock.Transaction
+    tx_info = update.transaction.transaction  # SubscribeUpdateTransactionInfo
     tx_meta = tx_info.meta                    # TransactionStatusMeta
 
     if tx_meta is None:
@@ -142,22 +143,26 @@ def _process_transaction_update(update):
     if tx_meta.err and tx_meta.err.err:
         return
 
-    # Build account keys list (static + loaded addresses)
-    account_keys = [_bytes_to_base58(k) for k in tx_msg.message.account_keys]
-    for addr in tx_meta.loaded_writable_addresses:
-        account_keys.append(_bytes_to_base58(addr))
-    for addr in tx_meta.loaded_readonly_addresses:
-        account_keys.append(_bytes_to_base58(addr))
+    pre_token_balances = tx_meta.pre_token_balances
+    post_token_balances = tx_meta.post_token_balances
+
+    # Fast path: no monitored mint in any token balance
+    if not any(tb.mint in MINT_TO_SYMBOL for tb in post_token_balances) and \
+            not any(tb.mint in MINT_TO_SYMBOL for tb in pre_token_balances):
+        _stats["fast_rejected"] += 1
+        return
 
     # Build pre/post token balance maps: {account_index: TokenBalance}
     pre_balances = {}
-    for tb in tx_meta.pre_token_balances:
+    for tb in pre_token_balances:
         pre_balances[tb.account_index] = tb
 
     post_balances = {}
-    for tb in tx_meta.post_token_balances:
+    for tb in post_token_balances:
         post_balances[tb.account_index] = tb
 
+    tx_sig = None
+
     # Find all account indices with token balance changes
     all_indices = set(pre_balances.keys()) | set(post_balances.keys())
 
@@ -175,6 +180,10 @@ def _process_transaction_update(update):
         if not mint or mint not in MINT_TO_SYMBOL:
             continue
 
+        # Same raw amount on both sides: no change
+        if pre and post and pre.ui_token_amount.amount == post.ui_token_amount.amount:
+            continue
+
         symbol = MINT_TO_SYMBOL[mint]
 
         # Get amounts
@@ -205,6 +214,9 @@ def _process_transaction_update(update):
 
         _stats["whale_transfers_found"] += 1
 
+        if tx_sig is None:
+            tx_sig = _bytes_to_base58(tx_info.signature)
+
         # Determine from/to based on balance change direction
         prev_owner = None
         if owner in solana_previous_balances:
@@ -396,3 +408,6 @@ def start_solana_grpc_thread():
 def get_grpc_stats():
     """Return current gRPC monitoring statistics."""
     return dict(_stats)
+
+
+register_collector('solana_grpc', get_grpc_stats)
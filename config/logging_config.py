@@ -12,15 +12,37 @@ Features:
 - Transaction-specific trace IDs for filtering and debugging
 - Rich contextual information for each analysis phase
 - Error tracking with full stack traces
+- Non-blocking queue backend: formatting and I/O run on a background thread
+- Level-gated, lazy context evaluation and per-transaction sampling
+
+Environment:
+    WHALE_LOG_LEVEL        DEBUG | INFO | WARNING | ERROR | OFF (default INFO)
+    WHALE_LOG_ASYNC        1 to format/write on a background thread (default 1)
+    WHALE_LOG_QUEUE_SIZE   bounded buffer size; records are dropped when full
+    WHALE_LOG_SAMPLE_RATE  fraction of transactions whose INFO/DEBUG records are
+                           kept (0.0-1.0, default 1.0); WARNING+ is never sampled
 """
 
+import atexit
 import logging
+import logging.handlers
 import json
+import os
+import queue
 import uuid
+import zlib
 from typing import Dict, Any, Optional
 from pythonjsonlogger import jsonlogger
 from datetime import datetime
 
+LOG_LEVEL = os.getenv('WHALE_LOG_LEVEL', 'INFO').upper()
+ASYNC_LOGGING = os.getenv('WHALE_LOG_ASYNC', '1') not in ('0', 'false', 'False')
+LOG_QUEUE_SIZE = int(os.getenv('WHALE_LOG_QUEUE_SIZE', '10000'))
+LOG_SAMPLE_RATE = float(os.getenv('WHALE_LOG_SAMPLE_RATE', '1.0'))
+
+# Level above CRITICAL used for WHALE_LOG_LEVEL=OFF
+LOG_LEVEL_OFF = logging.CRITICAL + 10
+
 class WhaleIntelligenceFormatter(jsonlogger.JsonFormatter):
     """
     Custom JSON formatter for whale intelligence logging with enhanced context.
@@ -41,13 +63,61 @@ class WhaleIntelligenceFormatter(jsonlogger.JsonFormatter):
         if not log_record.get('level'):
             log_record['level'] = record.levelname
 
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that never blocks or formats on the calling thread.
+
+    The stock handler formats the record in ``prepare()`` before enqueueing,
+    which keeps JSON serialization on the hot path. Here the raw record is
+    queued and formatting happens in the listener thread. When the bounded
+    queue is full the record is dropped and counted instead of blocking.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class DrainingQueueListener(logging.handlers.QueueListener):
+    """QueueListener whose stop() waits for room instead of failing on a full queue."""
+
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)
+
+
+def _is_sampled(transaction_hash: str, sample_rate: float) -> bool:
+    """Deterministic per-transaction sampling so a trace is kept or dropped whole."""
+    if sample_rate >= 1.0:
+        return True
+    if sample_rate <= 0.0:
+        return False
+    bucket = zlib.crc32(str(transaction_hash).encode('utf-8')) % 10_000
+    return bucket < sample_rate * 10_000
+
+
 class TransactionLogger:
     """
     Transaction-aware logger that automatically includes transaction context
     in all log messages for a specific transaction analysis.
+
+    Records below the logger's level return before any context is built.
+    Context values (and the message) may be zero-argument callables; they are
+    only evaluated when the record will actually be emitted.
     """
+
+    __slots__ = ('base_logger', 'transaction_hash', '_trace_id', 'sampled')
     
-    def __init__(self, base_logger: logging.Logger, transaction_hash: str, trace_id: Optional[str] = None):
+    def __init__(self, base_logger: logging.Logger, transaction_hash: str, trace_id: Optional[str] = None,
+                 sampled: bool = True):
         """
         Initialize transaction logger.
         
@@ -55,25 +125,49 @@ class TransactionLogger:
             base_logger: The base logger instance
             transaction_hash: Transaction hash for traceability
             trace_id: Optional custom trace ID, generates one if not provided
+            sampled: When False, only WARNING and above are emitted
         """
         self.base_logger = base_logger
         self.transaction_hash = transaction_hash
-        self.trace_id = trace_id or str(uuid.uuid4())[:8]
-        
-        # Base context that will be included in every log message
-        self.base_context = {
+        self._trace_id = trace_id
+        self.sampled = sampled
+
+    @property
+    def trace_id(self) -> str:
+        # Generated on first use so gated-off loggers never pay for uuid4
+        if self._trace_id is None:
+            self._trace_id = str(uuid.uuid4())[:8]
+        return self._trace_id
+
+    @property
+    def base_context(self) -> Dict[str, Any]:
+        """Context included in every log message."""
+        return {
             'transaction_hash': self.transaction_hash,
             'trace_id': self.trace_id
         }
+
+    def is_enabled_for(self, level: int) -> bool:
+        """True if a record at ``level`` would be emitted for this transaction."""
+        if level < logging.WARNING and not self.sampled:
+            return False
+        return self.base_logger.isEnabledFor(level)
     
-    def _log_with_context(self, level: int, message: str, extra_context: Optional[Dict[str, Any]] = None) -> None:
+    def _log_with_context(self, level: int, message: Any, extra_context: Optional[Dict[str, Any]] = None) -> None:
         """Log message with transaction context."""
-        context = self.base_context.copy()
+        if not self.is_enabled_for(level):
+            return
+
+        if callable(message):
+            message = message()
+
+        context = self.base_context
         if extra_context:
             # Remove any logging-related parameters that shouldn't be in context
-            filtered_context = {k: v for k, v in extra_context.items() 
-                              if k not in ['transaction_hash', 'exc_info', 'stack_info', 'stacklevel']}
-            context.update(filtered_context)
+            for k, v in extra_context.items():
+                if k in ('transaction_hash', 'exc_info', 'stack_info', 'stacklevel'):
+                    continue
+                context[k] = v() if callable(v) else v
         
         # Create extra dict for structured logging
         extra = {'extra_fields': context}
@@ -134,21 +228,45 @@ class TransactionLogger:
             master_reasoning=reasoning
         )
 
-def setup_production_logging(log_level: str = 'INFO') -> logging.Logger:
+# Background listener for the async backend (one per process)
+_queue_listener: Optional[DrainingQueueListener] = None
+_queue_handler: Optional[NonBlockingQueueHandler] = None
+
+
+def _stop_queue_listener() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
+
+
+atexit.register(_stop_queue_listener)
+
+
+def setup_production_logging(log_level: str = LOG_LEVEL, async_logging: bool = ASYNC_LOGGING,
+                             queue_size: int = LOG_QUEUE_SIZE) -> logging.Logger:
     """
     Set up production-grade structured logging for the Whale Intelligence Engine.
     
     Args:
-        log_level: Logging level (DEBUG, INFO, WARNING, ERROR)
+        log_level: Logging level (DEBUG, INFO, WARNING, ERROR, or OFF to disable)
+        async_logging: Format and write records on a background thread
+        queue_size: Bounded queue size for the async backend
         
     Returns:
         Configured logger instance
     """
+    global _queue_handler, _queue_listener
+
     # Create logger
     logger = logging.getLogger('whale_intelligence')
-    logger.setLevel(getattr(logging, log_level.upper()))
+    level_name = log_level.upper()
+    logger.setLevel(LOG_LEVEL_OFF if level_name == 'OFF' else getattr(logging, level_name))
     
     # Remove existing handlers to avoid duplicates
+    _stop_queue_listener()
+    _queue_handler = None
     logger.handlers.clear()
     
     # Create console handler with JSON formatting
@@ -160,13 +278,37 @@ def setup_production_logging(log_level: str = 'INFO') -> logging.Logger:
     )
     
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+
+    if async_logging:
+        # Hot path only enqueues; the listener thread formats and writes
+        log_queue = queue.Queue(maxsize=queue_size)
+        _queue_handler = NonBlockingQueueHandler(log_queue)
+        _queue_listener = DrainingQueueListener(
+            log_queue, console_handler, respect_handler_level=True
+        )
+        _queue_listener.start()
+        logger.addHandler(_queue_handler)
+
+        from utils.metrics import QUEUE_DEPTH
+        QUEUE_DEPTH.labels(queue='log_records').set_function(log_queue.qsize)
+    else:
+        logger.addHandler(console_handler)
     
     # Prevent propagation to root logger to avoid duplicate logs
     logger.propagate = False
     
     return logger
 
+def get_logging_stats() -> Dict[str, Any]:
+    """Queue depth and dropped-record count for the async backend."""
+    if _queue_handler is None:
+        return {'async': False, 'queued': 0, 'dropped': 0}
+    return {
+        'async': True,
+        'queued': _queue_handler.queue.qsize(),
+        'dropped': _queue_handler.dropped,
+    }
+
 def get_transaction_logger(transaction_hash: str, trace_id: Optional[str] = None) -> TransactionLogger:
     """
     Get a transaction-aware logger for analyzing a specific transaction.
@@ -178,8 +320,9 @@ def get_transaction_logger(transaction_hash: str, trace_id: Optional[str] = None
     Returns:
         TransactionLogger instance
     """
-    base_logger = logging.getLogger('whale_intelligence')
-    return TransactionLogger(base_logger, transaction_hash, trace_id)
+    return TransactionLogger(_base_logger, transaction_hash, trace_id,
+                             sampled=_is_sampled(transaction_hash, LOG_SAMPLE_RATE))
 
 # Initialize the production logger when module is imported
-production_logger = setup_production_logging() 
\ No newline at end of file
+production_logger = setup_production_logging()
+_base_logger = production_logger
@@ -26,6 +26,21 @@ DEDUP_SETTINGS = {
     'window_for_similar_tx': 1800  # 30 minutes
 }
 
+# Pipeline-level tx hash dedup (utils/seen_set.py)
+PIPELINE_DEDUP_SETTINGS = {
+    'capacity': 10_000,  # Exact LRU entries; the least recently seen hash is evicted first
+    'bloom_window': 0,  # Hashes per Bloom generation behind the LRU (0 = LRU only)
+    'bloom_fp_rate': 0.001,  # False-positive budget for Bloom lookups at full load
+}
+
+# Live SocketIO fan-out (utils/broadcast.py)
+BROADCAST_SETTINGS = {
+    'frame_interval_ms': 250,  # Coalesce events into one frame per interval
+    'max_events_per_frame': 500,  # Excess events roll over to the next frame
+    'max_buffered_events': 10_000,  # Oldest events are dropped past this
+    'usd_tiers': (0, 10_000, 50_000, 100_000, 500_000, 1_000_000),  # Room min-USD buckets
+}
+
 # Chain-specific settings
 CHAIN_SETTINGS = {
     'ethereum': {
@@ -1,3 +1,5 @@
+from utils.price_service import LivePrices
+
 # =======================
 # GLOBAL VARIABLES & COUNTERS
 # =======================
@@ -248,7 +250,8 @@ SOL_TOKENS_TO_MONITOR = {
 }
 
 # --- TOKEN PRICES (USD) for ERC‑20 tokens ---
-TOKEN_PRICES = {
+# Startup fallbacks; live values are published by models.classes.initialize_prices
+_STATIC_TOKEN_PRICES = {
     # Original tokens
     "WETH": 1600,
     "LINK": 7,
@@ -395,7 +398,7 @@ TOKEN_PRICES = {
 }
 
 # Update TOKEN_PRICES with current approximate values
-TOKEN_PRICES.update({
+_STATIC_TOKEN_PRICES.update({
     # Original Solana tokens
     "SOL": 150,
     "BONK": 0.00001,
@@ -423,11 +426,14 @@ TOKEN_PRICES.update({
 })
 
 # Native chain tokens (for Bitcoin/Tron monitors)
-TOKEN_PRICES.update({
+_STATIC_TOKEN_PRICES.update({
     "BTC": 95000,
     "TRX": 0.25,
 })
 
+# Read-only view of the latest price snapshot (see utils.price_service)
+TOKEN_PRICES = LivePrices(_STATIC_TOKEN_PRICES)
+
 STABLE_COINS = {"usdt", "usdc", "dai", "tusd", "busd"}
 
 # Alias for backwards compatibility
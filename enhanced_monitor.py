@@ -23,7 +23,7 @@ import asyncio
 import json
 import logging
 import argparse
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Dict, Any, List, Optional
 from colorama import Fore, Style
 
@@ -34,7 +34,7 @@ if hasattr(sys.stderr, 'reconfigure'):
 
 # Production logging imports
 from config.logging_config import production_logger, get_transaction_logger
-from utils.classification_final import WhaleIntelligenceEngine, ClassificationType, normalize_blockchain
+from utils.classification_final import WhaleIntelligenceEngine, ClassificationType, normalize_blockchain, get_whale_engine
 
 # Use the production logger throughout this module (including simulation path)
 logger = production_logger
@@ -63,12 +63,15 @@ from chains.solana_api import print_new_solana_transfers, test_helius_connection
 from models.classes import initialize_prices
 from utils.dedup import get_stats, deduped_transactions
 from utils.base_helpers import log_error, print_error_summary
+from utils.metrics import register_collector
+from utils.seen_set import SeenSet
+from utils.near_dupe_index import WindowedDupeIndex, to_epoch
+from config.monitor_settings import PIPELINE_DEDUP_SETTINGS
 from data.tokens import TOP_100_ERC20_TOKENS, TOKEN_PRICES
 from data.addresses import DEX_ADDRESSES
-from web3 import Web3
 
 # 🔧 PROFESSIONAL PIPELINE DEDUPLICATION SYSTEM
-pipeline_processed_txs = set()
+pipeline_processed_txs = SeenSet(name='pipeline', **PIPELINE_DEDUP_SETTINGS)
 pipeline_lock = threading.Lock()
 pipeline_stats = defaultdict(int)
 
@@ -92,13 +95,18 @@ NEAR_DUPE_PERCENTAGE_THRESHOLD = 0.0015
 NEAR_DUPE_CACHE_SIZE = 50
 
 # Number of recent transactions to check from database
+# (only queried when the in-memory index cannot cover the time window)
 NEAR_DUPE_DB_LOOKBACK = 200
 
 # Minimum USD value to apply safeguards (never dedupe above this)
 NEAR_DUPE_SAFEGUARD_USD = 5_000_000
 
 # Token-level cache size for cross-entity duplicate detection
-TOKEN_DUPE_CACHE_SIZE = 200
+# Probes only visit matching USD buckets, so this can hold a full window for busy tokens
+TOKEN_DUPE_CACHE_SIZE = 5_000
+
+# How long entries stay indexed; covers out-of-order timestamps around the window
+NEAR_DUPE_RETENTION = NEAR_DUPE_TIME_WINDOW * 2
 
 # Patterns to detect
 MIRROR_PATTERNS = [
@@ -113,15 +121,25 @@ TRANSFER_SHADOW_PATTERNS = [
     ('TRANSFER', 'SELL'),
 ]
 
-# In-memory cache for near-duplicate detection
-# Structure: {(whale_addr, token): [{'timestamp': ..., 'usd_value': ..., 'classification': ..., 'tx_hash': ...}]}
-near_dupe_cache = defaultdict(list)
-near_dupe_cache_lock = threading.Lock()
+# In-memory windowed index for near-duplicate detection
+# Keyed by (whale_addr, token); entries: {'timestamp': ..., 'usd_value': ..., 'classification': ..., 'tx_hash': ...}
+near_dupe_index = WindowedDupeIndex(
+    window_seconds=NEAR_DUPE_TIME_WINDOW,
+    retention_seconds=NEAR_DUPE_RETENTION,
+    max_per_key=NEAR_DUPE_CACHE_SIZE,
+    abs_tolerance=NEAR_DUPE_USD_THRESHOLD,
+    pct_tolerance=NEAR_DUPE_PERCENTAGE_THRESHOLD,
+)
 near_dupe_stats = defaultdict(int)
 
-# Token-level cache to detect cross-whale duplicates (e.g., BUY/SELL pairs of same size)
-token_dupe_cache = defaultdict(list)
-token_dupe_cache_lock = threading.Lock()
+# Token-level index to detect cross-whale duplicates (e.g., BUY/SELL pairs of same size)
+token_dupe_index = WindowedDupeIndex(
+    window_seconds=NEAR_DUPE_TIME_WINDOW,
+    retention_seconds=NEAR_DUPE_RETENTION,
+    max_per_key=TOKEN_DUPE_CACHE_SIZE,
+    abs_tolerance=NEAR_DUPE_USD_THRESHOLD,
+    pct_tolerance=NEAR_DUPE_PERCENTAGE_THRESHOLD,
+)
 
 HIGH_RISK_COUNTERPARTY_TYPES = {'CEX', 'DEX'}
 TRADE_COUNTERPARTY_TYPES = {'CEX', 'DEX'}
@@ -131,6 +149,8 @@ def is_transaction_already_processed(tx_hash: str) -> bool:
     🔧 PROFESSIONAL PIPELINE DEDUPLICATION
     
     Thread-safe function to check and add transaction hashes to prevent duplicates.
+    Hashes live in a bounded SeenSet (see PIPELINE_DEDUP_SETTINGS), which evicts
+    the least recently seen hash first.
     
     Args:
         tx_hash: Transaction hash to check
@@ -138,27 +158,22 @@ def is_transaction_already_processed(tx_hash: str) -> bool:
     Returns:
         bool: True if already processed, False if new
     """
-    with pipeline_lock:
-        if tx_hash in pipeline_processed_txs:
+    if pipeline_processed_txs.check_and_add(tx_hash):
+        with pipeline_lock:
             pipeline_stats['duplicates_prevented'] += 1
-            return True
-        else:
-            pipeline_processed_txs.add(tx_hash)
-            pipeline_stats['unique_processed'] += 1
-            
-            # Keep set size manageable
-            if len(pipeline_processed_txs) > 10000:
-                # Remove oldest 2000 entries
-                old_txs = list(pipeline_processed_txs)[:2000]
-                for old_tx in old_txs:
-                    pipeline_processed_txs.remove(old_tx)
-                    
-            return False
+        return True
+    with pipeline_lock:
+        pipeline_stats['unique_processed'] += 1
+    return False
 
 def get_pipeline_stats() -> dict:
     """Get pipeline processing statistics"""
     with pipeline_lock:
-        return dict(pipeline_stats)
+        stats = dict(pipeline_stats)
+    stats['seen_set'] = pipeline_processed_txs.get_stats()
+    return stats
+
+register_collector('pipeline', get_pipeline_stats)
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -352,7 +367,8 @@ def check_near_duplicate(whale_addr: str, token_symbol: str, usd_value: float,
     """
     Check if incoming transaction is a near-duplicate of recent transactions.
     
-    This function checks both in-memory cache and recent database records to detect:
+    This function checks the in-memory windowed indexes and, only when they
+    cannot cover the time window, recent database records to detect:
     - Mirror trades (BUY/SELL pairs within seconds)
     - Transfer shadows (BUY/TRANSFER or SELL/TRANSFER pairs)
     - Counterparty mismatches (same trade reported differently)
@@ -393,50 +409,43 @@ def check_near_duplicate(whale_addr: str, token_symbol: str, usd_value: float,
     
     cache_key = (whale_addr.lower() if whale_addr else '', token_symbol.upper())
     
-    with near_dupe_cache_lock:
-        # Check in-memory cache
-        recent_txs = near_dupe_cache.get(cache_key, [])
+    # Check in-memory index (only entries within the time window and USD tolerance range)
+    for existing in near_dupe_index.candidates(cache_key, usd_value, timestamp):
+        # Skip if same transaction hash
+        if existing['tx_hash'] == tx_hash:
+            continue
         
-        for existing in recent_txs:
-            # Skip if same transaction hash
-            if existing['tx_hash'] == tx_hash:
-                continue
-            
-            # Check timestamp window
-            time_diff = abs((timestamp - existing['timestamp']).total_seconds())
-            if time_diff > NEAR_DUPE_TIME_WINDOW:
-                continue
-            
-            # Check USD value match
-            if not is_usd_value_match(usd_value, existing['usd_value']):
-                continue
+        # Check USD value match
+        if not is_usd_value_match(usd_value, existing['usd_value']):
+            continue
+        
+        # Check for duplicate pattern
+        reason = detect_duplicate_pattern(
+            existing['classification'], classification,
+            existing.get('counterparty_type', 'EOA'), counterparty_type,
+            existing.get('is_cex_transaction', False), is_cex_transaction
+        )
+        
+        if reason:
+            time_diff = abs(to_epoch(timestamp) - to_epoch(existing['timestamp']))
+            near_dupe_stats['cache_hits'] += 1
+            near_dupe_stats[f'reason_{reason}'] += 1
             
-            # Check for duplicate pattern
-            reason = detect_duplicate_pattern(
-                existing['classification'], classification,
-                existing.get('counterparty_type', 'EOA'), counterparty_type,
-                existing.get('is_cex_transaction', False), is_cex_transaction
-            )
+            production_logger.info("Near-duplicate detected in cache", extra={'extra_fields': {
+                'incoming_tx': tx_hash,
+                'existing_tx': existing['tx_hash'],
+                'reason': reason,
+                'time_diff_seconds': time_diff,
+                'usd_value': usd_value,
+                'token': token_symbol,
+                'pattern': f"{existing['classification']} + {classification}"
+            }})
             
-            if reason:
-                near_dupe_stats['cache_hits'] += 1
-                near_dupe_stats[f'reason_{reason}'] += 1
-                
-                production_logger.info("Near-duplicate detected in cache", extra={'extra_fields': {
-                    'incoming_tx': tx_hash,
-                    'existing_tx': existing['tx_hash'],
-                    'reason': reason,
-                    'time_diff_seconds': time_diff,
-                    'usd_value': usd_value,
-                    'token': token_symbol,
-                    'pattern': f"{existing['classification']} + {classification}"
-                }})
-                
-                return {
-                    'existing_tx': existing,
-                    'reason': reason,
-                    'action': 'merge'  # Always merge, keep earliest
-                }
+            return {
+                'existing_tx': existing,
+                'reason': reason,
+                'action': 'merge'  # Always merge, keep earliest
+            }
     
     # Token-level cache for cross-entity duplicates
     cross_cache_result = _check_token_cache_for_duplicate(
@@ -446,8 +455,12 @@ def check_near_duplicate(whale_addr: str, token_symbol: str, usd_value: float,
     if cross_cache_result:
         return cross_cache_result
     
-    # Check database for recent transactions
-    if supabase_client and whale_addr:
+    # Check database for recent transactions the index can't vouch for
+    # (process just started, entries expired, or the per-whale cap evicted some)
+    if supabase_client and whale_addr and near_dupe_index.covers(cache_key, timestamp):
+        near_dupe_stats['db_lookbacks_skipped'] += 1
+    elif supabase_client and whale_addr:
+        near_dupe_stats['db_lookbacks'] += 1
         try:
             cutoff_time = timestamp - timedelta(seconds=NEAR_DUPE_TIME_WINDOW)
             
@@ -507,7 +520,10 @@ def check_near_duplicate(whale_addr: str, token_symbol: str, usd_value: float,
                                     extra={'extra_fields': {'error': str(e)}})
     
     # Cross-entity database lookback (same token, any whale)
-    if supabase_client:
+    if supabase_client and token_dupe_index.covers(token_symbol.upper(), timestamp):
+        near_dupe_stats['db_cross_lookbacks_skipped'] += 1
+    elif supabase_client:
+        near_dupe_stats['db_cross_lookbacks'] += 1
         try:
             cutoff_time = timestamp - timedelta(seconds=NEAR_DUPE_TIME_WINDOW)
             
@@ -579,63 +595,44 @@ def _check_token_cache_for_duplicate(token_symbol: str, incoming_entry: Dict[str
     """Check token-level cache for cross-entity duplicates."""
     token_key = token_symbol.upper()
     
-    with token_dupe_cache_lock:
-        recent_txs = token_dupe_cache.get(token_key, [])
-        if not recent_txs:
-            return None
+    for existing in token_dupe_index.candidates(token_key, incoming_entry['usd_value'], incoming_entry['timestamp']):
+        if existing['tx_hash'] == incoming_entry['tx_hash']:
+            continue
         
-        # Remove stale entries while iterating
-        fresh_entries = []
-        for existing in recent_txs:
-            time_diff = abs((incoming_entry['timestamp'] - existing['timestamp']).total_seconds())
-            
-            if time_diff > NEAR_DUPE_TIME_WINDOW * 2:
-                # Drop stale entry
-                continue
-            
-            fresh_entries.append(existing)
-            
-            if time_diff > NEAR_DUPE_TIME_WINDOW:
-                continue
-            
-            if not is_usd_value_match(incoming_entry['usd_value'], existing['usd_value']):
-                continue
-            
-            reason = detect_duplicate_pattern(
-                existing['classification'], incoming_entry['classification'],
-                existing.get('counterparty_type', 'EOA'), incoming_entry.get('counterparty_type', 'EOA'),
-                existing.get('is_cex_transaction', False), incoming_entry.get('is_cex_transaction', False)
-            )
-            
-            if not reason:
-                continue
-            
-            if not should_merge_cross_entity(existing, incoming_entry, reason):
-                continue
-            
-            time_diff = abs((incoming_entry['timestamp'] - existing['timestamp']).total_seconds())
-            near_dupe_stats['token_cache_hits'] += 1
-            near_dupe_stats[f'reason_{reason}'] += 1
-            
-            production_logger.info("Near-duplicate detected across whales (cache)", extra={'extra_fields': {
-                'incoming_tx': incoming_entry['tx_hash'],
-                'existing_tx': existing['tx_hash'],
-                'reason': reason,
-                'time_diff_seconds': time_diff,
-                'usd_value': incoming_entry['usd_value'],
-                'token': token_symbol,
-                'pattern': f"{existing['classification']} + {incoming_entry['classification']}"
-            }})
-            
-            return {
-                'existing_tx': existing,
-                'reason': reason,
-                'action': 'merge'
-            }
+        if not is_usd_value_match(incoming_entry['usd_value'], existing['usd_value']):
+            continue
+        
+        reason = detect_duplicate_pattern(
+            existing['classification'], incoming_entry['classification'],
+            existing.get('counterparty_type', 'EOA'), incoming_entry.get('counterparty_type', 'EOA'),
+            existing.get('is_cex_transaction', False), incoming_entry.get('is_cex_transaction', False)
+        )
+        
+        if not reason:
+            continue
+        
+        if not should_merge_cross_entity(existing, incoming_entry, reason):
+            continue
         
-        # Update cache with trimmed fresh entries
-        fresh_entries.sort(key=lambda x: x['timestamp'], reverse=True)
-        token_dupe_cache[token_key] = fresh_entries[:TOKEN_DUPE_CACHE_SIZE]
+        time_diff = abs(to_epoch(incoming_entry['timestamp']) - to_epoch(existing['timestamp']))
+        near_dupe_stats['token_cache_hits'] += 1
+        near_dupe_stats[f'reason_{reason}'] += 1
+        
+        production_logger.info("Near-duplicate detected across whales (cache)", extra={'extra_fields': {
+            'incoming_tx': incoming_entry['tx_hash'],
+            'existing_tx': existing['tx_hash'],
+            'reason': reason,
+            'time_diff_seconds': time_diff,
+            'usd_value': incoming_entry['usd_value'],
+            'token': token_symbol,
+            'pattern': f"{existing['classification']} + {incoming_entry['classification']}"
+        }})
+        
+        return {
+            'existing_tx': existing,
+            'reason': reason,
+            'action': 'merge'
+        }
     
     return None
 
@@ -662,69 +659,47 @@ def add_to_near_dupe_cache(whale_addr: str, token_symbol: str, usd_value: float,
     
     cache_key = (whale_addr.lower(), token_symbol.upper())
     
-    with near_dupe_cache_lock:
-        tx_info = {
-            'tx_hash': tx_hash,
-            'usd_value': usd_value,
-            'classification': classification,
-            'timestamp': timestamp,
-            'counterparty_type': counterparty_type,
-            'is_cex_transaction': is_cex_transaction,
-            'whale_address': whale_addr,
-            'counterparty_address': counterparty_address
-        }
-        
-        recent_txs = near_dupe_cache[cache_key]
-        recent_txs.append(tx_info)
-        
-        # Keep cache size manageable - remove oldest entries
-        if len(recent_txs) > NEAR_DUPE_CACHE_SIZE:
-            # Sort by timestamp and keep most recent
-            recent_txs.sort(key=lambda x: x['timestamp'], reverse=True)
-            near_dupe_cache[cache_key] = recent_txs[:NEAR_DUPE_CACHE_SIZE]
+    tx_info = {
+        'tx_hash': tx_hash,
+        'usd_value': usd_value,
+        'classification': classification,
+        'timestamp': timestamp,
+        'counterparty_type': counterparty_type,
+        'is_cex_transaction': is_cex_transaction,
+        'whale_address': whale_addr,
+        'counterparty_address': counterparty_address
+    }
     
-    add_to_token_dupe_cache(
-        token_symbol=token_symbol,
-        tx_info={
-            'tx_hash': tx_hash,
-            'usd_value': usd_value,
-            'classification': classification,
-            'timestamp': timestamp,
-            'counterparty_type': counterparty_type,
-            'is_cex_transaction': is_cex_transaction,
-            'whale_address': whale_addr,
-            'counterparty_address': counterparty_address
-        }
-    )
+    # Index keeps entries time-ordered and evicts the oldest past NEAR_DUPE_CACHE_SIZE
+    near_dupe_index.add(cache_key, tx_info)
+    
+    add_to_token_dupe_cache(token_symbol=token_symbol, tx_info=tx_info)
 
 
 def add_to_token_dupe_cache(token_symbol: str, tx_info: Dict[str, Any]) -> None:
     """Track recent transactions per token for cross-entity duplicate detection."""
-    token_key = token_symbol.upper()
-    with token_dupe_cache_lock:
-        token_entries = token_dupe_cache[token_key]
-        token_entries.append(tx_info)
-        token_entries.sort(key=lambda x: x['timestamp'], reverse=True)
-        token_dupe_cache[token_key] = token_entries[:TOKEN_DUPE_CACHE_SIZE]
+    token_dupe_index.add(token_symbol.upper(), tx_info)
 
 
 def get_near_dupe_stats() -> dict:
     """Get near-duplicate detection statistics."""
-    with near_dupe_cache_lock:
-        stats = dict(near_dupe_stats)
-        stats['cache_size'] = sum(len(txs) for txs in near_dupe_cache.values())
-        stats['cache_keys'] = len(near_dupe_cache)
+    stats = dict(near_dupe_stats)
     
-    with token_dupe_cache_lock:
-        stats['token_cache_size'] = sum(len(txs) for txs in token_dupe_cache.values())
-        stats['token_cache_keys'] = len(token_dupe_cache)
+    whale_index = near_dupe_index.get_stats()
+    stats['cache_size'] = whale_index['entries']
+    stats['cache_keys'] = whale_index['keys']
+    stats['index'] = whale_index
+    
+    token_index = token_dupe_index.get_stats()
+    stats['token_cache_size'] = token_index['entries']
+    stats['token_cache_keys'] = token_index['keys']
+    stats['token_index'] = token_index
     
     return stats
 
 # New imports for real-time market flow engine and Whale Intelligence
 try:
     from utils.real_time_classification import classify_swap_transaction, ClassifiedSwap
-    from utils.classification_final import whale_intelligence_engine
     from utils.etherscan_labels import label_provider
     from utils.token_intelligence import token_intelligence
     from utils.whale_registry import whale_registry
@@ -745,8 +720,8 @@ except ImportError as e:
     SENTIMENT_AGGREGATION_ENABLED = False
     ENHANCED_INTELLIGENCE_ENABLED = False
 
-# Initialize Production Whale Intelligence Engine
-whale_engine = WhaleIntelligenceEngine()
+# Production Whale Intelligence Engine is shared with utils.classification_final
+# and created on first use via get_whale_engine(), not at import time.
 
 # Import the classification system (optional — only used by simulation path)
 try:
@@ -771,7 +746,8 @@ active_threads = []
 monitoring_enabled = True  # Flag to control transaction display
 
 # Web3 Transfer topic signature
-ERC20_TRANSFER_TOPIC = Web3.keccak(text='Transfer(address,address,uint256)').hex()
+# keccak('Transfer(address,address,uint256)'), precomputed so web3 loads on first use
+ERC20_TRANSFER_TOPIC = '0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef'
 
 # Rolling cursors for Etherscan fallback and Web3 monitors
 LAST_BLOCK_BY_CONTRACT: dict[str, int] = {}
@@ -789,6 +765,7 @@ def run_web3_transfer_monitor(chain: str) -> None:
         import config.api_keys as api_keys
         from utils.enhanced_classification import process_with_enhanced_intelligence
         from utils.alchemy_rpc import get_rate_limiter
+        from web3 import Web3
     except Exception as e:
         print(RED + f"Web3 monitor init failed: {e}" + END)
         return
@@ -1250,15 +1227,18 @@ class TransactionStorage:
             # 🛡️ NEAR-DUPLICATE DETECTION - Check before storing
             # Use whale_address if available, otherwise fall back to from_address for matching
             check_whale_addr = whale_perspective['whale_address'] or from_address
-            tx_timestamp = datetime.utcnow()  # Use current time as default
+            tx_timestamp = datetime.now(timezone.utc)  # Use current time as default
             
-            # Try to parse transaction timestamp if available
+            # Try to parse transaction timestamp if available (always timezone-aware UTC,
+            # since the dupe index compares it against epoch time)
             if 'timestamp' in tx_data:
                 try:
                     if isinstance(tx_data['timestamp'], (int, float)):
-                        tx_timestamp = datetime.fromtimestamp(tx_data['timestamp'])
+                        tx_timestamp = datetime.fromtimestamp(tx_data['timestamp'], tz=timezone.utc)
                     elif isinstance(tx_data['timestamp'], str):
                         tx_timestamp = datetime.fromisoformat(tx_data['timestamp'].replace('Z', '+00:00'))
+                        if tx_timestamp.tzinfo is None:
+                            tx_timestamp = tx_timestamp.replace(tzinfo=timezone.utc)
                 except Exception:
                     pass  # Use current time as fallback
             
@@ -1431,7 +1411,7 @@ async def process_real_time_swap(log_data: dict, chain: str, dex: str) -> bool:
         }
         
         # Pass through full 7-phase analysis
-        intelligence_result = whale_engine.analyze_transaction_comprehensive(transaction_data)
+        intelligence_result = get_whale_engine().analyze_transaction_comprehensive(transaction_data)
         
         # Create classified swap from intelligence result
         classified_swap = _create_classified_swap_from_intelligence(transaction_data, intelligence_result)
@@ -1627,7 +1607,7 @@ def process_whale_alert_transaction(whale_data: dict) -> bool:
             except Exception:
                 pass
         
-        intelligence_result = whale_engine.analyze_transaction_comprehensive(transaction_data)
+        intelligence_result = get_whale_engine().analyze_transaction_comprehensive(transaction_data)
         
         # 🚀 GENERATE INVESTMENT SIGNALS 🚀
         # High-impact whale movement analysis for actionable trading ideas
@@ -1768,6 +1748,7 @@ def run_web3_swap_monitor(chain: str) -> None:
         import config.api_keys as api_keys
         from config import settings as cfg
         from utils.real_time_classification import classify_swap_transaction
+        from web3 import Web3
     except Exception as e:
         print(RED + f"Web3 swap monitor init failed: {e}" + END)
         return
@@ -1925,6 +1906,7 @@ def run_1inch_monitor(chain: str) -> None:
         import config.api_keys as api_keys
         from config import settings as cfg
         from utils.real_time_classification import classifier
+        from web3 import Web3
     except Exception as e:
         print(RED + f"1inch monitor init failed: {e}" + END)
         return
@@ -2037,6 +2019,8 @@ def run_1inch_monitor(chain: str) -> None:
 
 def diagnose_rpc_connections():
     """Test and diagnose all RPC connections before starting monitors."""
+    from web3 import Web3
+
     print("\n" + "="*80)
     print("🔍 DIAGNOSING RPC CONNECTIONS")
     print("="*80)
@@ -2276,7 +2260,7 @@ def print_transaction(tx_data):
     whale_analysis = None
     if WHALE_INTELLIGENCE_ENABLED:
         try:
-            whale_analysis = whale_intelligence_engine.analyze_transaction_comprehensive(tx_data)
+            whale_analysis = get_whale_engine().analyze_transaction_comprehensive(tx_data)
             if whale_analysis and whale_analysis.get('confidence', 0) > 0.7:
                 # Use whale intelligence classification if confidence is high
                 tx_data['classification'] = whale_analysis['classification']
@@ -3351,7 +3335,7 @@ def display_transaction(tx_data, enhanced_display=True):
         )
         
         # Run PRODUCTION whale intelligence analysis
-        whale_result = whale_engine.analyze_transaction_comprehensive(tx_data)
+        whale_result = get_whale_engine().analyze_transaction_comprehensive(tx_data)
         
         # 🚀 NEW: Store whale transaction classification for sentiment analysis
         if REAL_TIME_ENABLED and transaction_storage.storage_enabled:
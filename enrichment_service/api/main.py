@@ -15,6 +15,7 @@ from pydantic import BaseModel
 import time
 from typing import Optional, Dict, Any, List
 
+from enrichment_service.models.address import BatchEnrichmentRequest, BatchEnrichmentResponse
 from enrichment_service.services.enrichment_service import AddressEnrichmentService
 
 # Configure logging
@@ -33,6 +34,14 @@ enrichment_service = AddressEnrichmentService(
     redis_url=os.getenv("REDIS_URL", "redis://localhost:6379/0")
 )
 
+# Maximum number of addresses accepted by /enrich-addresses
+ENRICH_BATCH_MAX = int(os.getenv("ENRICH_BATCH_MAX", "2000"))
+
+@app.on_event("shutdown")
+async def close_enrichment_service():
+    """Close the enrichment service connections"""
+    await enrichment_service.close()
+
 @app.post("/enrich-address")
 async def enrich_address(request: Dict[str, Any]):
     """
@@ -61,10 +70,42 @@ async def enrich_address(request: Dict[str, Any]):
         logger.error(f"Error enriching address: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/enrich-addresses", response_model=BatchEnrichmentResponse)
+async def enrich_addresses(request: BatchEnrichmentRequest):
+    """
+    Enrich a batch of blockchain addresses
+    
+    Cached addresses are read with one MGET; only the misses are fetched from
+    the label sources, and they are cached with one pipelined write.
+    
+    Args:
+        request: The addresses to enrich
+    
+    Returns:
+        BatchEnrichmentResponse: One result per requested address, in request order
+    """
+    if len(request.addresses) > ENRICH_BATCH_MAX:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch of {len(request.addresses)} addresses exceeds the limit of {ENRICH_BATCH_MAX}"
+        )
+    
+    try:
+        results, counts = await enrichment_service.get_address_enrichments(
+            [(query.address, query.chain) for query in request.addresses],
+            force_refresh=request.force_refresh
+        )
+        
+        return BatchEnrichmentResponse(results=results, **counts)
+    
+    except Exception as e:
+        logger.error(f"Error enriching addresses: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint to verify the service is running"""
-    return {"status": "healthy", "service": "address_enrichment"}
+    return {"status": "healthy", "service": "address_enrichment", "cache": enrichment_service.get_stats()}
 
 if __name__ == "__main__":
     import uvicorn
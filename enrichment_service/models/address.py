@@ -52,6 +52,18 @@ class EnrichmentRequest(BaseModel):
     force_refresh: bool = Field(False, description="Whether to force refresh the data")
 
 
+class AddressQuery(BaseModel):
+    """One address in a batch enrichment request"""
+    address: str = Field(..., description="The blockchain address to enrich")
+    chain: ChainType = Field(..., description="The blockchain the address belongs to")
+
+
+class BatchEnrichmentRequest(BaseModel):
+    """Request model for batch address enrichment"""
+    addresses: List[AddressQuery]
+    force_refresh: bool = Field(False, description="Whether to force refresh the data for every address")
+
+
 class AddressLabel(BaseModel):
     """Label for an address from a specific source"""
     label_type: AddressLabelType
@@ -69,4 +81,13 @@ class EnrichedAddressResponse(BaseModel):
     confidence: float
     all_labels: List[AddressLabel] = []
     cached: bool = Field(False, description="Whether this response was served from cache")
-    last_updated: Optional[str] = None  # ISO format timestamp 
\ No newline at end of file
+    last_updated: Optional[str] = None  # ISO format timestamp 
+
+
+class BatchEnrichmentResponse(BaseModel):
+    """Response model for batch address enrichment"""
+    results: List[Optional[EnrichedAddressResponse]] = Field(
+        ..., description="One entry per requested address, in request order (null if enrichment failed)"
+    )
+    cache_hits: int = 0
+    fetched: int = 0
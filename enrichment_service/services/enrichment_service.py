@@ -10,8 +10,8 @@ import json
 import logging
 import os
 from datetime import datetime
-from typing import Dict, List, Optional, Union, Any
-import redis
+from typing import Dict, List, Optional, Tuple, Union, Any
+import redis.asyncio as aioredis
 import time
 
 from ..models.address import (
@@ -29,26 +29,59 @@ logger = logging.getLogger(__name__)
 # Cache TTL in seconds (24 hours)
 CACHE_TTL = 86400  
 
+# Freshness of addresses no source has a label for (shorter, so new labels show up sooner)
+NEGATIVE_CACHE_TTL = int(os.getenv("ENRICHMENT_NEGATIVE_CACHE_TTL", "3600"))
+
+# How long past its freshness an entry is still served (while it is refreshed in the background)
+STALE_TTL = int(os.getenv("ENRICHMENT_STALE_TTL", "86400"))
+
+# Per label source timeout in seconds; a slow source is dropped from the aggregate
+SOURCE_TIMEOUT_SECONDS = float(os.getenv("ENRICHMENT_SOURCE_TIMEOUT_SECONDS", "3"))
+
+# Maximum number of addresses fetched from the label sources at once
+MAX_CONCURRENT_FETCHES = int(os.getenv("ENRICHMENT_MAX_CONCURRENCY", "20"))
+
 class AddressEnrichmentService:
     """
     Service for enriching crypto wallet addresses with metadata from various sources.
     
     This service handles:
-    1. Caching of enrichment results (using Redis)
+    1. Caching of enrichment results (using async Redis)
     2. Integration with multiple label providers (Nansen, Arkham, etc.)
     3. Aggregation of labels from multiple sources
     4. Background fetching of labels for slow APIs
+    5. Batch enrichment: one MGET for cache hits, bounded concurrent fetches
+       for the misses and one pipelined write-back
+    
+    Cache entries are fresh for CACHE_TTL (NEGATIVE_CACHE_TTL for addresses no
+    source has a label for) and kept for another STALE_TTL. A stale entry is
+    returned immediately and refreshed in the background, so only addresses
+    that are not cached at all wait for the label sources. Each source has its
+    own timeout; a source that times out is left out of the aggregate.
     """
     
-    def __init__(self, redis_url: Optional[str] = None):
+    def __init__(
+        self, 
+        redis_url: Optional[str] = None,
+        redis_client: Optional[aioredis.Redis] = None,
+        max_concurrency: int = MAX_CONCURRENT_FETCHES,
+        source_timeouts: Optional[Dict[str, float]] = None
+    ):
         """
         Initialize the address enrichment service.
         
         Args:
             redis_url: Redis connection URL (defaults to localhost if not provided)
+            redis_client: Existing async Redis client to use instead of connecting
+                to redis_url (e.g. fakeredis.aioredis.FakeRedis in tests)
+            max_concurrency: Maximum number of addresses fetched from the label
+                sources at the same time
+            source_timeouts: Timeout in seconds per label source ("nansen",
+                "arkham", "chainalysis", "explorer"), overriding
+                SOURCE_TIMEOUT_SECONDS
         """
         self.redis_url = redis_url or os.getenv("REDIS_URL", "redis://localhost:6379/0")
-        self.redis = redis.from_url(self.redis_url)
+        self.redis = redis_client if redis_client is not None else aioredis.from_url(self.redis_url)
         
         # API keys for various services
         self.nansen_api_key = os.getenv("NANSEN_API_KEY", "")
@@ -57,6 +90,28 @@ class AddressEnrichmentService:
         
         # Session for API requests
         self.session = None
+        
+        # Bounds label source fetches across all concurrent requests
+        self.fetch_semaphore = asyncio.Semaphore(max_concurrency)
+        
+        self.source_timeouts = {
+            source: SOURCE_TIMEOUT_SECONDS
+            for source in ("nansen", "arkham", "chainalysis", "explorer")
+        }
+        self.source_timeouts.update(source_timeouts or {})
+        
+        # Background refreshes of stale entries, by cache key (also keeps the tasks referenced)
+        self._refresh_tasks: Dict[str, asyncio.Task] = {}
+        
+        self.stats = {
+            "fresh_hits": 0,
+            "stale_hits": 0,
+            "negative_hits": 0,
+            "misses": 0,
+            "background_refreshes": 0,
+            "refresh_errors": 0,
+            "source_timeouts": 0,
+        }
     
     async def get_session(self) -> aiohttp.ClientSession:
         """Get or create an aiohttp session"""
@@ -64,6 +119,104 @@ class AddressEnrichmentService:
             self.session = aiohttp.ClientSession()
         return self.session
     
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache and label source statistics"""
+        return {**self.stats, "refreshes_in_flight": len(self._refresh_tasks)}
+    
+    async def close(self) -> None:
+        """Close the HTTP session and the Redis connection pool"""
+        for task in list(self._refresh_tasks.values()):
+            task.cancel()
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        await self.redis.close()
+    
+    @staticmethod
+    def _normalize(address: str, chain: Union[str, ChainType]) -> Tuple[str, ChainType]:
+        """Normalize an address (lower-case for EVM chains) and its chain"""
+        chain = ChainType(chain.lower()) if isinstance(chain, str) else chain
+        if chain in (ChainType.ETHEREUM, ChainType.POLYGON):
+            address = address.lower()
+        return address, chain
+    
+    @staticmethod
+    def _cache_key(address: str, chain: ChainType) -> str:
+        return f"address:{chain.value}:{address}"
+    
+    @staticmethod
+    def _fresh_ttl(response: EnrichedAddressResponse) -> int:
+        """Seconds the response stays fresh: shorter for unlabeled addresses"""
+        return CACHE_TTL if response.all_labels else NEGATIVE_CACHE_TTL
+    
+    def _parse_cached(self, cached_data: Optional[bytes]) -> Optional[Tuple[EnrichedAddressResponse, bool]]:
+        """
+        Cached JSON to (response marked as cached, whether it is stale), or
+        None if missing or unreadable
+        """
+        if not cached_data:
+            return None
+        try:
+            response = EnrichedAddressResponse(**json.loads(cached_data))
+            response.cached = True
+        except Exception as e:
+            logger.error(f"Error parsing cached data: {e}")
+            return None
+        
+        try:
+            age = (datetime.utcnow() - datetime.fromisoformat(response.last_updated)).total_seconds()
+            stale = age >= self._fresh_ttl(response)
+        except (TypeError, ValueError):
+            stale = True
+        
+        if stale:
+            self.stats["stale_hits"] += 1
+        elif response.all_labels:
+            self.stats["fresh_hits"] += 1
+        else:
+            self.stats["negative_hits"] += 1
+        return response, stale
+    
+    def _cache_value(self, response: EnrichedAddressResponse) -> Tuple[int, str]:
+        """(Redis expiry, JSON) for a response: kept STALE_TTL past its freshness"""
+        return self._fresh_ttl(response) + STALE_TTL, json.dumps(response.dict())
+    
+    def _schedule_refresh(self, address: str, chain: ChainType) -> None:
+        """Refresh a stale entry in the background, once per key at a time"""
+        cache_key = self._cache_key(address, chain)
+        if cache_key in self._refresh_tasks:
+            return
+        task = asyncio.create_task(self._refresh(address, chain, cache_key))
+        self._refresh_tasks[cache_key] = task
+        task.add_done_callback(lambda _: self._refresh_tasks.pop(cache_key, None))
+    
+    async def _refresh(self, address: str, chain: ChainType, cache_key: str) -> None:
+        try:
+            response = await self._fetch_enrichment(address, chain)
+            await self.redis.setex(cache_key, *self._cache_value(response))
+            self.stats["background_refreshes"] += 1
+        except Exception as e:
+            self.stats["refresh_errors"] += 1
+            logger.error(f"Error refreshing address {address} in the background: {e}")
+    
+    async def _fetch_enrichment(self, address: str, chain: ChainType) -> EnrichedAddressResponse:
+        """Fetch labels from the external sources and build the response (not cached)"""
+        async with self.fetch_semaphore:
+            all_labels = await self._get_address_labels(address, chain)
+        
+        # Aggregate labels to determine the primary label
+        primary_label, source, confidence = self._aggregate_labels(all_labels)
+        
+        return EnrichedAddressResponse(
+            address=address,
+            chain=chain,
+            primary_label=primary_label,
+            source=source,
+            confidence=confidence,
+            all_labels=all_labels,
+            cached=False,
+            last_updated=datetime.utcnow().isoformat()
+        )
+    
     async def get_address_enrichment(
         self, 
         address: str, 
@@ -81,53 +234,97 @@ class AddressEnrichmentService:
         Returns:
             EnrichedAddressResponse: The enriched address data
         """
-        # Normalize inputs
-        address = address.lower() if isinstance(chain, str) and chain.lower() in ["ethereum", "polygon"] else address
-        if isinstance(chain, str):
-            chain = ChainType(chain.lower())
-        
-        # Generate cache key
-        cache_key = f"address:{chain.value}:{address}"
+        address, chain = self._normalize(address, chain)
+        cache_key = self._cache_key(address, chain)
         
         # Check cache first unless forcing refresh
         if not force_refresh:
-            cached_data = self.redis.get(cache_key)
-            if cached_data:
-                try:
-                    data = json.loads(cached_data)
-                    # Convert from dict to model
-                    response = EnrichedAddressResponse(**data)
-                    response.cached = True
-                    return response
-                except Exception as e:
-                    logger.error(f"Error parsing cached data: {e}")
+            cached = self._parse_cached(await self.redis.get(cache_key))
+            if cached is not None:
+                response, stale = cached
+                if stale:
+                    self._schedule_refresh(address, chain)
+                return response
         
         # If not in cache or refresh needed, fetch from external sources
-        all_labels = await self._get_address_labels(address, chain)
+        self.stats["misses"] += 1
+        response = await self._fetch_enrichment(address, chain)
         
-        # Aggregate labels to determine the primary label
-        primary_label, source, confidence = self._aggregate_labels(all_labels)
+        # Cache the result
+        await self.redis.setex(cache_key, *self._cache_value(response))
         
-        # Prepare response
-        response = EnrichedAddressResponse(
-            address=address,
-            chain=chain,
-            primary_label=primary_label,
-            source=source,
-            confidence=confidence,
-            all_labels=all_labels,
-            cached=False,
-            last_updated=datetime.utcnow().isoformat()
-        )
+        return response
+    
+    async def get_address_enrichments(
+        self,
+        addresses: List[Tuple[str, Union[str, ChainType]]],
+        force_refresh: bool = False
+    ) -> Tuple[List[Optional[EnrichedAddressResponse]], Dict[str, int]]:
+        """
+        Get enriched data for many blockchain addresses at once.
         
-        # Cache the result
-        self.redis.setex(
-            cache_key, 
-            CACHE_TTL, 
-            json.dumps(response.dict())
+        Cache hits are resolved with a single MGET (stale hits are returned and
+        refreshed in the background); only the misses are fetched from the
+        label sources (at most max_concurrency at a time) and they are written
+        back to the cache in one pipeline. Duplicate addresses are looked up
+        once.
+        
+        Args:
+            addresses: (address, chain) pairs to enrich
+            force_refresh: Whether to ignore cached data for every address
+            
+        Returns:
+            tuple: (one response per requested pair in request order, None where
+            enrichment failed; counts of cache hits and fetched addresses)
+        """
+        normalized = [self._normalize(address, chain) for address, chain in addresses]
+        unique = list(dict.fromkeys(normalized))
+        keys = [self._cache_key(address, chain) for address, chain in unique]
+        
+        responses: Dict[Tuple[str, ChainType], EnrichedAddressResponse] = {}
+        if not force_refresh and keys:
+            try:
+                cached_values = await self.redis.mget(keys)
+            except Exception as e:
+                logger.error(f"Error reading {len(keys)} addresses from cache: {e}")
+                cached_values = [None] * len(keys)
+            for pair, cached_data in zip(unique, cached_values):
+                cached = self._parse_cached(cached_data)
+                if cached is not None:
+                    responses[pair], stale = cached
+                    if stale:
+                        self._schedule_refresh(*pair)
+        cache_hits = len(responses)
+        
+        misses = [pair for pair in unique if pair not in responses]
+        self.stats["misses"] += len(misses)
+        fetched = await asyncio.gather(
+            *(self._fetch_enrichment(address, chain) for address, chain in misses),
+            return_exceptions=True
         )
         
-        return response
+        to_cache = []
+        for (address, chain), result in zip(misses, fetched):
+            if isinstance(result, Exception):
+                logger.error(f"Error enriching address {address}: {result}")
+                continue
+            responses[(address, chain)] = result
+            to_cache.append((self._cache_key(address, chain), result))
+        
+        if to_cache:
+            try:
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    for cache_key, response in to_cache:
+                        pipe.setex(cache_key, *self._cache_value(response))
+                    await pipe.execute()
+            except Exception as e:
+                logger.error(f"Error caching {len(to_cache)} addresses: {e}")
+        
+        logger.info(
+            f"Enriched {len(unique)} addresses: {cache_hits} from cache, "
+            f"{len(to_cache)} fetched, {len(misses) - len(to_cache)} failed"
+        )
+        return [responses.get(pair) for pair in normalized], {"cache_hits": cache_hits, "fetched": len(to_cache)}
     
     async def _get_address_labels(
         self, 
@@ -145,29 +342,35 @@ class AddressEnrichmentService:
             List[AddressLabel]: List of labels from various sources
         """
         # Create tasks for all label sources
-        tasks = []
+        tasks = {}
         
         # Only add tasks for APIs we have keys for or fallbacks
         if self.nansen_api_key:
-            tasks.append(self._get_nansen_label(address, chain))
+            tasks["nansen"] = self._get_nansen_label(address, chain)
         
         if self.arkham_api_key:
-            tasks.append(self._get_arkham_label(address, chain))
+            tasks["arkham"] = self._get_arkham_label(address, chain)
             
         if self.chainalysis_api_key:
-            tasks.append(self._get_chainalysis_label(address, chain))
+            tasks["chainalysis"] = self._get_chainalysis_label(address, chain)
         
         # Always add fallback sources
-        tasks.append(self._get_explorer_label(address, chain))
+        tasks["explorer"] = self._get_explorer_label(address, chain)
         
-        # Run all tasks concurrently
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # Run all tasks concurrently, each bounded by its source timeout
+        results = await asyncio.gather(
+            *(asyncio.wait_for(task, self.source_timeouts[source]) for source, task in tasks.items()),
+            return_exceptions=True
+        )
         
-        # Filter out exceptions and None results
+        # Filter out exceptions, timeouts and None results
         labels = []
-        for result in results:
-            if isinstance(result, Exception):
-                logger.error(f"Error fetching label: {result}")
+        for source, result in zip(tasks, results):
+            if isinstance(result, asyncio.TimeoutError):
+                self.stats["source_timeouts"] += 1
+                logger.warning(f"Timed out fetching {source} label for {address} after {self.source_timeouts[source]}s")
+            elif isinstance(result, Exception):
+                logger.error(f"Error fetching {source} label: {result}")
             elif result is not None:
                 labels.append(result)
         
@@ -1,3 +1,4 @@
+import threading
 import time
 import requests
 from datetime import datetime, timedelta
@@ -5,6 +6,8 @@ from typing import Dict, Optional, List
 from config.api_keys import NEWS_API_KEY, BITQUERY_API_BASE_URL, DUNE_API_BASE_URL, DUNE_API_KEY, BITQUERY_API_KEY
 from data.tokens import TOKEN_PRICES
 from utils.base_helpers import safe_print
+from utils.metrics import register_collector
+from utils.price_service import PriceRefresher
 
 # Define query IDs for important metrics
 DUNE_QUERIES = {
@@ -27,134 +30,162 @@ DUNE_QUERIES = {
     "token_bridges": "2516348",       # Cross-chain bridge volumes
 }
 
-def initialize_prices():
-    """Initialize token prices from CoinGecko Pro API (batch fetch) and update TOKEN_PRICES globally."""
-    coingecko = CoinGeckoAPI()
+# Symbol → CoinGecko ID for ALL monitored tokens (refreshed together in one batch)
+COINGECKO_IDS = {
+    # Ethereum ERC-20 tokens
+    "WETH": "weth",
+    "WBTC": "wrapped-bitcoin",
+    "LINK": "chainlink",
+    "UNI": "uniswap",
+    "AAVE": "aave",
+    "COMP": "compound-governance-token",
+    "SNX": "havven",
+    "MKR": "maker",
+    "YFI": "yearn-finance",
+    "SUSHI": "sushi",
+    "CRV": "curve-dao-token",
+    "BAL": "balancer",
+    "BNT": "bancor",
+    "REN": "republic-protocol",
+    "ZRX": "0x",
+    "BAT": "basic-attention-token",
+    "GRT": "the-graph",
+    "LRC": "loopring",
+    "1INCH": "1inch",
+    "MATIC": "matic-network",
+    "PEPE": "pepe",
+    "SHIB": "shiba-inu",
+    "FLOKI": "floki",
+    "APE": "apecoin",
+    "SAND": "the-sandbox",
+    "MANA": "decentraland",
+    "GALA": "gala",
+    "CHZ": "chiliz",
+    "ENJ": "enjincoin",
+    "FET": "fetch-ai",
+    "OCEAN": "ocean-protocol",
+    "DYDX": "dydx",
+    "OP": "optimism",
+    "ARB": "arbitrum",
+    "FRAX": "frax",
+    "LUSD": "liquity-usd",
+    "CVX": "convex-finance",
+    "FXS": "frax-share",
+    "LDO": "lido-dao",
+    "RPL": "rocket-pool",
+    "INJ": "injective-protocol",
+    "CRO": "crypto-com-chain",
+    "QNT": "quant-network",
+    "ENS": "ethereum-name-service",
+    "RNDR": "render-token",
+    "BLUR": "blur",
+    "SSV": "ssv-network",
+    "IMX": "immutable-x",
+    "AXS": "axie-infinity",
+    "ILV": "illuvium",
+    "LPT": "livepeer",
+    "NMR": "numeraire",
+    "DOGE": "dogecoin",
     
-    # Comprehensive mapping: symbol → CoinGecko ID for ALL monitored tokens
-    token_map = {
-        # Ethereum ERC-20 tokens
-        "WETH": "weth",
-        "WBTC": "wrapped-bitcoin",
-        "LINK": "chainlink",
-        "UNI": "uniswap",
-        "AAVE": "aave",
-        "COMP": "compound-governance-token",
-        "SNX": "havven",
-        "MKR": "maker",
-        "YFI": "yearn-finance",
-        "SUSHI": "sushi",
-        "CRV": "curve-dao-token",
-        "BAL": "balancer",
-        "BNT": "bancor",
-        "REN": "republic-protocol",
-        "ZRX": "0x",
-        "BAT": "basic-attention-token",
-        "GRT": "the-graph",
-        "LRC": "loopring",
-        "1INCH": "1inch",
-        "MATIC": "matic-network",
-        "PEPE": "pepe",
-        "SHIB": "shiba-inu",
-        "FLOKI": "floki",
-        "APE": "apecoin",
-        "SAND": "the-sandbox",
-        "MANA": "decentraland",
-        "GALA": "gala",
-        "CHZ": "chiliz",
-        "ENJ": "enjincoin",
-        "FET": "fetch-ai",
-        "OCEAN": "ocean-protocol",
-        "DYDX": "dydx",
-        "OP": "optimism",
-        "ARB": "arbitrum",
-        "FRAX": "frax",
-        "LUSD": "liquity-usd",
-        "CVX": "convex-finance",
-        "FXS": "frax-share",
-        "LDO": "lido-dao",
-        "RPL": "rocket-pool",
-        "INJ": "injective-protocol",
-        "CRO": "crypto-com-chain",
-        "QNT": "quant-network",
-        "ENS": "ethereum-name-service",
-        "RNDR": "render-token",
-        "BLUR": "blur",
-        "SSV": "ssv-network",
-        "IMX": "immutable-x",
-        "AXS": "axie-infinity",
-        "ILV": "illuvium",
-        "LPT": "livepeer",
-        "NMR": "numeraire",
-        "DOGE": "dogecoin",
-        
-        # Solana tokens
-        "SOL": "solana",
-        "BONK": "bonk",
-        "RAY": "raydium",
-        "ORCA": "orca",
-        "MSOL": "msol",
-        "JTO": "jito-governance-token",
-        "PYTH": "pyth-network",
-        "WIF": "dogwifcoin",
-        "RENDER": "render-token",
+    # Solana tokens
+    "SOL": "solana",
+    "BONK": "bonk",
+    "RAY": "raydium",
+    "ORCA": "orca",
+    "MSOL": "msol",
+    "JTO": "jito-governance-token",
+    "PYTH": "pyth-network",
+    "WIF": "dogwifcoin",
+    "RENDER": "render-token",
 
-        # Native chain tokens
-        "BTC": "bitcoin",
-        "TRX": "tron",
-        "XRP": "ripple",
+    # Native chain tokens
+    "BTC": "bitcoin",
+    "TRX": "tron",
+    "XRP": "ripple",
 
-        # Polygon tokens
-        "WMATIC": "wmatic",
-        "GHST": "aavegotchi",
-        "QUICK": "quickswap",
-    }
-    
-    print("Initializing token prices from CoinGecko Pro API (batch)...")
-    
-    # Batch fetch all prices in 1-2 API calls instead of 60+ individual ones
-    coin_ids = list(token_map.values())
-    fetched_prices = coingecko.get_prices_batch(coin_ids)
-    
-    # Reverse map: CoinGecko ID → symbol(s)
-    id_to_symbols = {}
-    for symbol, cid in token_map.items():
-        id_to_symbols.setdefault(cid, []).append(symbol)
-    
-    updated = 0
-    for cid, price in fetched_prices.items():
-        for symbol in id_to_symbols.get(cid, []):
-            TOKEN_PRICES[symbol] = price
-            updated += 1
-    
+    # Polygon tokens
+    "WMATIC": "wmatic",
+    "GHST": "aavegotchi",
+    "QUICK": "quickswap",
+}
+
+STABLECOINS = ("USDT", "USDC", "DAI", "BUSD", "TUSD", "USDP", "GUSD", "FRAX", "LUSD", "USDD")
+
+_price_refresher = None
+_price_refresher_lock = threading.Lock()
+
+
+def _derive_prices(prices: Dict[str, float]) -> None:
+    """Fill stablecoin and pegged-token prices into a freshly built price table."""
     # Stablecoins — always $1.00
-    for stable in ("USDT", "USDC", "DAI", "BUSD", "TUSD", "USDP", "GUSD", "FRAX", "LUSD", "USDD"):
-        TOKEN_PRICES[stable] = 1.00
+    for stable in STABLECOINS:
+        prices[stable] = 1.00
     
     # Paired tokens that track their base
-    if "SOL" in TOKEN_PRICES:
-        TOKEN_PRICES.setdefault("MSOL", TOKEN_PRICES["SOL"] * 1.05)
-        TOKEN_PRICES.setdefault("BSOL", TOKEN_PRICES["SOL"] * 1.03)
-    if "MATIC" in TOKEN_PRICES:
-        TOKEN_PRICES.setdefault("WMATIC", TOKEN_PRICES["MATIC"])
+    if "SOL" in prices:
+        prices.setdefault("MSOL", prices["SOL"] * 1.05)
+        prices.setdefault("BSOL", prices["SOL"] * 1.03)
+    if "MATIC" in prices:
+        prices.setdefault("WMATIC", prices["MATIC"])
+
+
+def _derived_table(prices) -> Dict[str, float]:
+    table = dict(prices)
+    _derive_prices(table)
+    return table
+
+
+def get_price_refresher() -> PriceRefresher:
+    """Shared refresher that keeps TOKEN_PRICES current (not started until initialize_prices)."""
+    global _price_refresher
+    if _price_refresher is None:
+        with _price_refresher_lock:
+            if _price_refresher is None:
+                coingecko = CoinGeckoAPI()
+                _price_refresher = PriceRefresher(
+                    TOKEN_PRICES,
+                    # Bypass the per-coin cache: every refresh must hit the API
+                    lambda coin_ids: coingecko.get_prices_batch(coin_ids, max_age=0),
+                    COINGECKO_IDS,
+                    derive=_derive_prices,
+                )
+                register_collector('prices', _price_refresher.get_stats)
+    return _price_refresher
+
+
+def initialize_prices():
+    """
+    Fetch all token prices from CoinGecko Pro API (one batch) into TOKEN_PRICES,
+    then keep refreshing them in the background.
+    """
+    print("Initializing token prices from CoinGecko Pro API (batch)...")
+    
+    refresher = get_price_refresher()
+    if not refresher.run_once():
+        # Keep the static fallbacks, but still fill stablecoins and pegged tokens
+        TOKEN_PRICES.publish(_derived_table)
+    refresher.start()
     
-    print(f"Token prices initialized: {updated} tokens updated from CoinGecko, "
-          f"{len(TOKEN_PRICES)} total prices available")
+    print(f"Token prices initialized: {refresher.stats['last_updated']} tokens updated from CoinGecko, "
+          f"{len(TOKEN_PRICES)} total prices available, refreshing every {refresher.interval:.0f}s")
     
     # Log a few key prices for verification
+    snapshot = TOKEN_PRICES.snapshot.prices
     for key_token in ("WETH", "WBTC", "BTC", "SOL", "LINK"):
-        if key_token in TOKEN_PRICES:
-            print(f"   {key_token}: ${TOKEN_PRICES[key_token]:,.2f}")
+        if key_token in snapshot:
+            print(f"   {key_token}: ${snapshot[key_token]:,.2f}")
 
 
 # In models/classes.py, update CoinGeckoAPI class
 
 class CoinGeckoAPI:
-    def __init__(self):
+    def __init__(self, base_url: Optional[str] = None):
         from config.api_keys import COINGECKO_API_KEY
         # Pro plan uses pro-api subdomain
         self.api_key = COINGECKO_API_KEY
-        if self.api_key and self.api_key.startswith("CG-"):
+        if base_url:
+            self.base_url = base_url.rstrip("/")
+        elif self.api_key and self.api_key.startswith("CG-"):
             self.base_url = "https://pro-api.coingecko.com/api/v3"
         else:
             self.base_url = "https://api.coingecko.com/api/v3"
@@ -180,15 +211,20 @@ class CoinGeckoAPI:
         prices = self.get_prices_batch([coin_id])
         return prices.get(coin_id)
 
-    def get_prices_batch(self, coin_ids: list) -> Dict[str, float]:
-        """Fetch prices for up to 250 coins in a single API call."""
+    def get_prices_batch(self, coin_ids: list, max_age: Optional[float] = None) -> Dict[str, float]:
+        """Fetch prices for up to 250 coins in a single API call.
+        
+        Cached prices younger than ``max_age`` seconds (default: cache_duration)
+        are returned without a request; ``max_age=0`` always fetches.
+        """
+        max_age = self.cache_duration if max_age is None else max_age
         results = {}
         # Return cached values where available, collect uncached
         uncached = []
         for cid in coin_ids:
             if cid in self.price_cache:
                 cache_time, price = self.price_cache[cid]
-                if datetime.now() - cache_time < timedelta(seconds=self.cache_duration):
+                if datetime.now() - cache_time < timedelta(seconds=max_age):
                     results[cid] = price
                     continue
             uncached.append(cid)
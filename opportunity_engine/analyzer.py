@@ -8,9 +8,13 @@ high-value trading opportunities based on whale transaction patterns.
 import time
 import logging
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
 from datetime import datetime
 from typing import Dict, List, Optional, Any, Tuple
 
+from . import indicators
+from .indicators import IndicatorStore
 from .market_data_provider import MarketDataProvider
 from .models import (
     OpportunitySignal, MarketHeuristics, TokenInfo, TransactionTrigger,
@@ -44,6 +48,12 @@ class OpportunityAnalyzer:
             'rsi_buy_threshold': 75,  # Don't buy if RSI > 75 (overbought)
             'rsi_sell_threshold': 25,  # Don't sell if RSI < 25 (oversold)
             
+            # Volatility: std of log returns over this many points
+            'volatility_window': 24,
+            
+            # Tokens whose incremental indicator state is kept
+            'indicator_state_tokens': 10_000,
+            
             # Minimum data points required for analysis
             'min_data_points': 50,
             
@@ -59,6 +69,14 @@ class OpportunityAnalyzer:
             'moderate_confidence_threshold': 0.6  # Allow moderate signals at 60%
         }
         
+        # Per-token EMA/RSI/volatility, advanced only by candles not seen before
+        self.indicator_store = IndicatorStore(
+            ema_period=self.config['ema_period'],
+            rsi_period=self.config['rsi_period'],
+            volatility_window=self.config['volatility_window'],
+            max_tokens=self.config['indicator_state_tokens'],
+        )
+        
         self.logger.info("OpportunityAnalyzer initialized with technical analysis capabilities")
     
     def analyze_opportunity(self, transaction_data: Dict[str, Any]) -> Optional[OpportunitySignal]:
@@ -82,56 +100,20 @@ class OpportunityAnalyzer:
         start_time = time.time()
         
         try:
-            # Extract transaction details
-            contract_address = transaction_data.get('contract_address', '').strip()
-            chain = transaction_data.get('chain', 'ethereum').lower()
-            classification = transaction_data.get('classification', '').upper()
-            value_usd = float(transaction_data.get('value_usd', 0))
-            
-            # Validate inputs
-            if not contract_address or not classification:
-                self.logger.warning("Missing required transaction data")
+            prepared = self._prepare_trigger(transaction_data)
+            if prepared is None:
                 return None
-            
-            # Check threshold
-            if value_usd < GLOBAL_USD_THRESHOLD:
-                self.logger.debug(f"Transaction value ${value_usd:,.0f} below threshold ${GLOBAL_USD_THRESHOLD:,.0f}")
-                return None
-            
-            # Only analyze BUY/SELL transactions
-            if classification not in ['BUY', 'SELL', 'STAKING']:
-                self.logger.debug(f"Skipping analysis for classification: {classification}")
-                return None
-            
-            # Map STAKING to BUY for analysis purposes
-            analysis_classification = 'BUY' if classification in ['STAKING'] else classification
-            
-            self.logger.info(f"Analyzing {analysis_classification} opportunity for {contract_address} (${value_usd:,.0f})")
-            
-            # Create token and transaction objects
-            token = TokenInfo(
-                symbol=transaction_data.get('symbol'),
-                contract_address=contract_address,
-                chain=chain,
-                decimals=transaction_data.get('decimals')
-            )
-            
-            trigger = TransactionTrigger(
-                hash=transaction_data.get('hash', ''),
-                from_address=transaction_data.get('from_address', ''),
-                to_address=transaction_data.get('to_address', ''),
-                value_usd=value_usd,
-                classification=classification
-            )
+            token, trigger, analysis_classification = prepared
             
             # Fetch market data
-            market_data = self.market_data_provider.get_market_data_for_token(contract_address, chain)
+            market_data = self.market_data_provider.get_market_data_for_token(token.contract_address, token.chain)
             if not market_data:
-                self.logger.warning(f"Could not fetch market data for {contract_address}")
+                self.logger.warning(f"Could not fetch market data for {token.contract_address}")
                 return None
             
             # Perform technical analysis
-            heuristics = self._perform_technical_analysis(market_data, analysis_classification)
+            heuristics = self._perform_technical_analysis(market_data, analysis_classification,
+                                                          state_key=(token.chain, token.contract_address.lower()))
             
             # Generate signal if heuristics pass
             signal = self._generate_signal(token, trigger, heuristics, analysis_classification, market_data)
@@ -147,17 +129,139 @@ class OpportunityAnalyzer:
             self.logger.error(f"Error analyzing opportunity: {e}", exc_info=True)
             return None
     
-    def _perform_technical_analysis(self, market_data: Dict[str, Any], signal_type: str) -> MarketHeuristics:
+    def analyze_batch(self, transactions: List[Dict[str, Any]],
+                      max_workers: int = 4) -> List[Optional[OpportunitySignal]]:
+        """
+        Analyze a window of transactions, grouped by token.
+        
+        Market data is fetched once per token (tokens in parallel, up to
+        ``max_workers``) and indicators are computed once per token; every
+        trigger in the group is then scored against them.
+        
+        Args:
+            transactions: transaction_data dicts as accepted by analyze_opportunity
+            max_workers: Concurrent market data fetches
+            
+        Returns:
+            One entry per input transaction, in order: its OpportunitySignal or None
+        """
+        start_time = time.time()
+        results: List[Optional[OpportunitySignal]] = [None] * len(transactions)
+        
+        # (chain, contract) -> [(index, token, trigger, analysis_classification), ...]
+        groups: Dict[Tuple[str, str], List[Tuple[int, TokenInfo, TransactionTrigger, str]]] = {}
+        for index, transaction_data in enumerate(transactions):
+            try:
+                prepared = self._prepare_trigger(transaction_data)
+            except Exception as e:
+                self.logger.error(f"Error preparing transaction {index} for analysis: {e}")
+                continue
+            if prepared is not None:
+                token = prepared[0]
+                groups.setdefault((token.chain, token.contract_address.lower()), []).append((index, *prepared))
+        
+        if not groups:
+            return results
+        
+        def fetch(key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+            token = groups[key][0][1]
+            try:
+                return self.market_data_provider.get_market_data_for_token(token.contract_address, token.chain)
+            except Exception as e:
+                self.logger.error(f"Error fetching market data for {token.contract_address}: {e}")
+                return None
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(groups))),
+                                thread_name_prefix='OpportunityFetch') as pool:
+            market_data_by_token = dict(zip(groups, pool.map(fetch, groups)))
+        
+        signals = 0
+        for key, members in groups.items():
+            market_data = market_data_by_token[key]
+            if not market_data:
+                self.logger.warning(f"Could not fetch market data for {key[1]} ({len(members)} triggers skipped)")
+                continue
+            
+            market_heuristics = self._compute_market_heuristics(market_data, state_key=key)
+            for index, token, trigger, analysis_classification in members:
+                try:
+                    heuristics = self._apply_signal_heuristics(market_heuristics, analysis_classification)
+                    signal = self._generate_signal(token, trigger, heuristics, analysis_classification, market_data)
+                except Exception as e:
+                    self.logger.error(f"Error analyzing opportunity: {e}", exc_info=True)
+                    continue
+                if signal:
+                    signal.analysis_duration_ms = (time.time() - start_time) * 1000
+                    signals += 1
+                results[index] = signal
+        
+        self.logger.info(f"Analyzed {len(transactions)} transactions across {len(groups)} tokens: {signals} signals")
+        return results
+    
+    def _prepare_trigger(self, transaction_data: Dict[str, Any]) -> Optional[Tuple[TokenInfo, TransactionTrigger, str]]:
+        """Validate a transaction; returns (token, trigger, 'BUY'|'SELL') or None if it isn't analyzed."""
+        # Extract transaction details
+        contract_address = transaction_data.get('contract_address', '').strip()
+        chain = transaction_data.get('chain', 'ethereum').lower()
+        classification = transaction_data.get('classification', '').upper()
+        value_usd = float(transaction_data.get('value_usd', 0))
+        
+        # Validate inputs
+        if not contract_address or not classification:
+            self.logger.warning("Missing required transaction data")
+            return None
+        
+        # Check threshold
+        if value_usd < GLOBAL_USD_THRESHOLD:
+            self.logger.debug(f"Transaction value ${value_usd:,.0f} below threshold ${GLOBAL_USD_THRESHOLD:,.0f}")
+            return None
+        
+        # Only analyze BUY/SELL transactions
+        if classification not in ['BUY', 'SELL', 'STAKING']:
+            self.logger.debug(f"Skipping analysis for classification: {classification}")
+            return None
+        
+        # Map STAKING to BUY for analysis purposes
+        analysis_classification = 'BUY' if classification in ['STAKING'] else classification
+        
+        self.logger.info(f"Analyzing {analysis_classification} opportunity for {contract_address} (${value_usd:,.0f})")
+        
+        # Create token and transaction objects
+        token = TokenInfo(
+            symbol=transaction_data.get('symbol'),
+            contract_address=contract_address,
+            chain=chain,
+            decimals=transaction_data.get('decimals')
+        )
+        
+        trigger = TransactionTrigger(
+            hash=transaction_data.get('hash', ''),
+            from_address=transaction_data.get('from_address', ''),
+            to_address=transaction_data.get('to_address', ''),
+            value_usd=value_usd,
+            classification=classification
+        )
+        return token, trigger, analysis_classification
+    
+    def _perform_technical_analysis(self, market_data: Dict[str, Any], signal_type: str,
+                                    state_key: Optional[Tuple[str, str]] = None) -> MarketHeuristics:
         """
         Perform comprehensive technical analysis on market data.
         
         Args:
             market_data: Market data from CoinGecko
             signal_type: 'BUY' or 'SELL'
+            state_key: Token key for incremental indicators; without it EMA,
+                RSI and volatility are computed from the full series
             
         Returns:
             MarketHeuristics object with analysis results
         """
+        return self._apply_signal_heuristics(self._compute_market_heuristics(market_data, state_key), signal_type)
+    
+    def _compute_market_heuristics(self, market_data: Dict[str, Any],
+                                   state_key: Optional[Tuple[str, str]] = None) -> MarketHeuristics:
+        """Indicator values (price, EMA, volume ratio, RSI, volatility) for a token, independent of signal type."""
         heuristics = MarketHeuristics()
         
         try:
@@ -171,28 +275,22 @@ class OpportunityAnalyzer:
             
             heuristics.data_points_analyzed = len(prices)
             
-            # Extract price and volume arrays
-            price_data = np.array([p[1] for p in prices])
-            volume_data = np.array([v[1] for v in volumes])
+            # Volume windows below only look at the last 144 points
+            volume_data = np.array([v[1] for v in volumes[-144:]])
             
-            current_price = price_data[-1]
+            current_price = float(prices[-1][1])
             heuristics.current_price = current_price
             
-            # Calculate 20-period EMA
-            ema_20 = self._calculate_ema(price_data, self.config['ema_period'])
+            if state_key is not None:
+                ema_20, rsi, volatility = self.indicator_store.observe(state_key, prices)
+            else:
+                price_data = np.array([p[1] for p in prices], dtype=float)
+                ema_20 = self._calculate_ema(price_data, self.config['ema_period'])
+                rsi = self._calculate_rsi(price_data, self.config['rsi_period'])
+                volatility = indicators.volatility(price_data, self.config['volatility_window'])
             heuristics.ema_20 = ema_20
-            
-            # Price trend analysis
-            if signal_type == 'BUY':
-                heuristics.price_above_ema = (
-                    HeuristicResult.PASS if current_price > ema_20 
-                    else HeuristicResult.FAIL
-                )
-            else:  # SELL
-                heuristics.price_below_ema = (
-                    HeuristicResult.PASS if current_price < ema_20 
-                    else HeuristicResult.FAIL
-                )
+            heuristics.volatility = volatility
+            heuristics.rsi_value = rsi
             
             # Volume analysis
             current_volume = volume_data[-1]
@@ -207,31 +305,6 @@ class OpportunityAnalyzer:
             heuristics.avg_volume_24h = baseline_volume_avg
             heuristics.volume_ratio = volume_ratio
             
-            heuristics.volume_surge = (
-                HeuristicResult.PASS if volume_ratio >= self.config['volume_surge_threshold']
-                else HeuristicResult.FAIL
-            )
-            
-            # RSI analysis
-            rsi = self._calculate_rsi(price_data, self.config['rsi_period'])
-            heuristics.rsi_value = rsi
-            
-            if signal_type == 'BUY':
-                # For BUY signals, RSI should be below 75 (not overbought)
-                heuristics.rsi_check = (
-                    HeuristicResult.PASS if rsi < self.config['rsi_buy_threshold']
-                    else HeuristicResult.FAIL
-                )
-            else:  # SELL
-                # For SELL signals, RSI should be above 25 (not oversold)
-                heuristics.rsi_check = (
-                    HeuristicResult.PASS if rsi > self.config['rsi_sell_threshold']
-                    else HeuristicResult.FAIL
-                )
-            
-            # Calculate overall scores
-            heuristics.buy_score, heuristics.sell_score = self._calculate_scores(heuristics, signal_type)
-            
             self.logger.debug(f"Technical analysis complete: Price=${current_price:.6f}, EMA=${ema_20:.6f}, "
                             f"Volume Ratio={volume_ratio:.2f}, RSI={rsi:.1f}")
             
@@ -241,43 +314,58 @@ class OpportunityAnalyzer:
             
         return heuristics
     
-    def _calculate_ema(self, prices: np.ndarray, period: int) -> float:
-        """Calculate Exponential Moving Average."""
-        if len(prices) < period:
-            return float(np.mean(prices))
-        
-        # Use pandas-style EMA calculation
-        alpha = 2 / (period + 1)
-        ema = prices[0]
-        
-        for price in prices[1:]:
-            ema = alpha * price + (1 - alpha) * ema
-            
-        return float(ema)
-    
-    def _calculate_rsi(self, prices: np.ndarray, period: int = 14) -> float:
-        """Calculate Relative Strength Index."""
-        if len(prices) < period + 1:
-            return 50.0  # Neutral RSI for insufficient data
-        
-        # Calculate price changes
-        deltas = np.diff(prices)
+    def _apply_signal_heuristics(self, market_heuristics: MarketHeuristics, signal_type: str) -> MarketHeuristics:
+        """Copy of ``market_heuristics`` with the pass/fail checks and scores for ``signal_type``."""
+        heuristics = replace(market_heuristics)
+        if heuristics.insufficient_data:
+            return heuristics
         
-        # Separate gains and losses
-        gains = np.where(deltas > 0, deltas, 0)
-        losses = np.where(deltas < 0, -deltas, 0)
+        current_price = heuristics.current_price
+        ema_20 = heuristics.ema_20
+        rsi = heuristics.rsi_value
         
-        # Calculate average gains and losses
-        avg_gains = np.mean(gains[-period:])
-        avg_losses = np.mean(losses[-period:])
+        # Price trend analysis
+        if signal_type == 'BUY':
+            heuristics.price_above_ema = (
+                HeuristicResult.PASS if current_price > ema_20 
+                else HeuristicResult.FAIL
+            )
+        else:  # SELL
+            heuristics.price_below_ema = (
+                HeuristicResult.PASS if current_price < ema_20 
+                else HeuristicResult.FAIL
+            )
         
-        if avg_losses == 0:
-            return 100.0
+        heuristics.volume_surge = (
+            HeuristicResult.PASS if heuristics.volume_ratio >= self.config['volume_surge_threshold']
+            else HeuristicResult.FAIL
+        )
         
-        rs = avg_gains / avg_losses
-        rsi = 100 - (100 / (1 + rs))
+        # RSI analysis
+        if signal_type == 'BUY':
+            # For BUY signals, RSI should be below 75 (not overbought)
+            heuristics.rsi_check = (
+                HeuristicResult.PASS if rsi < self.config['rsi_buy_threshold']
+                else HeuristicResult.FAIL
+            )
+        else:  # SELL
+            # For SELL signals, RSI should be above 25 (not oversold)
+            heuristics.rsi_check = (
+                HeuristicResult.PASS if rsi > self.config['rsi_sell_threshold']
+                else HeuristicResult.FAIL
+            )
         
-        return float(rsi)
+        # Calculate overall scores
+        heuristics.buy_score, heuristics.sell_score = self._calculate_scores(heuristics, signal_type)
+        return heuristics
+    
+    def _calculate_ema(self, prices: np.ndarray, period: int) -> float:
+        """Calculate Exponential Moving Average."""
+        return indicators.ema(prices, period)
+    
+    def _calculate_rsi(self, prices: np.ndarray, period: int = 14) -> float:
+        """Calculate Relative Strength Index."""
+        return indicators.rsi(prices, period)
     
     def _calculate_scores(self, heuristics: MarketHeuristics, signal_type: str) -> Tuple[float, float]:
         """Calculate buy and sell scores based on heuristics."""
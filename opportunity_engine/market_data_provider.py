@@ -3,15 +3,30 @@ MarketDataProvider - Professional market data interface for CoinGecko API
 
 Provides real-time and historical market data for any ERC-20 token with
 comprehensive caching, error handling, and rate limiting.
+
+Market charts are cached in a size-bounded TTL LRU; concurrent misses for
+the same token share one in-flight request. Each CoinGecko endpoint draws
+from its own token bucket instead of one global sleep.
 """
 
-import time
 import logging
 import requests
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional
 from config.api_keys import COINGECKO_API_KEY
 
+from .request_cache import TTLCache, TokenBucket
+
+# Endpoint -> (requests/second, burst); together about the old 1.2s global interval
+DEFAULT_RATE_BUDGETS = {
+    'market_chart': (0.5, 5),
+    'simple_price': (0.2, 2),
+    'coins': (0.1, 2),
+}
+
+MARKET_DATA_TTL_SECONDS = 120
+HISTORICAL_TTL_SECONDS = 1800
+
 
 class MarketDataProvider:
     """
@@ -21,19 +36,22 @@ class MarketDataProvider:
     with comprehensive caching, error handling, and rate limiting.
     """
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, max_cache_entries: int = 2048,
+                 rate_budgets: Optional[Dict[str, tuple]] = None):
         self.session = requests.Session()
         self.base_url = "https://api.coingecko.com/api/v3"
         self.api_key = api_key or COINGECKO_API_KEY
         
         # Enhanced caching for different data types
         self.price_cache = {}
-        self.market_chart_cache = {}
         self.cache_expiry = {}
+        self.market_chart_cache = TTLCache(max_entries=max_cache_entries)
         
-        # Rate limiting
-        self.last_request_time = 0
-        self.min_request_interval = 1.2  # Slightly more conservative
+        # Rate limiting: one budget per endpoint
+        self.rate_limiters = {
+            endpoint: TokenBucket(rate, burst)
+            for endpoint, (rate, burst) in (rate_budgets or DEFAULT_RATE_BUDGETS).items()
+        }
         
         self.logger = logging.getLogger(f"{__name__}.MarketDataProvider")
         
@@ -59,13 +77,14 @@ class MarketDataProvider:
         
         self.logger.info("MarketDataProvider initialized with enhanced CoinGecko integration")
     
-    def _rate_limit(self):
-        """Ensure we don't exceed rate limits."""
-        current_time = time.time()
-        time_since_last_request = current_time - self.last_request_time
-        if time_since_last_request < self.min_request_interval:
-            time.sleep(self.min_request_interval - time_since_last_request)
-        self.last_request_time = time.time()
+    def _rate_limit(self, endpoint: str):
+        """Wait for a request slot in ``endpoint``'s budget."""
+        limiter = self.rate_limiters.get(endpoint)
+        if limiter is None:
+            limiter = self.rate_limiters[endpoint] = TokenBucket(*DEFAULT_RATE_BUDGETS['coins'])
+        waited = limiter.acquire()
+        if waited > 0:
+            self.logger.debug(f"Waited {waited:.2f}s for CoinGecko {endpoint} budget")
     
     def _get_cache_key(self, method: str, **kwargs) -> str:
         """Generate a consistent cache key."""
@@ -74,15 +93,20 @@ class MarketDataProvider:
     
     def _check_cache(self, cache_key: str, cache_ttl_minutes: int = 5) -> Optional[Any]:
         """Check if data exists in cache and is still valid."""
-        if cache_key in self.market_chart_cache and cache_key in self.cache_expiry:
-            if datetime.utcnow() < self.cache_expiry[cache_key]:
-                return self.market_chart_cache[cache_key]
-        return None
+        return self.market_chart_cache.get(cache_key)
     
     def _set_cache(self, cache_key: str, data: Any, cache_ttl_minutes: int = 5):
         """Set data in cache with expiry."""
-        self.market_chart_cache[cache_key] = data
-        self.cache_expiry[cache_key] = datetime.utcnow() + timedelta(minutes=cache_ttl_minutes)
+        self.market_chart_cache.set(cache_key, data, cache_ttl_minutes * 60)
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Market chart cache counters plus seconds spent waiting per endpoint budget."""
+        return {
+            **self.market_chart_cache.get_stats(),
+            'rate_wait_seconds': {
+                endpoint: round(limiter.waited_seconds, 2) for endpoint, limiter in self.rate_limiters.items()
+            },
+        }
     
     def get_market_data_for_token(self, contract_address: str, chain: str) -> Optional[Dict[str, Any]]:
         """
@@ -100,18 +124,19 @@ class MarketDataProvider:
         """
         cache_key = self._get_cache_key("market_data", contract=contract_address, chain=chain)
         
-        # Check cache first (short TTL for real-time data)
-        cached_data = self._check_cache(cache_key, cache_ttl_minutes=2)
-        if cached_data:
-            self.logger.debug(f"Using cached market data for {contract_address}")
-            return cached_data
-        
+        # Short TTL for real-time data; concurrent callers share one request
+        return self.market_chart_cache.get_or_fetch(
+            cache_key, MARKET_DATA_TTL_SECONDS,
+            lambda: self._fetch_market_data(contract_address, chain)
+        )
+    
+    def _fetch_market_data(self, contract_address: str, chain: str) -> Optional[Dict[str, Any]]:
         chain_id = self.chain_id_mapping.get(chain.lower())
         if not chain_id:
             self.logger.warning(f"Unsupported chain: {chain}")
             return None
         
-        self._rate_limit()
+        self._rate_limit('market_chart')
         
         try:
             endpoint = f"/coins/{chain_id}/contract/{contract_address.lower()}/market_chart"
@@ -149,9 +174,6 @@ class MarketDataProvider:
                 'data_points': len(data['prices'])
             }
             
-            # Cache the result
-            self._set_cache(cache_key, market_data, cache_ttl_minutes=2)
-            
             self.logger.info(f"Successfully fetched {len(data['prices'])} data points for {contract_address}")
             return market_data
             
@@ -176,18 +198,19 @@ class MarketDataProvider:
         """
         cache_key = self._get_cache_key("historical", contract=contract_address, chain=chain, days=days)
         
-        # Check cache first (longer TTL for historical data)
-        cached_data = self._check_cache(cache_key, cache_ttl_minutes=30)
-        if cached_data:
-            self.logger.debug(f"Using cached historical data for {contract_address}")
-            return cached_data
-        
+        # Longer TTL for historical data; concurrent callers share one request
+        return self.market_chart_cache.get_or_fetch(
+            cache_key, HISTORICAL_TTL_SECONDS,
+            lambda: self._fetch_historical(contract_address, chain, days)
+        )
+    
+    def _fetch_historical(self, contract_address: str, chain: str, days: int) -> Optional[Dict[str, Any]]:
         chain_id = self.chain_id_mapping.get(chain.lower())
         if not chain_id:
             self.logger.warning(f"Unsupported chain: {chain}")
             return None
         
-        self._rate_limit()
+        self._rate_limit('market_chart')
         
         try:
             endpoint = f"/coins/{chain_id}/contract/{contract_address.lower()}/market_chart"
@@ -226,9 +249,6 @@ class MarketDataProvider:
                 'data_points': len(data['prices'])
             }
             
-            # Cache the result
-            self._set_cache(cache_key, historical_data, cache_ttl_minutes=30)
-            
             self.logger.info(f"Successfully fetched {days}-day historical data for {contract_address}")
             return historical_data
             
@@ -264,7 +284,7 @@ class MarketDataProvider:
             
             coin_id = symbol_map.get(symbol, symbol.lower())
             
-            self._rate_limit()
+            self._rate_limit('simple_price')
             response = self.session.get(
                 f"{self.base_url}/simple/price",
                 params={'ids': coin_id, 'vs_currencies': 'usd'},
@@ -308,7 +328,7 @@ class MarketDataProvider:
             elif normalized_symbol == 'wbtc':
                 normalized_symbol = 'bitcoin'
             
-            self._rate_limit()
+            self._rate_limit('coins')
             
             # Get comprehensive coin data
             response = self.session.get(
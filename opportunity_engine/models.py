@@ -68,6 +68,9 @@ class MarketHeuristics:
     rsi_threshold_upper: float = 75.0
     rsi_threshold_lower: float = 25.0
     
+    # Volatility (std of log returns, informational)
+    volatility: Optional[float] = None
+    
     # Overall scores
     buy_score: float = 0.0
     sell_score: float = 0.0
@@ -151,6 +154,7 @@ class OpportunitySignal:
                 "avg_volume_24h": self.heuristics.avg_volume_24h,
                 "volume_ratio": self.heuristics.volume_ratio,
                 "rsi_value": self.heuristics.rsi_value,
+                "volatility": self.heuristics.volatility,
                 "buy_score": self.heuristics.buy_score,
                 "sell_score": self.heuristics.sell_score,
                 "data_points_analyzed": self.heuristics.data_points_analyzed
@@ -0,0 +1,137 @@
+"""
+Request Cache - bounded TTL LRU with in-flight request coalescing, and
+per-endpoint token buckets
+
+``TTLCache.get_or_fetch(key, ttl, fetch)`` returns a fresh cached value, or
+runs ``fetch()`` once per key no matter how many threads miss at the same
+time: the first caller becomes the leader and fetches, later callers wait on
+its result. ``None`` results (not found, network error) are shared with the
+waiting callers but not cached. The cache holds at most ``max_entries``
+values and evicts the least recently used first.
+
+``TokenBucket`` gives each upstream endpoint its own request budget (steady
+rate plus burst), so a burst on one endpoint doesn't stall the others
+behind a single global sleep.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class _InFlight:
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class TTLCache:
+    """Thread-safe size-bounded LRU whose entries expire ``ttl`` seconds after insert."""
+
+    def __init__(self, max_entries: int = 2048, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()  # key -> (expires_at, value)
+        self._in_flight: Dict[Hashable, _InFlight] = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'expired': 0, 'evicted': 0}
+
+    def _lookup(self, key: Hashable) -> Optional[Any]:
+        """Fresh value for ``key`` or None; caller holds the lock."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= self.clock():
+            del self._entries[key]
+            self.stats['expired'] += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            return self._lookup(key)
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (self.clock() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evicted'] += 1
+
+    def get_or_fetch(self, key: Hashable, ttl: float, fetch: Callable[[], Optional[Any]]) -> Optional[Any]:
+        """Cached value, or the result of a single shared ``fetch()`` for this key."""
+        with self._lock:
+            value = self._lookup(key)
+            if value is not None:
+                self.stats['hits'] += 1
+                return value
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[key] = _InFlight()
+                self.stats['misses'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = fetch()
+            if flight.value is not None:
+                self.set(key, flight.value, ttl)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            flight.done.set()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, 'entries': len(self._entries), 'in_flight': len(self._in_flight)}
+
+
+class TokenBucket:
+    """Blocking token bucket: ``rate`` requests/second with bursts up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self._lock = threading.Lock()
+        self.waited_seconds = 0.0
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Take ``tokens``, sleeping until they are available. Returns seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    self.waited_seconds += waited
+                    return waited
+                delay = (tokens - self.tokens) / self.rate
+            self.sleep(delay)
+            waited += delay
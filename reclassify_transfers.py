@@ -6,22 +6,27 @@ Fetches all TRANSFER-classified whale_transactions, re-evaluates them using
 the updated _determine_whale_perspective and classify_from_whale_perspective
 logic, and updates any that should be BUY or SELL.
 
-Designed to run for several hours over 136k+ transactions.
-Progress is printed every batch and the script can be safely interrupted.
+Runs as a three-stage pipeline: a fetch thread keyset-paginates TRANSFER
+rows by id and loads each page's addresses into an in-memory snapshot
+(reused across pages), the main thread reclassifies, and a write thread
+bulk-upserts each page's changed rows. The id of the last fully written
+page is kept in a cursor file, so an interrupted run resumes from there.
 """
 
-import sys
+import argparse
+import json
 import os
+import queue
+import sys
+import threading
 import time
 from datetime import datetime
 from collections import defaultdict
 
-# Prevent BigQuery from initializing on import
-os.environ['SKIP_BIGQUERY_INIT'] = '1'
-
 from supabase import create_client
 from config.api_keys import SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY
 from data.addresses import known_exchange_addresses, DEX_ADDRESSES
+from utils.address_writer import LOOKUP_BATCH
 
 _BLOCKCHAIN_ALIASES = {
     'eth': 'ethereum', 'ETH': 'ethereum', 'Ethereum': 'ethereum',
@@ -40,6 +45,12 @@ def normalize_blockchain(blockchain):
 
 BATCH_SIZE = 500
 PROGRESS_INTERVAL = 5  # batches between detailed progress prints
+PIPELINE_DEPTH = 2  # pages buffered between pipeline stages
+CURSOR_FILE = '.reclassify_transfers.cursor.json'
+
+# Columns changed by a reclassification (per-row fallback when the bulk upsert fails)
+UPDATED_COLUMNS = ('classification', 'whale_address', 'counterparty_address',
+                   'counterparty_type', 'is_cex_transaction')
 
 
 def get_supabase():
@@ -58,26 +69,43 @@ def is_cex_address(addr_type, label, entity_name):
     return any(name in searchable for name in cex_names)
 
 
-def determine_perspective(sb, from_addr, to_addr, blockchain):
+def fetch_address_snapshot(sb, txs, snapshot):
+    """
+    Load every (address, blockchain) of a page that isn't in ``snapshot`` yet.
+    
+    One ``in_`` query per blockchain and LOOKUP_BATCH addresses; addresses
+    with no row are cached as None so they are never looked up again.
+    """
+    wanted = defaultdict(set)
+    for tx in txs:
+        blockchain = normalize_blockchain(tx.get('blockchain', 'ethereum'))
+        for addr in (tx.get('from_address'), tx.get('to_address')):
+            if addr and (addr.lower(), blockchain) not in snapshot:
+                wanted[blockchain].add(addr.lower())
+    
+    for blockchain, addresses in wanted.items():
+        addresses = sorted(addresses)
+        for i in range(0, len(addresses), LOOKUP_BATCH):
+            chunk = addresses[i:i + LOOKUP_BATCH]
+            result = sb.table('addresses') \
+                .select('address, address_type, label, entity_name') \
+                .in_('address', chunk) \
+                .eq('blockchain', blockchain) \
+                .execute()
+            for addr in chunk:
+                snapshot.setdefault((addr, blockchain), None)
+            for row in (result.data or []):
+                snapshot[(row.get('address', '').lower(), blockchain)] = row
+
+
+def determine_perspective(snapshot, from_addr, to_addr, blockchain):
     """Lightweight whale perspective determination for reclassification."""
     blockchain = normalize_blockchain(blockchain)
-    addresses_to_check = [a.lower() for a in [from_addr, to_addr] if a]
     
-    from_data = None
+    from_data = snapshot.get((from_addr.lower(), blockchain)) if from_addr else None
     to_data = None
-    
-    if addresses_to_check:
-        result = sb.table('addresses') \
-            .select('address, address_type, label, entity_name') \
-            .in_('address', addresses_to_check) \
-            .eq('blockchain', blockchain) \
-            .execute()
-        for row in (result.data or []):
-            addr = row.get('address', '').lower()
-            if from_addr and addr == from_addr.lower():
-                from_data = row
-            elif to_addr and addr == to_addr.lower():
-                to_data = row
+    if to_addr and not (from_addr and to_addr.lower() == from_addr.lower()):
+        to_data = snapshot.get((to_addr.lower(), blockchain))
 
     from_type = from_data.get('address_type', '') if from_data else ''
     to_type = to_data.get('address_type', '') if to_data else ''
@@ -130,13 +158,133 @@ def reclassify(counterparty_type, whale_addr, from_addr, to_addr):
     return 'TRANSFER'
 
 
+def load_cursor(path):
+    """Last whale_transactions id whose page was fully written, or 0."""
+    try:
+        with open(path, 'r') as f:
+            return int(json.load(f).get('last_id', 0))
+    except FileNotFoundError:
+        return 0
+
+
+def save_cursor(path, last_id, stats):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({'last_id': last_id, 'updated_at': datetime.now().isoformat(), 'stats': dict(stats)}, f)
+    os.replace(tmp_path, path)
+
+
+def with_reconnect(sb, label, func):
+    """
+    Call ``func(sb)`` until it succeeds, reconnecting on connection errors.
+    
+    Returns the result and the (possibly new) client.
+    """
+    while True:
+        try:
+            if sb is None:
+                sb = get_supabase()
+            return func(sb), sb
+        except Exception as e:
+            print(f"  [!] {label} error: {e}")
+            if 'ConnectionTerminated' in str(e) or 'timeout' in str(e).lower():
+                print(f"  [!] Reconnecting to Supabase...")
+                sb = None
+                time.sleep(5)
+            else:
+                time.sleep(2)
+
+
+def fetch_pages(start_id, batch_size, snapshot, pages, stop):
+    """
+    Fetch stage: keyset-paginate TRANSFER rows after ``start_id`` and load
+    each page's unseen addresses into ``snapshot`` before handing it on.
+    """
+    sb = get_supabase()
+    last_id = start_id
+    while not stop.is_set():
+        def fetch(client):
+            # Full rows: changed rows are written back with one upsert per page
+            batch = client.table('whale_transactions') \
+                .select('*') \
+                .eq('classification', 'TRANSFER') \
+                .gt('id', last_id) \
+                .order('id') \
+                .limit(batch_size) \
+                .execute()
+            fetch_address_snapshot(client, batch.data or [], snapshot)
+            return batch.data or []
+        
+        txs, sb = with_reconnect(sb, f"Fetch after id {last_id}", fetch)
+        if not txs:
+            break
+        last_id = txs[-1]['id']
+        pages.put(txs)
+        if len(txs) < batch_size:
+            break
+    pages.put(None)
+
+
+def write_pages(writes, cursor_file, stats, stats_lock):
+    """
+    Write stage: one bulk upsert per page, falling back to per-row updates
+    if it fails; the cursor advances only after a page is fully written.
+
+    Drains ``writes`` until the ``None`` sentinel, so pages already queued
+    when the run is interrupted are still written. Once a row fails, the
+    cursor stays just before it for the rest of the run so a resume
+    retries it.
+    """
+    sb = get_supabase()
+    pinned_id = None
+    while True:
+        item = writes.get()
+        if item is None:
+            break
+        page_last_id, rows = item
+        if rows:
+            try:
+                sb.table('whale_transactions').upsert(rows, on_conflict='id').execute()
+                with stats_lock:
+                    stats['updated'] += len(rows)
+            except Exception as e:
+                print(f"  [!] Bulk upsert of {len(rows)} rows failed, updating one by one: {e}")
+                for row in rows:
+                    changes = {key: row[key] for key in UPDATED_COLUMNS}
+                    try:
+                        sb.table('whale_transactions').update(changes).eq('id', row['id']).execute()
+                        with stats_lock:
+                            stats['updated'] += 1
+                    except Exception as e2:
+                        with stats_lock:
+                            stats['errors'] += 1
+                            errors = stats['errors']
+                        if errors <= 10:
+                            print(f"  [!] Error updating tx {row['id']}: {e2}")
+                        if pinned_id is None:
+                            pinned_id = row['id'] - 1
+                            print(f"  [!] Cursor held at id {pinned_id} so tx {row['id']} is retried on resume")
+        with stats_lock:
+            snapshot = dict(stats)
+        save_cursor(cursor_file, page_last_id if pinned_id is None else pinned_id, snapshot)
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Reclassify TRANSFER whale_transactions as BUY/SELL.")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--cursor-file', default=CURSOR_FILE,
+                        help='resume point, rewritten after every written page')
+    parser.add_argument('--reset', action='store_true', help='ignore the cursor file and start from the first row')
+    args = parser.parse_args()
+    
+    start_id = 0 if args.reset else load_cursor(args.cursor_file)
     sb = get_supabase()
     
-    # Count total TRANSFER transactions
+    # Count TRANSFER transactions left to evaluate
     count_result = sb.table('whale_transactions') \
         .select('id', count='exact') \
         .eq('classification', 'TRANSFER') \
+        .gt('id', start_id) \
         .execute()
     total = count_result.count
     
@@ -144,42 +292,42 @@ def main():
     print("  TRANSFER RECLASSIFICATION SCRIPT")
     print("=" * 70)
     print(f"  Total TRANSFER transactions to evaluate: {total:,}")
-    print(f"  Batch size: {BATCH_SIZE}")
-    print(f"  Estimated batches: {(total // BATCH_SIZE) + 1}")
+    if start_id:
+        print(f"  Resuming after id {start_id} (from {args.cursor_file})")
+    print(f"  Batch size: {args.batch_size}")
+    print(f"  Estimated batches: {(total // args.batch_size) + 1}")
     print(f"  Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("=" * 70)
     print()
     
     stats = defaultdict(int)
     stats['total'] = total
+    stats_lock = threading.Lock()  # shared with the write stage
     processed = 0
-    updated = 0
-    errors = 0
     batch_num = 0
     start_time = time.time()
-    last_id = 0
     
-    while processed < total:
-        batch_num += 1
-        
-        try:
-            # Paginate using id cursor for consistent ordering
-            batch = sb.table('whale_transactions') \
-                .select('id, from_address, to_address, blockchain, classification, '
-                        'whale_address, counterparty_type') \
-                .eq('classification', 'TRANSFER') \
-                .gt('id', last_id) \
-                .order('id') \
-                .limit(BATCH_SIZE) \
-                .execute()
-            
-            if not batch.data:
+    # fetch -> compute -> write, each stage one page ahead of the next
+    snapshot = {}
+    pages = queue.Queue(maxsize=PIPELINE_DEPTH)
+    writes = queue.Queue(maxsize=PIPELINE_DEPTH)
+    stop = threading.Event()
+    fetcher = threading.Thread(target=fetch_pages, args=(start_id, args.batch_size, snapshot, pages, stop),
+                               daemon=True, name='reclassify-fetch')
+    writer = threading.Thread(target=write_pages, args=(writes, args.cursor_file, stats, stats_lock),
+                              daemon=True, name='reclassify-write')
+    fetcher.start()
+    writer.start()
+    
+    try:
+        while True:
+            txs = pages.get()
+            if txs is None:
                 break
+            batch_num += 1
+            rows = []
             
-            last_id = batch.data[-1]['id']
-            updates = []
-            
-            for tx in batch.data:
+            for tx in txs:
                 from_addr = tx.get('from_address', '')
                 to_addr = tx.get('to_address', '')
                 blockchain = tx.get('blockchain', 'ethereum')
@@ -190,37 +338,36 @@ def main():
                 
                 try:
                     ct, whale_addr, counterparty_addr = determine_perspective(
-                        sb, from_addr, to_addr, blockchain
+                        snapshot, from_addr, to_addr, blockchain
                     )
                     
                     new_cls = reclassify(ct, whale_addr, from_addr, to_addr)
                     
                     if new_cls != 'TRANSFER':
-                        updates.append({
-                            'id': tx['id'],
+                        rows.append({
+                            **tx,
                             'classification': new_cls,
                             'whale_address': whale_addr,
                             'counterparty_address': counterparty_addr,
                             'counterparty_type': ct,
                             'is_cex_transaction': ct == 'CEX'
                         })
-                        stats[new_cls] += 1
+                        with stats_lock:
+                            stats[new_cls] += 1
                     else:
-                        stats['STILL_TRANSFER'] += 1
+                        with stats_lock:
+                            stats['STILL_TRANSFER'] += 1
                     
                 except Exception as e:
-                    errors += 1
+                    with stats_lock:
+                        stats['errors'] += 1
+                        errors = stats['errors']
                     if errors <= 10:
                         print(f"  [!] Error on tx {tx['id']}: {e}")
                 
                 processed += 1
             
-            # Batch update
-            if updates:
-                for upd in updates:
-                    tx_id = upd.pop('id')
-                    sb.table('whale_transactions').update(upd).eq('id', tx_id).execute()
-                updated += len(updates)
+            writes.put((txs[-1]['id'], rows))
             
             # Progress reporting
             elapsed = time.time() - start_time
@@ -228,36 +375,25 @@ def main():
             eta_seconds = (total - processed) / rate if rate > 0 else 0
             eta_min = eta_seconds / 60
             
-            if batch_num % PROGRESS_INTERVAL == 0 or len(batch.data) < BATCH_SIZE:
+            if batch_num % PROGRESS_INTERVAL == 0 or len(txs) < args.batch_size:
                 print(f"  [{datetime.now().strftime('%H:%M:%S')}] "
                       f"Batch {batch_num} | "
-                      f"{processed:,}/{total:,} ({processed/total*100:.1f}%) | "
-                      f"Reclassified: {updated:,} | "
+                      f"{processed:,}/{total:,} ({processed/max(total,1)*100:.1f}%) | "
+                      f"Reclassified: {stats['updated']:,} | "
+                      f"Addresses cached: {len(snapshot):,} | "
                       f"Rate: {rate:.1f}/s | "
                       f"ETA: {eta_min:.0f}min")
-            
-        except KeyboardInterrupt:
-            print(f"\n  Interrupted at batch {batch_num}")
-            break
-        except Exception as e:
-            errors += 1
-            print(f"  [!] Batch {batch_num} error: {e}")
-            # Reconnect on connection errors
-            if 'ConnectionTerminated' in str(e) or 'timeout' in str(e).lower():
-                print(f"  [!] Reconnecting to Supabase...")
-                time.sleep(5)
-                try:
-                    sb = get_supabase()
-                    print(f"  [!] Reconnected successfully")
-                except Exception as e2:
-                    print(f"  [!] Reconnect failed: {e2}")
-                    time.sleep(10)
-            else:
-                time.sleep(2)
-            continue
+    
+    except KeyboardInterrupt:
+        print(f"\n  Interrupted at batch {batch_num}, finishing queued writes...")
+        stop.set()
+    
+    writes.put(None)
+    writer.join()
     
     # Final report
     elapsed = time.time() - start_time
+    updated = stats['updated']
     print()
     print("=" * 70)
     print("  RECLASSIFICATION COMPLETE")
@@ -267,9 +403,10 @@ def main():
     print(f"    -> BUY:     {stats['BUY']:,}")
     print(f"    -> SELL:    {stats['SELL']:,}")
     print(f"  Still TRANSFER: {stats['STILL_TRANSFER']:,}")
-    print(f"  Errors:       {errors:,}")
+    print(f"  Errors:       {stats['errors']:,}")
     print(f"  Duration:     {elapsed/60:.1f} minutes")
-    print(f"  Rate:         {processed/elapsed:.1f} tx/sec")
+    print(f"  Rate:         {processed/max(elapsed, 1e-9):.1f} tx/sec")
+    print(f"  Cursor:       {args.cursor_file}")
     print("=" * 70)
 
 
@@ -3,6 +3,7 @@ Rule Engine API Module
 
 This module provides a FastAPI application for the rule-based transaction classification engine.
 """
+import asyncio
 import logging
 import httpx
 import json
@@ -15,9 +16,15 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../.
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 import time
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 
-from rule_engine.models.transaction import TransactionRequest, ClassificationResult, AddressMetadata
+from rule_engine.models.transaction import (
+    TransactionRequest,
+    ClassificationResult,
+    AddressMetadata,
+    BatchClassificationRequest,
+    BatchClassificationResponse
+)
 from rule_engine.rules.base import RuleEngine
 from rule_engine.rules.common_rules import (
     ExchangeDepositRule,
@@ -52,6 +59,46 @@ rule_engine.register_rules([
 
 # Environment variables
 ENRICHMENT_SERVICE_URL = os.getenv("ENRICHMENT_SERVICE_URL", "http://localhost:8000")
+ENRICHMENT_TIMEOUT_SECONDS = float(os.getenv("ENRICHMENT_TIMEOUT_SECONDS", "5"))
+ENRICHMENT_MAX_CONNECTIONS = int(os.getenv("ENRICHMENT_MAX_CONNECTIONS", "50"))
+CLASSIFY_BATCH_MAX = int(os.getenv("CLASSIFY_BATCH_MAX", "1000"))
+# Addresses per /enrich-addresses request; a batch's chunks are sent concurrently
+ENRICHMENT_BATCH_CHUNK = int(os.getenv("ENRICHMENT_BATCH_CHUNK", "200"))
+# Per-chunk timeout: the service fetches a chunk's cache misses from slow sources
+ENRICHMENT_BATCH_TIMEOUT_SECONDS = float(os.getenv("ENRICHMENT_BATCH_TIMEOUT_SECONDS", "30"))
+
+# (address, chain) key used to deduplicate enrichment lookups
+AddressKey = Tuple[str, str]
+
+# Process-wide pooled client for the enrichment service (see get_http_client)
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Shared AsyncClient for enrichment calls, so connections are kept alive
+    and reused across requests instead of opened per transaction
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=ENRICHMENT_TIMEOUT_SECONDS,
+            limits=httpx.Limits(
+                max_connections=ENRICHMENT_MAX_CONNECTIONS,
+                max_keepalive_connections=ENRICHMENT_MAX_CONNECTIONS
+            )
+        )
+    return _http_client
+
+
+@app.on_event("shutdown")
+async def close_http_client():
+    """Close the pooled enrichment client"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
 
 @app.post("/classify-transaction", response_model=ClassificationResult)
 async def classify_transaction(transaction: TransactionRequest):
@@ -92,63 +139,197 @@ async def classify_transaction(transaction: TransactionRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-async def enrich_transaction_addresses(transaction: TransactionRequest) -> TransactionRequest:
+@app.post("/classify/batch", response_model=BatchClassificationResponse)
+async def classify_batch(request: BatchClassificationRequest):
     """
-    Enrich the transaction addresses with metadata from the enrichment service
+    Classify a batch of crypto transactions
+    
+    The addresses missing metadata across the whole batch are deduplicated
+    and enriched with batched calls to the enrichment service, then every
+    transaction is classified by the rule engine.
     
     Args:
-        transaction: The transaction to enrich
+        request: The transactions to classify
         
     Returns:
-        TransactionRequest: The enriched transaction
+        BatchClassificationResponse: One result per transaction, in request order
     """
-    async with httpx.AsyncClient() as client:
-        # Enrich the from address
-        try:
-            response = await client.post(
-                f"{ENRICHMENT_SERVICE_URL}/enrich-address",
-                json={
-                    "address": transaction.from_address,
-                    "chain": transaction.chain.value
-                },
-                timeout=5.0
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                transaction.from_address_metadata = AddressMetadata(
-                    address=data["address"],
-                    label=data["primary_label"],
-                    entity_type=data["primary_label"],
-                    confidence=data["confidence"]
-                )
-                logger.info(f"Enriched from address {transaction.from_address} as {data['primary_label']}")
-        except Exception as e:
-            logger.error(f"Error enriching from address: {e}")
+    if len(request.transactions) > CLASSIFY_BATCH_MAX:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch of {len(request.transactions)} transactions exceeds the limit of {CLASSIFY_BATCH_MAX}"
+        )
+    
+    start_time = time.time()
+    
+    try:
+        keys = _missing_address_keys(request.transactions)
+        metadata = await enrich_addresses(keys) if keys else {}
+        
+        results = []
+        for transaction in request.transactions:
+            _apply_metadata(transaction, metadata)
+            results.append(rule_engine.classify(transaction))
+        
+        processing_time_ms = (time.time() - start_time) * 1000
+        logger.info(
+            f"Classified {len(results)} transactions ({len(metadata)}/{len(keys)} addresses enriched) "
+            f"in {processing_time_ms:.2f}ms"
+        )
+        
+        return BatchClassificationResponse(
+            results=results,
+            requested_addresses=len(keys),
+            enriched_addresses=len(metadata),
+            processing_time_ms=processing_time_ms
+        )
+    
+    except Exception as e:
+        logger.error(f"Error classifying transaction batch: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _missing_address_keys(transactions: List[TransactionRequest]) -> List[AddressKey]:
+    """Distinct (address, chain) pairs that still need metadata, in first-seen order"""
+    keys: Dict[AddressKey, None] = {}
+    for transaction in transactions:
+        chain = transaction.chain.value
+        if not transaction.from_address_metadata:
+            keys[(transaction.from_address, chain)] = None
+        if not transaction.to_address_metadata:
+            keys[(transaction.to_address, chain)] = None
+    return list(keys)
+
+
+def _apply_metadata(transaction: TransactionRequest, metadata: Dict[AddressKey, AddressMetadata]) -> None:
+    """Fill in the transaction's missing address metadata from enrichment results"""
+    chain = transaction.chain.value
+    if not transaction.from_address_metadata:
+        transaction.from_address_metadata = metadata.get((transaction.from_address, chain))
+    if not transaction.to_address_metadata:
+        transaction.to_address_metadata = metadata.get((transaction.to_address, chain))
+
+
+def _to_metadata(data: Dict[str, Any]) -> AddressMetadata:
+    """Convert an enrichment service response into AddressMetadata"""
+    return AddressMetadata(
+        address=data["address"],
+        label=data["primary_label"],
+        entity_type=data["primary_label"],
+        confidence=data["confidence"]
+    )
+
+
+async def enrich_addresses(keys: List[AddressKey]) -> Dict[AddressKey, AddressMetadata]:
+    """
+    Enrich addresses with batched calls to the enrichment service
+    
+    Keys are split into chunks of ENRICHMENT_BATCH_CHUNK addresses, sent
+    concurrently on the pooled client with ENRICHMENT_BATCH_TIMEOUT_SECONDS
+    each, so a slow or failed chunk only loses its own addresses. Falls back
+    to concurrent single-address calls when the enrichment service doesn't
+    expose the batch endpoint. Addresses that could not be enriched are
+    missing from the result.
+    
+    Args:
+        keys: Distinct (address, chain) pairs to enrich
         
-        # Enrich the to address
+    Returns:
+        Dict mapping (address, chain) to AddressMetadata
+    """
+    client = get_http_client()
+    size = max(1, ENRICHMENT_BATCH_CHUNK)
+    chunks = [keys[i:i + size] for i in range(0, len(keys), size)]
+    results = await asyncio.gather(*(_enrich_chunk(client, chunk) for chunk in chunks))
+    
+    metadata = {}
+    unsupported = []
+    for chunk, chunk_metadata in zip(chunks, results):
+        if chunk_metadata is None:
+            unsupported.extend(chunk)
+        else:
+            metadata.update(chunk_metadata)
+    if unsupported:
+        logger.warning("Enrichment service has no batch endpoint, enriching addresses one by one")
+        metadata.update(await _enrich_addresses_individually(client, unsupported))
+    
+    logger.info(f"Enriched {len(metadata)}/{len(keys)} addresses in {len(chunks)} requests")
+    return metadata
+
+
+async def _enrich_chunk(
+    client: httpx.AsyncClient,
+    keys: List[AddressKey]
+) -> Optional[Dict[AddressKey, AddressMetadata]]:
+    """One /enrich-addresses request; None if the service has no batch endpoint"""
+    try:
+        response = await client.post(
+            f"{ENRICHMENT_SERVICE_URL}/enrich-addresses",
+            json={"addresses": [{"address": address, "chain": chain} for address, chain in keys]},
+            timeout=ENRICHMENT_BATCH_TIMEOUT_SECONDS
+        )
+    except Exception as e:
+        logger.error(f"Error enriching {len(keys)} addresses: {type(e).__name__}: {e}")
+        return {}
+    
+    if response.status_code in (404, 405):
+        return None
+    
+    if response.status_code != 200:
+        logger.error(f"Error enriching {len(keys)} addresses: HTTP {response.status_code}")
+        return {}
+    
+    # results[i] answers keys[i] (null if it couldn't be enriched); the service
+    # may normalize the address (e.g. lower-case EVM), so match by position
+    metadata = {}
+    for key, data in zip(keys, response.json().get("results", [])):
+        if not data:
+            continue
         try:
-            response = await client.post(
-                f"{ENRICHMENT_SERVICE_URL}/enrich-address",
-                json={
-                    "address": transaction.to_address,
-                    "chain": transaction.chain.value
-                },
-                timeout=5.0
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                transaction.to_address_metadata = AddressMetadata(
-                    address=data["address"],
-                    label=data["primary_label"],
-                    entity_type=data["primary_label"],
-                    confidence=data["confidence"]
-                )
-                logger.info(f"Enriched to address {transaction.to_address} as {data['primary_label']}")
+            metadata[key] = _to_metadata(data)
         except Exception as e:
-            logger.error(f"Error enriching to address: {e}")
+            logger.error(f"Error parsing enrichment result for {key[0]}: {e}")
+    return metadata
+
+
+async def _enrich_addresses_individually(
+    client: httpx.AsyncClient,
+    keys: List[AddressKey]
+) -> Dict[AddressKey, AddressMetadata]:
+    """Enrich addresses through the single-address endpoint, bounded by the pool size"""
+    semaphore = asyncio.Semaphore(ENRICHMENT_MAX_CONNECTIONS)
+    
+    async def enrich_one(key: AddressKey) -> Optional[AddressMetadata]:
+        address, chain = key
+        async with semaphore:
+            try:
+                response = await client.post(
+                    f"{ENRICHMENT_SERVICE_URL}/enrich-address",
+                    json={"address": address, "chain": chain}
+                )
+                if response.status_code == 200:
+                    return _to_metadata(response.json())
+            except Exception as e:
+                logger.error(f"Error enriching address {address}: {e}")
+        return None
+    
+    results = await asyncio.gather(*(enrich_one(key) for key in keys))
+    return {key: metadata for key, metadata in zip(keys, results) if metadata is not None}
+
+
+async def enrich_transaction_addresses(transaction: TransactionRequest) -> TransactionRequest:
+    """
+    Enrich the transaction addresses with metadata from the enrichment service
     
+    Args:
+        transaction: The transaction to enrich
+        
+    Returns:
+        TransactionRequest: The enriched transaction
+    """
+    keys = _missing_address_keys([transaction])
+    if keys:
+        _apply_metadata(transaction, await enrich_addresses(keys))
     return transaction
 
 
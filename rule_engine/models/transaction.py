@@ -89,4 +89,17 @@ class ClassificationResult(BaseModel):
     processed_at: datetime = Field(default_factory=datetime.utcnow)
     
     class Config:
-        extra = "allow"  # Allow additional fields 
\ No newline at end of file
+        extra = "allow"  # Allow additional fields 
+
+
+class BatchClassificationRequest(BaseModel):
+    """Request model for batch transaction classification"""
+    transactions: List[TransactionRequest]
+
+
+class BatchClassificationResponse(BaseModel):
+    """Response model for batch transaction classification"""
+    results: List[ClassificationResult]
+    requested_addresses: int = Field(0, description="Distinct addresses sent to the enrichment service")
+    enriched_addresses: int = Field(0, description="Distinct addresses the enrichment service returned metadata for")
+    processing_time_ms: Optional[float] = None
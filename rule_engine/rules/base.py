@@ -5,9 +5,10 @@ This module provides the base rule engine functionality for crypto transaction c
 """
 import time
 import logging
-from typing import Dict, List, Type, Any, Optional
+from typing import Dict, List, Type, Any, Optional, Sequence
 from abc import ABC, abstractmethod
 
+from .dispatch import CompiledDispatch
 from ..models.transaction import (
     TransactionRequest,
     ClassificationResult,
@@ -31,6 +32,10 @@ class BaseRule(ABC):
     description = "Base rule class"
     chain = None  # None means all chains
     
+    # Dispatch declaration (see rules.dispatch): alternatives of conditions that
+    # must hold for apply() to match. None means evaluate for every transaction.
+    requires = None
+    
     @abstractmethod
     def apply(self, transaction: TransactionRequest) -> Optional[ClassificationResult]:
         """
@@ -99,12 +104,16 @@ class RuleEngine:
     Rule engine for classifying crypto transactions
     
     This class manages a collection of rules and applies them in order
-    to classify transactions.
+    to classify transactions. The rules are compiled into a dispatch index
+    (rebuilt whenever the rule list changes) so only the rules whose declared
+    conditions hold are evaluated.
     """
     
-    def __init__(self):
+    def __init__(self, use_dispatch: bool = True):
         """Initialize the rule engine with an empty rule list"""
         self.rules: List[BaseRule] = []
+        self.use_dispatch = use_dispatch
+        self._dispatch: Optional[CompiledDispatch] = None
         
     def register_rule(self, rule: BaseRule) -> None:
         """
@@ -114,6 +123,7 @@ class RuleEngine:
             rule: The rule to register
         """
         self.rules.append(rule)
+        self._dispatch = None
         logger.info(f"Registered rule: {rule.name}")
         
     def register_rules(self, rules: List[BaseRule]) -> None:
@@ -126,6 +136,14 @@ class RuleEngine:
         for rule in rules:
             self.register_rule(rule)
     
+    def candidate_rules(self, transaction: TransactionRequest) -> Sequence[BaseRule]:
+        """Rules to evaluate for ``transaction``, in registration order."""
+        if not self.use_dispatch:
+            return self.rules
+        if self._dispatch is None or self._dispatch.rules != self.rules:
+            self._dispatch = CompiledDispatch(self.rules)
+        return self._dispatch.candidates(transaction)
+    
     def classify(self, transaction: TransactionRequest) -> ClassificationResult:
         """
         Classify a transaction using registered rules
@@ -141,8 +159,8 @@ class RuleEngine:
         """
         start_time = time.time()
         
-        # Apply each rule in order
-        for rule in self.rules:
+        # Apply each candidate rule in order
+        for rule in self.candidate_rules(transaction):
             # Skip rules that are chain-specific and don't match the transaction chain
             if rule.chain is not None and rule.chain != transaction.chain:
                 continue
@@ -7,6 +7,7 @@ These rules use enriched address metadata to improve classification accuracy.
 from typing import Optional, List, Set
 
 from .base import BaseRule
+from .dispatch import LabelMatch
 from ..models.transaction import (
     TransactionRequest,
     ClassificationResult,
@@ -34,6 +35,8 @@ class ExchangeDepositRule(BaseRule):
         "personal", "unknown", "individual", "user", "wallet"
     }
     
+    requires = [{'from_label': LabelMatch(PERSONAL_LABELS), 'to_label': LabelMatch(EXCHANGE_LABELS)}]
+    
     def apply(self, transaction: TransactionRequest) -> Optional[ClassificationResult]:
         # Skip if we don't have metadata for both addresses
         if not transaction.from_address_metadata or not transaction.to_address_metadata:
@@ -88,6 +91,8 @@ class ExchangeWithdrawalRule(BaseRule):
         "personal", "unknown", "individual", "user", "wallet"
     }
     
+    requires = [{'from_label': LabelMatch(EXCHANGE_LABELS), 'to_label': LabelMatch(PERSONAL_LABELS)}]
+    
     def apply(self, transaction: TransactionRequest) -> Optional[ClassificationResult]:
         # Skip if we don't have metadata for both addresses
         if not transaction.from_address_metadata or not transaction.to_address_metadata:
@@ -150,6 +155,12 @@ class DexSwapRule(BaseRule):
         "usdt", "usdc", "busd", "dai", "tusd", "usdp", "usdn", "frax", "lusd"
     }
     
+    # The token only picks BUY vs SELL, so it is not part of the dispatch key
+    requires = [
+        {'from_label': LabelMatch(PERSONAL_LABELS), 'to_label': LabelMatch(DEX_LABELS)},
+        {'from_label': LabelMatch(DEX_LABELS), 'to_label': LabelMatch(PERSONAL_LABELS)},
+    ]
+    
     def apply(self, transaction: TransactionRequest) -> Optional[ClassificationResult]:
         # Skip if we don't have metadata for both addresses
         if not transaction.from_address_metadata or not transaction.to_address_metadata:
@@ -239,6 +250,11 @@ class BridgeTransactionRule(BaseRule):
         "bridge", "cross-chain", "cross chain", "multichain"
     }
     
+    requires = [
+        {'from_label': LabelMatch(BRIDGE_LABELS, substring=True)},
+        {'to_label': LabelMatch(BRIDGE_LABELS, substring=True)},
+    ]
+    
     def apply(self, transaction: TransactionRequest) -> Optional[ClassificationResult]:
         # Skip if we don't have metadata for both addresses
         if not transaction.from_address_metadata or not transaction.to_address_metadata:
@@ -273,6 +289,13 @@ class BridgeTransactionRule(BaseRule):
         return None
 
 
+def _same_entity_name(transaction: TransactionRequest) -> bool:
+    """Both sides carry the same (non-empty) entity_name"""
+    from_entity = getattr(transaction.from_address_metadata, 'entity_name', '').lower()
+    to_entity = getattr(transaction.to_address_metadata, 'entity_name', '').lower()
+    return bool(from_entity and to_entity and from_entity == to_entity)
+
+
 class MarketMakerTransferRule(BaseRule):
     """
     Rule E: Same-owner or Market Maker Transfers → Transfer
@@ -289,6 +312,12 @@ class MarketMakerTransferRule(BaseRule):
         "market maker", "market_maker", "liquidity provider", "market making"
     }
     
+    requires = [
+        {'from_label': LabelMatch(MARKET_MAKER_LABELS, substring=True),
+         'to_label': LabelMatch(MARKET_MAKER_LABELS, substring=True)},
+        {'check': _same_entity_name},
+    ]
+    
     def apply(self, transaction: TransactionRequest) -> Optional[ClassificationResult]:
         # Skip if we don't have metadata for both addresses
         if not transaction.from_address_metadata or not transaction.to_address_metadata:
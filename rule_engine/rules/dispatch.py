@@ -0,0 +1,169 @@
+"""
+Rule Dispatch Module
+
+This module compiles registered rules into a dispatch index so the engine only
+calls apply() on the rules that can match a given transaction.
+
+A rule declares what it depends on through its ``requires`` attribute: a list
+of alternatives, each a dict of conditions that must all hold for apply() to
+possibly return a result:
+
+    'from_label' / 'to_label'   LabelMatch on the from/to address metadata
+                                label (lower-cased)
+    'check'                     callable(transaction) -> bool, for conditions
+                                that aren't about a single label (e.g. the
+                                same entity on both sides)
+
+``requires = None`` (the default) means the rule is evaluated for every
+transaction.
+
+Per transaction the index works out which label conditions each side
+satisfies (memoized by label, since labels repeat heavily), runs the 'check'
+predicates only if their outcome could change the candidate set, and looks up
+the tuple of candidate rules for that combination (memoized as well). Candidates keep registration order and the engine keeps
+first-match semantics, so results are identical to evaluating every rule as
+long as each declaration is a necessary condition of its rule's apply().
+"""
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+# Label -> condition bits caches are reset past this many distinct labels
+LABEL_CACHE_SIZE = 50_000
+
+
+class LabelMatch:
+    """A label condition: the label is one of ``labels`` or, with ``substring``, contains one."""
+
+    __slots__ = ('labels', 'substring')
+
+    def __init__(self, labels: Iterable[str], substring: bool = False):
+        self.labels: FrozenSet[str] = frozenset(labels)
+        self.substring = substring
+
+    def matches(self, label: str) -> bool:
+        if self.substring:
+            return any(term in label for term in self.labels)
+        return label in self.labels
+
+    def __eq__(self, other: Any) -> bool:
+        return (isinstance(other, LabelMatch) and
+                self.labels == other.labels and self.substring == other.substring)
+
+    def __hash__(self) -> int:
+        return hash((self.labels, self.substring))
+
+    def __repr__(self) -> str:
+        mode = "contains" if self.substring else "in"
+        return f"LabelMatch({mode} {sorted(self.labels)})"
+
+
+class _Side:
+    """Label conditions on one side of the transaction, with a per-label cache."""
+
+    __slots__ = ('attribute', 'conditions', 'all_bits', 'cache')
+
+    def __init__(self, attribute: str):
+        self.attribute = attribute
+        self.conditions: List[Tuple[int, LabelMatch]] = []
+        self.all_bits = 0
+        self.cache: Dict[str, int] = {}
+
+    def add(self, bit: int, match: LabelMatch) -> None:
+        self.conditions.append((bit, match))
+        self.all_bits |= 1 << bit
+
+    def bits(self, transaction: Any) -> int:
+        metadata = getattr(transaction, self.attribute, None)
+        if not metadata:
+            return 0
+        label = getattr(metadata, 'label', None)
+        if not isinstance(label, str):
+            # Let the rules see it (and fail or skip) exactly as before
+            return self.all_bits
+        bits = self.cache.get(label)
+        if bits is None:
+            lowered = label.lower()
+            bits = 0
+            for bit, match in self.conditions:
+                if match.matches(lowered):
+                    bits |= 1 << bit
+            if len(self.cache) >= LABEL_CACHE_SIZE:
+                self.cache.clear()
+            self.cache[label] = bits
+        return bits
+
+
+class CompiledDispatch:
+    """Dispatch index over an ordered list of rules."""
+
+    def __init__(self, rules: Sequence[Any]):
+        self.rules = list(rules)
+        self._bits: Dict[Tuple[str, Any], int] = {}
+        self._from = _Side('from_address_metadata')
+        self._to = _Side('to_address_metadata')
+        self._checks: List[Tuple[int, Callable[[Any], bool]]] = []
+        # Per rule: None (always a candidate) or the bit masks of its alternatives
+        self._masks: List[Optional[Tuple[int, ...]]] = [self._compile(rule) for rule in self.rules]
+        self._check_bits = 0
+        for bit, _ in self._checks:
+            self._check_bits |= 1 << bit
+        self._candidates: Dict[int, Tuple[Any, ...]] = {}
+        # Label facts -> candidates when the 'check' results can't change them, else None
+        self._by_labels: Dict[int, Optional[Tuple[Any, ...]]] = {}
+
+    def _bit(self, key: str, value: Any) -> int:
+        bit = self._bits.get((key, value))
+        if bit is None:
+            bit = self._bits[(key, value)] = len(self._bits)
+            if key == 'from_label':
+                self._from.add(bit, value)
+            elif key == 'to_label':
+                self._to.add(bit, value)
+            else:
+                self._checks.append((bit, value))
+        return bit
+
+    def _compile(self, rule: Any) -> Optional[Tuple[int, ...]]:
+        requires = getattr(rule, 'requires', None)
+        if requires is None:
+            return None
+        masks = []
+        for alternative in requires:
+            mask = 0
+            for key, value in alternative.items():
+                if key not in ('from_label', 'to_label', 'check'):
+                    raise ValueError(f"Rule {rule.name}: unknown dispatch condition {key!r}")
+                mask |= 1 << self._bit(key, value)
+            masks.append(mask)
+        return tuple(masks)
+
+    def _select(self, facts: int) -> Tuple[Any, ...]:
+        candidates = self._candidates.get(facts)
+        if candidates is None:
+            candidates = tuple(
+                rule for rule, masks in zip(self.rules, self._masks)
+                if masks is None or any(mask & facts == mask for mask in masks)
+            )
+            self._candidates[facts] = candidates
+        return candidates
+
+    def candidates(self, transaction: Any) -> Tuple[Any, ...]:
+        """Rules that may match ``transaction``, in registration order."""
+        facts = self._from.bits(transaction) | self._to.bits(transaction)
+        if facts in self._by_labels:
+            candidates = self._by_labels[facts]
+        else:
+            candidates = self._select(facts)
+            if candidates != self._select(facts | self._check_bits):
+                candidates = None
+            self._by_labels[facts] = candidates
+        if candidates is not None:
+            return candidates
+
+        for bit, check in self._checks:
+            try:
+                if check(transaction):
+                    facts |= 1 << bit
+            except Exception:
+                # Unknown: keep the rule so it reports its own error
+                facts |= 1 << bit
+        return self._select(facts)
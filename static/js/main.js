@@ -37,14 +37,27 @@ function initSocketIO() {
     socket.on('connect', function() {
         console.log('Real-time connection established');
         showToast('Live updates connected');
+        subscribeToFilters();
     });
 
     socket.on('disconnect', function() {
         console.log('Real-time connection lost, will auto-reconnect');
     });
 
-    socket.on('new_transaction', function(tx) {
-        handleRealtimeTransaction(tx);
+    // Server coalesces events into frames: one pre-serialized JSON array per tick
+    socket.on('transactions', function(frame) {
+        const txs = typeof frame === 'string' ? JSON.parse(frame) : frame;
+        txs.forEach(handleRealtimeTransaction);
+    });
+}
+
+// Join the server-side room matching the current chain / token / min value filters
+function subscribeToFilters() {
+    if (!socket || !socket.connected) return;
+    socket.emit('subscribe', {
+        chain: document.getElementById('blockchain-filter').value || null,
+        symbol: document.getElementById('token-filter').value || null,
+        min_usd: parseFloat(document.getElementById('min-value-input').value) || 0
     });
 }
 
@@ -126,6 +139,9 @@ function fetchTransactions() {
     const type = document.getElementById('type-filter').value;
     const limit = document.getElementById('limit-filter').value;
     const minValue = document.getElementById('min-value-input').value || '';
+
+    // Keep the live feed room in sync with the filters
+    subscribeToFilters();
     
     // Build query string
     let queryParams = new URLSearchParams();
@@ -0,0 +1,201 @@
+"""Address Profile Store - local SQLite cache of BigQuery historical address stats.
+
+The live classification path reads profiles from here instead of running a
+BigQuery job per address. Lookups are a primary-key read on a per-thread
+SQLite connection (tens of microseconds).
+
+Profiles are filled by ``ProfileRefresher``: a background thread that, on a
+schedule, takes every address requested since the last run (``enqueue``)
+plus profiles older than ``max_age``, and computes their stats with one
+batched ``UNNEST(@addresses)`` query per ``batch_size`` addresses
+(``BigQueryAnalyzer.get_addresses_historical_stats``).
+
+Environment:
+    WHALE_PROFILE_STORE             SQLite path (default data/address_profiles.sqlite3)
+    WHALE_PROFILE_REFRESH_SECONDS   seconds between refresh runs (default 900)
+    WHALE_PROFILE_MAX_AGE_SECONDS   re-profile addresses older than this (default 86400)
+    WHALE_PROFILE_BATCH_SIZE        addresses per BigQuery job (default 5000)
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+PROFILE_STORE_PATH = os.getenv(
+    'WHALE_PROFILE_STORE',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'address_profiles.sqlite3')
+)
+PROFILE_REFRESH_SECONDS = float(os.getenv('WHALE_PROFILE_REFRESH_SECONDS', '900'))
+PROFILE_MAX_AGE_SECONDS = float(os.getenv('WHALE_PROFILE_MAX_AGE_SECONDS', '86400'))
+PROFILE_BATCH_SIZE = int(os.getenv('WHALE_PROFILE_BATCH_SIZE', '5000'))
+
+# Same columns as BigQueryAnalyzer.get_address_historical_stats
+PROFILE_COLUMNS = (
+    'total_transactions',
+    'active_days',
+    'total_eth_volume',
+    'avg_eth_per_tx',
+    'max_eth_in_tx',
+    'unique_counterparties',
+)
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS address_profiles (
+    address TEXT PRIMARY KEY,
+    {', '.join(f'{column} REAL' for column in PROFILE_COLUMNS)},
+    refreshed_at REAL NOT NULL
+) WITHOUT ROWID
+"""
+
+
+class AddressProfileStore:
+    """SQLite-backed address -> historical stats map, safe to share across threads."""
+
+    def __init__(self, path: str = PROFILE_STORE_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        conn = self._conn()
+        with conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def get(self, address: str) -> Optional[Dict[str, Any]]:
+        """Stored stats for ``address`` (with 'refreshed_at'), or None if never profiled."""
+        row = self._conn().execute(
+            'SELECT * FROM address_profiles WHERE address = ?', (address.lower(),)
+        ).fetchone()
+        if row is None:
+            return None
+        profile = dict(row)
+        for column in ('total_transactions', 'active_days', 'unique_counterparties'):
+            if profile[column] is not None:
+                profile[column] = int(profile[column])
+        return profile
+
+    def upsert_many(self, profiles: Dict[str, Dict[str, Any]], refreshed_at: Optional[float] = None) -> int:
+        refreshed_at = time.time() if refreshed_at is None else refreshed_at
+        rows = [
+            (address.lower(), *(_as_float(stats.get(column)) for column in PROFILE_COLUMNS), refreshed_at)
+            for address, stats in profiles.items()
+        ]
+        placeholders = ', '.join('?' * (len(PROFILE_COLUMNS) + 2))
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO address_profiles "
+                    f"(address, {', '.join(PROFILE_COLUMNS)}, refreshed_at) VALUES ({placeholders})",
+                    rows,
+                )
+        return len(rows)
+
+    def stale_addresses(self, max_age: float, limit: int) -> List[str]:
+        cutoff = time.time() - max_age
+        rows = self._conn().execute(
+            'SELECT address FROM address_profiles WHERE refreshed_at < ? ORDER BY refreshed_at LIMIT ?',
+            (cutoff, limit),
+        ).fetchall()
+        return [row['address'] for row in rows]
+
+    def count(self) -> int:
+        return self._conn().execute('SELECT COUNT(*) FROM address_profiles').fetchone()[0]
+
+
+def _as_float(value: Any) -> Optional[float]:
+    return None if value is None else float(value)
+
+
+class ProfileRefresher:
+    """Scheduled batch profiler that keeps an AddressProfileStore filled from BigQuery."""
+
+    def __init__(self, analyzer, store: AddressProfileStore,
+                 interval: float = PROFILE_REFRESH_SECONDS,
+                 max_age: float = PROFILE_MAX_AGE_SECONDS,
+                 batch_size: int = PROFILE_BATCH_SIZE):
+        self.analyzer = analyzer
+        self.store = store
+        self.interval = interval
+        self.max_age = max_age
+        self.batch_size = batch_size
+        self._pending: Set[str] = set()
+        self._pending_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {'runs': 0, 'profiled': 0, 'queries': 0, 'failures': 0, 'last_run_seconds': 0.0}
+
+    def enqueue(self, addresses: Iterable[str]) -> None:
+        """Ask for ``addresses`` to be profiled on the next run."""
+        with self._pending_lock:
+            self._pending.update(address.lower() for address in addresses if address)
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True, name="ProfileRefresher")
+        self._thread.start()
+        logger.info(f"Address profile refresher started (every {self.interval:.0f}s, "
+                    f"{self.batch_size} addresses per query)")
+
+    def refresh_now(self) -> None:
+        self._wake.set()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                self.stats['failures'] += 1
+                logger.error(f"Address profile refresh failed: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def run_once(self) -> int:
+        """Profile pending and stale addresses; returns how many profiles were written."""
+        with self._pending_lock:
+            pending, self._pending = self._pending, set()
+        stale = self.store.stale_addresses(self.max_age, limit=self.batch_size)
+        addresses = sorted(pending.union(stale))
+        if not addresses:
+            return 0
+
+        started = time.perf_counter()
+        written = 0
+        for i in range(0, len(addresses), self.batch_size):
+            batch = addresses[i:i + self.batch_size]
+            profiles = self.analyzer.get_addresses_historical_stats(batch)
+            self.stats['queries'] += 1
+            if profiles is None:
+                # Quota exhausted or client unavailable: retry these next run
+                self.enqueue(batch)
+                self.stats['failures'] += 1
+                break
+            written += self.store.upsert_many(profiles)
+
+        elapsed = time.perf_counter() - started
+        self.stats['runs'] += 1
+        self.stats['profiled'] += written
+        self.stats['last_run_seconds'] = round(elapsed, 2)
+        logger.info(f"Profiled {written} addresses in {elapsed:.1f}s ({len(pending)} requested, {len(stale)} stale)")
+        return written
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._pending_lock:
+            pending = len(self._pending)
+        return {**self.stats, 'pending': pending, 'stored_profiles': self.store.count()}
@@ -0,0 +1,179 @@
+"""Address Writer - chunked, concurrent bulk upsert into the Supabase ``addresses`` table.
+
+Replaces per-address select-then-insert/update loops. Rows are merged per
+(address, blockchain), split into chunks, and each chunk is written with a
+single ``upsert(..., on_conflict='address,blockchain')``. Chunks run on a
+thread pool capped at ``max_concurrency`` connections.
+
+Before upserting, the existing rows for a chunk are fetched (one ``in_``
+lookup per ``LOOKUP_BATCH`` addresses) and merged field by field using
+``MERGE_RULES``, so an upsert never lowers a stored confidence or replaces
+a newer balance with an older one:
+
+    max          keep the larger value (confidence)
+    latest       keep the value from the row with the newest
+                 ``last_balance_check`` (balance_native, balance_usd)
+    keep         existing value wins unless it is None
+    (default)    incoming value wins unless it is None
+
+Columns missing from a new row are left to their database defaults.
+
+If a chunk upsert fails, its rows are retried one by one so a single bad
+row doesn't drop the whole chunk.
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ADDRESS_CONFLICT_KEY = 'address,blockchain'
+
+MERGE_RULES = {
+    'confidence': 'max',
+    'balance_native': 'latest',
+    'balance_usd': 'latest',
+    'last_balance_check': 'latest',
+}
+
+# Column that orders rows for the 'latest' rule
+LATEST_BY = 'last_balance_check'
+
+# Addresses per existing-row lookup (keeps the PostgREST URL short)
+LOOKUP_BATCH = 100
+
+
+def _row_key(row: Dict[str, Any]) -> Tuple[str, str]:
+    return row['address'], row['blockchain']
+
+
+def _is_newer(candidate: Dict[str, Any], current: Dict[str, Any]) -> bool:
+    """True if ``candidate`` has the newer LATEST_BY stamp (ISO strings compare in time order)."""
+    new_stamp, old_stamp = candidate.get(LATEST_BY), current.get(LATEST_BY)
+    if new_stamp is None:
+        return old_stamp is None
+    return old_stamp is None or str(new_stamp) >= str(old_stamp)
+
+
+def merge_address_rows(current: Dict[str, Any], incoming: Dict[str, Any],
+                       rules: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Merge ``incoming`` over ``current`` for the same (address, blockchain)."""
+    rules = MERGE_RULES if rules is None else rules
+    incoming_is_newer = _is_newer(incoming, current)
+    merged = dict(current)
+    for column, value in incoming.items():
+        rule = rules.get(column)
+        if rule == 'max':
+            existing = current.get(column)
+            if existing is None or (value is not None and value > existing):
+                merged[column] = value
+        elif rule == 'latest':
+            if incoming_is_newer and value is not None:
+                merged[column] = value
+        elif rule == 'keep':
+            if current.get(column) is None:
+                merged[column] = value
+        elif value is not None or column not in current:
+            merged[column] = value
+    return merged
+
+
+class AddressBulkWriter:
+    """Bulk upsert of address rows with field-level merge rules."""
+
+    def __init__(self, client, table: str = 'addresses', chunk_size: int = 500,
+                 max_concurrency: int = 4, merge_existing: bool = True,
+                 rules: Optional[Dict[str, str]] = None):
+        self.client = client
+        self.table = table
+        self.chunk_size = chunk_size
+        self.max_concurrency = max(1, max_concurrency)
+        self.merge_existing = merge_existing
+        self.rules = MERGE_RULES if rules is None else rules
+
+    def _dedupe(self, rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        merged: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for row in rows:
+            if not row.get('address') or not row.get('blockchain'):
+                continue
+            key = _row_key(row)
+            merged[key] = merge_address_rows(merged[key], row, self.rules) if key in merged else dict(row)
+        return list(merged.values())
+
+    def _fetch_existing(self, chunk: List[Dict[str, Any]]) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        existing: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        wanted = {_row_key(row) for row in chunk}
+        columns = sorted({column for row in chunk for column in row})
+        for i in range(0, len(chunk), LOOKUP_BATCH):
+            batch = chunk[i:i + LOOKUP_BATCH]
+            result = self.client.table(self.table)\
+                .select(','.join(columns))\
+                .in_('address', sorted({row['address'] for row in batch}))\
+                .in_('blockchain', sorted({row['blockchain'] for row in batch}))\
+                .execute()
+            for row in result.data or []:
+                key = _row_key(row)
+                if key in wanted:
+                    existing[key] = row
+        return existing
+
+    def _prepare(self, chunk: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if self.merge_existing:
+            existing = self._fetch_existing(chunk)
+            chunk = [merge_address_rows(existing[_row_key(row)], row, self.rules)
+                     if _row_key(row) in existing else row for row in chunk]
+        return chunk
+
+    def _upsert(self, rows: List[Dict[str, Any]]) -> None:
+        # default_to_null=False: columns absent from a row take the DB default instead of NULL
+        self.client.table(self.table)\
+            .upsert(rows, on_conflict=ADDRESS_CONFLICT_KEY, default_to_null=False)\
+            .execute()
+
+    def _write_chunk(self, chunk: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """Upsert one chunk; returns (written, failed)."""
+        try:
+            rows = self._prepare(chunk)
+            self._upsert(rows)
+            return len(rows), 0
+        except Exception as e:
+            logger.warning(f"Bulk upsert of {len(chunk)} rows into {self.table} failed, retrying per row: {e}")
+
+        written = failed = 0
+        for row in chunk:
+            try:
+                self._upsert(self._prepare([row]))
+                written += 1
+            except Exception as e:
+                failed += 1
+                logger.error(f"Failed to upsert address {row.get('address')} ({row.get('blockchain')}): {e}")
+        return written, failed
+
+    def write(self, rows: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Merge, chunk and upsert ``rows``. Returns counts and rows/sec."""
+        started = time.perf_counter()
+        unique_rows = self._dedupe(rows)
+        chunks = [unique_rows[i:i + self.chunk_size] for i in range(0, len(unique_rows), self.chunk_size)]
+
+        written = failed = 0
+        if chunks:
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(chunks)),
+                                    thread_name_prefix='AddressWriter') as pool:
+                for chunk_written, chunk_failed in pool.map(self._write_chunk, chunks):
+                    written += chunk_written
+                    failed += chunk_failed
+
+        elapsed = time.perf_counter() - started
+        stats = {
+            'rows': len(unique_rows),
+            'written': written,
+            'failed': failed,
+            'chunks': len(chunks),
+            'seconds': round(elapsed, 3),
+            'rows_per_sec': round(written / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+        logger.info(f"Upserted {written}/{len(unique_rows)} rows into {self.table} in {len(chunks)} chunks "
+                    f"({stats['rows_per_sec']} rows/sec, {failed} failed)")
+        return stats
@@ -21,6 +21,8 @@ from config.api_keys import (
     ALCHEMY_TRON_RPC,
     HELIUS_RPC_URL,
 )
+from utils.metrics import STAGE_LATENCY, register_collector
+from utils.tracing import span, endpoint_label
 
 logger = logging.getLogger(__name__)
 
@@ -108,12 +110,14 @@ def _rpc_call(rpc_url: str, method: str, params: list, timeout: int = 10, cu_cos
         _rate_limiter.wait_if_needed(cu_cost)
         with _rate_limiter._semaphore:
             try:
-                resp = requests.post(rpc_url, json={
-                    'jsonrpc': '2.0',
-                    'method': method,
-                    'params': params,
-                    'id': 1,
-                }, timeout=timeout)
+                with span('alchemy.rpc', metric=STAGE_LATENCY.labels(stage='fetch'),
+                          method=method, endpoint=endpoint_label(rpc_url)):
+                    resp = requests.post(rpc_url, json={
+                        'jsonrpc': '2.0',
+                        'method': method,
+                        'params': params,
+                        'id': 1,
+                    }, timeout=timeout)
                 if resp.status_code == 429:
                     wait = min(2 ** attempt, 8)
                     logger.warning(f"Alchemy 429 rate-limited ({method}), retrying in {wait}s (attempt {attempt}/{_retries})")
@@ -538,3 +542,6 @@ def get_rate_limiter_stats() -> Dict[str, Any]:
         'cu_remaining': _rate_limiter.monthly_budget - _rate_limiter.cu_used,
         'utilization_pct': round(_rate_limiter.cu_used / _rate_limiter.monthly_budget * 100, 2),
     }
+
+
+register_collector('alchemy_rate_limiter', get_rate_limiter_stats)
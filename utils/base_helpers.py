@@ -1,22 +1,101 @@
 # utils/base_helpers.py
 """Base helper functions to avoid circular imports"""
+import atexit
+import os
+import queue
 import sys
+import threading
 from threading import Lock
 from config.settings import print_lock, RUNTIME_ERRORS
 
+# Console output is written by one background thread so callers on the hot
+# path only pay for building the string and a non-blocking enqueue.
+ASYNC_PRINT = os.getenv('WHALE_ASYNC_PRINT', '1') not in ('0', 'false', 'False')
+_PRINT_QUEUE_SIZE = int(os.getenv('WHALE_PRINT_QUEUE_SIZE', '10000'))
+_print_queue: "queue.Queue" = queue.Queue(maxsize=_PRINT_QUEUE_SIZE)
+_print_thread = None
+_print_thread_lock = Lock()
+
+
+def _write_text(text: str, stream, flush: bool = False):
+    """Write already-joined text, surviving Windows cp1252 consoles."""
+    stream = stream or sys.stdout
+    try:
+        stream.write(text)
+    except UnicodeEncodeError:
+        encoding = getattr(stream, 'encoding', None) or 'utf-8'
+        stream.write(text.encode(encoding, errors='replace').decode(encoding, errors='replace'))
+    if flush:
+        stream.flush()
+
+
+def _print_worker():
+    while True:
+        item = _print_queue.get()
+        if item is None:
+            _print_queue.task_done()
+            break
+        text, stream, flush = item
+        try:
+            with print_lock:
+                _write_text(text, stream, flush)
+        except Exception:
+            pass
+        finally:
+            _print_queue.task_done()
+
+
+def _ensure_print_thread():
+    global _print_thread
+    if _print_thread is None:
+        with _print_thread_lock:
+            if _print_thread is None:
+                _print_thread = threading.Thread(target=_print_worker, daemon=True, name="SafePrint")
+                _print_thread.start()
+
+
+def flush_prints():
+    """Block until every queued safe_print line has been written."""
+    if _print_thread is not None:
+        _print_queue.join()
+
+
+atexit.register(flush_prints)
+
+
+def _register_print_queue_gauge():
+    from utils.metrics import QUEUE_DEPTH
+    QUEUE_DEPTH.labels(queue='safe_print').set_function(_print_queue.qsize)
+
+
+_register_print_queue_gauge()
+
+
 def safe_print(*args, **kwargs):
-    """Thread-safe print function that survives Windows cp1252 consoles."""
+    """Thread-safe print function that survives Windows cp1252 consoles.
+
+    Output is handed to a background writer; if its bounded queue is full the
+    line is written synchronously instead of being dropped.
+    """
+    sep = kwargs.get('sep', ' ')
+    end = kwargs.get('end', '\n')
+    text = (sep if sep is not None else ' ').join(str(arg) for arg in args) + (end if end is not None else '\n')
+    stream = kwargs.get('file')
+    flush = kwargs.get('flush', False)
+
+    if ASYNC_PRINT:
+        _ensure_print_thread()
+        try:
+            _print_queue.put_nowait((text, stream, flush))
+            return
+        except queue.Full:
+            pass
+
     with print_lock:
         try:
-            print(*args, **kwargs)
-        except UnicodeEncodeError:
-            sep = kwargs.get('sep', ' ')
-            end = kwargs.get('end', '\n')
-            text = sep.join(str(arg) for arg in args)
-            encoding = getattr(sys.stdout, 'encoding', None) or 'utf-8'
-            safe_text = text.encode(encoding, errors='replace').decode(encoding, errors='replace')
-            sys.stdout.write(safe_text + end)
-            sys.stdout.flush()
+            _write_text(text, stream, flush)
+        except Exception:
+            pass
 
 def log_error(error_message: str):
     """
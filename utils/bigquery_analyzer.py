@@ -1,9 +1,11 @@
 import os
+import threading
 import time
 from datetime import datetime, timedelta
 from google.cloud import bigquery
 from config.api_keys import GCP_PROJECT_ID
 from config.settings import TEST_MODE
+from utils.metrics import register_collector
 import logging
 from typing import Dict, Any, Optional, List, Tuple
 
@@ -29,6 +31,11 @@ class BigQueryAnalyzer:
         self.daily_query_count = 0
         self.last_query_date = None
 
+        # Local profile store + scheduled batch refresher, created on first lookup
+        self._profile_store = None
+        self._profile_refresher = None
+        self._profile_lock = threading.Lock()
+
     def _initialize_client(self) -> Optional[bigquery.Client]:
         """Initializes the BigQuery client using service account credentials."""
         try:
@@ -167,6 +174,11 @@ class BigQueryAnalyzer:
         - Whale classification tiers
         - Historical activity insights
         
+        Stats come from the local address profile store, which the background
+        ProfileRefresher fills with batched BigQuery queries. An address that
+        has not been profiled yet is queued for the next batch and this call
+        returns None rather than running a query on the live path.
+        
         Args:
             address: Ethereum address to analyze
             
@@ -176,95 +188,128 @@ class BigQueryAnalyzer:
         if not self.client:
             logger.debug(f"BigQuery client not available for whale analysis of {address}")
             return None
-        
-        # 🔧 CRITICAL: Check quota status before expensive whale analysis
-        if not self._check_quota_status():
-            logger.debug(f"BigQuery quota exhausted - skipping whale analysis for {address}")
-            return None
-
+            
         try:
             address = address.lower()
             
-            # Get historical stats first
-            historical_stats = self.get_address_historical_stats(address)
+            historical_stats = self.get_profile(address)
             if not historical_stats:
                 return None
             
-            # Extract key metrics with defensive coding for None values
-            total_eth_volume = float(historical_stats.get('total_eth_volume') or 0)
-            max_eth_in_tx = float(historical_stats.get('max_eth_in_tx') or 0)
-            total_transactions = int(historical_stats.get('total_transactions') or 0)
-            active_days = int(historical_stats.get('active_days') or 0)
-            unique_counterparties = int(historical_stats.get('unique_counterparties') or 0)
-            
-            # Whale classification logic
-            whale_tier = "UNKNOWN"
-            whale_confidence = 0.0
-            whale_signals = []
-            
-            # Volume-based classification
-            if total_eth_volume >= 10000:  # 10,000+ ETH
-                whale_tier = "MEGA_WHALE"
-                whale_confidence = 0.95
-                whale_signals.append("MEGA_VOLUME_WHALE")
-            elif total_eth_volume >= 1000:  # 1,000+ ETH
-                whale_tier = "ULTRA_WHALE"
-                whale_confidence = 0.85
-                whale_signals.append("ULTRA_VOLUME_WHALE")
-            elif total_eth_volume >= 100:   # 100+ ETH
-                whale_tier = "WHALE"
-                whale_confidence = 0.70
-                whale_signals.append("HIGH_VOLUME_WHALE")
-            elif total_eth_volume >= 10:    # 10+ ETH
-                whale_tier = "MINI_WHALE"
-                whale_confidence = 0.50
-                whale_signals.append("MODERATE_VOLUME")
-            
-            # Single transaction size analysis
-            if max_eth_in_tx >= 1000:
-                whale_signals.append("MEGA_SINGLE_TX")
-                whale_confidence = min(0.95, whale_confidence + 0.15)
-            elif max_eth_in_tx >= 100:
-                whale_signals.append("LARGE_SINGLE_TX")
-                whale_confidence = min(0.90, whale_confidence + 0.10)
-            
-            # Activity pattern analysis
-            if total_transactions >= 1000:
-                whale_signals.append("HIGH_FREQUENCY_TRADER")
-                whale_confidence = min(0.90, whale_confidence + 0.05)
-            
-            if active_days >= 100:
-                whale_signals.append("PERSISTENT_ACTOR")
-                whale_confidence = min(0.90, whale_confidence + 0.05)
-            
-            if unique_counterparties >= 100:
-                whale_signals.append("PROTOCOL_INTERACTOR")
-                whale_confidence = min(0.90, whale_confidence + 0.05)
-            
-            # Prepare analysis result
-            analysis_result = {
-                'whale_tier': whale_tier,
-                'whale_confidence': whale_confidence,
-                'whale_signals': whale_signals,
-                'historical_stats': historical_stats,
-                'analysis_summary': {
-                    'total_volume_eth': total_eth_volume,
-                    'max_single_tx_eth': max_eth_in_tx,
-                    'activity_score': min(100, (active_days * total_transactions) / 10),
-                    'network_reach': unique_counterparties
-                },
-                'is_whale': whale_confidence >= 0.50,
-                'classification_method': 'bigquery_historical_analysis'
-            }
-            
-            logger.debug(f"BigQuery whale analysis for {address}: {whale_tier} (confidence: {whale_confidence:.2f})")
-            
-            return analysis_result
+            return self._whale_patterns_from_stats(address, historical_stats)
             
         except Exception as e:
             logger.warning(f"BigQuery whale pattern analysis failed for {address}: {e}")
             return None
 
+    def _whale_patterns_from_stats(self, address: str, historical_stats: Dict[str, Any]) -> Dict[str, Any]:
+        """Whale tier, confidence and signals from an address's historical stats."""
+        # Extract key metrics with defensive coding for None values
+        total_eth_volume = float(historical_stats.get('total_eth_volume') or 0)
+        max_eth_in_tx = float(historical_stats.get('max_eth_in_tx') or 0)
+        total_transactions = int(historical_stats.get('total_transactions') or 0)
+        active_days = int(historical_stats.get('active_days') or 0)
+        unique_counterparties = int(historical_stats.get('unique_counterparties') or 0)
+        
+        # Whale classification logic
+        whale_tier = "UNKNOWN"
+        whale_confidence = 0.0
+        whale_signals = []
+        
+        # Volume-based classification
+        if total_eth_volume >= 10000:  # 10,000+ ETH
+            whale_tier = "MEGA_WHALE"
+            whale_confidence = 0.95
+            whale_signals.append("MEGA_VOLUME_WHALE")
+        elif total_eth_volume >= 1000:  # 1,000+ ETH
+            whale_tier = "ULTRA_WHALE"
+            whale_confidence = 0.85
+            whale_signals.append("ULTRA_VOLUME_WHALE")
+        elif total_eth_volume >= 100:   # 100+ ETH
+            whale_tier = "WHALE"
+            whale_confidence = 0.70
+            whale_signals.append("HIGH_VOLUME_WHALE")
+        elif total_eth_volume >= 10:    # 10+ ETH
+            whale_tier = "MINI_WHALE"
+            whale_confidence = 0.50
+            whale_signals.append("MODERATE_VOLUME")
+        
+        # Single transaction size analysis
+        if max_eth_in_tx >= 1000:
+            whale_signals.append("MEGA_SINGLE_TX")
+            whale_confidence = min(0.95, whale_confidence + 0.15)
+        elif max_eth_in_tx >= 100:
+            whale_signals.append("LARGE_SINGLE_TX")
+            whale_confidence = min(0.90, whale_confidence + 0.10)
+        
+        # Activity pattern analysis
+        if total_transactions >= 1000:
+            whale_signals.append("HIGH_FREQUENCY_TRADER")
+            whale_confidence = min(0.90, whale_confidence + 0.05)
+        
+        if active_days >= 100:
+            whale_signals.append("PERSISTENT_ACTOR")
+            whale_confidence = min(0.90, whale_confidence + 0.05)
+        
+        if unique_counterparties >= 100:
+            whale_signals.append("PROTOCOL_INTERACTOR")
+            whale_confidence = min(0.90, whale_confidence + 0.05)
+        
+        # Prepare analysis result
+        analysis_result = {
+            'whale_tier': whale_tier,
+            'whale_confidence': whale_confidence,
+            'whale_signals': whale_signals,
+            'historical_stats': historical_stats,
+            'analysis_summary': {
+                'total_volume_eth': total_eth_volume,
+                'max_single_tx_eth': max_eth_in_tx,
+                'activity_score': min(100, (active_days * total_transactions) / 10),
+                'network_reach': unique_counterparties
+            },
+            'is_whale': whale_confidence >= 0.50,
+            'classification_method': 'bigquery_historical_analysis'
+        }
+        
+        logger.debug(f"BigQuery whale analysis for {address}: {whale_tier} (confidence: {whale_confidence:.2f})")
+        
+        return analysis_result
+
+    def _get_profile_refresher(self):
+        """Create the profile store and start the refresher on first use (requires a BigQuery client)."""
+        if self._profile_refresher is None:
+            with self._profile_lock:
+                if self._profile_refresher is None:
+                    from utils.address_profile_store import AddressProfileStore, ProfileRefresher
+                    self._profile_store = AddressProfileStore()
+                    refresher = ProfileRefresher(self, self._profile_store)
+                    refresher.start()
+                    self._profile_refresher = refresher
+        return self._profile_refresher
+
+    def get_profile(self, address: str) -> Optional[Dict[str, Any]]:
+        """
+        Stored historical stats for an address, from the local profile store.
+        
+        Misses are queued for the next scheduled batch query; stale profiles
+        are still returned and re-profiled in the background. Without a
+        BigQuery client nothing could ever fill the store, so this returns
+        None without creating it.
+        """
+        if not self.client:
+            return None
+        refresher = self._get_profile_refresher()
+        address = address.lower()
+        profile = self._profile_store.get(address)
+        if profile is None:
+            refresher.enqueue([address])
+        return profile
+
+    def get_profile_stats(self) -> Dict[str, Any]:
+        if self._profile_refresher is None:
+            return {'enabled': False}
+        return {'enabled': True, **self._profile_refresher.get_stats()}
+
     def get_address_historical_stats(self, address: str) -> Optional[Dict[str, Any]]:
         """
         Queries BigQuery for historical transaction stats for a given address.
@@ -330,6 +375,87 @@ class BigQueryAnalyzer:
                 logger.error(f"BigQuery query failed for address {address}: {e}")
                 return None
 
+    def get_addresses_historical_stats(self, addresses: List[str]) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Historical stats for many addresses in one parameterized query.
+        
+        Computes the same columns as get_address_historical_stats over the same
+        365-day window, grouped per address via UNNEST(@addresses). Addresses
+        with no activity get zero counts. Returns None if the query could not
+        run (no client, quota exhausted, error) so callers can retry later.
+        """
+        if not self.client or not addresses:
+            return None
+
+        addresses = sorted({address.lower() for address in addresses})
+        # A transaction matches an address on either side; a self-transfer is
+        # counted once, as in the single-address OR filter.
+        query = """
+            WITH targets AS (
+                SELECT address FROM UNNEST(@addresses) AS address
+            ),
+            matched AS (
+                SELECT t.address, tx.block_timestamp, tx.value, tx.to_address
+                FROM `bigquery-public-data.crypto_ethereum.transactions` tx
+                JOIN targets t ON tx.from_address = t.address
+                WHERE tx.block_timestamp >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL 365 DAY)
+                UNION ALL
+                SELECT t.address, tx.block_timestamp, tx.value, tx.to_address
+                FROM `bigquery-public-data.crypto_ethereum.transactions` tx
+                JOIN targets t ON tx.to_address = t.address
+                WHERE tx.block_timestamp >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL 365 DAY)
+                    AND (tx.from_address IS NULL OR tx.from_address != t.address)
+            )
+            SELECT
+                address,
+                COUNT(*) AS total_transactions,
+                COUNT(DISTINCT DATE(block_timestamp)) as active_days,
+                SUM(value / POW(10, 18)) AS total_eth_volume,
+                AVG(value / POW(10, 18)) AS avg_eth_per_tx,
+                MAX(value / POW(10, 18)) AS max_eth_in_tx,
+                COUNT(DISTINCT to_address) as unique_counterparties
+            FROM matched
+            GROUP BY address
+        """
+
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[
+                bigquery.ArrayQueryParameter("addresses", "STRING", addresses),
+            ]
+        )
+
+        if not self._check_quota_status():
+            logger.debug(f"BigQuery quota exhausted - skipping batch profile of {len(addresses)} addresses")
+            return None
+
+        try:
+            logger.info(f"Running BigQuery batch profile for {len(addresses)} addresses")
+            results = self.client.query(query, job_config=job_config).result()
+            stats = {
+                address: {
+                    'total_transactions': 0,
+                    'active_days': 0,
+                    'total_eth_volume': None,
+                    'avg_eth_per_tx': None,
+                    'max_eth_in_tx': None,
+                    'unique_counterparties': 0,
+                }
+                for address in addresses
+            }
+            for row in results:
+                row_dict = {key: value for key, value in row.items()}
+                stats[row_dict.pop('address')] = row_dict
+            return stats
+
+        except Exception as e:
+            error_msg = str(e)
+            if self._is_quota_error(error_msg):
+                self._handle_quota_exhaustion(error_msg)
+                logger.debug("BigQuery quota exhausted during batch profile - fallback mode activated")
+            else:
+                logger.error(f"BigQuery batch profile of {len(addresses)} addresses failed: {e}")
+            return None
+
     def get_whale_addresses_by_volume(self, min_volume_eth: float = 1000) -> Optional[Dict[str, Any]]:
         """
         Queries BigQuery to find addresses with high transaction volumes.
@@ -396,5 +522,34 @@ class BigQueryAnalyzer:
             logger.error(f"BigQuery whale discovery query failed: {e}")
             return None
 
-# Global instance
-bigquery_analyzer = BigQueryAnalyzer() 
\ No newline at end of file
+# Global instance, created on first use: construction authenticates and runs a
+# test query, which must not happen as a side effect of importing this module.
+_bigquery_analyzer: Optional[BigQueryAnalyzer] = None
+_bigquery_analyzer_lock = threading.Lock()
+
+
+def get_bigquery_analyzer() -> BigQueryAnalyzer:
+    """Return the shared BigQueryAnalyzer, initializing it on first call."""
+    global _bigquery_analyzer
+    if _bigquery_analyzer is None:
+        with _bigquery_analyzer_lock:
+            if _bigquery_analyzer is None:
+                _bigquery_analyzer = BigQueryAnalyzer()
+    return _bigquery_analyzer
+
+
+def get_profile_store_stats() -> Dict[str, Any]:
+    """Profile store/refresher stats, without initializing the analyzer."""
+    if _bigquery_analyzer is None:
+        return {'enabled': False}
+    return _bigquery_analyzer.get_profile_stats()
+
+
+register_collector('address_profiles', get_profile_store_stats)
+
+
+def __getattr__(name: str):
+    # Keep `from utils.bigquery_analyzer import bigquery_analyzer` working (PEP 562)
+    if name == 'bigquery_analyzer':
+        return get_bigquery_analyzer()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}") 
\ No newline at end of file
@@ -24,6 +24,7 @@ import asyncio
 
 # Import the AddressData class from api_integrations
 from .api_integrations import AddressData
+from .bigquery_query_cache import BigQueryQueryCache
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -124,9 +125,11 @@ class ComprehensiveWhaleDetector:
 class BigQueryPublicDatasetExtractorBase(ABC):
     """Base class for extracting addresses from BigQuery public datasets."""
     
-    def __init__(self, bigquery_client: bigquery.Client, project_id: str):
+    def __init__(self, bigquery_client: bigquery.Client, project_id: str,
+                 query_cache: Optional[BigQueryQueryCache] = None):
         self.bigquery_client = bigquery_client
         self.project_id = project_id
+        self.query_cache = query_cache or BigQueryQueryCache()
         self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
         self.whale_detector = ComprehensiveWhaleDetector()
     
@@ -138,11 +141,8 @@ class BigQueryPublicDatasetExtractorBase(ABC):
             if job_config is None:
                 job_config = bigquery.QueryJobConfig()
             
-            query_job = self.bigquery_client.query(query, job_config=job_config)
-            results = query_job.result()
-            
-            # Convert results to list of dictionaries
-            rows = [dict(row) for row in results]
+            # Cached result, or a dry-run-budgeted job fetched as Arrow
+            rows = self.query_cache.execute(self.bigquery_client, query, job_config)
             
             self.logger.info(f"Query executed successfully, returned {len(rows)} rows")
             return rows
@@ -983,18 +983,21 @@ class BigQueryPublicDataIntegrationManager:
         self.project_id = project_id
         self.logger = logging.getLogger(f"{__name__}.BigQueryPublicDataIntegrationManager")
         
+        # Result cache and per-run byte budget shared by all extractors
+        self.query_cache = BigQueryQueryCache()
+        
         # Initialize whale detector for price constants
         self.whale_detector = ComprehensiveWhaleDetector()
         
         # Initialize extractors
         self.extractors = {
-            'ethereum': EthereumPublicDataExtractor(bigquery_client, project_id),
-            'bitcoin': BitcoinPublicDataExtractor(bigquery_client, project_id),
-            'solana': SolanaPublicDataExtractor(bigquery_client, project_id),
-            'polygon': PolygonPublicDataExtractor(bigquery_client, project_id),
-            'avalanche': AvalanchePublicDataExtractor(bigquery_client, project_id),
-            'arbitrum': ArbitrumPublicDataExtractor(bigquery_client, project_id),
-            'optimism': OptimismPublicDataExtractor(bigquery_client, project_id)
+            'ethereum': EthereumPublicDataExtractor(bigquery_client, project_id, self.query_cache),
+            'bitcoin': BitcoinPublicDataExtractor(bigquery_client, project_id, self.query_cache),
+            'solana': SolanaPublicDataExtractor(bigquery_client, project_id, self.query_cache),
+            'polygon': PolygonPublicDataExtractor(bigquery_client, project_id, self.query_cache),
+            'avalanche': AvalanchePublicDataExtractor(bigquery_client, project_id, self.query_cache),
+            'arbitrum': ArbitrumPublicDataExtractor(bigquery_client, project_id, self.query_cache),
+            'optimism': OptimismPublicDataExtractor(bigquery_client, project_id, self.query_cache)
         }
         
         self.logger.info(f"Initialized {len(self.extractors)} public dataset extractors")
@@ -1016,6 +1019,7 @@ class BigQueryPublicDataIntegrationManager:
     def collect_all_public_data_addresses(self, limit_per_query: int = 5000) -> List[AddressData]:
         """Collect addresses from all public dataset extractors."""
         all_addresses = []
+        self.start_run()
         
         for name, extractor in self.extractors.items():
             try:
@@ -1029,8 +1033,13 @@ class BigQueryPublicDataIntegrationManager:
                 continue
         
         self.logger.info(f"Total addresses collected from all public datasets: {len(all_addresses)}")
+        self.logger.info(f"BigQuery query cache: {self.query_cache.get_stats()}")
         return all_addresses
     
+    def start_run(self) -> None:
+        """Start a discovery run: resets the bytes-processed budget shared by all queries."""
+        self.query_cache.start_run()
+    
     # ============================================================================
     # PHASE 3: ADVANCED SQL QUERY PATTERNS
     # ============================================================================
@@ -1659,11 +1668,8 @@ class BigQueryPublicDataIntegrationManager:
             if job_config is None:
                 job_config = bigquery.QueryJobConfig()
             
-            query_job = self.bigquery_client.query(query, job_config=job_config)
-            results = query_job.result()
-            
-            # Convert results to list of dictionaries
-            rows = [dict(row) for row in results]
+            # Cached result, or a dry-run-budgeted job fetched as Arrow
+            rows = self.query_cache.execute(self.bigquery_client, query, job_config)
             
             self.logger.info(f"Query executed successfully, returned {len(rows)} rows")
             return rows
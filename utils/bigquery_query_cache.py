@@ -0,0 +1,239 @@
+"""BigQuery Query Cache - content-addressed result cache and per-run byte budget.
+
+Discovery runs regenerate the same whale/exchange/DeFi queries with the same
+parameters. ``BigQueryQueryCache.execute`` keys each query by its normalized
+SQL (comments dropped, whitespace collapsed outside literals) plus its query
+parameters, and serves a fresh local copy instead of running a job.
+
+On a miss the query is first dry-run. If its estimated bytes processed would
+push the run past ``byte_budget`` it is refused with ``QueryBudgetExceeded``;
+otherwise the estimate is reserved, the job runs with ``maximum_bytes_billed``
+capped at the remaining budget, and the actual bytes are settled afterwards.
+``start_run()`` resets the budget.
+
+Results are fetched as Arrow (through the BigQuery Storage Read API when
+google-cloud-bigquery-storage is installed, paged REST otherwise) and cached
+as zstd-compressed Parquet. Without pyarrow, rows are materialized one by one
+and cached as gzipped JSON (values JSON can't represent, such as datetimes
+and Decimals, are stored as strings).
+
+Environment:
+    WHALE_BQ_CACHE_DIR           cache directory (default data/bigquery_cache)
+    WHALE_BQ_CACHE_TTL_SECONDS   result TTL (default 21600)
+    WHALE_BQ_RUN_BYTE_BUDGET     bytes processed per run (default 500 GB)
+"""
+
+import copy
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+try:
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pq = None
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+QUERY_CACHE_DIR = os.getenv(
+    'WHALE_BQ_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'bigquery_cache')
+)
+QUERY_CACHE_TTL_SECONDS = float(os.getenv('WHALE_BQ_CACHE_TTL_SECONDS', str(6 * 3600)))
+RUN_BYTE_BUDGET = int(float(os.getenv('WHALE_BQ_RUN_BYTE_BUDGET', str(500 * 10**9))))
+
+# String/identifier literals (kept verbatim), comments (dropped), whitespace runs (collapsed)
+_SQL_TOKENS = re.compile(
+    r"""('(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|`[^`]*`)|(--[^\n]*|/\*.*?\*/)|(\s+)""",
+    re.DOTALL,
+)
+
+
+class QueryBudgetExceeded(Exception):
+    """A query's dry-run estimate would exceed the remaining per-run byte budget."""
+
+
+def normalize_sql(query: str) -> str:
+    """Canonical form of ``query`` for cache keys: no comments, single spaces outside literals."""
+    parts: List[str] = []
+    position = 0
+    for match in _SQL_TOKENS.finditer(query):
+        if match.start() > position:
+            parts.append(query[position:match.start()])
+        position = match.end()
+        literal = match.group(1)
+        if literal is not None:
+            parts.append(literal)
+        elif not parts or not parts[-1].endswith(' '):
+            parts.append(' ')
+    parts.append(query[position:])
+    return ''.join(parts).strip()
+
+
+def query_cache_key(query: str, job_config=None) -> str:
+    """sha256 over the normalized SQL and the job's query parameters."""
+    params = []
+    for param in getattr(job_config, 'query_parameters', None) or []:
+        params.append(param.to_api_repr())
+    payload = json.dumps({'sql': normalize_sql(query), 'params': params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _format_bytes(num_bytes: float) -> str:
+    return f"{num_bytes / 10**9:,.2f} GB"
+
+
+class BigQueryQueryCache:
+    """Local result cache plus dry-run byte budget in front of ``bigquery.Client.query``."""
+
+    def __init__(self, cache_dir: str = QUERY_CACHE_DIR, ttl_seconds: float = QUERY_CACHE_TTL_SECONDS,
+                 byte_budget: int = RUN_BYTE_BUDGET):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.byte_budget = byte_budget
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._bytes_reserved = 0
+        self._bytes_processed = 0
+        self.stats = {'hits': 0, 'misses': 0, 'rejected': 0, 'bytes_estimated': 0, 'bytes_processed': 0}
+
+    # ------------------------------------------------------------------
+    # Budget
+
+    def start_run(self) -> None:
+        """Reset the per-run byte budget."""
+        with self._lock:
+            self._bytes_reserved = 0
+            self._bytes_processed = 0
+
+    @property
+    def bytes_remaining(self) -> int:
+        with self._lock:
+            return max(0, self.byte_budget - self._bytes_processed - self._bytes_reserved)
+
+    def _reserve(self, estimate: int) -> int:
+        """Reserve ``estimate`` bytes; returns the bytes left for maximum_bytes_billed."""
+        with self._lock:
+            remaining = self.byte_budget - self._bytes_processed - self._bytes_reserved
+            if estimate > remaining:
+                self.stats['rejected'] += 1
+                raise QueryBudgetExceeded(
+                    f"query would process {_format_bytes(estimate)}, "
+                    f"{_format_bytes(max(0, remaining))} left of the {_format_bytes(self.byte_budget)} run budget"
+                )
+            self._bytes_reserved += estimate
+            return remaining
+
+    def _settle(self, estimate: int, processed: int) -> None:
+        with self._lock:
+            self._bytes_reserved -= estimate
+            self._bytes_processed += processed
+            self.stats['bytes_processed'] += processed
+
+    def _dry_run(self, client, query: str, job_config) -> int:
+        from google.cloud import bigquery
+
+        dry_config = copy.deepcopy(job_config) if job_config is not None else bigquery.QueryJobConfig()
+        dry_config.dry_run = True
+        dry_config.use_query_cache = False
+        estimate = int(client.query(query, job_config=dry_config).total_bytes_processed or 0)
+        with self._lock:
+            self.stats['bytes_estimated'] += estimate
+        return estimate
+
+    # ------------------------------------------------------------------
+    # Result files
+
+    def _path(self, key: str) -> str:
+        extension = 'parquet' if PYARROW_AVAILABLE else 'json.gz'
+        return os.path.join(self.cache_dir, f"{key}.{extension}")
+
+    def _load(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl_seconds:
+                return None
+            if PYARROW_AVAILABLE:
+                return pq.read_table(path).to_pylist()
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Discarding unreadable BigQuery cache entry {path}: {e}")
+            return None
+
+    def _store(self, key: str, table_or_rows) -> None:
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            if PYARROW_AVAILABLE:
+                pq.write_table(table_or_rows, tmp_path, compression='zstd')
+            else:
+                with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+                    json.dump(table_or_rows, f, default=str)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Failed to write BigQuery cache entry {path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    # ------------------------------------------------------------------
+
+    def execute(self, client, query: str, job_config=None) -> List[Dict[str, Any]]:
+        """Rows for ``query`` as dictionaries, from the local cache or a budgeted job."""
+        from google.cloud import bigquery
+
+        key = query_cache_key(query, job_config)
+        rows = self._load(key)
+        if rows is not None:
+            with self._lock:
+                self.stats['hits'] += 1
+            logger.info(f"BigQuery cache hit {key[:12]} ({len(rows)} rows)")
+            return rows
+        with self._lock:
+            self.stats['misses'] += 1
+
+        estimate = self._dry_run(client, query, job_config)
+        remaining = self._reserve(estimate)
+        processed = 0
+        try:
+            run_config = copy.deepcopy(job_config) if job_config is not None else bigquery.QueryJobConfig()
+            # Let BigQuery itself refuse a job that would bill past the budget
+            run_config.maximum_bytes_billed = max(remaining, estimate, 1)
+            query_job = client.query(query, job_config=run_config)
+            results = query_job.result()
+            processed = int(query_job.total_bytes_processed if query_job.total_bytes_processed is not None
+                            else estimate)
+
+            if PYARROW_AVAILABLE:
+                table = results.to_arrow(create_bqstorage_client=True)
+                rows = table.to_pylist()
+                self._store(key, table)
+            else:
+                rows = [dict(row) for row in results]
+                self._store(key, rows)
+        finally:
+            self._settle(estimate, processed)
+
+        logger.info(f"BigQuery query {key[:12]} processed {_format_bytes(processed)} "
+                    f"(estimated {_format_bytes(estimate)}), {len(rows)} rows cached")
+        return rows
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                'byte_budget': self.byte_budget,
+                'run_bytes_processed': self._bytes_processed,
+                'run_bytes_reserved': self._bytes_reserved,
+            }
@@ -360,6 +360,49 @@ class BlockchainDataProcessor:
             if self.github_manager:
                 self.github_manager.cleanup()
     
+    def store_github_data(self, repo_names: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Extract GitHub addresses and store each repository's batch as soon as
+        its extractor finishes, so the full set is never held in memory.
+        
+        Args:
+            repo_names: Specific repositories to extract from. If None, extracts from all.
+            
+        Returns:
+            Dict with address, written and failed counts, the blockchains seen
+            and the per-extractor report
+        """
+        result = {'addresses': 0, 'written': 0, 'failed': 0, 'blockchains': set(), 'report': {}}
+        if not self.github_manager:
+            if not self.initialize_data_acquisition():
+                return result
+        
+        try:
+            self.logger.info("Starting GitHub data collection (streaming to storage)...")
+            if not self.supabase_client:
+                self.create_supabase_client()
+            writer = self._collected_writer()
+            
+            def sink(addresses: List[GitHubAddressData]) -> None:
+                stats = writer.write(self._collected_row(address_data) for address_data in addresses)
+                result['addresses'] += len(addresses)
+                result['written'] += stats['written']
+                result['failed'] += stats['failed']
+                result['blockchains'].update(address_data.blockchain for address_data in addresses)
+            
+            result['report'] = self.github_manager.stream_repositories(sink, repo_names=repo_names)
+            self.logger.info(f"Stored {result['written']} of {result['addresses']} GitHub addresses "
+                             f"({result['failed']} failed)")
+            return result
+            
+        except Exception as e:
+            self.logger.error(f"Failed to store GitHub data: {e}")
+            result['error'] = str(e)
+            return result
+        finally:
+            if self.github_manager:
+                self.github_manager.cleanup()
+    
     def collect_bigquery_public_data_addresses(self, limit_per_query: int = 5000) -> List[AddressData]:
         """
         Collect address data from BigQuery public datasets.
@@ -682,13 +725,16 @@ class BlockchainDataProcessor:
         
         return enhancement
     
-    def collect_all_data(self, include_realtime: bool = False, realtime_duration: int = 5) -> Dict[str, List]:
+    def collect_all_data(self, include_realtime: bool = False, realtime_duration: int = 5,
+                         include_github: bool = True) -> Dict[str, List]:
         """
         Collect address data from all sources (APIs, GitHub repositories, Analytics, and BigQuery).
         
         Args:
             include_realtime: Whether to include real-time WebSocket data
             realtime_duration: Duration in minutes for real-time collection
+            include_github: Whether to collect GitHub data (see store_github_data
+                to stream it straight to storage instead)
             
         Returns:
             Dict containing collected data from different sources
@@ -709,7 +755,7 @@ class BlockchainDataProcessor:
             collected_data['api_data'] = api_data
             
             # Collect GitHub data
-            github_data = self.collect_github_data()
+            github_data = self.collect_github_data() if include_github else []
             collected_data['github_data'] = github_data
             
             # Collect Analytics data (whale addresses from analytics platforms)
@@ -735,6 +781,29 @@ class BlockchainDataProcessor:
             self.logger.error(f"Failed to collect all data: {e}")
             return collected_data
     
+    def _collected_writer(self):
+        """Bulk writer for collected addresses."""
+        from utils.address_writer import AddressBulkWriter, MERGE_RULES
+        
+        # All sources go through one bulk upsert; collected rows never
+        # overwrite the label/source/type of an address already stored
+        return AddressBulkWriter(
+            self.supabase_client,
+            rules={**MERGE_RULES, 'label': 'keep', 'source': 'keep', 'address_type': 'keep'}
+        )
+    
+    @staticmethod
+    def _collected_row(address_data) -> Dict[str, Any]:
+        """Addresses table row for a collected AddressData/GitHubAddressData."""
+        return {
+            'address': address_data.address,
+            'blockchain': address_data.blockchain,
+            'label': address_data.initial_label,
+            'source': address_data.source_system,
+            'confidence': address_data.confidence_score,
+            'address_type': 'collected'
+        }
+    
     def store_collected_data(self, collected_data: Dict[str, List]) -> bool:
         """
         Store collected address data to Supabase.
@@ -749,104 +818,18 @@ class BlockchainDataProcessor:
             if not self.supabase_client:
                 self.create_supabase_client()
             
-            total_stored = 0
-            
-            # Store API data
-            for address_data in collected_data.get('api_data', []):
-                try:
-                    record = {
-                        'address': address_data.address,
-                        'blockchain': address_data.blockchain,
-                        'label': address_data.initial_label,
-                        'source': address_data.source_system,
-                        'confidence': address_data.confidence_score,
-                        'address_type': 'collected'
-                    }
-                    
-                    result = self.supabase_client.table('addresses').insert(record).execute()
-                    total_stored += 1
-                    
-                except Exception as e:
-                    self.logger.error(f"Failed to store API address {address_data.address}: {e}")
-                    continue
-            
-            # Store GitHub data
-            for github_data in collected_data.get('github_data', []):
-                try:
-                    record = {
-                        'address': github_data.address,
-                        'blockchain': github_data.blockchain,
-                        'label': github_data.initial_label,
-                        'source': github_data.source_system,
-                        'confidence': github_data.confidence_score,
-                        'address_type': 'collected'
-                    }
-                    
-                    result = self.supabase_client.table('addresses').insert(record).execute()
-                    total_stored += 1
-                    
-                except Exception as e:
-                    self.logger.error(f"Failed to store GitHub address {github_data.address}: {e}")
-                    continue
-            
-            # Store real-time data
-            for realtime_data in collected_data.get('realtime_data', []):
-                try:
-                    record = {
-                        'address': realtime_data.address,
-                        'blockchain': realtime_data.blockchain,
-                        'label': realtime_data.initial_label,
-                        'source': realtime_data.source_system,
-                        'confidence': realtime_data.confidence_score,
-                        'address_type': 'collected'
-                    }
-                    
-                    result = self.supabase_client.table('addresses').insert(record).execute()
-                    total_stored += 1
-                    
-                except Exception as e:
-                    self.logger.error(f"Failed to store realtime address {realtime_data.address}: {e}")
-                    continue
+            writer = self._collected_writer()
             
-            # Store analytics data
-            for analytics_addr in collected_data.get('analytics_data', []):
-                try:
-                    record = {
-                        'address': analytics_addr.address,
-                        'blockchain': analytics_addr.blockchain,
-                        'label': analytics_addr.initial_label,
-                        'source': analytics_addr.source_system,
-                        'confidence': analytics_addr.confidence_score,
-                        'address_type': 'collected'
-                    }
-                    
-                    result = self.supabase_client.table('addresses').insert(record).execute()
-                    total_stored += 1
-                    
-                except Exception as e:
-                    self.logger.error(f"Failed to store analytics address {analytics_addr.address}: {e}")
-                    continue
+            records = []
+            for source_key in ('api_data', 'github_data', 'realtime_data', 'analytics_data', 'bigquery_data'):
+                for address_data in collected_data.get(source_key, []):
+                    records.append(self._collected_row(address_data))
             
-            # Store BigQuery data
-            for bigquery_addr in collected_data.get('bigquery_data', []):
-                try:
-                    record = {
-                        'address': bigquery_addr.address,
-                        'blockchain': bigquery_addr.blockchain,
-                        'label': bigquery_addr.initial_label,
-                        'source': bigquery_addr.source_system,
-                        'confidence': bigquery_addr.confidence_score,
-                        'address_type': 'collected'
-                    }
-                    
-                    result = self.supabase_client.table('addresses').insert(record).execute()
-                    total_stored += 1
-                    
-                except Exception as e:
-                    self.logger.error(f"Failed to store BigQuery address {bigquery_addr.address}: {e}")
-                    continue
+            result = writer.write(records)
+            total_stored = result['written']
             
-            self.logger.info(f"Successfully stored {total_stored} addresses to Supabase")
+            self.logger.info(f"Successfully stored {total_stored} addresses to Supabase "
+                             f"({result['rows_per_sec']} rows/sec, {result['failed']} failed)")
             return True
             
         except Exception as e:
@@ -879,17 +862,25 @@ class BlockchainDataProcessor:
                 results['errors'].append("Failed to initialize data acquisition managers")
                 return results
             
-            # Collect all data
+            # Collect all data; when storing, GitHub batches are streamed to
+            # storage per repository instead of being collected in memory
             collected_data = self.collect_all_data(
                 include_realtime=include_realtime,
-                realtime_duration=5
+                realtime_duration=5,
+                include_github=not store_data
             )
             
             results['collected_data'] = collected_data
             
+            github_stored = None
+            if store_data:
+                github_stored = self.store_github_data()
+                results['github_report'] = github_stored['report']
+            
             # Calculate statistics
             api_count = len(collected_data.get('api_data', []))
-            github_count = len(collected_data.get('github_data', []))
+            github_count = (github_stored['addresses'] if github_stored is not None
+                            else len(collected_data.get('github_data', [])))
             realtime_count = len(collected_data.get('realtime_data', []))
             analytics_count = len(collected_data.get('analytics_data', []))
             bigquery_count = len(collected_data.get('bigquery_data', []))
@@ -908,13 +899,15 @@ class BlockchainDataProcessor:
                     [addr.blockchain for addr in collected_data.get('realtime_data', [])] +
                     [addr.blockchain for addr in collected_data.get('analytics_data', [])] +
                     [addr.blockchain for addr in collected_data.get('bigquery_data', [])]
-                )),
+                ) | (github_stored['blockchains'] if github_stored is not None else set())),
                 'collection_timestamp': datetime.utcnow().isoformat()
             }
             
             # Store data if requested
             if store_data and total_count > 0:
-                storage_success = self.store_collected_data(collected_data)
+                storage_success = not (github_stored.get('error') or github_stored['failed'])
+                if total_count > github_count:
+                    storage_success = self.store_collected_data(collected_data) and storage_success
                 results['data_stored'] = storage_success
                 
                 if not storage_success:
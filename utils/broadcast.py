@@ -0,0 +1,213 @@
+"""Broadcast stage - coalesced, rate-shaped SocketIO fan-out for live transactions.
+
+Monitor threads call ``publish()`` which only appends to a bounded buffer and
+returns immediately; they never touch a socket.  A single emitter task drains
+the buffer every ``frame_interval_ms`` and sends one frame per active room.
+
+Clients subscribe to filtered rooms (chain, symbol, min USD tier).  Each frame
+is JSON-serialized once per room, not once per client, and the Socket.IO
+server fans the same encoded packet out to every member of the room.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from config.monitor_settings import BROADCAST_SETTINGS
+from utils.metrics import QUEUE_DEPTH
+
+logger = logging.getLogger(__name__)
+
+# Wildcard used in room names for "any chain" / "any symbol"
+ANY = '*'
+
+# Frame event name sent to clients (payload is a pre-serialized JSON array)
+FRAME_EVENT = 'transactions'
+
+
+def _event_usd(event: Dict[str, Any]) -> float:
+    try:
+        return float(event.get('usd_value', 0) or event.get('estimated_usd', 0) or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class TransactionBroadcaster:
+    """Micro-batching emitter that fans transaction frames out to filtered rooms."""
+
+    def __init__(self, socketio, settings: Optional[Dict[str, Any]] = None):
+        settings = {**BROADCAST_SETTINGS, **(settings or {})}
+        self.socketio = socketio
+        self.frame_interval = settings['frame_interval_ms'] / 1000.0
+        self.max_events_per_frame = settings['max_events_per_frame']
+        self.usd_tiers: Tuple[float, ...] = tuple(sorted(settings['usd_tiers']))
+
+        # deque.append / popleft are atomic, so producers never take a lock
+        self._buffer: Deque[Dict[str, Any]] = deque(maxlen=settings['max_buffered_events'])
+
+        # room name -> (chain, symbol, min_usd), refcounted by subscribed clients
+        self._rooms: Dict[str, Tuple[str, str, float]] = {}
+        self._room_members: Dict[str, int] = {}
+        self._client_rooms: Dict[str, str] = {}
+        self._rooms_lock = threading.Lock()
+
+        self._running = False
+        QUEUE_DEPTH.labels(queue='broadcast').set_function(lambda: len(self._buffer))
+        self.stats = {
+            'published': 0,
+            'dropped': 0,
+            'frames_sent': 0,
+            'events_sent': 0,
+            'last_frame_ms': 0.0,
+        }
+
+    # ------------------------------------------------------------------
+    # Producer side (monitor threads)
+    # ------------------------------------------------------------------
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        """Queue an event for the next frame. Never blocks the caller."""
+        if len(self._buffer) == self._buffer.maxlen:
+            # Oldest event is about to be evicted by the bounded deque
+            self.stats['dropped'] += 1
+        self._buffer.append(event)
+        self.stats['published'] += 1
+
+    # ------------------------------------------------------------------
+    # Subscriptions
+    # ------------------------------------------------------------------
+
+    def _usd_tier(self, min_usd: float) -> float:
+        """Round a requested minimum down to a tier so room count stays bounded."""
+        tier = 0.0
+        for value in self.usd_tiers:
+            if value <= min_usd:
+                tier = value
+        return tier
+
+    def room_for(self, chain: Optional[str] = None, symbol: Optional[str] = None,
+                 min_usd: float = 0) -> Tuple[str, Tuple[str, str, float]]:
+        """Normalize a subscription filter into a (room name, filter) pair."""
+        chain_key = (chain or ANY).lower()
+        symbol_key = (symbol or ANY).upper()
+        tier = self._usd_tier(float(min_usd or 0))
+        return f"tx:{chain_key}:{symbol_key}:{int(tier)}", (chain_key, symbol_key, tier)
+
+    def subscribe(self, sid: str, chain: Optional[str] = None, symbol: Optional[str] = None,
+                  min_usd: float = 0) -> str:
+        """Record that client ``sid`` wants frames for the given filter.
+
+        Returns the room name; the caller is responsible for ``join_room``.
+        A client holds at most one subscription, so any previous one is released.
+        """
+        room, room_filter = self.room_for(chain, symbol, min_usd)
+        with self._rooms_lock:
+            self._release(sid)
+            self._rooms[room] = room_filter
+            self._room_members[room] = self._room_members.get(room, 0) + 1
+            self._client_rooms[sid] = room
+        return room
+
+    def unsubscribe(self, sid: str) -> Optional[str]:
+        """Forget client ``sid``. Returns the room it was in, if any."""
+        with self._rooms_lock:
+            return self._release(sid)
+
+    def _release(self, sid: str) -> Optional[str]:
+        room = self._client_rooms.pop(sid, None)
+        if room is not None:
+            remaining = self._room_members.get(room, 1) - 1
+            if remaining <= 0:
+                self._room_members.pop(room, None)
+                self._rooms.pop(room, None)
+            else:
+                self._room_members[room] = remaining
+        return room
+
+    # ------------------------------------------------------------------
+    # Emitter
+    # ------------------------------------------------------------------
+
+    def _drain(self) -> List[Dict[str, Any]]:
+        batch = []
+        buffer = self._buffer
+        while buffer and len(batch) < self.max_events_per_frame:
+            try:
+                batch.append(buffer.popleft())
+            except IndexError:
+                break
+        return batch
+
+    @staticmethod
+    def _matches(event: Dict[str, Any], usd: float, room_filter: Tuple[str, str, float]) -> bool:
+        chain, symbol, min_usd = room_filter
+        if usd < min_usd:
+            return False
+        # Same fallback as the client-side filter (tx.blockchain || tx.source)
+        if chain != ANY and (event.get('blockchain') or event.get('source') or '').lower() != chain:
+            return False
+        if symbol != ANY and (event.get('symbol') or '').upper() != symbol:
+            return False
+        return True
+
+    def flush(self) -> int:
+        """Build and emit one frame. Returns the number of events drained."""
+        batch = self._drain()
+        if not batch:
+            return 0
+
+        with self._rooms_lock:
+            rooms = list(self._rooms.items())
+        if not rooms:
+            return len(batch)
+
+        started = time.perf_counter()
+        usd_values = [_event_usd(event) for event in batch]
+        for room, room_filter in rooms:
+            frame = [event for event, usd in zip(batch, usd_values)
+                     if self._matches(event, usd, room_filter)]
+            if not frame:
+                continue
+            payload = json.dumps(frame, default=str, separators=(',', ':'))
+            try:
+                self.socketio.emit(FRAME_EVENT, payload, to=room)
+            except Exception as e:
+                logger.warning(f"Broadcast emit to {room} failed: {e}")
+                continue
+            self.stats['frames_sent'] += 1
+            self.stats['events_sent'] += len(frame)
+
+        self.stats['last_frame_ms'] = round((time.perf_counter() - started) * 1000, 3)
+        return len(batch)
+
+    def _run(self) -> None:
+        while self._running:
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Broadcast frame failed: {e}")
+            self.socketio.sleep(self.frame_interval)
+
+    def start(self) -> None:
+        """Start the dedicated emitter task (idempotent)."""
+        if self._running:
+            return
+        self._running = True
+        self.socketio.start_background_task(self._run)
+        logger.info(f"Broadcaster started ({self.frame_interval * 1000:.0f}ms frames)")
+
+    def stop(self) -> None:
+        self._running = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._rooms_lock:
+            rooms = dict(self._room_members)
+        return {
+            **self.stats,
+            'buffered': len(self._buffer),
+            'rooms': rooms,
+            'clients': sum(rooms.values()),
+        }
@@ -21,10 +21,11 @@ Version: 2.1.0 (Market Data Integration)
 """
 
 import logging
+import threading
 import traceback
 import time
 import random
-from typing import Dict, Any, List, Optional, Tuple, Union
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Tuple, Union
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
@@ -34,13 +35,13 @@ import re
 from collections import defaultdict, Counter
 
 # Third-party imports
-import pandas as pd
-import numpy as np
 from pydantic import BaseModel, Field, validator
 from pydantic.dataclasses import dataclass as pydantic_dataclass
 
 # Project imports
 from config.logging_config import get_transaction_logger, production_logger
+from utils.metrics import STAGE_LATENCY, PHASE_LATENCY
+from utils.tracing import trace, span, traced
 from config.settings import (
     STABLECOIN_SYMBOLS, 
     CONFIDENCE_WEIGHTS, 
@@ -50,14 +51,6 @@ from config.settings import (
     DEFI_PROTOCOL_SETTINGS,
     PROTOCOL_CONTRACT_VERIFICATION
 )
-from utils.bigquery_analyzer import BigQueryAnalyzer
-from utils.evm_parser import EVMLogParser
-from utils.solana_parser import SolanaParser
-from utils.api_integrations import (
-    get_moralis_token_metadata,
-    get_zerion_portfolio_analysis,
-    enhanced_cex_address_matching
-)
 from data.addresses import (
     known_exchange_addresses,
     DEX_ADDRESSES,
@@ -75,19 +68,22 @@ from utils.dedup import deduplicate_transactions
 from utils.helpers import get_protocol_slug, get_dex_name, is_significant_tvl_movement
 from utils.summary import has_been_classified, mark_as_classified
 
-# Market Data Integration
-try:
+# Heavy optional subsystems (BigQuery, web3 parsers, market data) are imported
+# on first use inside WhaleIntelligenceEngine so importing this module stays
+# cheap and makes no network calls.
+if TYPE_CHECKING:
+    from utils.bigquery_analyzer import BigQueryAnalyzer
+    from utils.evm_parser import EVMLogParser
+    from utils.solana_parser import SolanaParser
     from opportunity_engine.market_data_provider import MarketDataProvider
-    MARKET_DATA_AVAILABLE = True
-except ImportError:
-    MarketDataProvider = None
-    MARKET_DATA_AVAILABLE = False
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 
-# Global whale engine instance to avoid re-initialization
+# Global whale engine instance to avoid re-initialization (see get_whale_engine)
 _GLOBAL_WHALE_ENGINE = None
+_GLOBAL_WHALE_ENGINE_ERROR = None
+_GLOBAL_WHALE_ENGINE_LOCK = threading.Lock()
 
 # =============================================================================
 # CONFIGURATION AND ENUMS
@@ -451,6 +447,7 @@ class CEXClassificationEngine(BaseAnalysisEngine):
             self.logger.warning(f"Hardcoded CEX check failed: {e}")
             return None
     
+    @traced('cex.supabase_addresses', endpoint='supabase:addresses')
     def _check_supabase_cex_addresses(self, from_addr: str, to_addr: str, blockchain: str) -> Optional[Tuple[ClassificationType, float, List[str]]]:
         """
         ENHANCED: Check Supabase database for CEX addresses with comprehensive data utilization.
@@ -646,6 +643,7 @@ class CEXClassificationEngine(BaseAnalysisEngine):
         
         return False
 
+    @traced('cex.supabase_institutional', endpoint='supabase:addresses')
     def _institutional_supabase_cex_analysis(self, from_addr: str, to_addr: str, blockchain: str) -> Optional[Tuple[ClassificationType, float, List[str], List[str], Dict]]:
         """
         🏛️ INSTITUTIONAL-GRADE SUPABASE CEX ANALYSIS
@@ -1611,6 +1609,7 @@ class DEXProtocolEngine(BaseAnalysisEngine):
             self.logger.warning(f"Hardcoded DEX check failed: {e}")
             return None
     
+    @traced('dex.supabase_defi_protocols', endpoint='supabase')
     def _check_supabase_defi_protocols(self, from_addr: str, to_addr: str, blockchain: str) -> Optional[PhaseResult]:
         """
         ENHANCED: Check Supabase for DeFi protocol information with improved flexibility.
@@ -1977,6 +1976,7 @@ class DEXProtocolEngine(BaseAnalysisEngine):
         
         return False
 
+    @traced('dex.supabase_institutional', endpoint='supabase:addresses')
     def _institutional_supabase_defi_analysis(self, from_addr: str, to_addr: str, blockchain: str) -> Optional[PhaseResult]:
         """
         🏛️ INSTITUTIONAL-GRADE SUPABASE DEFI ANALYSIS
@@ -2506,13 +2506,13 @@ class WhaleIntelligenceEngine:
         self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
         
         # Initialize core components
-        self.bigquery_analyzer: Optional[BigQueryAnalyzer] = None
-        self.evm_parsers: Dict[str, EVMLogParser] = {}
-        self.solana_parser: Optional[SolanaParser] = None
+        self.bigquery_analyzer: Optional['BigQueryAnalyzer'] = None
+        self.evm_parsers: Dict[str, 'EVMLogParser'] = {}
+        self.solana_parser: Optional['SolanaParser'] = None
         self.supabase_client = None
         
         # Initialize market data provider
-        self.market_data_provider: Optional[MarketDataProvider] = None
+        self.market_data_provider: Optional['MarketDataProvider'] = None
         
         # Initialize analysis engines
         self.cex_engine: Optional[CEXClassificationEngine] = None
@@ -2551,6 +2551,8 @@ class WhaleIntelligenceEngine:
         try:
             # Initialize EVM parsers for Ethereum and Polygon with proper API credentials
             from config.api_keys import ETHERSCAN_API_KEY
+            from utils.evm_parser import EVMLogParser
+            from utils.solana_parser import SolanaParser
             
             self.evm_parsers['ethereum'] = EVMLogParser('ethereum', ETHERSCAN_API_KEY, 'https://api.etherscan.io/api')
             self.evm_parsers['polygon'] = EVMLogParser('polygon', ETHERSCAN_API_KEY, 'https://api.polygonscan.com/api')
@@ -2582,7 +2584,8 @@ class WhaleIntelligenceEngine:
             
             # Initialize BigQuery with comprehensive error handling
             try:
-                from utils.bigquery_analyzer import bigquery_analyzer
+                from utils.bigquery_analyzer import get_bigquery_analyzer
+                bigquery_analyzer = get_bigquery_analyzer()
                 
                 # Test BigQuery initialization and permissions
                 if bigquery_analyzer and hasattr(bigquery_analyzer, 'client'):
@@ -2638,7 +2641,12 @@ class WhaleIntelligenceEngine:
                 self.logger.info("Enhanced API integrations not available")
             
             # Initialize market data provider
-            if MARKET_DATA_AVAILABLE:
+            try:
+                from opportunity_engine.market_data_provider import MarketDataProvider
+            except ImportError:
+                MarketDataProvider = None
+
+            if MarketDataProvider is not None:
                 try:
                     self.market_data_provider = MarketDataProvider()
                     self.logger.info("✅ MarketDataProvider initialized successfully")
@@ -2688,6 +2696,13 @@ class WhaleIntelligenceEngine:
         return mapped_result
     
     def analyze_transaction_comprehensive(self, transaction: Dict[str, Any]) -> IntelligenceResult:
+        """Run the two-stage analysis pipeline under a trace, recording it as the 'classify' stage."""
+        with trace('analyze_transaction_comprehensive', metric=STAGE_LATENCY.labels(stage='classify'),
+                   tx_hash=transaction.get('hash', transaction.get('tx_hash', '')),
+                   blockchain=transaction.get('blockchain', '')):
+            return self._run_two_stage_analysis(transaction)
+
+    def _run_two_stage_analysis(self, transaction: Dict[str, Any]) -> IntelligenceResult:
         """
         🎯 TWO-STAGE ANALYSIS PIPELINE 🎯
         
@@ -2729,33 +2744,38 @@ class WhaleIntelligenceEngine:
             # Phase 1: Blockchain Specific Analysis (Foundation)
             tx_logger.debug("Phase 1: Blockchain Specific Analysis")
             pre_fetched_receipt = transaction.get('receipt')
-            phase1_result = self._analyze_blockchain_specific(tx_hash, blockchain, receipt=pre_fetched_receipt)
+            with span(AnalysisPhase.BLOCKCHAIN_SPECIFIC.value, metric=PHASE_LATENCY.labels(phase=AnalysisPhase.BLOCKCHAIN_SPECIFIC.value)):
+                phase1_result = self._analyze_blockchain_specific(tx_hash, blockchain, receipt=pre_fetched_receipt)
             result.phase_results[AnalysisPhase.BLOCKCHAIN_SPECIFIC.value] = phase1_result
             result.whale_signals.extend(phase1_result.whale_signals)
             
             # Phase 2: Stablecoin Flow Analysis
             tx_logger.debug("Phase 2: Stablecoin Flow Analysis")
-            phase2_result = self._analyze_stablecoin_flow(from_addr, to_addr, transaction)
+            with span(AnalysisPhase.STABLECOIN_FLOW.value, metric=PHASE_LATENCY.labels(phase=AnalysisPhase.STABLECOIN_FLOW.value)):
+                phase2_result = self._analyze_stablecoin_flow(from_addr, to_addr, transaction)
             result.phase_results[AnalysisPhase.STABLECOIN_FLOW.value] = phase2_result
             result.whale_signals.extend(phase2_result.whale_signals)
             
             # Phase 3: CEX Classification
             tx_logger.debug("Phase 3: CEX Classification")
             if self.cex_engine:
-                phase3_result = self.cex_engine.analyze(from_addr, to_addr, blockchain)
+                with span(AnalysisPhase.CEX_CLASSIFICATION.value, metric=PHASE_LATENCY.labels(phase=AnalysisPhase.CEX_CLASSIFICATION.value)):
+                    phase3_result = self.cex_engine.analyze(from_addr, to_addr, blockchain)
                 result.phase_results[AnalysisPhase.CEX_CLASSIFICATION.value] = phase3_result
                 result.whale_signals.extend(phase3_result.whale_signals)
             
             # Phase 4: DEX & DeFi Protocol Classification
             tx_logger.debug("Phase 4: DEX & DeFi Protocol Classification")
             if self.dex_engine:
-                phase4_result = self.dex_engine.analyze(from_addr, to_addr, blockchain)
+                with span(AnalysisPhase.DEX_PROTOCOL.value, metric=PHASE_LATENCY.labels(phase=AnalysisPhase.DEX_PROTOCOL.value)):
+                    phase4_result = self.dex_engine.analyze(from_addr, to_addr, blockchain)
                 result.phase_results[AnalysisPhase.DEX_PROTOCOL.value] = phase4_result
                 result.whale_signals.extend(phase4_result.whale_signals)
             
             # Phase 5: Wallet Behavioral Analysis
             tx_logger.debug("Phase 5: Wallet Behavioral Analysis")
-            phase5_result = self._analyze_wallet_behavior(from_addr, to_addr, transaction)
+            with span(AnalysisPhase.WALLET_BEHAVIOR.value, metric=PHASE_LATENCY.labels(phase=AnalysisPhase.WALLET_BEHAVIOR.value)):
+                phase5_result = self._analyze_wallet_behavior(from_addr, to_addr, transaction)
             result.phase_results[AnalysisPhase.WALLET_BEHAVIOR.value] = phase5_result
             result.whale_signals.extend(phase5_result.whale_signals)
             
@@ -2798,12 +2818,14 @@ class WhaleIntelligenceEngine:
             
             # 🧠 SMART TIER 2: API-Only Enrichment (Always run - cheap APIs)
             tx_logger.debug("Phase 6: Zerion Portfolio Analysis")
-            phase6_result = self._analyze_zerion_portfolio(from_addr, to_addr, tx_hash)
+            with span(AnalysisPhase.ZERION_PORTFOLIO.value, metric=PHASE_LATENCY.labels(phase=AnalysisPhase.ZERION_PORTFOLIO.value)):
+                phase6_result = self._analyze_zerion_portfolio(from_addr, to_addr, tx_hash)
             result.phase_results[AnalysisPhase.ZERION_PORTFOLIO.value] = phase6_result
             result.whale_signals.extend(phase6_result.whale_signals)
             
             tx_logger.debug("Phase 7: Moralis Enrichment")
-            phase7_result = self._analyze_moralis_enrichment(from_addr, to_addr, blockchain)
+            with span(AnalysisPhase.MORALIS_ENRICHMENT.value, metric=PHASE_LATENCY.labels(phase=AnalysisPhase.MORALIS_ENRICHMENT.value)):
+                phase7_result = self._analyze_moralis_enrichment(from_addr, to_addr, blockchain)
             result.phase_results[AnalysisPhase.MORALIS_ENRICHMENT.value] = phase7_result
             result.whale_signals.extend(phase7_result.whale_signals)
             
@@ -2814,7 +2836,8 @@ class WhaleIntelligenceEngine:
             if current_confidence < BIGQUERY_TRIGGER_THRESHOLD and self.bigquery_analyzer:
                 tx_logger.info(f"🚀 TIER 3 TRIGGERED: Confidence still low ({current_confidence:.2f}) - Activating BigQuery")
                 tx_logger.debug("Phase 8: BigQuery Mega Whale Detection")
-                phase8_result = self._analyze_bigquery_whale(from_addr, to_addr, blockchain)
+                with span(AnalysisPhase.BIGQUERY_WHALE.value, metric=PHASE_LATENCY.labels(phase=AnalysisPhase.BIGQUERY_WHALE.value)):
+                    phase8_result = self._analyze_bigquery_whale(from_addr, to_addr, blockchain)
                 result.phase_results[AnalysisPhase.BIGQUERY_WHALE.value] = phase8_result
                 result.whale_signals.extend(phase8_result.whale_signals)
             elif current_confidence >= BIGQUERY_TRIGGER_THRESHOLD:
@@ -3124,6 +3147,7 @@ class WhaleIntelligenceEngine:
                 AnalysisPhase.WALLET_BEHAVIOR.value
             )
     
+    @traced('whale.supabase_whale_addresses', endpoint='supabase')
     def _check_whale_addresses(self, from_addr: str, to_addr: str, blockchain: str) -> Optional[Tuple[ClassificationType, float, List[str], List[str]]]:
         """
         ENHANCED: Check addresses against comprehensive whale database with full intelligence.
@@ -4900,9 +4924,7 @@ def process_and_enrich_transaction(event: Dict[str, Any]) -> Optional[Dict[str,
         )
         
         # Use global whale intelligence engine (avoid re-init)
-        global _GLOBAL_WHALE_ENGINE
-        if _GLOBAL_WHALE_ENGINE is None:
-            _GLOBAL_WHALE_ENGINE = WhaleIntelligenceEngine()
+        engine = get_whale_engine()
         
         # Convert event to standardized transaction format for the whale intelligence engine
         transaction_data = {
@@ -4926,7 +4948,7 @@ def process_and_enrich_transaction(event: Dict[str, Any]) -> Optional[Dict[str,
         )
         
         # Run FULL PRODUCTION-READY comprehensive analysis
-        result = _GLOBAL_WHALE_ENGINE.analyze_transaction_comprehensive(transaction_data)
+        result = engine.analyze_transaction_comprehensive(transaction_data)
         
         if not result:
             tx_logger.warning("Whale intelligence analysis returned no result")
@@ -5029,7 +5051,7 @@ def process_and_enrich_transaction(event: Dict[str, Any]) -> Optional[Dict[str,
 def transaction_classifier(from_addr: str, to_addr: str, symbol: str, amount: float, blockchain: str = "ethereum") -> tuple:
     """
     Legacy function for backward compatibility.
-    Uses global _GLOBAL_WHALE_ENGINE to avoid re-initialization.
+    Uses the shared engine from get_whale_engine() to avoid re-initialization.
     """
     try:
         # Create mock transaction data with required fields
@@ -5043,11 +5065,9 @@ def transaction_classifier(from_addr: str, to_addr: str, symbol: str, amount: fl
         }
         
         # Use global whale engine (avoid re-init)
-        global _GLOBAL_WHALE_ENGINE
-        if _GLOBAL_WHALE_ENGINE is None:
-            _GLOBAL_WHALE_ENGINE = WhaleIntelligenceEngine()
+        engine = get_whale_engine()
         
-        result = _GLOBAL_WHALE_ENGINE.analyze_transaction_comprehensive(transaction_data)
+        result = engine.analyze_transaction_comprehensive(transaction_data)
         
         classification = result.classification.value
         confidence = result.confidence
@@ -5081,10 +5101,8 @@ def classify_xrp_transaction(tx_data: Dict[str, Any]) -> tuple:
         }
         
         # Use global whale engine (avoid re-init)
-        global _GLOBAL_WHALE_ENGINE
-        if _GLOBAL_WHALE_ENGINE is None:
-            _GLOBAL_WHALE_ENGINE = WhaleIntelligenceEngine()
-        result = _GLOBAL_WHALE_ENGINE.analyze_transaction_comprehensive(transaction_data)
+        engine = get_whale_engine()
+        result = engine.analyze_transaction_comprehensive(transaction_data)
         
         classification = result.classification.value
         confidence = result.confidence
@@ -5118,10 +5136,8 @@ def analyze_address_characteristics(address: str, blockchain: str = "ethereum")
         }
         
         # Use global whale engine (avoid re-init)
-        global _GLOBAL_WHALE_ENGINE
-        if _GLOBAL_WHALE_ENGINE is None:
-            _GLOBAL_WHALE_ENGINE = WhaleIntelligenceEngine()
-        result = _GLOBAL_WHALE_ENGINE.analyze_transaction_comprehensive(transaction_data)
+        engine = get_whale_engine()
+        result = engine.analyze_transaction_comprehensive(transaction_data)
         
         return {
             'address': address,
@@ -5173,10 +5189,8 @@ def enhanced_solana_classification(owner: str, prev_owner: Optional[str], amount
         }
         
         # Use global whale engine (avoid re-init)
-        global _GLOBAL_WHALE_ENGINE
-        if _GLOBAL_WHALE_ENGINE is None:
-            _GLOBAL_WHALE_ENGINE = WhaleIntelligenceEngine()
-        result = _GLOBAL_WHALE_ENGINE.analyze_transaction_comprehensive(transaction_data)
+        engine = get_whale_engine()
+        result = engine.analyze_transaction_comprehensive(transaction_data)
         
         # Extract classification and confidence
         classification = result.classification.value.lower()
@@ -5223,17 +5237,37 @@ def enhanced_solana_classification(owner: str, prev_owner: Optional[str], amount
 # MODULE INITIALIZATION
 # =============================================================================
 
-# Initialize the main engine instance for use by other modules
-try:
-    _GLOBAL_WHALE_ENGINE = WhaleIntelligenceEngine()
-    whale_engine = _GLOBAL_WHALE_ENGINE  # Keep backward compatibility
-    logger.info("Whale Intelligence Engine module initialized successfully")
-except Exception as e:
-    logger.error(f"Failed to initialize whale engine: {e}")
-    whale_engine = None
+def get_whale_engine() -> 'WhaleIntelligenceEngine':
+    """
+    Return the shared WhaleIntelligenceEngine, creating it on first use.
+
+    Engine construction opens Supabase/BigQuery clients, so it is deferred
+    until a transaction actually needs classifying instead of running at
+    import time. If initialization fails the error is raised, and later calls
+    raise a RuntimeError chained to it without retrying the constructor.
+    """
+    global _GLOBAL_WHALE_ENGINE, _GLOBAL_WHALE_ENGINE_ERROR
+    if _GLOBAL_WHALE_ENGINE is None:
+        with _GLOBAL_WHALE_ENGINE_LOCK:
+            if _GLOBAL_WHALE_ENGINE_ERROR is not None:
+                raise RuntimeError("Whale Intelligence Engine failed to initialize") from _GLOBAL_WHALE_ENGINE_ERROR
+            if _GLOBAL_WHALE_ENGINE is None:
+                try:
+                    _GLOBAL_WHALE_ENGINE = WhaleIntelligenceEngine()
+                    logger.info("Whale Intelligence Engine module initialized successfully")
+                except Exception as e:
+                    logger.error(f"Failed to initialize whale engine: {e}")
+                    _GLOBAL_WHALE_ENGINE_ERROR = e
+                    raise
+    return _GLOBAL_WHALE_ENGINE
+
+
+def __getattr__(name: str):
+    # Backward-compatible lazy module attributes (PEP 562)
+    if name in ('whale_engine', 'whale_intelligence_engine'):
+        return get_whale_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Initialize global whale intelligence engine instance for backward compatibility
-whale_intelligence_engine = whale_engine
 
 # Export main classes and functions
 __all__ = [
@@ -5250,6 +5284,7 @@ __all__ = [
     'classify_xrp_transaction',
     'analyze_address_characteristics',
     'enhanced_solana_classification',
+    'get_whale_engine',
     'whale_engine',
     'whale_intelligence_engine'
 ] 
\ No newline at end of file
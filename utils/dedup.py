@@ -4,6 +4,8 @@ from typing import Dict, Any, Optional, Tuple
 from collections import defaultdict
 import time
 
+from utils.metrics import STAGE_LATENCY, EVENTS, QUEUE_DEPTH, register_collector
+
 # In dedup.py - update the TransactionDeduplicator class
 
 class TransactionDeduplicator:
@@ -50,6 +52,10 @@ class TransactionDeduplicator:
 
     def handle_event(self, event: Dict[str, Any]) -> bool:
         """Process new event with enhanced deduplication"""
+        with STAGE_LATENCY.labels(stage='dedup').time():
+            return self._handle_event(event)
+
+    def _handle_event(self, event: Dict[str, Any]) -> bool:
         if not event:
             return False
 
@@ -63,6 +69,7 @@ class TransactionDeduplicator:
         chain = event.get('blockchain', '').lower()
         if symbol in self.EXCLUDED_STABLECOINS and chain not in ('polygon', 'solana'):
             self.stats['stablecoins_skipped'] += 1
+            EVENTS.labels(source=chain, outcome='stablecoin_skipped').inc()
             return False
 
         unique_key = self.generate_key(event)
@@ -71,6 +78,7 @@ class TransactionDeduplicator:
         if unique_key in self.transactions:
             self.stats['duplicates_caught'] += 1
             self.stats['by_chain'][chain]['duplicates'] += 1
+            EVENTS.labels(source=chain, outcome='duplicate').inc()
             
             # Update classification if needed
             if ('classification' not in self.transactions[unique_key] and 
@@ -101,6 +109,7 @@ class TransactionDeduplicator:
                 
                 self.stats['circular_flows_caught'] += 1
                 self.stats['by_chain'][chain]['circular'] += 1
+                EVENTS.labels(source=chain, outcome='circular').inc()
                 return False
 
         # Add timestamp if not present
@@ -108,6 +117,7 @@ class TransactionDeduplicator:
             event['timestamp'] = current_time
 
         self.transactions[unique_key] = event
+        EVENTS.labels(source=chain, outcome='accepted').inc()
 
         # Push to connected clients via SocketIO
         if self.on_new_transaction:
@@ -191,6 +201,9 @@ def get_transactions() -> Dict:
 
 # For backward compatibility
 get_dedup_stats = get_stats
+
+register_collector('dedup', get_stats)
+QUEUE_DEPTH.labels(queue='dedup_transactions').set_function(lambda: len(deduplicator.transactions))
 deduped_transactions = deduplicator.transactions
 
 # Export these for direct access if needed
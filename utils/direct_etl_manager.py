@@ -9,23 +9,139 @@ This module provides direct access to blockchain data extraction tools for:
 - Custom event log extraction
 - Recent data that may not be in public datasets
 
+Block/date range exports run in concurrent chunks into a partitioned dataset
+under ETL_DATASET_DIR (``<chain>/range=<key>/<table>.csv``) with a checkpoint
+manifest, so interrupted runs resume and readers can consume it partition by
+partition. Partitions older than ETL_DATASET_RETENTION_DAYS are pruned at the
+start of each range export.
+
 Author: Whale Transaction Monitor System
 Version: 1.0.0
 """
 
 import os
 import csv
+import itertools
 import json
 import logging
 import subprocess
 import tempfile
 import shutil
-from typing import Dict, List, Any, Optional, Union
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Any, NamedTuple, Optional, Tuple, Union
 from datetime import datetime, timedelta
 from pathlib import Path
 
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    pa = None
+    pa_csv = None
+    PYARROW_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Exports at least this large use the pyarrow columnar reader when available
+DEFAULT_COLUMNAR_MIN_BYTES = 256 * 1024 * 1024
+COLUMNAR_BLOCK_SIZE = 16 * 1024 * 1024
+
+# A 32-byte topic holding an address: 0x + 24 zero nibbles + 40 address nibbles
+ADDRESS_TOPIC_PREFIX = '0x' + '0' * 24
+TOPIC_LABELS = {i: f'Event Indexed Address (topic{i})' for i in range(1, 4)}
+
+
+class AddressOccurrence(NamedTuple):
+    """One address seen in an ETL export row."""
+    address: str
+    label: str
+    block_number: str
+    transaction_hash: str
+
+# Persistent, partitioned export datasets (one directory per chain)
+DEFAULT_DATASET_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'etl'
+)
+DEFAULT_ETHEREUM_CHUNK_BLOCKS = 5_000
+DEFAULT_BITCOIN_CHUNK_DAYS = 1
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_RETENTION_DAYS = 7
+MANIFEST_FILE = '_manifest.json'
+
+
+class ETLCheckpointManifest:
+    """
+    Checkpoint manifest of a partitioned ETL dataset.
+    
+    A dataset directory holds one ``range=<key>`` partition per finished
+    chunk, each with that chunk's export CSVs. A chunk is exported into
+    ``range=<key>.partial`` and renamed once all its exports are done, then
+    recorded here, so an interrupted run leaves no half-written partition
+    behind. The next run skips every recorded chunk except those with
+    missing (failed optional) tables, which it retries.
+    """
+    
+    def __init__(self, dataset_dir: str):
+        self.dataset_dir = dataset_dir
+        self.path = os.path.join(dataset_dir, MANIFEST_FILE)
+        self._lock = threading.Lock()
+        os.makedirs(dataset_dir, exist_ok=True)
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._chunks: Dict[str, Dict[str, Any]] = json.load(f).get('chunks', {})
+        except FileNotFoundError:
+            self._chunks = {}
+    
+    def is_complete(self, key: str) -> bool:
+        """True if chunk ``key`` is recorded with no missing tables."""
+        with self._lock:
+            return key in self._chunks and not self._chunks[key].get('missing')
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            chunk = self._chunks.get(key)
+            return dict(chunk) if chunk is not None else None
+    
+    def record(self, key: str, files: Dict[str, str], missing: List[str]) -> None:
+        """Mark chunk ``key`` complete with its table -> partition-relative file map."""
+        with self._lock:
+            self._chunks[key] = {
+                'completed_at': datetime.utcnow().isoformat(),
+                'files': files,
+                'missing': missing,
+            }
+            self._save()
+    
+    def prune(self, max_age: timedelta) -> int:
+        """Drop partitions completed more than ``max_age`` ago; returns how many."""
+        cutoff = (datetime.utcnow() - max_age).isoformat()
+        with self._lock:
+            expired = [key for key, chunk in self._chunks.items() if chunk.get('completed_at', '') < cutoff]
+            for key in expired:
+                del self._chunks[key]
+            if expired:
+                self._save()
+        for key in expired:
+            shutil.rmtree(os.path.join(self.dataset_dir, f"range={key}"), ignore_errors=True)
+        return len(expired)
+    
+    def _save(self) -> None:
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'chunks': self._chunks}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+    
+    def partition_files(self, table: str, keys: Optional[List[str]] = None) -> Iterator[str]:
+        """Paths of ``table`` in completed partitions, in key (block/date) order."""
+        with self._lock:
+            chunks = dict(self._chunks)
+        for key in sorted(chunks if keys is None else keys):
+            relative = chunks.get(key, {}).get('files', {}).get(table)
+            if relative:
+                yield os.path.join(self.dataset_dir, f"range={key}", relative)
+
 
 class DirectETLManager:
     """
@@ -45,6 +161,14 @@ class DirectETLManager:
         self.config = config
         self.ethereum_provider_uri = config.get('ETHEREUM_NODE_PROVIDER_URI', '')
         self.bitcoin_provider_uri = config.get('BITCOIN_NODE_PROVIDER_URI', '')
+        self.columnar_min_bytes = int(config.get('ETL_COLUMNAR_MIN_BYTES', DEFAULT_COLUMNAR_MIN_BYTES))
+        
+        # Chunked, checkpointed range exports
+        self.dataset_root = config.get('ETL_DATASET_DIR', DEFAULT_DATASET_DIR)
+        self.ethereum_chunk_blocks = int(config.get('ETL_ETHEREUM_CHUNK_BLOCKS', DEFAULT_ETHEREUM_CHUNK_BLOCKS))
+        self.bitcoin_chunk_days = int(config.get('ETL_BITCOIN_CHUNK_DAYS', DEFAULT_BITCOIN_CHUNK_DAYS))
+        self.max_workers = int(config.get('ETL_MAX_WORKERS', DEFAULT_MAX_WORKERS))
+        self.retention_days = float(config.get('ETL_DATASET_RETENTION_DAYS', DEFAULT_RETENTION_DAYS))
         
         # Validate provider URIs
         if not self.ethereum_provider_uri:
@@ -52,21 +176,123 @@ class DirectETLManager:
         if not self.bitcoin_provider_uri:
             logger.warning("No Bitcoin provider URI configured - Bitcoin ETL features disabled")
     
+    def _dataset_dir(self, chain: str, output_dir: Optional[str]) -> str:
+        return output_dir or os.path.join(self.dataset_root, chain)
+    
+    def _run_chunk(
+        self,
+        manifest: ETLCheckpointManifest,
+        key: str,
+        exports: List[Tuple[str, List[str], bool]],
+        timeout: int
+    ) -> None:
+        """
+        Run one chunk's exports and commit its partition.
+        
+        ``exports`` is (table, command, required); the command's output path
+        is written under the partial partition directory. A failed required
+        export fails the chunk; a failed optional one is recorded as missing.
+        If the chunk is already recorded, only its missing tables are
+        exported again and added to the existing partition.
+        """
+        partial_dir = os.path.join(manifest.dataset_dir, f"range={key}.partial")
+        final_dir = os.path.join(manifest.dataset_dir, f"range={key}")
+        recorded = manifest.get(key) if os.path.isdir(final_dir) else None
+        if recorded is not None:
+            exports = [export for export in exports if export[0] in recorded.get('missing', [])]
+        stale_dirs = (partial_dir,) if recorded is not None else (partial_dir, final_dir)
+        for stale in stale_dirs:
+            if os.path.exists(stale):
+                shutil.rmtree(stale)
+        os.makedirs(partial_dir)
+        
+        files = dict(recorded['files']) if recorded is not None else {}
+        missing = []
+        for table, cmd, required in exports:
+            cmd = [arg.replace('{partition}', partial_dir) for arg in cmd]
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+            table_file = os.path.join(partial_dir, f"{table}.csv")
+            if result.returncode == 0 and os.path.exists(table_file):
+                files[table] = f"{table}.csv"
+            elif required:
+                raise RuntimeError(f"{cmd[0]} {cmd[1]} failed for chunk {key}: {result.stderr}")
+            else:
+                missing.append(table)
+        
+        if recorded is None:
+            os.rename(partial_dir, final_dir)
+        else:
+            for table, _, _ in exports:
+                if table not in missing:
+                    os.replace(os.path.join(partial_dir, files[table]), os.path.join(final_dir, files[table]))
+            shutil.rmtree(partial_dir)
+        manifest.record(key, files, missing)
+    
+    def _run_chunks(
+        self,
+        manifest: ETLCheckpointManifest,
+        chunks: List[Tuple[str, List[Tuple[str, List[str], bool]]]],
+        timeout: int,
+        max_workers: Optional[int] = None
+    ) -> None:
+        """Run the chunks not yet complete in the manifest with at most ``max_workers`` at a time."""
+        if self.retention_days > 0:
+            pruned = manifest.prune(timedelta(days=self.retention_days))
+            if pruned:
+                logger.info(f"Pruned {pruned} partitions older than {self.retention_days:g} days "
+                            f"from {manifest.dataset_dir}")
+        pending = [(key, exports) for key, exports in chunks if not manifest.is_complete(key)]
+        done = len(chunks) - len(pending)
+        if done:
+            logger.info(f"Resuming: {done}/{len(chunks)} chunks already exported in {manifest.dataset_dir}")
+        if not pending:
+            return
+        
+        failed = []
+        workers = max(1, min(max_workers or self.max_workers, len(pending)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='etl-chunk') as pool:
+            futures = {pool.submit(self._run_chunk, manifest, key, exports, timeout): key
+                       for key, exports in pending}
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    future.result()
+                    done += 1
+                    logger.info(f"Exported chunk {key} ({done}/{len(chunks)})")
+                except Exception as e:
+                    failed.append(key)
+                    logger.error(f"ETL chunk {key} failed: {e}")
+        
+        if failed:
+            raise RuntimeError(
+                f"{len(failed)} of {len(chunks)} ETL chunks failed ({', '.join(sorted(failed))}); "
+                f"completed chunks are checkpointed in {manifest.path}, rerun to resume"
+            )
+    
     def extract_ethereum_data_range(
         self, 
         start_block: int, 
         end_block: int, 
         provider_uri: Optional[str] = None,
-        output_dir: Optional[str] = None
+        output_dir: Optional[str] = None,
+        chunk_blocks: Optional[int] = None,
+        max_workers: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
         Extract Ethereum data for a specific block range
         
+        The range is exported in chunks of ``chunk_blocks`` blocks, up to
+        ``max_workers`` at a time, into a partitioned dataset. Chunks
+        already recorded in the dataset's manifest are skipped, so a run
+        that failed or was interrupted resumes where it stopped.
+        
         Args:
             start_block: Starting block number
             end_block: Ending block number
             provider_uri: Ethereum node provider URI (optional, uses config if not provided)
-            output_dir: Output directory for temporary files (optional, creates temp dir)
+            output_dir: Dataset directory (optional, defaults to <ETL_DATASET_DIR>/ethereum)
+            chunk_blocks: Blocks per chunk (optional, uses config if not provided)
+            max_workers: Concurrent chunks (optional, uses config if not provided)
             
         Returns:
             List of address data dictionaries
@@ -75,72 +301,41 @@ class DirectETLManager:
         if not provider_uri:
             raise ValueError("No Ethereum provider URI available")
         
-        # Create temporary directory if not provided
-        temp_dir_created = False
-        if output_dir is None:
-            output_dir = tempfile.mkdtemp(prefix='eth_etl_')
-            temp_dir_created = True
+        chunk_blocks = max(1, chunk_blocks or self.ethereum_chunk_blocks)
+        manifest = ETLCheckpointManifest(self._dataset_dir('ethereum', output_dir))
         
         try:
-            os.makedirs(output_dir, exist_ok=True)
+            chunks = []
+            for chunk_start in range(start_block, end_block + 1, chunk_blocks):
+                chunk_end = min(chunk_start + chunk_blocks - 1, end_block)
+                blocks = ['--start-block', str(chunk_start), '--end-block', str(chunk_end),
+                          '--provider-uri', provider_uri]
+                chunks.append((f"{chunk_start:010d}-{chunk_end:010d}", [
+                    ('transactions', ['ethereumetl', 'export_blocks_and_transactions', *blocks,
+                                      '--blocks-output', '{partition}/blocks.csv',
+                                      '--transactions-output', '{partition}/transactions.csv'], True),
+                    ('token_transfers', ['ethereumetl', 'export_token_transfers', *blocks,
+                                         '--output', '{partition}/token_transfers.csv'], False),
+                    ('logs', ['ethereumetl', 'export_logs', *blocks,
+                              '--output', '{partition}/logs.csv'], False),
+                ]))
+            
+            logger.info(f"Extracting Ethereum blocks {start_block}-{end_block} in {len(chunks)} chunks")
+            self._run_chunks(manifest, chunks, timeout=300, max_workers=max_workers)
+            
+            # Read the range back partition by partition
+            keys = [key for key, _ in chunks]
             addresses = []
-            
-            # Extract blocks and transactions
-            transactions_file = os.path.join(output_dir, 'transactions.csv')
-            blocks_file = os.path.join(output_dir, 'blocks.csv')
-            
-            logger.info(f"Extracting Ethereum blocks {start_block}-{end_block}")
-            
-            # Run ethereum-etl export_blocks_and_transactions
-            cmd = [
-                'ethereumetl', 'export_blocks_and_transactions',
-                '--start-block', str(start_block),
-                '--end-block', str(end_block),
-                '--provider-uri', provider_uri,
-                '--blocks-output', blocks_file,
-                '--transactions-output', transactions_file
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
-            if result.returncode != 0:
-                logger.error(f"ethereum-etl failed: {result.stderr}")
-                raise RuntimeError(f"ethereum-etl export failed: {result.stderr}")
-            
-            # Parse transactions for addresses
-            if os.path.exists(transactions_file):
-                addresses.extend(self._parse_ethereum_transactions(transactions_file))
-            
-            # Extract token transfers
-            token_transfers_file = os.path.join(output_dir, 'token_transfers.csv')
-            logger.info(f"Extracting Ethereum token transfers {start_block}-{end_block}")
-            
-            cmd = [
-                'ethereumetl', 'export_token_transfers',
-                '--start-block', str(start_block),
-                '--end-block', str(end_block),
-                '--provider-uri', provider_uri,
-                '--output', token_transfers_file
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
-            if result.returncode == 0 and os.path.exists(token_transfers_file):
-                addresses.extend(self._parse_ethereum_token_transfers(token_transfers_file))
-            
-            # Extract logs
-            logs_file = os.path.join(output_dir, 'logs.csv')
-            logger.info(f"Extracting Ethereum logs {start_block}-{end_block}")
-            
-            cmd = [
-                'ethereumetl', 'export_logs',
-                '--start-block', str(start_block),
-                '--end-block', str(end_block),
-                '--provider-uri', provider_uri,
-                '--output', logs_file
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
-            if result.returncode == 0 and os.path.exists(logs_file):
-                addresses.extend(self._parse_ethereum_logs(logs_file))
+            for table, iterate, source_system, description in (
+                ('transactions', self._iter_ethereum_transactions,
+                 'direct_etl_ethereum_transactions', 'transactions'),
+                ('token_transfers', self._iter_ethereum_token_transfers,
+                 'direct_etl_ethereum_token_transfers', 'token transfers'),
+                ('logs', self._iter_ethereum_logs, 'direct_etl_ethereum_logs', 'logs'),
+            ):
+                occurrences = itertools.chain.from_iterable(
+                    iterate(path) for path in manifest.partition_files(table, keys))
+                addresses.extend(self._unique_addresses(occurrences, source_system, 'ethereum', description))
             
             logger.info(f"Extracted {len(addresses)} addresses from Ethereum blocks {start_block}-{end_block}")
             return addresses
@@ -148,26 +343,29 @@ class DirectETLManager:
         except Exception as e:
             logger.error(f"Error extracting Ethereum data: {e}")
             raise
-        finally:
-            # Clean up temporary directory if we created it
-            if temp_dir_created and os.path.exists(output_dir):
-                shutil.rmtree(output_dir)
     
     def extract_bitcoin_data_range(
         self,
         start_date: str,
         end_date: str,
         provider_uri: Optional[str] = None,
-        output_dir: Optional[str] = None
+        output_dir: Optional[str] = None,
+        chunk_days: Optional[int] = None,
+        max_workers: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
         Extract Bitcoin data for a specific date range
         
+        Exported in chunks of ``chunk_days`` days into a checkpointed,
+        partitioned dataset, like extract_ethereum_data_range.
+        
         Args:
             start_date: Start date in YYYY-MM-DD format
             end_date: End date in YYYY-MM-DD format
             provider_uri: Bitcoin node provider URI (optional, uses config if not provided)
-            output_dir: Output directory for temporary files (optional, creates temp dir)
+            output_dir: Dataset directory (optional, defaults to <ETL_DATASET_DIR>/bitcoin)
+            chunk_days: Days per chunk (optional, uses config if not provided)
+            max_workers: Concurrent chunks (optional, uses config if not provided)
             
         Returns:
             List of address data dictionaries
@@ -176,40 +374,34 @@ class DirectETLManager:
         if not provider_uri:
             raise ValueError("No Bitcoin provider URI available")
         
-        # Create temporary directory if not provided
-        temp_dir_created = False
-        if output_dir is None:
-            output_dir = tempfile.mkdtemp(prefix='btc_etl_')
-            temp_dir_created = True
+        chunk_days = max(1, chunk_days or self.bitcoin_chunk_days)
+        manifest = ETLCheckpointManifest(self._dataset_dir('bitcoin', output_dir))
         
         try:
-            os.makedirs(output_dir, exist_ok=True)
-            addresses = []
-            
-            # Extract blocks and transactions
-            transactions_file = os.path.join(output_dir, 'transactions.csv')
-            blocks_file = os.path.join(output_dir, 'blocks.csv')
-            
-            logger.info(f"Extracting Bitcoin data {start_date} to {end_date}")
-            
-            # Run bitcoin-etl export_blocks_and_transactions
-            cmd = [
-                'bitcoinetl', 'export_blocks_and_transactions',
-                '--start-date', start_date,
-                '--end-date', end_date,
-                '--provider-uri', provider_uri,
-                '--blocks-output', blocks_file,
-                '--transactions-output', transactions_file
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
-            if result.returncode != 0:
-                logger.error(f"bitcoin-etl failed: {result.stderr}")
-                raise RuntimeError(f"bitcoin-etl export failed: {result.stderr}")
-            
-            # Parse transactions for addresses
-            if os.path.exists(transactions_file):
-                addresses.extend(self._parse_bitcoin_transactions(transactions_file))
+            first = datetime.strptime(start_date, '%Y-%m-%d').date()
+            last = datetime.strptime(end_date, '%Y-%m-%d').date()
+            chunks = []
+            chunk_start = first
+            while chunk_start <= last:
+                chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), last)
+                chunks.append((f"{chunk_start.isoformat()}-{chunk_end.isoformat()}", [
+                    ('transactions', ['bitcoinetl', 'export_blocks_and_transactions',
+                                      '--start-date', chunk_start.isoformat(),
+                                      '--end-date', chunk_end.isoformat(),
+                                      '--provider-uri', provider_uri,
+                                      '--blocks-output', '{partition}/blocks.csv',
+                                      '--transactions-output', '{partition}/transactions.csv'], True),
+                ]))
+                chunk_start = chunk_end + timedelta(days=1)
+            
+            logger.info(f"Extracting Bitcoin data {start_date} to {end_date} in {len(chunks)} chunks")
+            self._run_chunks(manifest, chunks, timeout=600, max_workers=max_workers)
+            
+            occurrences = itertools.chain.from_iterable(
+                self._iter_bitcoin_transactions(path)
+                for path in manifest.partition_files('transactions', [key for key, _ in chunks]))
+            addresses = self._unique_addresses(occurrences, 'direct_etl_bitcoin_transactions',
+                                               'bitcoin', 'Bitcoin transactions')
             
             logger.info(f"Extracted {len(addresses)} addresses from Bitcoin {start_date} to {end_date}")
             return addresses
@@ -217,10 +409,6 @@ class DirectETLManager:
         except Exception as e:
             logger.error(f"Error extracting Bitcoin data: {e}")
             raise
-        finally:
-            # Clean up temporary directory if we created it
-            if temp_dir_created and os.path.exists(output_dir):
-                shutil.rmtree(output_dir)
     
     def extract_ethereum_contract_interactions(
         self,
@@ -384,206 +572,168 @@ class DirectETLManager:
             if temp_dir_created and os.path.exists(output_dir):
                 shutil.rmtree(output_dir)
     
-    def _parse_ethereum_transactions(self, transactions_file: str) -> List[Dict[str, Any]]:
-        """Parse Ethereum transactions CSV for addresses"""
-        addresses = []
-        try:
-            with open(transactions_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    # From address
-                    if row.get('from_address'):
-                        addresses.append({
-                            'address': row['from_address'].lower(),
-                            'label': 'Transaction Sender',
-                            'source_system': 'direct_etl_ethereum_transactions',
-                            'blockchain': 'ethereum',
-                            'metadata': {
-                                'block_number': row.get('block_number'),
-                                'transaction_hash': row.get('hash'),
-                                'value': row.get('value')
-                            }
-                        })
-                    
-                    # To address
-                    if row.get('to_address'):
-                        addresses.append({
-                            'address': row['to_address'].lower(),
-                            'label': 'Transaction Recipient',
-                            'source_system': 'direct_etl_ethereum_transactions',
-                            'blockchain': 'ethereum',
-                            'metadata': {
-                                'block_number': row.get('block_number'),
-                                'transaction_hash': row.get('hash'),
-                                'value': row.get('value')
-                            }
-                        })
-        except Exception as e:
-            logger.error(f"Error parsing transactions file: {e}")
+    # ------------------------------------------------------------------
+    # Streaming parsers
+    #
+    # The _iter_* generators read an export once and yield one compact
+    # AddressOccurrence tuple per address seen; the _parse_* wrappers fold
+    # those into one record per unique address, so memory is bounded by
+    # the number of distinct addresses rather than rows.
+    # ------------------------------------------------------------------
+    
+    def _iter_csv(self, csv_file: str, columns: Tuple[str, ...]) -> Iterator[Tuple[str, ...]]:
+        """
+        Yield ``columns`` of each row as a tuple of strings ('' if empty or missing).
         
-        return addresses
+        Files of at least ``columnar_min_bytes`` are read in record batches
+        with pyarrow's multithreaded CSV reader when it is installed;
+        otherwise ``csv.reader`` with header positions (no dict per row).
+        """
+        with open(csv_file, 'r', encoding='utf-8', newline='') as f:
+            header = next(csv.reader(f), [])
+        present = [column for column in columns if column in header]
+        
+        if PYARROW_AVAILABLE and os.path.getsize(csv_file) >= self.columnar_min_bytes:
+            reader = pa_csv.open_csv(
+                csv_file,
+                read_options=pa_csv.ReadOptions(block_size=COLUMNAR_BLOCK_SIZE),
+                convert_options=pa_csv.ConvertOptions(
+                    include_columns=present,
+                    column_types={column: pa.string() for column in present},
+                    strings_can_be_null=False,
+                ),
+            )
+            for batch in reader:
+                values = {name: batch.column(name).to_pylist() for name in present}
+                empty = [''] * batch.num_rows
+                yield from zip(*(values.get(column, empty) for column in columns))
+            return
+        
+        positions = [header.index(column) if column in header else None for column in columns]
+        with open(csv_file, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for row in reader:
+                yield tuple(row[i] if i is not None and i < len(row) else '' for i in positions)
     
-    def _parse_ethereum_token_transfers(self, token_transfers_file: str) -> List[Dict[str, Any]]:
-        """Parse Ethereum token transfers CSV for addresses"""
-        addresses = []
+    def _iter_ethereum_transactions(self, transactions_file: str) -> Iterator[AddressOccurrence]:
+        for block_number, tx_hash, from_address, to_address in self._iter_csv(
+                transactions_file, ('block_number', 'hash', 'from_address', 'to_address')):
+            if from_address:
+                yield AddressOccurrence(from_address.lower(), 'Transaction Sender', block_number, tx_hash)
+            if to_address:
+                yield AddressOccurrence(to_address.lower(), 'Transaction Recipient', block_number, tx_hash)
+    
+    def _iter_ethereum_token_transfers(self, token_transfers_file: str) -> Iterator[AddressOccurrence]:
+        for block_number, tx_hash, token_address, from_address, to_address in self._iter_csv(
+                token_transfers_file,
+                ('block_number', 'transaction_hash', 'token_address', 'from_address', 'to_address')):
+            if from_address:
+                yield AddressOccurrence(from_address.lower(), 'Token Transfer Sender', block_number, tx_hash)
+            if to_address:
+                yield AddressOccurrence(to_address.lower(), 'Token Transfer Recipient', block_number, tx_hash)
+            if token_address:
+                yield AddressOccurrence(token_address.lower(), 'Token Contract', block_number, tx_hash)
+    
+    def _iter_ethereum_logs(self, logs_file: str) -> Iterator[AddressOccurrence]:
+        for block_number, tx_hash, address, *topics in self._iter_csv(
+                logs_file, ('block_number', 'transaction_hash', 'address', 'topic1', 'topic2', 'topic3')):
+            # Contract address that emitted the log
+            if address:
+                yield AddressOccurrence(address.lower(), 'Event Emitter Contract', block_number, tx_hash)
+            
+            # Indexed topics that look like an address (32 bytes with 12 leading zero bytes)
+            for position, topic in enumerate(topics, start=1):
+                if len(topic) == 66 and topic.startswith(ADDRESS_TOPIC_PREFIX):
+                    yield AddressOccurrence('0x' + topic[26:].lower(), TOPIC_LABELS[position],
+                                            block_number, tx_hash)
+    
+    def _iter_bitcoin_transactions(self, transactions_file: str) -> Iterator[AddressOccurrence]:
+        # Inputs and outputs are JSON arrays; this is a simplified parser - a
+        # real implementation would need to handle the full UTXO model
+        for block_number, tx_hash, inputs, outputs in self._iter_csv(
+                transactions_file, ('block_number', 'hash', 'inputs', 'outputs')):
+            for raw, label in ((inputs, 'Bitcoin Input Address'), (outputs, 'Bitcoin Output Address')):
+                if not raw:
+                    continue
+                try:
+                    entries = json.loads(raw)
+                except (json.JSONDecodeError, TypeError):
+                    continue
+                # Malformed values (null, non-list, non-object entries) skip just that entry
+                if not isinstance(entries, list):
+                    continue
+                for entry in entries:
+                    if not isinstance(entry, dict):
+                        continue
+                    entry_addresses = entry.get('addresses')
+                    if not isinstance(entry_addresses, list):
+                        continue
+                    for addr in entry_addresses:
+                        if isinstance(addr, str) and addr:
+                            yield AddressOccurrence(addr, label, block_number, tx_hash)
+    
+    @staticmethod
+    def _unique_addresses(
+        occurrences: Iterator[AddressOccurrence],
+        source_system: str,
+        blockchain: str,
+        description: str
+    ) -> List[Dict[str, Any]]:
+        """
+        Fold occurrences into one record per address.
+        
+        Each record keeps the label, block and transaction of the first
+        occurrence plus an occurrence count. A parse error stops the file
+        but keeps the addresses read so far.
+        """
+        # address -> [label, block_number, transaction_hash, occurrences]
+        seen: Dict[str, List[Any]] = {}
         try:
-            with open(token_transfers_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    # From address
-                    if row.get('from_address'):
-                        addresses.append({
-                            'address': row['from_address'].lower(),
-                            'label': 'Token Transfer Sender',
-                            'source_system': 'direct_etl_ethereum_token_transfers',
-                            'blockchain': 'ethereum',
-                            'metadata': {
-                                'block_number': row.get('block_number'),
-                                'transaction_hash': row.get('transaction_hash'),
-                                'token_address': row.get('token_address'),
-                                'value': row.get('value')
-                            }
-                        })
-                    
-                    # To address
-                    if row.get('to_address'):
-                        addresses.append({
-                            'address': row['to_address'].lower(),
-                            'label': 'Token Transfer Recipient',
-                            'source_system': 'direct_etl_ethereum_token_transfers',
-                            'blockchain': 'ethereum',
-                            'metadata': {
-                                'block_number': row.get('block_number'),
-                                'transaction_hash': row.get('transaction_hash'),
-                                'token_address': row.get('token_address'),
-                                'value': row.get('value')
-                            }
-                        })
-                    
-                    # Token contract address
-                    if row.get('token_address'):
-                        addresses.append({
-                            'address': row['token_address'].lower(),
-                            'label': 'Token Contract',
-                            'source_system': 'direct_etl_ethereum_token_transfers',
-                            'blockchain': 'ethereum',
-                            'metadata': {
-                                'block_number': row.get('block_number'),
-                                'transaction_hash': row.get('transaction_hash')
-                            }
-                        })
+            for occurrence in occurrences:
+                entry = seen.get(occurrence.address)
+                if entry is None:
+                    seen[occurrence.address] = [occurrence.label, occurrence.block_number,
+                                                occurrence.transaction_hash, 1]
+                else:
+                    entry[3] += 1
         except Exception as e:
-            logger.error(f"Error parsing token transfers file: {e}")
+            logger.error(f"Error parsing {description} file: {e}")
         
-        return addresses
+        return [
+            {
+                'address': address,
+                'label': label,
+                'source_system': source_system,
+                'blockchain': blockchain,
+                'metadata': {
+                    'block_number': block_number,
+                    'transaction_hash': transaction_hash,
+                    'occurrences': count
+                }
+            }
+            for address, (label, block_number, transaction_hash, count) in seen.items()
+        ]
+    
+    def _parse_ethereum_transactions(self, transactions_file: str) -> List[Dict[str, Any]]:
+        """Parse Ethereum transactions CSV for unique addresses"""
+        return self._unique_addresses(self._iter_ethereum_transactions(transactions_file),
+                                      'direct_etl_ethereum_transactions', 'ethereum', 'transactions')
+    
+    def _parse_ethereum_token_transfers(self, token_transfers_file: str) -> List[Dict[str, Any]]:
+        """Parse Ethereum token transfers CSV for unique addresses"""
+        return self._unique_addresses(self._iter_ethereum_token_transfers(token_transfers_file),
+                                      'direct_etl_ethereum_token_transfers', 'ethereum', 'token transfers')
     
     def _parse_ethereum_logs(self, logs_file: str) -> List[Dict[str, Any]]:
-        """Parse Ethereum logs CSV for addresses"""
-        addresses = []
-        try:
-            with open(logs_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    # Contract address that emitted the log
-                    if row.get('address'):
-                        addresses.append({
-                            'address': row['address'].lower(),
-                            'label': 'Event Emitter Contract',
-                            'source_system': 'direct_etl_ethereum_logs',
-                            'blockchain': 'ethereum',
-                            'metadata': {
-                                'block_number': row.get('block_number'),
-                                'transaction_hash': row.get('transaction_hash'),
-                                'log_index': row.get('log_index'),
-                                'topic0': row.get('topic0')
-                            }
-                        })
-                    
-                    # Extract addresses from indexed topics (topic1, topic2, topic3)
-                    for i in range(1, 4):
-                        topic_key = f'topic{i}'
-                        if row.get(topic_key):
-                            topic_value = row[topic_key]
-                            # Check if topic looks like an address (32 bytes with leading zeros)
-                            if (topic_value.startswith('0x') and 
-                                len(topic_value) == 66 and 
-                                topic_value[2:26] == '000000000000000000000000'):
-                                address = '0x' + topic_value[26:]
-                                addresses.append({
-                                    'address': address.lower(),
-                                    'label': f'Event Indexed Address (topic{i})',
-                                    'source_system': 'direct_etl_ethereum_logs',
-                                    'blockchain': 'ethereum',
-                                    'metadata': {
-                                        'block_number': row.get('block_number'),
-                                        'transaction_hash': row.get('transaction_hash'),
-                                        'log_index': row.get('log_index'),
-                                        'topic0': row.get('topic0'),
-                                        'topic_position': i
-                                    }
-                                })
-        except Exception as e:
-            logger.error(f"Error parsing logs file: {e}")
-        
-        return addresses
+        """Parse Ethereum logs CSV for unique addresses"""
+        return self._unique_addresses(self._iter_ethereum_logs(logs_file),
+                                      'direct_etl_ethereum_logs', 'ethereum', 'logs')
     
     def _parse_bitcoin_transactions(self, transactions_file: str) -> List[Dict[str, Any]]:
-        """Parse Bitcoin transactions CSV for addresses"""
-        addresses = []
-        try:
-            with open(transactions_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    # Parse inputs and outputs for addresses
-                    # Bitcoin transactions have complex input/output structures
-                    # This is a simplified parser - real implementation would need
-                    # to handle the full UTXO model
-                    
-                    if row.get('inputs'):
-                        # Parse JSON inputs
-                        try:
-                            inputs = json.loads(row['inputs'])
-                            for inp in inputs:
-                                if inp.get('addresses'):
-                                    for addr in inp['addresses']:
-                                        addresses.append({
-                                            'address': addr,
-                                            'label': 'Bitcoin Input Address',
-                                            'source_system': 'direct_etl_bitcoin_transactions',
-                                            'blockchain': 'bitcoin',
-                                            'metadata': {
-                                                'block_number': row.get('block_number'),
-                                                'transaction_hash': row.get('hash'),
-                                                'value': inp.get('value')
-                                            }
-                                        })
-                        except (json.JSONDecodeError, TypeError):
-                            pass
-                    
-                    if row.get('outputs'):
-                        # Parse JSON outputs
-                        try:
-                            outputs = json.loads(row['outputs'])
-                            for out in outputs:
-                                if out.get('addresses'):
-                                    for addr in out['addresses']:
-                                        addresses.append({
-                                            'address': addr,
-                                            'label': 'Bitcoin Output Address',
-                                            'source_system': 'direct_etl_bitcoin_transactions',
-                                            'blockchain': 'bitcoin',
-                                            'metadata': {
-                                                'block_number': row.get('block_number'),
-                                                'transaction_hash': row.get('hash'),
-                                                'value': out.get('value')
-                                            }
-                                        })
-                        except (json.JSONDecodeError, TypeError):
-                            pass
-        except Exception as e:
-            logger.error(f"Error parsing Bitcoin transactions file: {e}")
-        
-        return addresses
+        """Parse Bitcoin transactions CSV for unique addresses"""
+        return self._unique_addresses(self._iter_bitcoin_transactions(transactions_file),
+                                      'direct_etl_bitcoin_transactions', 'bitcoin', 'Bitcoin transactions')
     
     def _parse_contract_transactions(self, transactions_file: str, contract_address: str) -> List[Dict[str, Any]]:
         """Parse transactions for a specific contract"""
@@ -9,6 +9,8 @@ from config.settings import DEX_CONTRACT_INFO, STABLECOIN_SYMBOLS
 from data.tokens import TOKENS_TO_MONITOR, POLYGON_TOKENS_TO_MONITOR
 from config.api_keys import ETHERSCAN_API_KEY, POLYGONSCAN_API_KEY, FALLBACK_API_KEYS
 from web3 import Web3
+from utils.metrics import STAGE_LATENCY
+from utils.tracing import span, traced, endpoint_label
 
 logger = logging.getLogger(__name__)
 
@@ -350,7 +352,9 @@ class EVMLogParser:
             for provider_index, rpc_url in enumerate(providers):
                 try:
                     logger.debug(f"🔗 Trying provider {provider_index + 1}/{len(providers)}: {rpc_url}")
-                    receipt = self._fetch_receipt_from_provider(tx_hash, rpc_url)
+                    with span('evm.fetch_receipt', endpoint=endpoint_label(rpc_url)) as provider_span:
+                        receipt = self._fetch_receipt_from_provider(tx_hash, rpc_url)
+                        provider_span.set(found=bool(receipt))
                     
                     if receipt:
                         logger.info(f"✅ Receipt fetched successfully from provider {provider_index + 1}")
@@ -453,6 +457,7 @@ class EVMLogParser:
         
         return True
 
+    @traced('evm.etherscan_receipt', endpoint='etherscan')
     def _get_receipt_via_etherscan(self, tx_hash: str) -> Optional[Dict[str, Any]]:
         """Fallback method to get receipt via Etherscan API."""
         params = {
@@ -601,7 +606,8 @@ class EVMLogParser:
         """
         try:
             if receipt is None:
-                receipt = self.get_transaction_receipt(tx_hash)
+                with span('evm.get_transaction_receipt', metric=STAGE_LATENCY.labels(stage='fetch'), chain=self.chain):
+                    receipt = self.get_transaction_receipt(tx_hash)
             
             if not receipt:
                 logger.debug(f"⚠️ Receipt fetch failed for {tx_hash}, falling back to heuristic analysis")
@@ -618,11 +624,12 @@ class EVMLogParser:
                     'analysis_method': 'status_check'
                 }
             
-            # STEP 3: Deep analysis with method signature and events
-            details = self._decode_transaction_details(receipt)
-            
-            # STEP 4: Apply internal classification rules
-            return self._classify_from_details(details, tx_hash)
+            with span('evm.decode_and_classify', metric=STAGE_LATENCY.labels(stage='parse')):
+                # STEP 3: Deep analysis with method signature and events
+                details = self._decode_transaction_details(receipt)
+                
+                # STEP 4: Apply internal classification rules
+                return self._classify_from_details(details, tx_hash)
             
         except Exception as e:
             logger.warning(f"⚠️ Enhanced analysis failed for {tx_hash}: {str(e)}, falling back to heuristic")
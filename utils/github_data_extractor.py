@@ -11,20 +11,44 @@ Version: 2.0.0 (Phase 2)
 import os
 import json
 import csv
+import gzip
 import logging
 import tempfile
 import shutil
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Any, Tuple
+from dataclasses import asdict, dataclass
 from datetime import datetime
 import requests
 import pandas as pd
+import git
 from git import Repo
 from pathlib import Path
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Persistent clones and per-commit extraction results
+GITHUB_CACHE_DIR = os.getenv(
+    'WHALE_GITHUB_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'github_cache')
+)
+GITHUB_EXTRACT_WORKERS = int(os.getenv('WHALE_GITHUB_WORKERS', '4'))
+
+# Written into each cached clone's .git dir: the sparse patterns it was checked out with
+SPARSE_MARKER_FILE = 'whale_sparse_paths.json'
+
+
+def resolve_head_sha(repo_url: str) -> Optional[str]:
+    """Commit SHA of the remote HEAD via ``git ls-remote`` (no clone), or None if unreachable."""
+    try:
+        output = git.cmd.Git().ls_remote(repo_url, 'HEAD')
+        return output.split()[0] if output else None
+    except Exception as e:
+        logger.warning(f"Could not resolve HEAD of {repo_url}: {e}")
+        return None
+
 
 @dataclass
 class GitHubAddressData:
@@ -43,28 +67,71 @@ class GitHubAddressData:
             self.collected_at = datetime.utcnow()
         if self.metadata is None:
             self.metadata = {}
+    
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data['collected_at'] = self.collected_at.isoformat() if self.collected_at else None
+        return data
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'GitHubAddressData':
+        data = dict(data)
+        if data.get('collected_at'):
+            data['collected_at'] = datetime.fromisoformat(data['collected_at'])
+        return cls(**data)
 
 
 class GitHubRepositoryExtractor:
     """Base class for extracting data from GitHub repositories."""
     
+    # Sparse-checkout patterns (gitignore syntax) for the files extract_addresses
+    # reads; None checks out the whole tree
+    SPARSE_PATHS: Optional[List[str]] = None
+    
     def __init__(self, repo_url: str, temp_dir: Optional[str] = None):
         self.repo_url = repo_url
         self.temp_dir = temp_dir or tempfile.mkdtemp()
         self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
         self.repo_path = None
+        # Remote HEAD resolved by the caller; saves a second ls-remote in clone_repository
+        self.head_sha: Optional[str] = None
         
     def clone_repository(self) -> str:
-        """Clone the repository to a temporary directory."""
+        """
+        Shallow, sparse clone of the repository into the persistent clone cache.
+        
+        A cached clone already at the remote HEAD commit, checked out with the
+        same SPARSE_PATHS, is reused as is.
+        """
         try:
             repo_name = self.repo_url.split('/')[-1].replace('.git', '')
-            self.repo_path = os.path.join(self.temp_dir, repo_name)
+            self.repo_path = os.path.join(GITHUB_CACHE_DIR, 'clones', repo_name)
+            marker_path = os.path.join(self.repo_path, '.git', SPARSE_MARKER_FILE)
+            
+            head_sha = self.head_sha or resolve_head_sha(self.repo_url)
+            if head_sha and os.path.isdir(os.path.join(self.repo_path, '.git')):
+                try:
+                    with open(marker_path, 'r', encoding='utf-8') as f:
+                        sparse_paths = json.load(f)
+                    if sparse_paths == self.SPARSE_PATHS and Repo(self.repo_path).head.commit.hexsha == head_sha:
+                        self.logger.info(f"Reusing cached clone of {self.repo_url} at {head_sha[:12]}")
+                        return self.repo_path
+                except Exception:
+                    pass
             
             if os.path.exists(self.repo_path):
                 shutil.rmtree(self.repo_path)
             
             self.logger.info(f"Cloning repository: {self.repo_url}")
-            Repo.clone_from(self.repo_url, self.repo_path)
+            if self.SPARSE_PATHS:
+                repo = Repo.clone_from(self.repo_url, self.repo_path, depth=1,
+                                       filter='blob:none', no_checkout=True)
+                repo.git.sparse_checkout('set', '--no-cone', *self.SPARSE_PATHS)
+                repo.git.checkout()
+            else:
+                Repo.clone_from(self.repo_url, self.repo_path, depth=1)
+            with open(marker_path, 'w', encoding='utf-8') as f:
+                json.dump(self.SPARSE_PATHS, f)
             
             return self.repo_path
             
@@ -84,7 +151,8 @@ class GitHubRepositoryExtractor:
             response = requests.get(raw_url, timeout=30)
             response.raise_for_status()
             
-            # Save to temporary file
+            # Save to temporary file (cleanup() may have removed the directory on a previous run)
+            os.makedirs(self.temp_dir, exist_ok=True)
             temp_file = os.path.join(self.temp_dir, os.path.basename(file_path))
             with open(temp_file, 'w', encoding='utf-8') as f:
                 f.write(response.text)
@@ -113,6 +181,8 @@ class GitHubRepositoryExtractor:
 class EtherscanLabelsExtractor(GitHubRepositoryExtractor):
     """Extractor for brianleect/etherscan-labels repository."""
     
+    SPARSE_PATHS = ['*.csv']
+    
     def __init__(self):
         super().__init__("https://github.com/brianleect/etherscan-labels")
     
@@ -190,6 +260,8 @@ class EtherscanLabelsExtractor(GitHubRepositoryExtractor):
 class EthLabelsExtractor(GitHubRepositoryExtractor):
     """Extractor for dawsbot/eth-labels repository."""
     
+    SPARSE_PATHS = ['*.json', '*.csv']
+    
     def __init__(self):
         super().__init__("https://github.com/dawsbot/eth-labels")
     
@@ -399,6 +471,8 @@ class OFACAddressesExtractor(GitHubRepositoryExtractor):
 class ENSTwitterExtractor(GitHubRepositoryExtractor):
     """Extractor for ultrasoundmoney/ens_twitter_accounts repository."""
     
+    SPARSE_PATHS = ['*.json', '*.csv']
+    
     def __init__(self):
         super().__init__("https://github.com/ultrasoundmoney/ens_twitter_accounts")
     
@@ -533,6 +607,8 @@ class ENSTwitterExtractor(GitHubRepositoryExtractor):
 class SybilListExtractor(GitHubRepositoryExtractor):
     """Extractor for Uniswap/sybil-list repository."""
     
+    SPARSE_PATHS = ['*.json']
+    
     def __init__(self):
         super().__init__("https://github.com/Uniswap/sybil-list")
     
@@ -642,6 +718,8 @@ class SybilListExtractor(GitHubRepositoryExtractor):
 class EllipticPlusPlusExtractor(GitHubRepositoryExtractor):
     """Extractor for git-disl/EllipticPlusPlus repository."""
     
+    SPARSE_PATHS = ['*.csv', '*.json']
+    
     def __init__(self):
         super().__init__("https://github.com/git-disl/EllipticPlusPlus")
     
@@ -770,6 +848,8 @@ class EllipticPlusPlusExtractor(GitHubRepositoryExtractor):
 class WhaleWatchingExtractor(GitHubRepositoryExtractor):
     """Extractor for 0x4A42/whale-watching repository."""
     
+    SPARSE_PATHS = ['*.json', '*.csv']
+    
     def __init__(self):
         super().__init__("https://github.com/0x4A42/whale-watching")
     
@@ -891,6 +971,8 @@ class WhaleWatchingExtractor(GitHubRepositoryExtractor):
 class EthereumETLExtractor(GitHubRepositoryExtractor):
     """Extractor for blockchain-etl/ethereum-etl-airflow repository."""
     
+    SPARSE_PATHS = ['*.json']
+    
     def __init__(self):
         super().__init__("https://github.com/blockchain-etl/ethereum-etl-airflow")
     
@@ -969,6 +1051,8 @@ class EthereumETLExtractor(GitHubRepositoryExtractor):
 class DefiLlamaExtractor(GitHubRepositoryExtractor):
     """Extractor for DefiLlama/defillama-server repository."""
     
+    SPARSE_PATHS = ['*.json', '*.js', '*.ts']
+    
     def __init__(self):
         super().__init__("https://github.com/DefiLlama/defillama-server")
     
@@ -1037,6 +1121,8 @@ class DefiLlamaExtractor(GitHubRepositoryExtractor):
 class ArkhamTokenListsExtractor(GitHubRepositoryExtractor):
     """Extractor for ArkhamIntel/token-lists repository."""
     
+    SPARSE_PATHS = ['*.json', '*.csv']
+    
     def __init__(self):
         super().__init__("https://github.com/ArkhamIntel/token-lists")
     
@@ -1146,6 +1232,8 @@ class ArkhamTokenListsExtractor(GitHubRepositoryExtractor):
 class ExplorerLabelsExtractor(GitHubRepositoryExtractor):
     """Extractor for 0xtracker/explorer-labels repository."""
     
+    SPARSE_PATHS = ['*.json', '*.csv', '*.yml', '*.yaml']
+    
     def __init__(self):
         super().__init__("https://github.com/0xtracker/explorer-labels")
     
@@ -1229,6 +1317,8 @@ class ExplorerLabelsExtractor(GitHubRepositoryExtractor):
 class EthereumWhaleWatcherExtractor(GitHubRepositoryExtractor):
     """Extractor for je-suis-tm/ethereum_whale_watcher repository."""
     
+    SPARSE_PATHS = ['*[Ww]hale*', '*WHALE*']
+    
     def __init__(self):
         super().__init__("https://github.com/je-suis-tm/ethereum_whale_watcher")
     
@@ -1297,13 +1387,35 @@ class EthereumWhaleWatcherExtractor(GitHubRepositoryExtractor):
             self.cleanup()
 
 
+def _run_extractor(extractor: GitHubRepositoryExtractor,
+                   head_sha: Optional[str]) -> Tuple[List[GitHubAddressData], float]:
+    """Process-pool entry point: run one extractor, return its addresses and wall time."""
+    extractor.head_sha = head_sha
+    started = time.perf_counter()
+    addresses = extractor.extract_addresses()
+    return addresses, time.perf_counter() - started
+
+
 class GitHubDataManager:
-    """Manager class to coordinate all GitHub repository extractions."""
+    """
+    Manager class to coordinate all GitHub repository extractions.
+    
+    Extractors run in a process pool, isolated from each other: one that
+    raises or crashes is reported as failed and the rest carry on. Results
+    are cached per extractor and remote HEAD commit, so a repository that
+    has not changed since its last successful extraction is not cloned or
+    parsed at all.
+    """
     
-    def __init__(self, temp_dir: Optional[str] = None):
+    def __init__(self, temp_dir: Optional[str] = None, max_workers: int = GITHUB_EXTRACT_WORKERS):
         self.temp_dir = temp_dir or tempfile.mkdtemp()
+        self.max_workers = max(1, max_workers)
+        self.results_dir = os.path.join(GITHUB_CACHE_DIR, 'results')
         self.logger = logging.getLogger(f"{__name__}.GitHubDataManager")
         
+        # Per-extractor status, address count, seconds and commit of the last run
+        self.last_report: Dict[str, Dict[str, Any]] = {}
+        
         # Initialize extractors
         self.extractors = {
             'etherscan_labels': EtherscanLabelsExtractor(),
@@ -1320,42 +1432,126 @@ class GitHubDataManager:
             'ethereum_whale_watcher': EthereumWhaleWatcherExtractor()
         }
     
-    def extract_all_repositories(self) -> List[GitHubAddressData]:
-        """Extract addresses from all GitHub repositories."""
-        all_addresses = []
+    def _results_path(self, name: str, head_sha: str) -> str:
+        return os.path.join(self.results_dir, f"{name}-{head_sha}.json.gz")
+    
+    def _load_cached_results(self, name: str, head_sha: Optional[str]) -> Optional[List[GitHubAddressData]]:
+        if not head_sha:
+            return None
+        path = self._results_path(name, head_sha)
+        if not os.path.exists(path):
+            return None
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                return [GitHubAddressData.from_dict(item) for item in json.load(f)]
+        except Exception as e:
+            self.logger.warning(f"Discarding unreadable cached results for {name}: {e}")
+            return None
+    
+    def _store_results(self, name: str, head_sha: Optional[str], addresses: List[GitHubAddressData]) -> None:
+        # Extractors log and return [] on failure, so an empty result is never cached
+        if not head_sha or not addresses:
+            return
+        try:
+            os.makedirs(self.results_dir, exist_ok=True)
+            for stale in os.listdir(self.results_dir):
+                if stale.startswith(f"{name}-"):
+                    os.remove(os.path.join(self.results_dir, stale))
+            path = self._results_path(name, head_sha)
+            with gzip.open(f"{path}.tmp", 'wt', encoding='utf-8') as f:
+                json.dump([address.to_dict() for address in addresses], f, default=str)
+            os.replace(f"{path}.tmp", path)
+        except Exception as e:
+            self.logger.warning(f"Failed to cache results for {name}: {e}")
+    
+    def stream_repositories(self, sink: Callable[[List[GitHubAddressData]], None],
+                            repo_names: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Run extractors and hand each one's addresses to ``sink`` as soon as it finishes.
         
-        for name, extractor in self.extractors.items():
-            try:
-                self.logger.info(f"Extracting from {name}...")
-                addresses = extractor.extract_addresses()
-                all_addresses.extend(addresses)
-                self.logger.info(f"Extracted {len(addresses)} addresses from {name}")
-                
-            except Exception as e:
-                self.logger.error(f"Failed to extract from {name}: {e}")
+        Args:
+            sink: Called once per extractor with that extractor's addresses
+            repo_names: Extractors to run. If None, runs all of them.
+        
+        Returns:
+            Per-extractor report: status ('ok', 'unchanged', 'failed'),
+            address count, seconds and commit SHA
+        """
+        names = []
+        for repo_name in (list(self.extractors) if repo_names is None else repo_names):
+            if repo_name in self.extractors:
+                names.append(repo_name)
+            else:
+                self.logger.warning(f"Unknown repository: {repo_name}")
+        
+        report: Dict[str, Dict[str, Any]] = {}
+        started = time.perf_counter()
+        
+        # ls-remote is network-bound; resolve every HEAD concurrently
+        with ThreadPoolExecutor(max_workers=max(1, min(8, len(names)))) as pool:
+            head_shas = dict(zip(names, pool.map(
+                lambda name: resolve_head_sha(self.extractors[name].repo_url), names)))
+        
+        pending = []
+        for name in names:
+            cached = self._load_cached_results(name, head_shas[name])
+            if cached is None:
+                pending.append(name)
                 continue
+            sink(cached)
+            report[name] = {'status': 'unchanged', 'addresses': len(cached), 'seconds': 0.0,
+                            'sha': head_shas[name]}
+            self.logger.info(f"{name} unchanged at {head_shas[name][:12]}, reused {len(cached)} cached addresses")
+        
+        if pending:
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(pending))) as pool:
+                futures = {
+                    pool.submit(_run_extractor, self.extractors[name], head_shas[name]): name
+                    for name in pending
+                }
+                for future in as_completed(futures):
+                    name = futures[future]
+                    try:
+                        addresses, seconds = future.result()
+                    except Exception as e:
+                        self.logger.error(f"Failed to extract from {name}: {e}")
+                        report[name] = {'status': 'failed', 'addresses': 0, 'seconds': None,
+                                        'sha': head_shas[name], 'error': str(e)}
+                        continue
+                    if not addresses:
+                        # Extractors swallow their own clone/parse errors and return
+                        # nothing; don't report or cache that as a successful run
+                        self.logger.error(f"No addresses extracted from {name}")
+                        report[name] = {'status': 'failed', 'addresses': 0, 'seconds': round(seconds, 2),
+                                        'sha': head_shas[name], 'error': 'no addresses extracted'}
+                        continue
+                    self._store_results(name, head_shas[name], addresses)
+                    sink(addresses)
+                    report[name] = {'status': 'ok', 'addresses': len(addresses), 'seconds': round(seconds, 2),
+                                    'sha': head_shas[name]}
+                    self.logger.info(f"Extracted {len(addresses)} addresses from {name} in {seconds:.1f}s")
         
+        self.last_report = report
+        total = sum(entry['addresses'] for entry in report.values())
+        self.logger.info(f"GitHub extraction: {total} addresses from {len(report)} repositories "
+                         f"in {time.perf_counter() - started:.1f}s")
+        for name in names:
+            entry = report[name]
+            seconds = f"{entry['seconds']:.1f}s" if entry['seconds'] is not None else '-'
+            self.logger.info(f"  {name:<24} {entry['status']:<10} {entry['addresses']:>7} addresses  {seconds}")
+        return report
+    
+    def extract_all_repositories(self) -> List[GitHubAddressData]:
+        """Extract addresses from all GitHub repositories."""
+        all_addresses: List[GitHubAddressData] = []
+        self.stream_repositories(all_addresses.extend)
         self.logger.info(f"Total addresses extracted from GitHub repositories: {len(all_addresses)}")
         return all_addresses
     
     def extract_specific_repositories(self, repo_names: List[str]) -> List[GitHubAddressData]:
         """Extract addresses from specific repositories."""
-        addresses = []
-        
-        for repo_name in repo_names:
-            if repo_name in self.extractors:
-                try:
-                    self.logger.info(f"Extracting from {repo_name}...")
-                    repo_addresses = self.extractors[repo_name].extract_addresses()
-                    addresses.extend(repo_addresses)
-                    self.logger.info(f"Extracted {len(repo_addresses)} addresses from {repo_name}")
-                    
-                except Exception as e:
-                    self.logger.error(f"Failed to extract from {repo_name}: {e}")
-                    continue
-            else:
-                self.logger.warning(f"Unknown repository: {repo_name}")
-        
+        addresses: List[GitHubAddressData] = []
+        self.stream_repositories(addresses.extend, repo_names=repo_names)
         return addresses
     
     def cleanup(self):
@@ -0,0 +1,405 @@
+"""Metrics - pipeline-wide latency histograms, event counters and queue gauges.
+
+The record path is lock-free: every thread writes into its own shard
+(a plain list of counts held in a threading.local), so ``observe()`` and
+``inc()`` never contend with each other or with a scrape. Shards are merged
+only when the registry is rendered, either as Prometheus text
+(``render_prometheus``) or as a JSON snapshot (``snapshot``).
+
+Existing ad-hoc stats dicts (dedup, gRPC, rate limiter, ...) are folded into
+the JSON snapshot through ``register_collector``.
+
+Usage:
+    from utils.metrics import STAGE_LATENCY, EVENTS
+
+    with STAGE_LATENCY.labels(stage='classify').time():
+        ...
+    EVENTS.labels(source='ethereum', outcome='accepted').inc()
+"""
+
+import bisect
+import logging
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds; spans sub-millisecond dict work up to slow external calls
+DEFAULT_LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+# Shard count at which registering a new thread first sweeps out exited threads
+SHARD_SWEEP_MIN = 64
+
+
+class _Sharded:
+    """Per-thread list of floats merged on read. Writers never take a lock.
+
+    Shards of threads that have exited (e.g. the per-event Supabase writer
+    threads) are folded into a retired total so they don't pile up: on read,
+    and when a new thread registers once the shard list has doubled since the
+    last sweep, so the list stays bounded even if nothing ever scrapes.
+    """
+
+    __slots__ = ('_size', '_local', '_shards', '_retired', '_lock', '_sweep_at')
+
+    def __init__(self, size: int):
+        self._size = size
+        self._local = threading.local()
+        self._shards: List[Tuple[threading.Thread, List[float]]] = []
+        self._retired = [0.0] * size
+        self._lock = threading.Lock()
+        self._sweep_at = SHARD_SWEEP_MIN
+
+    def shard(self) -> List[float]:
+        try:
+            return self._local.values
+        except AttributeError:
+            values = [0.0] * self._size
+            with self._lock:  # once per thread
+                if len(self._shards) >= self._sweep_at:
+                    self._retire_dead()
+                    self._sweep_at = max(SHARD_SWEEP_MIN, 2 * len(self._shards))
+                self._shards.append((threading.current_thread(), values))
+            self._local.values = values
+            return values
+
+    def _retire_dead(self) -> None:
+        """Fold the shards of exited threads into the retired total; caller holds the lock."""
+        live = []
+        for thread, values in self._shards:
+            if thread.is_alive():
+                live.append((thread, values))
+            else:
+                for i, value in enumerate(values):
+                    self._retired[i] += value
+        self._shards = live
+
+    def merged(self) -> List[float]:
+        with self._lock:
+            self._retire_dead()
+            live = self._shards
+            total = list(self._retired)
+        for _, values in live:
+            for i, value in enumerate(values):
+                total[i] += value
+        return total
+
+
+class _CounterChild:
+    __slots__ = ('_data',)
+
+    def __init__(self):
+        self._data = _Sharded(1)
+
+    def inc(self, amount: float = 1) -> None:
+        self._data.shard()[0] += amount
+
+    def value(self) -> float:
+        return self._data.merged()[0]
+
+
+class _GaugeChild:
+    __slots__ = ('_value', '_fn')
+
+    def __init__(self):
+        self._value = 0.0
+        self._fn: Optional[Callable[[], float]] = None
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        """Compute the value at scrape time (zero cost on the hot path)."""
+        self._fn = fn
+
+    def value(self) -> float:
+        if self._fn is not None:
+            try:
+                return float(self._fn())
+            except Exception:
+                return float('nan')
+        return self._value
+
+
+class _Timer:
+    __slots__ = ('_child', '_start')
+
+    def __init__(self, child: '_HistogramChild'):
+        self._child = child
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._child.observe(time.perf_counter() - self._start)
+        return False
+
+
+class _HistogramChild:
+    __slots__ = ('_buckets', '_data')
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self._buckets = buckets
+        # layout: one slot per bucket, +Inf, then sum
+        self._data = _Sharded(len(buckets) + 2)
+
+    def observe(self, value: float) -> None:
+        values = self._data.shard()
+        values[bisect.bisect_left(self._buckets, value)] += 1
+        values[-1] += value
+
+    def time(self) -> _Timer:
+        return _Timer(self)
+
+    def state(self) -> Tuple[List[float], float, float]:
+        """Return (non-cumulative bucket counts incl. +Inf, count, sum)."""
+        merged = self._data.merged()
+        counts = merged[:-1]
+        return counts, sum(counts), merged[-1]
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile by linear interpolation inside the bucket."""
+        counts, count, _ = self.state()
+        if not count:
+            return None
+        rank = q * count
+        seen = 0.0
+        lower = 0.0
+        for i, bucket_count in enumerate(counts):
+            upper = self._buckets[i] if i < len(self._buckets) else math.inf
+            if seen + bucket_count >= rank and bucket_count:
+                if upper == math.inf:
+                    return lower
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+            lower = upper
+        return lower
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self._child_for(())
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _child_for(self, key: Tuple[str, ...]):
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._new_child()
+                    self._children[key] = child
+        return child
+
+    def labels(self, *values: Any, **kwargs: Any):
+        if kwargs:
+            values = tuple(kwargs.get(name, '') for name in self.labelnames)
+        return self._child_for(tuple(str(v) for v in values))
+
+    def children(self) -> List[Tuple[Dict[str, str], Any]]:
+        with self._lock:
+            items = list(self._children.items())
+        return [(dict(zip(self.labelnames, key)), child) for key, child in items]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1) -> None:
+        self._default.inc(amount)
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self._default.set(value)
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        self._default.set_function(fn)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default.observe(value)
+
+    def time(self) -> _Timer:
+        return self._default.time()
+
+
+class MetricsRegistry:
+    """Holds metric families and stats collectors for the process."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, name: str, fn: Callable[[], Dict[str, Any]]) -> None:
+        """Include an existing stats function under ``name`` in the JSON snapshot."""
+        with self._lock:
+            self._collectors[name] = fn
+
+    def metrics(self) -> List[_Metric]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def render_prometheus(self) -> str:
+        """Render every metric in the Prometheus text exposition format (0.0.4)."""
+        lines: List[str] = []
+        for metric in self.metrics():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for labels, child in metric.children():
+                if metric.kind == 'histogram':
+                    counts, count, total = child.state()
+                    cumulative = 0.0
+                    for bound, bucket_count in zip(list(metric.buckets) + [math.inf], counts):
+                        cumulative += bucket_count
+                        le = '+Inf' if bound == math.inf else _format_value(bound)
+                        lines.append(f"{metric.name}_bucket{_format_labels(labels, le=le)} {_format_value(cumulative)}")
+                    lines.append(f"{metric.name}_sum{_format_labels(labels)} {_format_value(total)}")
+                    lines.append(f"{metric.name}_count{_format_labels(labels)} {_format_value(count)}")
+                else:
+                    suffix = '_total' if metric.kind == 'counter' and not metric.name.endswith('_total') else ''
+                    lines.append(f"{metric.name}{suffix}{_format_labels(labels)} {_format_value(child.value())}")
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-friendly view: counters/gauges, histogram summaries and collectors."""
+        result: Dict[str, Any] = {'timestamp': time.time(), 'metrics': {}, 'collectors': {}}
+        for metric in self.metrics():
+            series = []
+            for labels, child in metric.children():
+                if metric.kind == 'histogram':
+                    _, count, total = child.state()
+                    series.append({
+                        'labels': labels,
+                        'count': count,
+                        'sum': round(total, 6),
+                        'mean': round(total / count, 6) if count else None,
+                        'p50': child.quantile(0.50),
+                        'p95': child.quantile(0.95),
+                        'p99': child.quantile(0.99),
+                    })
+                else:
+                    series.append({'labels': labels, 'value': child.value()})
+            result['metrics'][metric.name] = {'type': metric.kind, 'series': series}
+
+        with self._lock:
+            collectors = list(self._collectors.items())
+        for name, fn in collectors:
+            try:
+                result['collectors'][name] = fn()
+            except Exception as e:
+                result['collectors'][name] = {'error': str(e)}
+        return result
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str], **extra: str) -> str:
+    merged = {**labels, **extra}
+    if not merged:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(str(v))}"' for k, v in merged.items()) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value != value:
+        return 'NaN'
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+# Process-wide registry
+REGISTRY = MetricsRegistry()
+
+# Pipeline metrics shared by every module
+STAGE_LATENCY = REGISTRY.histogram(
+    'whale_pipeline_stage_seconds',
+    'Latency of each pipeline stage (fetch, parse, classify, dedup, write)',
+    ('stage',),
+)
+PHASE_LATENCY = REGISTRY.histogram(
+    'whale_classification_phase_seconds',
+    'Latency of each WhaleIntelligenceEngine analysis phase',
+    ('phase',),
+)
+EVENTS = REGISTRY.counter(
+    'whale_events_total',
+    'Events seen per source and outcome',
+    ('source', 'outcome'),
+)
+QUEUE_DEPTH = REGISTRY.gauge(
+    'whale_queue_depth',
+    'Items waiting in in-process queues and buffers',
+    ('queue',),
+)
+
+
+def register_collector(name: str, fn: Callable[[], Dict[str, Any]]) -> None:
+    REGISTRY.register_collector(name, fn)
+
+
+def render_prometheus() -> str:
+    return REGISTRY.render_prometheus()
+
+
+def snapshot() -> Dict[str, Any]:
+    return REGISTRY.snapshot()
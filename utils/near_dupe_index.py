@@ -0,0 +1,174 @@
+"""Near-duplicate index - time-windowed, USD-bucketed lookup of recent transactions.
+
+Replaces per-key lists that were appended to and fully re-sorted on every
+insert and scanned linearly on every probe. Each key (e.g. (whale, token)
+or token) holds:
+
+* its entries in timestamp order (``bisect.insort`` on (epoch, seq), which
+  is an append for the usual in-order arrival), used for age expiry and
+  the per-key size cap, and
+* a USD bucket map. Buckets are equal-width in ``log1p(usd / S)`` where
+  ``S = abs_tolerance / pct_tolerance``, so one bucket spans roughly the
+  absolute tolerance for small values and the percentage tolerance for
+  large ones. A probe visits only the two or three buckets that can hold a
+  match, then filters those few candidates by time.
+
+The index also tracks how far back it is complete for a key (process start,
+age expiry and cap evictions), so callers can skip a database lookback when
+``covers()`` says the in-memory window already spans the requested range.
+"""
+
+import bisect
+import itertools
+import math
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+def to_epoch(timestamp: Any) -> float:
+    """Aware datetime, ISO string (no offset = UTC) or number -> epoch seconds.
+
+    Naive datetimes are rejected: ``datetime.fromtimestamp()`` returns local
+    time, and guessing wrong shifts entries against the ``time.time()``
+    bookkeeping behind ``covers()``.
+    """
+    if isinstance(timestamp, datetime):
+        if timestamp.tzinfo is None:
+            raise ValueError(f"naive datetime {timestamp.isoformat()} has no timezone; pass an aware datetime")
+        return timestamp.timestamp()
+    if isinstance(timestamp, str):
+        parsed = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+    return float(timestamp)
+
+
+class _KeyWindow:
+    __slots__ = ('order', 'buckets', 'evicted_through')
+
+    def __init__(self):
+        # (epoch, seq, bucket, entry), sorted by (epoch, seq)
+        self.order: List[Tuple[float, int, int, Dict[str, Any]]] = []
+        self.buckets: Dict[int, List[Tuple[float, int, int, Dict[str, Any]]]] = {}
+        # Newest timestamp dropped by the size cap; the window is incomplete before it
+        self.evicted_through = float('-inf')
+
+    def remove_oldest(self) -> Tuple[float, int, int, Dict[str, Any]]:
+        item = self.order.pop(0)
+        bucket = self.buckets[item[2]]
+        bucket.remove(item)
+        if not bucket:
+            del self.buckets[item[2]]
+        return item
+
+
+class WindowedDupeIndex:
+    """Thread-safe per-key index of recent transactions for near-duplicate probes."""
+
+    # Full sweep for keys that stopped receiving traffic, every N inserts
+    SWEEP_EVERY = 1_000
+
+    def __init__(self, window_seconds: float, retention_seconds: float, max_per_key: int,
+                 abs_tolerance: float, pct_tolerance: float):
+        self.window = window_seconds
+        self.retention = max(retention_seconds, window_seconds)
+        self.max_per_key = max_per_key
+        self.abs_tolerance = abs_tolerance
+        self.pct_tolerance = pct_tolerance
+        self._scale = abs_tolerance / pct_tolerance
+
+        self._keys: Dict[Hashable, _KeyWindow] = {}
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._watermark = float('-inf')
+        # Everything before this is gone from memory (never seen, or expired)
+        self._complete_since = time.time()
+        self._inserts = 0
+        self.stats = {'probes': 0, 'candidates': 0, 'expired': 0, 'cap_evicted': 0}
+
+    # ------------------------------------------------------------------
+
+    def _bucket(self, usd_value: float) -> int:
+        return int(math.log1p(max(usd_value, 0.0) / self._scale) / self.pct_tolerance)
+
+    def _value_range(self, usd_value: float) -> Tuple[float, float]:
+        """Widest [lo, hi] of values that can match ``usd_value`` under either tolerance."""
+        half = self.pct_tolerance / 2
+        lo = min(usd_value - self.abs_tolerance, usd_value * (1 - half) / (1 + half))
+        hi = max(usd_value + self.abs_tolerance, usd_value * (1 + half) / (1 - half))
+        return lo, hi
+
+    def _expire(self, key: Hashable, window: _KeyWindow) -> None:
+        cutoff = self._watermark - self.retention
+        while window.order and window.order[0][0] < cutoff:
+            window.remove_oldest()
+            self.stats['expired'] += 1
+        if not window.order:
+            del self._keys[key]
+
+    def _sweep(self) -> None:
+        for key, window in list(self._keys.items()):
+            self._expire(key, window)
+
+    # ------------------------------------------------------------------
+
+    def add(self, key: Hashable, entry: Dict[str, Any]) -> None:
+        """Index ``entry`` (needs 'timestamp' and 'usd_value') under ``key``."""
+        epoch = to_epoch(entry['timestamp'])
+        item = (epoch, next(self._seq), self._bucket(float(entry.get('usd_value') or 0)), entry)
+        with self._lock:
+            if epoch > self._watermark:
+                self._watermark = epoch
+                self._complete_since = max(self._complete_since, epoch - self.retention)
+            window = self._keys.get(key)
+            if window is None:
+                window = self._keys[key] = _KeyWindow()
+            bisect.insort(window.order, item, key=lambda i: (i[0], i[1]))
+            window.buckets.setdefault(item[2], []).append(item)
+            while len(window.order) > self.max_per_key:
+                evicted = window.remove_oldest()
+                window.evicted_through = max(window.evicted_through, evicted[0])
+                self.stats['cap_evicted'] += 1
+            self._expire(key, window)
+
+            self._inserts += 1
+            if self._inserts % self.SWEEP_EVERY == 0:
+                self._sweep()
+
+    def candidates(self, key: Hashable, usd_value: float, timestamp: Any) -> List[Dict[str, Any]]:
+        """Entries under ``key`` within the time window and value tolerance range, newest first."""
+        epoch = to_epoch(timestamp)
+        lo, hi = self._value_range(usd_value)
+        with self._lock:
+            self.stats['probes'] += 1
+            window = self._keys.get(key)
+            if window is None:
+                return []
+            found = []
+            for bucket in range(self._bucket(lo), self._bucket(hi) + 1):
+                for item in window.buckets.get(bucket, ()):
+                    if abs(item[0] - epoch) <= self.window and lo <= float(item[3].get('usd_value') or 0) <= hi:
+                        found.append(item)
+            self.stats['candidates'] += len(found)
+        found.sort(key=lambda i: (i[0], i[1]), reverse=True)
+        return [item[3] for item in found]
+
+    def covers(self, key: Hashable, timestamp: Any) -> bool:
+        """True if every entry for ``key`` in [timestamp - window, timestamp] is in memory."""
+        since = to_epoch(timestamp) - self.window
+        with self._lock:
+            if since < self._complete_since:
+                return False
+            window = self._keys.get(key)
+            return window is None or since > window.evicted_through
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                'keys': len(self._keys),
+                'entries': sum(len(window.order) for window in self._keys.values()),
+            }
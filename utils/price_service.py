@@ -0,0 +1,161 @@
+"""Price Service - background token price refresh behind an atomically swapped snapshot.
+
+``TOKEN_PRICES`` (data.tokens) is a ``LivePrices`` view. Readers call
+``TOKEN_PRICES.get(symbol)`` exactly as they did on the old dict; each read
+dereferences the current ``PriceSnapshot``, an immutable mapping that is
+never modified after it is published. ``publish()`` builds a complete new
+snapshot and swaps it in with a single reference assignment, so the hot path
+never takes a lock, never sees a half-applied refresh and never makes a
+network call. Code that needs several prices from the same refresh can hold
+on to ``TOKEN_PRICES.snapshot``.
+
+``PriceRefresher`` re-fetches every monitored symbol in one batched call
+(``fetch_batch(coin_ids) -> {coin_id: usd}``) every ``interval`` seconds on a
+daemon thread. A failed or empty fetch keeps the previous snapshot; symbols
+missing from a partial response keep their previous price. The clock is
+injectable so staleness can be tested without sleeping.
+
+Environment:
+    WHALE_PRICE_REFRESH_SECONDS   seconds between refreshes (default 60)
+"""
+
+import logging
+import os
+import threading
+import time
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+PRICE_REFRESH_SECONDS = float(os.getenv('WHALE_PRICE_REFRESH_SECONDS', '60'))
+
+
+class PriceSnapshot:
+    """One published price table. Never modified after construction."""
+
+    __slots__ = ('prices', 'fetched_at', 'version')
+
+    def __init__(self, prices: Mapping[str, float], fetched_at: float, version: int):
+        object.__setattr__(self, 'prices', MappingProxyType(dict(prices)))
+        object.__setattr__(self, 'fetched_at', fetched_at)
+        object.__setattr__(self, 'version', version)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('PriceSnapshot is immutable')
+
+    def age(self, now: float) -> float:
+        return now - self.fetched_at
+
+
+class LivePrices(Mapping):
+    """Read-only mapping over the latest ``PriceSnapshot``."""
+
+    def __init__(self, prices: Mapping[str, float]):
+        self._snapshot = PriceSnapshot(prices, fetched_at=0.0, version=0)
+        # Serializes publishers only; readers never touch it
+        self._publish_lock = threading.Lock()
+
+    @property
+    def snapshot(self) -> PriceSnapshot:
+        return self._snapshot
+
+    def __getitem__(self, symbol: str) -> float:
+        return self._snapshot.prices[symbol]
+
+    def get(self, symbol: str, default: Any = None) -> Any:
+        return self._snapshot.prices.get(symbol, default)
+
+    def __contains__(self, symbol: object) -> bool:
+        return symbol in self._snapshot.prices
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._snapshot.prices)
+
+    def __len__(self) -> int:
+        return len(self._snapshot.prices)
+
+    def publish(self, build: Callable[[Mapping[str, float]], Mapping[str, float]],
+                fetched_at: Optional[float] = None) -> PriceSnapshot:
+        """Swap in ``build(current_prices)`` as the new snapshot and return it."""
+        with self._publish_lock:
+            current = self._snapshot
+            snapshot = PriceSnapshot(build(current.prices),
+                                     fetched_at=time.time() if fetched_at is None else fetched_at,
+                                     version=current.version + 1)
+            self._snapshot = snapshot
+        return snapshot
+
+
+class PriceRefresher:
+    """Periodically re-fetches ``coin_ids`` and publishes them into a ``LivePrices``."""
+
+    def __init__(self, prices: LivePrices, fetch_batch: Callable[[list], Dict[str, float]],
+                 symbol_ids: Mapping[str, str],
+                 derive: Optional[Callable[[Dict[str, float]], None]] = None,
+                 interval: float = PRICE_REFRESH_SECONDS,
+                 clock: Callable[[], float] = time.time):
+        self.prices = prices
+        self.fetch_batch = fetch_batch
+        self.derive = derive
+        self.interval = interval
+        self.clock = clock
+        self._id_to_symbols: Dict[str, list] = {}
+        for symbol, coin_id in symbol_ids.items():
+            self._id_to_symbols.setdefault(coin_id, []).append(symbol)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {'refreshes': 0, 'failures': 0, 'last_updated': 0, 'last_fetch_seconds': 0.0}
+
+    def run_once(self) -> bool:
+        """Fetch all prices in one batch and publish them. False if nothing was fetched."""
+        started = time.perf_counter()
+        try:
+            fetched = self.fetch_batch(list(self._id_to_symbols))
+        except Exception as e:
+            logger.warning(f"Price refresh failed: {e}")
+            fetched = {}
+        self.stats['last_fetch_seconds'] = round(time.perf_counter() - started, 3)
+        if not fetched:
+            self.stats['failures'] += 1
+            return False
+
+        updates = {symbol: price
+                   for coin_id, price in fetched.items()
+                   for symbol in self._id_to_symbols.get(coin_id, ())}
+
+        def build(current: Mapping[str, float]) -> Dict[str, float]:
+            table = dict(current)
+            table.update(updates)
+            if self.derive is not None:
+                self.derive(table)
+            return table
+
+        self.prices.publish(build, fetched_at=self.clock())
+        self.stats['refreshes'] += 1
+        self.stats['last_updated'] = len(updates)
+        return True
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="PriceRefresher")
+        self._thread.start()
+        logger.info(f"Price refresher started ({len(self._id_to_symbols)} coins every {self.interval:.0f}s)")
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+    def get_stats(self) -> Dict[str, Any]:
+        snapshot = self.prices.snapshot
+        return {
+            **self.stats,
+            'version': snapshot.version,
+            'symbols': len(snapshot.prices),
+            'age_seconds': round(snapshot.age(self.clock()), 1) if snapshot.fetched_at else None,
+        }
@@ -32,10 +32,13 @@ except ImportError as e:
     sys.exit(1)
 
 # BigQuery is optional; if unavailable, disable gracefully
-try:
-    from utils.bigquery_analyzer import bigquery_analyzer  # type: ignore
-except Exception:
-    bigquery_analyzer = None
+def _get_bigquery_analyzer():
+    """Resolve the shared BigQuery analyzer on first use (never at import)."""
+    try:
+        from utils.bigquery_analyzer import get_bigquery_analyzer  # type: ignore
+        return get_bigquery_analyzer()
+    except Exception:
+        return None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -276,6 +279,7 @@ class RealTimeClassifier:
     async def validate_with_bigquery(self, transaction_hash: str, chain: str) -> Dict[str, Any]:
         """Validate using BigQuery only if available at no cost, otherwise return disabled reason."""
         try:
+            bigquery_analyzer = _get_bigquery_analyzer()
             if not bigquery_analyzer or not getattr(bigquery_analyzer, 'client', None):
                 return {'bigquery_disabled_reason': 'unavailable_or_cost'}
             return {'bigquery_enabled': True}
@@ -0,0 +1,187 @@
+"""Seen-set - bounded, time-ordered membership set for transaction hash dedup.
+
+``SeenSet`` answers "have we processed this hash?" and records it in one
+call. The exact tier is an insertion-ordered LRU (``OrderedDict``): inserts,
+hits and evictions are O(1) and the entry evicted at capacity is always the
+least recently seen one, never an arbitrary subset.
+
+For windows too large to hold exactly, ``bloom_window`` adds a rotating pair
+of Bloom filters behind the LRU. Every hash goes into the current filter;
+once it holds ``bloom_window`` hashes it becomes the previous filter and a
+fresh one takes over, so hashes are remembered for between one and two
+windows in constant memory. A Bloom hit can be a false positive (a new hash
+reported as seen); each filter is sized for half of ``bloom_fp_rate`` so the
+combined lookup stays within that budget at full load.
+
+    seen = SeenSet(capacity=10_000, bloom_window=1_000_000, bloom_fp_rate=0.001)
+    if seen.check_and_add(tx_hash):
+        return  # duplicate
+"""
+
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from utils.metrics import REGISTRY
+
+SEEN_SET_EVENTS = REGISTRY.counter(
+    'whale_seen_set_events_total',
+    'Seen-set lookups and evictions by set and result (hit, bloom_hit, miss, evict, rotate)',
+    ('set', 'result'),
+)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter using double hashing over one blake2b digest."""
+
+    __slots__ = ('capacity', 'fp_rate', 'num_bits', 'num_hashes', 'count', '_bits')
+
+    def __init__(self, capacity: int, fp_rate: float):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        if not 0 < fp_rate < 1:
+            raise ValueError("fp_rate must be between 0 and 1")
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        # Optimal sizing: m = -n ln p / (ln 2)^2, k = (m / n) ln 2
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(fp_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.count = 0
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        m = self.num_bits
+        return [(h1 + i * h2) % m for i in range(self.num_hashes)]
+
+    def add(self, key: str) -> None:
+        bits = self._bits
+        for pos in self._positions(key):
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        bits = self._bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def estimated_fp_rate(self) -> float:
+        """False-positive probability at the current fill: (1 - e^(-kn/m))^k."""
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+
+class RotatingBloomFilter:
+    """Two Bloom filters covering the last one to two windows of ``window`` keys."""
+
+    def __init__(self, window: int, fp_rate: float):
+        self.window = window
+        self.fp_rate = fp_rate
+        # A lookup checks both filters, so each gets half of the budget
+        self._filter_fp_rate = fp_rate / 2
+        self.current = BloomFilter(window, self._filter_fp_rate)
+        self.previous: Optional[BloomFilter] = None
+        self.rotations = 0
+
+    def add(self, key: str) -> bool:
+        """Add a key; returns True if the filters rotated."""
+        self.current.add(key)
+        if self.current.count >= self.window:
+            self.previous = self.current
+            self.current = BloomFilter(self.window, self._filter_fp_rate)
+            self.rotations += 1
+            return True
+        return False
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.current or (self.previous is not None and key in self.previous)
+
+    def estimated_fp_rate(self) -> float:
+        miss_current = 1 - self.current.estimated_fp_rate()
+        miss_previous = 1 - self.previous.estimated_fp_rate() if self.previous is not None else 1.0
+        return 1 - miss_current * miss_previous
+
+    @property
+    def memory_bytes(self) -> int:
+        previous = len(self.previous._bits) if self.previous is not None else 0
+        return len(self.current._bits) + previous
+
+
+class SeenSet:
+    """Thread-safe bounded seen-set: exact LRU, optionally backed by rotating Bloom filters."""
+
+    def __init__(self, capacity: int = 10_000, bloom_window: int = 0,
+                 bloom_fp_rate: float = 0.001, name: str = 'default'):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.name = name
+        self._entries: 'OrderedDict[str, None]' = OrderedDict()
+        self._bloom = RotatingBloomFilter(bloom_window, bloom_fp_rate) if bloom_window > 0 else None
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'bloom_hits': 0, 'misses': 0, 'evictions': 0}
+
+        self._hit = SEEN_SET_EVENTS.labels(set=name, result='hit')
+        self._bloom_hit = SEEN_SET_EVENTS.labels(set=name, result='bloom_hit')
+        self._miss = SEEN_SET_EVENTS.labels(set=name, result='miss')
+        self._evict = SEEN_SET_EVENTS.labels(set=name, result='evict')
+        self._rotate = SEEN_SET_EVENTS.labels(set=name, result='rotate')
+
+    def check_and_add(self, key: str) -> bool:
+        """Return True if ``key`` was already seen; otherwise record it and return False."""
+        with self._lock:
+            entries = self._entries
+            if key in entries:
+                entries.move_to_end(key)
+                self.stats['hits'] += 1
+                self._hit.inc()
+                return True
+
+            if self._bloom is not None and key in self._bloom:
+                # Seen within the Bloom window (or a false positive within budget)
+                self.stats['bloom_hits'] += 1
+                self._bloom_hit.inc()
+                return True
+
+            entries[key] = None
+            if len(entries) > self.capacity:
+                entries.popitem(last=False)
+                self.stats['evictions'] += 1
+                self._evict.inc()
+            if self._bloom is not None and self._bloom.add(key):
+                self._rotate.inc()
+            self.stats['misses'] += 1
+            self._miss.inc()
+            return False
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries or (self._bloom is not None and key in self._bloom)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._bloom is not None:
+                self._bloom = RotatingBloomFilter(self._bloom.window, self._bloom.fp_rate)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = {
+                **self.stats,
+                'size': len(self._entries),
+                'capacity': self.capacity,
+            }
+            if self._bloom is not None:
+                stats.update({
+                    'bloom_window': self._bloom.window,
+                    'bloom_fp_budget': self._bloom.fp_rate,
+                    'bloom_estimated_fp_rate': round(self._bloom.estimated_fp_rate(), 8),
+                    'bloom_rotations': self._bloom.rotations,
+                    'bloom_memory_bytes': self._bloom.memory_bytes,
+                })
+            return stats
@@ -13,6 +13,8 @@ import logging
 from datetime import datetime, timezone
 from typing import Dict, Any, Optional
 
+from utils.metrics import STAGE_LATENCY, EVENTS
+
 logger = logging.getLogger(__name__)
 
 # Lazy-initialized Supabase client
@@ -194,11 +196,13 @@ def store_transaction(event: Dict[str, Any], classification_data: Optional[Dict[
             logger.warning(f"Unknown blockchain '{blockchain}', skipping storage")
             return False
 
-        result = client.table(table_name).upsert(
-            row,
-            on_conflict='transaction_hash'
-        ).execute()
+        with STAGE_LATENCY.labels(stage='write').time():
+            result = client.table(table_name).upsert(
+                row,
+                on_conflict='transaction_hash'
+            ).execute()
 
+        EVENTS.labels(source=blockchain, outcome='stored' if result.data else 'store_empty').inc()
         if result.data:
             logger.info(
                 f"Stored -> {table_name}: {row['token_symbol']} "
@@ -208,6 +212,7 @@ def store_transaction(event: Dict[str, Any], classification_data: Optional[Dict[
         return False
 
     except Exception as e:
+        EVENTS.labels(source=event.get('blockchain', 'unknown'), outcome='store_failed').inc()
         logger.error(f"Failed to store transaction {event.get('tx_hash', '?')}: {e}")
         return False
 
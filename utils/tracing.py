@@ -0,0 +1,296 @@
+"""Tracing - per-transaction span trees, slow-transaction log and sampling profiler.
+
+A trace is opened for each classified transaction with ``trace()``; code on
+the call path opens child spans with ``span()``. The active span is held in
+a ContextVar, so nesting follows the call stack per thread (and per asyncio
+task). When no trace is active ``span()`` is a no-op costing one ContextVar
+lookup, so shared helpers like the Alchemy RPC client can be instrumented
+unconditionally.
+
+When a trace finishes above ``SLOW_TX_THRESHOLD_MS`` its full span tree is
+logged and kept in a small ring buffer for the admin endpoint.
+
+``SamplingProfiler`` samples every thread's stack via
+``sys._current_frames()`` on a background thread and aggregates collapsed
+stacks (flamegraph format) for on-demand profiling in production.
+
+Environment:
+    WHALE_SLOW_TX_MS       slow-transaction threshold in ms (default 2000)
+    WHALE_SLOW_TX_KEEP     number of slow traces kept in memory (default 50)
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from functools import wraps
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, List, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+SLOW_TX_THRESHOLD_MS = float(os.getenv('WHALE_SLOW_TX_MS', '2000'))
+SLOW_TX_KEEP = int(os.getenv('WHALE_SLOW_TX_KEEP', '50'))
+
+_current_span: ContextVar[Optional['Span']] = ContextVar('whale_current_span', default=None)
+_slow_traces: Deque[Dict[str, Any]] = deque(maxlen=SLOW_TX_KEEP)
+
+
+def endpoint_label(url: str) -> str:
+    """Reduce a provider URL to scheme://host so API keys in paths never leak into traces."""
+    try:
+        parsed = urlparse(url)
+        return f"{parsed.scheme}://{parsed.netloc}" if parsed.netloc else str(url)
+    except Exception:
+        return 'unknown'
+
+
+class Span:
+    """One timed operation with attributes and child spans."""
+
+    __slots__ = ('name', 'attributes', 'children', 'start', 'duration_ms', 'error', '_metric', '_token')
+
+    def __init__(self, name: str, attributes: Dict[str, Any], metric=None):
+        self.name = name
+        self.attributes = attributes
+        self.children: List['Span'] = []
+        self.start = 0.0
+        self.duration_ms = 0.0
+        self.error: Optional[str] = None
+        self._metric = metric
+        self._token = None
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def __enter__(self) -> 'Span':
+        self.start = time.perf_counter()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        elapsed = time.perf_counter() - self.start
+        self.duration_ms = elapsed * 1000
+        if exc_type is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._token)
+        if self._metric is not None:
+            self._metric.observe(elapsed)
+        return False
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {
+            'name': self.name,
+            'duration_ms': round(self.duration_ms, 3),
+        }
+        if self.attributes:
+            result['attributes'] = self.attributes
+        if self.error:
+            result['error'] = self.error
+        if self.children:
+            result['children'] = [child.to_dict() for child in self.children]
+        return result
+
+    def render(self, indent: int = 0) -> str:
+        """Human-readable indented tree."""
+        attrs = ' '.join(f"{k}={v}" for k, v in self.attributes.items())
+        line = f"{'  ' * indent}{self.name} {self.duration_ms:.1f}ms {attrs}".rstrip()
+        if self.error:
+            line += f" error={self.error}"
+        return '\n'.join([line] + [child.render(indent + 1) for child in self.children])
+
+
+class _MetricOnly:
+    """Stand-in used outside a trace: still feeds the metric, records nothing else."""
+
+    __slots__ = ('_metric', '_start')
+
+    def __init__(self, metric):
+        self._metric = metric
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        self._metric.observe(time.perf_counter() - self._start)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _Trace(Span):
+    """Root span; reports itself to the slow-transaction log on exit."""
+
+    __slots__ = ()
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        super().__exit__(exc_type, exc, tb)
+        if self.duration_ms >= SLOW_TX_THRESHOLD_MS:
+            _record_slow_trace(self)
+        return False
+
+
+def trace(name: str, metric=None, **attributes: Any) -> Span:
+    """Open a root span, or a child span if a trace is already active."""
+    parent = _current_span.get()
+    if parent is not None:
+        child = Span(name, attributes, metric)
+        parent.children.append(child)
+        return child
+    return _Trace(name, attributes, metric)
+
+
+def span(name: str, metric=None, **attributes: Any):
+    """Open a child span of the active trace; no-op (apart from ``metric``) outside one."""
+    parent = _current_span.get()
+    if parent is None:
+        return _MetricOnly(metric) if metric is not None else _NOOP
+    child = Span(name, attributes, metric)
+    parent.children.append(child)
+    return child
+
+
+def traced(name: str, **attributes: Any) -> Callable:
+    """Decorator form of ``span()`` for methods that make one external call."""
+    def decorator(fn: Callable) -> Callable:
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return fn(*args, **kwargs)
+            with span(name, **attributes):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def _record_slow_trace(root: Span) -> None:
+    entry = {'recorded_at': time.time(), 'trace': root.to_dict()}
+    _slow_traces.append(entry)
+    logger.warning(
+        f"Slow transaction trace ({root.duration_ms:.0f}ms >= {SLOW_TX_THRESHOLD_MS:.0f}ms):\n{root.render()}"
+    )
+
+
+def get_slow_traces(limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Most recent slow traces, newest first."""
+    traces = list(_slow_traces)[::-1]
+    return traces[:limit] if limit else traces
+
+
+class SamplingProfiler:
+    """Wall-clock sampling profiler over all threads.
+
+    Samples run on a daemon thread so the profiled threads are never paused
+    beyond the GIL hand-off of ``sys._current_frames()``.
+    """
+
+    def __init__(self, interval_ms: float = 5.0, max_depth: int = 64):
+        self.interval = interval_ms / 1000.0
+        self.max_depth = max_depth
+        self._stacks: Counter = Counter()
+        self._samples = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds: float) -> bool:
+        """Start sampling for ``seconds``; returns False if already running."""
+        with self._lock:
+            if self.running:
+                return False
+            self._stacks = Counter()
+            self._samples = 0
+            self._stop.clear()
+            self.started_at = time.time()
+            self.finished_at = None
+            self._thread = threading.Thread(
+                target=self._run, args=(seconds,), daemon=True, name="SamplingProfiler"
+            )
+            self._thread.start()
+            return True
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self, seconds: float) -> None:
+        own_ident = threading.get_ident()
+        names = {}
+        deadline = time.monotonic() + seconds
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            if len(names) != threading.active_count():
+                names = {t.ident: t.name for t in threading.enumerate()}
+            sampled = []
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                sampled.append(';'.join(reversed(stack)))
+            # Readers may be formatting a snapshot while we sample
+            with self._lock:
+                self._stacks.update(sampled)
+                self._samples += 1
+            time.sleep(self.interval)
+        self.finished_at = time.time()
+
+    def _snapshot(self):
+        with self._lock:
+            return Counter(dict(self._stacks)), self._samples
+
+    def collapsed(self) -> str:
+        """Collapsed stacks ("frame;frame;frame count"), input for flamegraph tools."""
+        stacks, _ = self._snapshot()
+        return '\n'.join(f"{stack} {count}" for stack, count in stacks.most_common())
+
+    def summary(self, top: int = 25) -> Dict[str, Any]:
+        stacks, samples = self._snapshot()
+        return {
+            'running': self.running,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'samples': samples,
+            'interval_ms': self.interval * 1000,
+            'top_stacks': [
+                {'stack': stack.split(';'), 'count': count}
+                for stack, count in stacks.most_common(top)
+            ],
+        }
+
+
+# Process-wide profiler used by the admin endpoint
+profiler = SamplingProfiler()
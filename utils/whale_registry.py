@@ -2,17 +2,280 @@
 """
 Whale Wallet Registry
 Tracks wallets that consistently make profitable/significant moves
+
+Persistence is log-structured. ``track_transaction`` applies the trade in
+memory and queues one compact, sequence-numbered record; a background writer
+appends the records to ``<persistence_file>.log`` (flushed and fsynced per
+batch) and, every ``compact_every`` records, writes a snapshot of the whole
+registry to ``persistence_file`` (tmp + os.replace) and truncates the log.
+The writer keeps its own copy of the registry, built by applying the same
+records, so a snapshot never needs the hot path's lock and always matches a
+log position exactly.
+
+``load_registry`` reads the snapshot (a legacy plain ``{address: data}`` file
+is accepted too) and replays the log records newer than the snapshot's
+sequence number. A crash can lose at most the records that were still
+queued; a torn last log line is ignored and a crash between the snapshot
+swap and the log truncation doesn't double-count, because already
+snapshotted records are skipped by sequence number.
+
+Environment:
+    WHALE_REGISTRY_COMPACT_EVERY   log records between snapshots (default 10000)
 """
 
+import atexit
 import logging
 import json
 import os
-from typing import Dict, Optional
+import queue
+import threading
+from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 from decimal import Decimal
 
+from utils.metrics import register_collector
+
 logger = logging.getLogger(__name__)
 
+COMPACT_EVERY = int(os.getenv('WHALE_REGISTRY_COMPACT_EVERY', '10000'))
+
+# Trades kept per whale in trade_history
+TRADE_HISTORY_LIMIT = 50
+
+SNAPSHOT_VERSION = 2
+
+
+def _smart_money_score(whale_data: Dict) -> float:
+    """
+    Calculate "smart money" score based on:
+    - Consistency (regular trading)
+    - Volume (high value trades)
+    - Diversification (trading multiple tokens)
+    """
+    score = 0.5  # Start neutral
+    
+    # Factor 1: Trade frequency (max +0.2)
+    if whale_data['total_trades'] >= 20:
+        score += 0.2
+    elif whale_data['total_trades'] >= 10:
+        score += 0.1
+    
+    # Factor 2: Total volume (max +0.2)
+    if whale_data['total_volume_usd'] >= 1_000_000:
+        score += 0.2
+    elif whale_data['total_volume_usd'] >= 500_000:
+        score += 0.1
+    
+    # Factor 3: Token diversification (max +0.1)
+    unique_tokens = len(whale_data['tokens_traded'])
+    if unique_tokens >= 10:
+        score += 0.1
+    elif unique_tokens >= 5:
+        score += 0.05
+    
+    return min(0.99, score)
+
+
+def apply_trade(registry: Dict[str, Dict], record: Dict) -> None:
+    """
+    Apply one trade record to a registry.
+    
+    Deterministic in the record alone (the timestamp travels with it), so the
+    hot path, the background writer and log replay all reach the same state.
+    
+    Args:
+        registry: {address: whale_data}, updated in place
+        record: {'n': seq, 'a': address (lower-case), 't': ISO timestamp,
+                 'c': classification, 'k': token, 'u': usd_value, 'f': confidence}
+    """
+    address = record['a']
+    timestamp = record['t']
+    
+    # Initialize if new whale
+    whale_data = registry.get(address)
+    if whale_data is None:
+        whale_data = registry[address] = {
+            'address': address,
+            'first_seen': timestamp,
+            'last_activity': timestamp,
+            'total_trades': 0,
+            'buy_count': 0,
+            'sell_count': 0,
+            'total_volume_usd': 0.0,
+            'tokens_traded': [],
+            'smart_money_score': 0.5,  # Start neutral
+            'is_proven': False,
+            'trade_history': []
+        }
+    
+    # Update stats
+    whale_data['last_activity'] = timestamp
+    whale_data['total_trades'] += 1
+    whale_data['total_volume_usd'] += record['u'] or 0
+    
+    if record['c'] == 'BUY':
+        whale_data['buy_count'] += 1
+    elif record['c'] == 'SELL':
+        whale_data['sell_count'] += 1
+    
+    # Track tokens
+    token = record['k']
+    if token and token not in whale_data['tokens_traded']:
+        whale_data['tokens_traded'].append(token)
+    
+    # Add to trade history (keep last TRADE_HISTORY_LIMIT)
+    history = whale_data['trade_history']
+    history.append({
+        'timestamp': timestamp,
+        'classification': record['c'],
+        'token': token,
+        'usd_value': record['u'],
+        'confidence': record['f']
+    })
+    if len(history) > TRADE_HISTORY_LIMIT:
+        del history[:-TRADE_HISTORY_LIMIT]
+    
+    # Update smart money score
+    whale_data['smart_money_score'] = _smart_money_score(whale_data)
+    
+    # Mark as proven if meets criteria
+    if (
+        whale_data['total_trades'] >= 5 and
+        whale_data['total_volume_usd'] >= 250_000 and
+        whale_data['smart_money_score'] >= 0.65
+    ):
+        whale_data['is_proven'] = True
+
+
+def _number(value) -> Optional[float]:
+    """JSON-safe float for usd_value / confidence (Decimal, int or None)."""
+    return float(value) if isinstance(value, (int, float, Decimal)) else value
+
+
+class _RegistryWriter:
+    """Background thread that appends trade records and compacts them into snapshots."""
+    
+    def __init__(self, snapshot_file: str, log_file: str, registry: Dict[str, Dict],
+                 seq: int, log_records: int, compact_every: int):
+        self.snapshot_file = snapshot_file
+        self.log_file = log_file
+        # Private copy of the registry, advanced only by the records it has written
+        self.registry = registry
+        self.seq = seq
+        self.durable_seq = seq
+        self.log_records = log_records
+        self.compact_every = compact_every
+        self.queue: 'queue.Queue' = queue.Queue()
+        self._log = None
+        # Set when an append failed: the log has a gap until the next snapshot
+        self._needs_snapshot = False
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {'batches': 0, 'records_written': 0, 'snapshots': 0, 'write_errors': 0}
+    
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True, name="WhaleRegistryWriter")
+            self._thread.start()
+    
+    def request(self, command: str, timeout: Optional[float] = None) -> bool:
+        """Run 'flush', 'compact' or 'stop' after everything queued so far; wait for it."""
+        if self._thread is None or not self._thread.is_alive():
+            return False
+        done = threading.Event()
+        self.queue.put((command, done))
+        return done.wait(timeout)
+    
+    def _run(self) -> None:
+        while True:
+            batch = [self.queue.get()]
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            records: List[Dict] = []
+            for item in batch:
+                if isinstance(item, dict):
+                    records.append(item)
+                    continue
+                self._write(records)
+                records = []
+                command, done = item
+                if command in ('compact', 'stop'):
+                    self._compact()
+                done.set()
+                if command == 'stop':
+                    self._close_log()
+                    return
+            self._write(records)
+            if self.log_records >= self.compact_every or self._needs_snapshot:
+                self._compact()
+    
+    def _open_log(self):
+        if self._log is None:
+            directory = os.path.dirname(self.log_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._log = open(self.log_file, 'a', encoding='utf-8')
+        return self._log
+    
+    def _close_log(self) -> None:
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+    
+    def _write(self, records: List[Dict]) -> None:
+        if not records:
+            return
+        try:
+            log = self._open_log()
+            log.write(''.join(json.dumps(record, separators=(',', ':')) + '\n' for record in records))
+            log.flush()
+            os.fsync(log.fileno())
+        except Exception as e:
+            self.stats['write_errors'] += 1
+            logger.error(f"Failed to append {len(records)} whale registry records: {e}")
+            self._close_log()
+            self._needs_snapshot = True
+        for record in records:
+            apply_trade(self.registry, record)
+        self.seq = records[-1]['n']
+        if not self._needs_snapshot:
+            self.durable_seq = self.seq
+        self.log_records += len(records)
+        self.stats['batches'] += 1
+        self.stats['records_written'] += len(records)
+    
+    def _compact(self) -> None:
+        """Snapshot the writer's registry atomically, then start an empty log."""
+        tmp_path = f"{self.snapshot_file}.tmp"
+        try:
+            directory = os.path.dirname(self.snapshot_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': SNAPSHOT_VERSION, 'seq': self.seq, 'whales': self.registry},
+                          f, separators=(',', ':'), default=str)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_file)
+            # Records up to self.seq are in the snapshot; replay skips them if
+            # we crash before the truncation below
+            self._close_log()
+            open(self.log_file, 'w').close()
+            self.log_records = 0
+            self.durable_seq = self.seq
+            self._needs_snapshot = False
+            self.stats['snapshots'] += 1
+            logger.debug(f"Compacted whale registry: {len(self.registry)} whales at seq {self.seq}")
+        except Exception as e:
+            self.stats['write_errors'] += 1
+            logger.error(f"Failed to write whale registry snapshot: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
 class WhaleRegistry:
     """
     Track and learn from whale wallet behavior over time.
@@ -24,33 +287,100 @@ class WhaleRegistry:
     - Detect accumulation/distribution patterns
     """
     
-    def __init__(self, persistence_file: str = 'data/whale_registry.json'):
+    def __init__(self, persistence_file: str = 'data/whale_registry.json',
+                 compact_every: int = COMPACT_EVERY):
         self.persistence_file = persistence_file
+        self.log_file = f"{persistence_file}.log"
+        self.compact_every = compact_every
         self.registry = {}  # {address: whale_data}
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._writer: Optional[_RegistryWriter] = None
+        self._closed_warned = False
         self.load_registry()
+        atexit.register(self.close)
     
     def load_registry(self):
-        """Load whale registry from disk."""
+        """Load whale registry from disk: snapshot plus the log records after it."""
+        if self._writer is not None:
+            self.close()
+        
+        registry, seq = {}, 0
         try:
             if os.path.exists(self.persistence_file):
                 with open(self.persistence_file, 'r') as f:
-                    self.registry = json.load(f)
-                logger.info(f"Loaded {len(self.registry)} tracked whales from registry")
+                    data = json.load(f)
+                if isinstance(data, dict) and data.get('version') == SNAPSHOT_VERSION and 'whales' in data:
+                    registry, seq = data['whales'], data['seq']
+                else:
+                    # Legacy format: the registry itself
+                    registry = data
             else:
                 logger.info("No existing whale registry found, starting fresh")
         except Exception as e:
             logger.error(f"Failed to load whale registry: {e}")
-            self.registry = {}
-    
-    def save_registry(self):
-        """Save whale registry to disk."""
+            registry, seq = {}, 0
+        
+        replayed = 0
         try:
-            os.makedirs(os.path.dirname(self.persistence_file), exist_ok=True)
-            with open(self.persistence_file, 'w') as f:
-                json.dump(self.registry, f, indent=2, default=str)
-            logger.debug(f"Saved {len(self.registry)} whales to registry")
+            if os.path.exists(self.log_file):
+                good_offset = 0
+                with open(self.log_file, 'rb') as f:
+                    for line in f:
+                        try:
+                            if not line.endswith(b'\n'):
+                                raise ValueError("no trailing newline")
+                            record = json.loads(line)
+                        except ValueError:
+                            # Only the last line can be torn (crash mid-append)
+                            logger.warning("Ignoring incomplete whale registry log record")
+                            break
+                        good_offset += len(line)
+                        if record['n'] <= seq:
+                            continue
+                        apply_trade(registry, record)
+                        seq = record['n']
+                        replayed += 1
+                if good_offset < os.path.getsize(self.log_file):
+                    # Cut the torn tail so new records don't get appended onto it
+                    with open(self.log_file, 'r+b') as f:
+                        f.truncate(good_offset)
         except Exception as e:
-            logger.error(f"Failed to save whale registry: {e}")
+            logger.error(f"Failed to replay whale registry log: {e}")
+        
+        # The writer advances its own copy of what was loaded; take it here,
+        # before the registry is shared, rather than on the trade path
+        writer = _RegistryWriter(
+            self.persistence_file, self.log_file,
+            json.loads(json.dumps(registry, default=str)),
+            seq, replayed, self.compact_every
+        )
+        writer.start()
+        with self._lock:
+            self.registry = registry
+            self._seq = seq
+            self._writer = writer
+            self._closed_warned = False
+        logger.info(f"Loaded {len(self.registry)} tracked whales from registry ({replayed} log records replayed)")
+    
+    def save_registry(self, timeout: Optional[float] = 30.0) -> bool:
+        """Write everything tracked so far and compact it into a snapshot (blocking)."""
+        with self._lock:
+            writer = self._writer
+        return writer.request('compact', timeout) if writer is not None else False
+    
+    def flush(self, timeout: Optional[float] = 30.0) -> bool:
+        """Wait until every tracked trade so far is appended to the log."""
+        with self._lock:
+            writer = self._writer
+        return writer.request('flush', timeout) if writer is not None else True
+    
+    def close(self, timeout: Optional[float] = 30.0) -> None:
+        """Flush, compact and stop the background writer until the next load_registry()."""
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            writer.request('stop', timeout)
     
     def track_transaction(
         self,
@@ -60,6 +390,9 @@ class WhaleRegistry:
         """
         Track a whale transaction and update registry.
         
+        The registry is updated in memory; the trade is persisted by the
+        background writer, so this never waits on disk.
+        
         Args:
             address: Wallet address
             transaction: {
@@ -70,95 +403,30 @@ class WhaleRegistry:
                 'confidence': float
             }
         """
-        address_lower = address.lower()
-        
-        # Initialize if new whale
-        if address_lower not in self.registry:
-            self.registry[address_lower] = {
-                'address': address_lower,
-                'first_seen': datetime.now().isoformat(),
-                'last_activity': datetime.now().isoformat(),
-                'total_trades': 0,
-                'buy_count': 0,
-                'sell_count': 0,
-                'total_volume_usd': 0.0,
-                'tokens_traded': [],
-                'smart_money_score': 0.5,  # Start neutral
-                'is_proven': False,
-                'trade_history': []
-            }
-        
-        whale_data = self.registry[address_lower]
-        
-        # Update stats
-        whale_data['last_activity'] = datetime.now().isoformat()
-        whale_data['total_trades'] += 1
-        whale_data['total_volume_usd'] += transaction.get('usd_value', 0)
-        
-        if transaction.get('classification') == 'BUY':
-            whale_data['buy_count'] += 1
-        elif transaction.get('classification') == 'SELL':
-            whale_data['sell_count'] += 1
-        
-        # Track tokens
-        token = transaction.get('token')
-        if token and token not in whale_data['tokens_traded']:
-            whale_data['tokens_traded'].append(token)
-        
-        # Add to trade history (keep last 50)
-        whale_data['trade_history'].append({
-            'timestamp': datetime.now().isoformat(),
-            'classification': transaction.get('classification'),
-            'token': token,
-            'usd_value': transaction.get('usd_value'),
-            'confidence': transaction.get('confidence')
-        })
-        whale_data['trade_history'] = whale_data['trade_history'][-50:]
-        
-        # Update smart money score
-        self._update_smart_money_score(whale_data)
-        
-        # Mark as proven if meets criteria
-        if (
-            whale_data['total_trades'] >= 5 and
-            whale_data['total_volume_usd'] >= 250_000 and
-            whale_data['smart_money_score'] >= 0.65
-        ):
-            whale_data['is_proven'] = True
-        
-        # Save to disk periodically
-        if whale_data['total_trades'] % 5 == 0:
-            self.save_registry()
+        record = {
+            'a': address.lower(),
+            't': datetime.now().isoformat(),
+            'c': transaction.get('classification'),
+            'k': transaction.get('token'),
+            'u': _number(transaction.get('usd_value')),
+            'f': _number(transaction.get('confidence'))
+        }
+        with self._lock:
+            self._seq += 1
+            record['n'] = self._seq
+            apply_trade(self.registry, record)
+            writer = self._writer
+            if writer is not None:
+                writer.queue.put(record)
+                return
+            warn = not self._closed_warned
+            self._closed_warned = True
+        if warn:
+            logger.warning("Whale registry is closed; trades are tracked in memory only")
     
     def _update_smart_money_score(self, whale_data: Dict):
-        """
-        Calculate "smart money" score based on:
-        - Consistency (regular trading)
-        - Volume (high value trades)
-        - Diversification (trading multiple tokens)
-        """
-        score = 0.5  # Start neutral
-        
-        # Factor 1: Trade frequency (max +0.2)
-        if whale_data['total_trades'] >= 20:
-            score += 0.2
-        elif whale_data['total_trades'] >= 10:
-            score += 0.1
-        
-        # Factor 2: Total volume (max +0.2)
-        if whale_data['total_volume_usd'] >= 1_000_000:
-            score += 0.2
-        elif whale_data['total_volume_usd'] >= 500_000:
-            score += 0.1
-        
-        # Factor 3: Token diversification (max +0.1)
-        unique_tokens = len(whale_data['tokens_traded'])
-        if unique_tokens >= 10:
-            score += 0.1
-        elif unique_tokens >= 5:
-            score += 0.05
-        
-        whale_data['smart_money_score'] = min(0.99, score)
+        """Recalculate whale_data's smart money score (see _smart_money_score)."""
+        whale_data['smart_money_score'] = _smart_money_score(whale_data)
     
     def get_whale_confidence_boost(self, address: str) -> float:
         """
@@ -196,18 +464,26 @@ class WhaleRegistry:
     
     def get_stats(self) -> Dict:
         """Get registry statistics."""
-        proven_count = sum(1 for w in self.registry.values() if w.get('is_proven'))
-        total_volume = sum(w.get('total_volume_usd', 0) for w in self.registry.values())
-        
-        return {
-            'total_tracked': len(self.registry),
-            'proven_whales': proven_count,
-            'total_volume_tracked': total_volume,
-            'total_trades_tracked': sum(w.get('total_trades', 0) for w in self.registry.values())
-        }
+        # Collected as a metrics collector too, so aggregate under the lock
+        # rather than iterate while track_transaction mutates the registry
+        with self._lock:
+            stats = {
+                'total_tracked': len(self.registry),
+                'proven_whales': sum(1 for w in self.registry.values() if w.get('is_proven')),
+                'total_volume_tracked': sum(w.get('total_volume_usd', 0) for w in self.registry.values()),
+                'total_trades_tracked': sum(w.get('total_trades', 0) for w in self.registry.values()),
+                'seq': self._seq
+            }
+            writer = self._writer
+        if writer is not None:
+            stats.update(dict(writer.stats))
+            stats['durable_seq'] = writer.durable_seq
+            stats['pending_records'] = writer.queue.qsize()
+            stats['log_records'] = writer.log_records
+        return stats
 
 
 # Global instance
 whale_registry = WhaleRegistry()
 
-
+register_collector('whale_registry', whale_registry.get_stats)
@@ -46,7 +46,7 @@ from config.api_keys import (
     ETHERSCAN_API_KEY, HELIUS_API_KEY, COVALENT_API_KEY, MORALIS_API_KEY,
     SOLSCAN_API_KEY, POLYGONSCAN_API_KEY, BLOCKFROST_PROJECT_ID,
     SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY, GOOGLE_APPLICATION_CREDENTIALS,
-    WHALE_ALERT_API_KEY, DUNE_API_KEY, COINGECKO_API_KEY
+    WHALE_ALERT_API_KEY, DUNE_API_KEY, COINGECKO_API_KEY, ETHEREUM_RPC_URL
 )
 from utils.api_integrations import (
     AddressData, EtherscanAPI, HeliusAPI, CovalentAPI, MoralisAPI,
@@ -230,13 +230,47 @@ class WhaleAddress:
         return analysis_tags
 
 
+class AsyncTokenBucket:
+    """Async-native token bucket: waits with asyncio.sleep, never blocks the event loop."""
+    
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self, tokens: float = 1.0):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+
 class ChainBalanceEnricher:
     """Enrich addresses with current balance data using appropriate APIs for each chain."""
     
+    # Addresses per multi-address request
+    ETHERSCAN_BALANCEMULTI_SIZE = 20  # Etherscan/Polygonscan balancemulti limit
+    RPC_BATCH_SIZE = 100  # JSON-RPC batch of eth_getBalance calls
+    SOLANA_MULTIPLE_ACCOUNTS_SIZE = 100  # getMultipleAccounts limit
+    
+    # Concurrent requests for chains without a multi-address endpoint
+    SINGLE_ADDRESS_CONCURRENCY = 8
+    
+    # Placeholder prices (same values as the per-address paths)
+    NATIVE_PRICES_USD = {'ethereum': 2400.0, 'polygon': 0.8, 'solana': 100.0}
+    
     def __init__(self, api_keys: Dict[str, str]):
         self.api_keys = api_keys
         self.enrichers = self._initialize_enrichers()
         self.rate_limiters = self._initialize_rate_limiters()
+        self._session = None
         
     def _initialize_enrichers(self) -> Dict[str, Any]:
         """Initialize API clients for each supported chain."""
@@ -278,37 +312,43 @@ class ChainBalanceEnricher:
             
         return enrichers
     
-    def _initialize_rate_limiters(self) -> Dict[str, Dict[str, Any]]:
-        """Initialize rate limiting parameters for each API."""
-        return {
-            'etherscan': {'calls_per_second': 5, 'last_call': 0},
-            'polygonscan': {'calls_per_second': 5, 'last_call': 0},
-            'helius': {'calls_per_second': 10, 'last_call': 0},
-            'solscan': {'calls_per_second': 5, 'last_call': 0},
-            'moralis': {'calls_per_second': 25, 'last_call': 0},
-            'covalent': {'calls_per_second': 4, 'last_call': 0},
-            'blockfrost': {'calls_per_second': 10, 'last_call': 0},
-            'blockstream': {'calls_per_second': 4, 'last_call': 0},
-            'xrpl': {'calls_per_second': 20, 'last_call': 0}
+    def _initialize_rate_limiters(self) -> Dict[str, AsyncTokenBucket]:
+        """Initialize a token bucket per API (calls per second)."""
+        calls_per_second = {
+            'etherscan': 5,
+            'polygonscan': 5,
+            'ethereum_rpc': 10,
+            'helius': 10,
+            'solscan': 5,
+            'moralis': 25,
+            'covalent': 4,
+            'blockfrost': 10,
+            'blockstream': 4,
+            'xrpl': 20
         }
+        return {name: AsyncTokenBucket(rate) for name, rate in calls_per_second.items()}
     
-    def _apply_rate_limit(self, api_name: str):
-        """Apply rate limiting for the specified API."""
-        if api_name not in self.rate_limiters:
-            return
-            
-        limiter = self.rate_limiters[api_name]
-        calls_per_second = limiter['calls_per_second']
-        last_call = limiter['last_call']
-        
-        min_interval = 1.0 / calls_per_second
-        time_since_last = time.time() - last_call
-        
-        if time_since_last < min_interval:
-            sleep_time = min_interval - time_since_last
-            time.sleep(sleep_time)
-            
-        self.rate_limiters[api_name]['last_call'] = time.time()
+    async def _apply_rate_limit(self, api_name: str):
+        """Wait for a token from the specified API's bucket."""
+        limiter = self.rate_limiters.get(api_name)
+        if limiter is not None:
+            await limiter.acquire()
+    
+    async def _get_session(self):
+        """Shared aiohttp session, created on first use inside the running loop."""
+        if self._session is None or self._session.closed:
+            import aiohttp
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=30),
+                connector=aiohttp.TCPConnector(limit=32)
+            )
+        return self._session
+    
+    async def close(self):
+        """Close the shared HTTP session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
     
     async def enrich_address_balance(self, address: str, blockchain: str) -> Optional[Tuple[float, float]]:
         """
@@ -336,12 +376,167 @@ class ChainBalanceEnricher:
             logger.error(f"Failed to enrich balance for {address} on {blockchain}: {e}")
             return None
     
+    async def enrich_balances(self, addresses: List[str], blockchain: str) -> Dict[str, Optional[Tuple[float, float]]]:
+        """
+        Enrich many addresses on one chain, using multi-address endpoints where available.
+        
+        Ethereum/Polygon use Etherscan-style balancemulti (20 per call), with a
+        batched eth_getBalance JSON-RPC fallback for Ethereum; Solana uses
+        getMultipleAccounts (100 per call). Other chains, and addresses a batch
+        endpoint didn't answer, go through enrich_address_balance with bounded
+        concurrency. Returns {address: (native_balance, usd_balance) or None}.
+        """
+        addresses = list(dict.fromkeys(a for a in addresses if a))
+        results: Dict[str, Optional[Tuple[float, float]]] = {}
+        
+        try:
+            if blockchain == 'ethereum':
+                if 'ethereum' in self.enrichers:
+                    results.update(await self._batch_balancemulti(
+                        addresses, 'https://api.etherscan.io/api', self.api_keys['etherscan'], 'etherscan', blockchain))
+                missing = [a for a in addresses if a not in results]
+                if missing and self.api_keys.get('ethereum_rpc'):
+                    results.update(await self._batch_eth_get_balance(missing))
+            elif blockchain == 'polygon' and self.api_keys.get('polygonscan'):
+                results.update(await self._batch_balancemulti(
+                    addresses, 'https://api.polygonscan.com/api', self.api_keys['polygonscan'], 'polygonscan', blockchain))
+            elif blockchain == 'solana' and self.api_keys.get('helius'):
+                results.update(await self._batch_solana_multiple_accounts(addresses))
+        except Exception as e:
+            logger.warning(f"Batched balance enrichment failed for {blockchain}, falling back per address: {e}")
+        
+        # Per-address path for unsupported chains and anything the batch calls missed
+        missing = [a for a in addresses if a not in results]
+        if missing:
+            semaphore = asyncio.Semaphore(self.SINGLE_ADDRESS_CONCURRENCY)
+            
+            async def enrich_one(address: str):
+                async with semaphore:
+                    results[address] = await self.enrich_address_balance(address, blockchain)
+            
+            await asyncio.gather(*(enrich_one(a) for a in missing))
+        
+        return results
+    
+    def _to_native_and_usd(self, raw_balance: int, decimals: int, blockchain: str) -> Tuple[float, float]:
+        balance_native = raw_balance / (10 ** decimals)
+        return balance_native, balance_native * self.NATIVE_PRICES_USD[blockchain]
+    
+    async def _batch_balancemulti(self, addresses: List[str], url: str, api_key: str,
+                                  limiter: str, blockchain: str) -> Dict[str, Tuple[float, float]]:
+        """Etherscan-compatible 'balancemulti': up to 20 addresses per request."""
+        size = self.ETHERSCAN_BALANCEMULTI_SIZE
+        chunks = [addresses[i:i + size] for i in range(0, len(addresses), size)]
+        session = await self._get_session()
+        
+        async def fetch(chunk: List[str]) -> Dict[str, Tuple[float, float]]:
+            await self._apply_rate_limit(limiter)
+            params = {
+                'module': 'account',
+                'action': 'balancemulti',
+                'address': ','.join(chunk),
+                'tag': 'latest',
+                'apikey': api_key
+            }
+            try:
+                async with session.get(url, params=params) as response:
+                    if response.status != 200:
+                        return {}
+                    data = await response.json()
+            except Exception as e:
+                logger.warning(f"{limiter} balancemulti failed for {len(chunk)} addresses: {e}")
+                return {}
+            if data.get('status') != '1' or not isinstance(data.get('result'), list):
+                return {}
+            by_lower = {a.lower(): a for a in chunk}
+            found = {}
+            for item in data['result']:
+                address = by_lower.get(str(item.get('account', '')).lower())
+                if address is not None:
+                    found[address] = self._to_native_and_usd(int(item.get('balance', 0)), 18, blockchain)
+            return found
+        
+        results: Dict[str, Tuple[float, float]] = {}
+        for found in await asyncio.gather(*(fetch(chunk) for chunk in chunks)):
+            results.update(found)
+        return results
+    
+    async def _batch_eth_get_balance(self, addresses: List[str]) -> Dict[str, Tuple[float, float]]:
+        """JSON-RPC batch of eth_getBalance calls against the configured Ethereum RPC."""
+        size = self.RPC_BATCH_SIZE
+        chunks = [addresses[i:i + size] for i in range(0, len(addresses), size)]
+        session = await self._get_session()
+        
+        async def fetch(chunk: List[str]) -> Dict[str, Tuple[float, float]]:
+            await self._apply_rate_limit('ethereum_rpc')
+            payload = [
+                {'jsonrpc': '2.0', 'id': i, 'method': 'eth_getBalance', 'params': [address, 'latest']}
+                for i, address in enumerate(chunk)
+            ]
+            try:
+                async with session.post(self.api_keys['ethereum_rpc'], json=payload) as response:
+                    if response.status != 200:
+                        return {}
+                    data = await response.json()
+            except Exception as e:
+                logger.warning(f"Batched eth_getBalance failed for {len(chunk)} addresses: {e}")
+                return {}
+            found = {}
+            for item in data if isinstance(data, list) else []:
+                index, result = item.get('id'), item.get('result')
+                if isinstance(index, int) and 0 <= index < len(chunk) and result is not None:
+                    found[chunk[index]] = self._to_native_and_usd(int(result, 16), 18, 'ethereum')
+            return found
+        
+        results: Dict[str, Tuple[float, float]] = {}
+        for found in await asyncio.gather(*(fetch(chunk) for chunk in chunks)):
+            results.update(found)
+        return results
+    
+    async def _batch_solana_multiple_accounts(self, addresses: List[str]) -> Dict[str, Tuple[float, float]]:
+        """Solana getMultipleAccounts via Helius: lamports for up to 100 accounts per call."""
+        size = self.SOLANA_MULTIPLE_ACCOUNTS_SIZE
+        chunks = [addresses[i:i + size] for i in range(0, len(addresses), size)]
+        url = f"https://mainnet.helius-rpc.com/?api-key={self.api_keys['helius']}"
+        session = await self._get_session()
+        
+        async def fetch(chunk: List[str]) -> Dict[str, Tuple[float, float]]:
+            await self._apply_rate_limit('helius')
+            payload = {
+                'jsonrpc': '2.0',
+                'id': 1,
+                'method': 'getMultipleAccounts',
+                # Zero-length data slice: only lamports are needed
+                'params': [chunk, {'encoding': 'base64', 'dataSlice': {'offset': 0, 'length': 0}}]
+            }
+            try:
+                async with session.post(url, json=payload) as response:
+                    if response.status != 200:
+                        return {}
+                    data = await response.json()
+            except Exception as e:
+                logger.warning(f"getMultipleAccounts failed for {len(chunk)} addresses: {e}")
+                return {}
+            accounts = (data.get('result') or {}).get('value')
+            if not isinstance(accounts, list) or len(accounts) != len(chunk):
+                return {}
+            # A null account has never been funded: zero balance
+            return {
+                address: self._to_native_and_usd(int((account or {}).get('lamports', 0)), 9, 'solana')
+                for address, account in zip(chunk, accounts)
+            }
+        
+        results: Dict[str, Tuple[float, float]] = {}
+        for found in await asyncio.gather(*(fetch(chunk) for chunk in chunks)):
+            results.update(found)
+        return results
+    
     async def _enrich_ethereum_balance(self, address: str) -> Optional[Tuple[float, float]]:
         """Enrich Ethereum address balance using multiple APIs with fallback."""
         # Try Etherscan first
         if 'ethereum' in self.enrichers:
             try:
-                self._apply_rate_limit('etherscan')
+                await self._apply_rate_limit('etherscan')
                 balance_wei = await self._get_ethereum_balance_etherscan(address)
                 if balance_wei is not None:
                     balance_eth = balance_wei / 1e18
@@ -355,7 +550,7 @@ class ChainBalanceEnricher:
         # Try Moralis as fallback
         if 'ethereum_moralis' in self.enrichers:
             try:
-                self._apply_rate_limit('moralis')
+                await self._apply_rate_limit('moralis')
                 return await self._get_ethereum_balance_moralis(address)
             except Exception as e:
                 logger.warning(f"Moralis balance fetch failed for {address}: {e}")
@@ -363,7 +558,7 @@ class ChainBalanceEnricher:
         # Try Covalent as final fallback
         if 'ethereum_covalent' in self.enrichers:
             try:
-                self._apply_rate_limit('covalent')
+                await self._apply_rate_limit('covalent')
                 return await self._get_ethereum_balance_covalent(address)
             except Exception as e:
                 logger.warning(f"Covalent balance fetch failed for {address}: {e}")
@@ -372,8 +567,6 @@ class ChainBalanceEnricher:
     
     async def _get_ethereum_balance_etherscan(self, address: str) -> Optional[int]:
         """Get Ethereum balance using Etherscan API."""
-        import aiohttp
-        
         url = "https://api.etherscan.io/api"
         params = {
             'module': 'account',
@@ -383,18 +576,16 @@ class ChainBalanceEnricher:
             'apikey': self.api_keys['etherscan']
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    if data.get('status') == '1':
-                        return int(data['result'])
+        session = await self._get_session()
+        async with session.get(url, params=params) as response:
+            if response.status == 200:
+                data = await response.json()
+                if data.get('status') == '1':
+                    return int(data['result'])
         return None
     
     async def _get_ethereum_balance_moralis(self, address: str) -> Optional[Tuple[float, float]]:
         """Get Ethereum balance using Moralis API."""
-        import aiohttp
-        
         url = f"https://deep-index.moralis.io/api/v2/{address}/balance"
         headers = {
             'X-API-Key': self.api_keys['moralis']
@@ -403,59 +594,55 @@ class ChainBalanceEnricher:
             'chain': 'eth'
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    balance_wei = int(data.get('balance', 0))
-                    balance_eth = balance_wei / 1e18
-                    eth_price = 2400.0  # Placeholder
-                    return balance_eth, balance_eth * eth_price
+        session = await self._get_session()
+        async with session.get(url, headers=headers, params=params) as response:
+            if response.status == 200:
+                data = await response.json()
+                balance_wei = int(data.get('balance', 0))
+                balance_eth = balance_wei / 1e18
+                eth_price = 2400.0  # Placeholder
+                return balance_eth, balance_eth * eth_price
         return None
     
     async def _get_ethereum_balance_covalent(self, address: str) -> Optional[Tuple[float, float]]:
         """Get Ethereum balance using Covalent API."""
-        import aiohttp
-        
         url = f"https://api.covalenthq.com/v1/eth-mainnet/address/{address}/balances_v2/"
         headers = {
             'Authorization': f'Bearer {self.api_keys["covalent"]}'
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    items = data.get('data', {}).get('items', [])
-                    for item in items:
-                        if item.get('contract_ticker_symbol') == 'ETH':
-                            balance_eth = float(item.get('balance', 0)) / 1e18
-                            quote_rate = item.get('quote_rate', 2400.0)
-                            return balance_eth, balance_eth * quote_rate
+        session = await self._get_session()
+        async with session.get(url, headers=headers) as response:
+            if response.status == 200:
+                data = await response.json()
+                items = data.get('data', {}).get('items', [])
+                for item in items:
+                    if item.get('contract_ticker_symbol') == 'ETH':
+                        balance_eth = float(item.get('balance', 0)) / 1e18
+                        quote_rate = item.get('quote_rate', 2400.0)
+                        return balance_eth, balance_eth * quote_rate
         return None
     
     async def _enrich_bitcoin_balance(self, address: str) -> Optional[Tuple[float, float]]:
         """Enrich Bitcoin address balance using Blockstream API."""
-        import aiohttp
-        
-        self._apply_rate_limit('blockstream')
+        await self._apply_rate_limit('blockstream')
         
         url = f"https://blockstream.info/api/address/{address}"
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        balance_satoshis = data.get('chain_stats', {}).get('funded_txo_sum', 0)
-                        unspent_satoshis = data.get('chain_stats', {}).get('spent_txo_sum', 0)
-                        current_balance = (balance_satoshis - unspent_satoshis) / 1e8
+            session = await self._get_session()
+            async with session.get(url) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    balance_satoshis = data.get('chain_stats', {}).get('funded_txo_sum', 0)
+                    unspent_satoshis = data.get('chain_stats', {}).get('spent_txo_sum', 0)
+                    current_balance = (balance_satoshis - unspent_satoshis) / 1e8
                         
-                        # Get BTC price (placeholder)
-                        btc_price = 42000.0
-                        balance_usd = current_balance * btc_price
+                    # Get BTC price (placeholder)
+                    btc_price = 42000.0
+                    balance_usd = current_balance * btc_price
                         
-                        return current_balance, balance_usd
+                    return current_balance, balance_usd
         except Exception as e:
             logger.error(f"Bitcoin balance fetch failed for {address}: {e}")
             
@@ -463,9 +650,7 @@ class ChainBalanceEnricher:
     
     async def _enrich_solana_balance(self, address: str) -> Optional[Tuple[float, float]]:
         """Enrich Solana address balance using Helius API."""
-        import aiohttp
-        
-        self._apply_rate_limit('helius')
+        await self._apply_rate_limit('helius')
         
         url = f"https://mainnet.helius-rpc.com/?api-key={self.api_keys['helius']}"
         
@@ -477,18 +662,18 @@ class ChainBalanceEnricher:
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=payload) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        balance_lamports = data.get('result', {}).get('value', 0)
-                        balance_sol = balance_lamports / 1e9
+            session = await self._get_session()
+            async with session.post(url, json=payload) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    balance_lamports = data.get('result', {}).get('value', 0)
+                    balance_sol = balance_lamports / 1e9
                         
-                        # Get SOL price (placeholder)
-                        sol_price = 100.0
-                        balance_usd = balance_sol * sol_price
+                    # Get SOL price (placeholder)
+                    sol_price = 100.0
+                    balance_usd = balance_sol * sol_price
                         
-                        return balance_sol, balance_usd
+                    return balance_sol, balance_usd
         except Exception as e:
             logger.error(f"Solana balance fetch failed for {address}: {e}")
             
@@ -496,9 +681,7 @@ class ChainBalanceEnricher:
     
     async def _enrich_polygon_balance(self, address: str) -> Optional[Tuple[float, float]]:
         """Enrich Polygon address balance using Polygonscan API."""
-        import aiohttp
-        
-        self._apply_rate_limit('polygonscan')
+        await self._apply_rate_limit('polygonscan')
         
         url = "https://api.polygonscan.com/api"
         params = {
@@ -510,19 +693,19 @@ class ChainBalanceEnricher:
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        if data.get('status') == '1':
-                            balance_wei = int(data['result'])
-                            balance_matic = balance_wei / 1e18
+            session = await self._get_session()
+            async with session.get(url, params=params) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    if data.get('status') == '1':
+                        balance_wei = int(data['result'])
+                        balance_matic = balance_wei / 1e18
                             
-                            # Get MATIC price (placeholder)
-                            matic_price = 0.8
-                            balance_usd = balance_matic * matic_price
+                        # Get MATIC price (placeholder)
+                        matic_price = 0.8
+                        balance_usd = balance_matic * matic_price
                             
-                            return balance_matic, balance_usd
+                        return balance_matic, balance_usd
         except Exception as e:
             logger.error(f"Polygon balance fetch failed for {address}: {e}")
             
@@ -530,9 +713,7 @@ class ChainBalanceEnricher:
     
     async def _enrich_xrp_balance(self, address: str) -> Optional[Tuple[float, float]]:
         """Enrich XRP address balance using XRPL API."""
-        import aiohttp
-        
-        self._apply_rate_limit('xrpl')
+        await self._apply_rate_limit('xrpl')
         
         url = "https://xrplcluster.com"
         payload = {
@@ -546,19 +727,19 @@ class ChainBalanceEnricher:
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=payload) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        account_data = data.get('result', {}).get('account_data', {})
-                        balance_drops = int(account_data.get('Balance', 0))
-                        balance_xrp = balance_drops / 1e6
+            session = await self._get_session()
+            async with session.post(url, json=payload) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    account_data = data.get('result', {}).get('account_data', {})
+                    balance_drops = int(account_data.get('Balance', 0))
+                    balance_xrp = balance_drops / 1e6
                         
-                        # Get XRP price (placeholder)
-                        xrp_price = 0.6
-                        balance_usd = balance_xrp * xrp_price
+                    # Get XRP price (placeholder)
+                    xrp_price = 0.6
+                    balance_usd = balance_xrp * xrp_price
                         
-                        return balance_xrp, balance_usd
+                    return balance_xrp, balance_usd
         except Exception as e:
             logger.error(f"XRP balance fetch failed for {address}: {e}")
             
@@ -566,9 +747,7 @@ class ChainBalanceEnricher:
     
     async def _enrich_cardano_balance(self, address: str) -> Optional[Tuple[float, float]]:
         """Enrich Cardano address balance using Blockfrost API."""
-        import aiohttp
-        
-        self._apply_rate_limit('blockfrost')
+        await self._apply_rate_limit('blockfrost')
         
         url = f"https://cardano-mainnet.blockfrost.io/api/v0/addresses/{address}"
         headers = {
@@ -576,21 +755,21 @@ class ChainBalanceEnricher:
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        amounts = data.get('amount', [])
-                        for amount in amounts:
-                            if amount.get('unit') == 'lovelace':
-                                balance_lovelace = int(amount.get('quantity', 0))
-                                balance_ada = balance_lovelace / 1e6
+            session = await self._get_session()
+            async with session.get(url, headers=headers) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    amounts = data.get('amount', [])
+                    for amount in amounts:
+                        if amount.get('unit') == 'lovelace':
+                            balance_lovelace = int(amount.get('quantity', 0))
+                            balance_ada = balance_lovelace / 1e6
                                 
-                                # Get ADA price (placeholder)
-                                ada_price = 0.4
-                                balance_usd = balance_ada * ada_price
+                            # Get ADA price (placeholder)
+                            ada_price = 0.4
+                            balance_usd = balance_ada * ada_price
                                 
-                                return balance_ada, balance_usd
+                            return balance_ada, balance_usd
         except Exception as e:
             logger.error(f"Cardano balance fetch failed for {address}: {e}")
             
@@ -778,7 +957,8 @@ class WhaleDiscoveryAgent:
             'moralis': MORALIS_API_KEY,
             'solscan': SOLSCAN_API_KEY,
             'polygonscan': POLYGONSCAN_API_KEY,
-            'blockfrost': BLOCKFROST_PROJECT_ID
+            'blockfrost': BLOCKFROST_PROJECT_ID,
+            'ethereum_rpc': ETHEREUM_RPC_URL
         }
         return ChainBalanceEnricher(api_keys)
     
@@ -857,112 +1037,129 @@ class WhaleDiscoveryAgent:
         
         all_whale_addresses = []
         
-        # Phase 1: Comprehensive Discovery using all sources
-        if not self.test_mode:
-            logger.info("📊 Phase 1: Comprehensive multi-source whale discovery")
-            
-            # Configure for high-volume collection
-            limit_per_source = 5000 if not self.test_mode else 5
+        try:
+            # New BigQuery bytes-processed budget for this run
+            self.bigquery_manager.start_run()
             
-            try:
-                comprehensive_addresses = self.comprehensive_discovery.discover_whale_addresses(
-                    limit_per_source=limit_per_source
-                )
-                
-                logger.info(f"✅ Comprehensive discovery found {len(comprehensive_addresses)} addresses")
+            # Phase 1: Comprehensive Discovery using all sources
+            if not self.test_mode:
+                logger.info("📊 Phase 1: Comprehensive multi-source whale discovery")
                 
-                # Convert AddressData to WhaleAddress format
-                for addr_data in comprehensive_addresses:
-                    try:
-                        # Get balance information
-                        balance_native = addr_data.metadata.get('balance_native', 0)
-                        balance_usd = addr_data.metadata.get('balance_usd', 0)
-                        
-                        # If no balance info, try to enrich
-                        if balance_usd == 0 and not self.dry_run:
-                            balance_result = await self.balance_enricher.enrich_address_balance(
-                                addr_data.address, addr_data.blockchain
-                            )
-                            if balance_result:
-                                balance_native, balance_usd = balance_result
-                        
-                        # Only include if meets minimum threshold (must have valid positive balance)
-                        if balance_usd is not None and balance_usd > 0 and balance_usd >= self.min_balance_usd:
-                            whale_address = WhaleAddress(
-                                address=addr_data.address,
-                                blockchain=addr_data.blockchain,
-                                balance_native=balance_native,
-                                balance_usd=balance_usd,
-                                source_system=addr_data.source_system,
-                                discovery_method=addr_data.metadata.get('detection_method', 'comprehensive_discovery'),
-                                confidence_score=addr_data.confidence_score,
-                                metadata=addr_data.metadata,
-                                discovered_at=datetime.utcnow()
-                            )
-                            all_whale_addresses.append(whale_address)
-                        else:
-                            # Log why address was skipped for debugging
-                            if balance_usd is None:
-                                logger.debug(f"Skipped {addr_data.address}: No balance data available")
-                            elif balance_usd <= 0:
-                                logger.debug(f"Skipped {addr_data.address}: Invalid balance ${balance_usd}")
-                            else:
-                                logger.debug(f"Skipped {addr_data.address}: Balance ${balance_usd:,.0f} below threshold ${self.min_balance_usd:,.0f}")
-                    
-                    except Exception as e:
-                        logger.warning(f"Failed to process address {addr_data.address}: {e}")
-                        continue
+                # Configure for high-volume collection
+                limit_per_source = 5000 if not self.test_mode else 5
                 
-                logger.info(f"📈 Processed {len(all_whale_addresses)} qualifying whale addresses from comprehensive discovery")
-                
-            except Exception as e:
-                logger.error(f"Comprehensive discovery failed: {e}")
-        
-        # Phase 2: Enhanced BigQuery Discovery (if needed for more addresses)
-        if len(all_whale_addresses) < 10000:
-            logger.info("📊 Phase 2: Enhanced BigQuery whale discovery")
-            
-            for chain in self.target_chains:
-                if len(all_whale_addresses) >= 10000:
-                    break
-                    
                 try:
-                    # Get more candidates from BigQuery
-                    candidates = await self._discover_candidates_bigquery(chain, limit=3000)
-                    logger.info(f"BigQuery {chain}: Found {len(candidates)} whale candidates")
+                    comprehensive_addresses = self.comprehensive_discovery.discover_whale_addresses(
+                        limit_per_source=limit_per_source
+                    )
                     
-                    # Enrich and filter
-                    enriched_whales = await self._enrich_and_filter_candidates(candidates, chain)
-                    all_whale_addresses.extend(enriched_whales)
-                    
-                    logger.info(f"BigQuery {chain}: Added {len(enriched_whales)} qualified whales")
-                    
-                except Exception as e:
-                    logger.error(f"BigQuery discovery failed for {chain}: {e}")
-                    continue
-        
-        # Phase 3: API-based Discovery (additional sources)
-        if len(all_whale_addresses) < 10000:
-            logger.info("📊 Phase 3: API-based whale discovery")
-            
-            for chain in self.target_chains:
-                if len(all_whale_addresses) >= 10000:
-                    break
+                    logger.info(f"✅ Comprehensive discovery found {len(comprehensive_addresses)} addresses")
                     
-                try:
-                    # Get more candidates from APIs
-                    candidates = await self._discover_candidates_apis(chain, limit=2000)
-                    logger.info(f"API {chain}: Found {len(candidates)} whale candidates")
+                    # Enrich addresses without balance info in one batched pass per chain
+                    enriched_balances = {}
+                    if not self.dry_run:
+                        needs_balance = {}
+                        for addr_data in comprehensive_addresses:
+                            if addr_data.metadata.get('balance_usd', 0) == 0:
+                                needs_balance.setdefault(addr_data.blockchain, []).append(addr_data.address)
+                        for blockchain, addresses in needs_balance.items():
+                            chain_balances = await self.balance_enricher.enrich_balances(addresses, blockchain)
+                            for address, balance_result in chain_balances.items():
+                                enriched_balances[(address, blockchain)] = balance_result
                     
-                    # Enrich and filter
-                    enriched_whales = await self._enrich_and_filter_candidates(candidates, chain)
-                    all_whale_addresses.extend(enriched_whales)
+                    # Convert AddressData to WhaleAddress format
+                    for addr_data in comprehensive_addresses:
+                        try:
+                            # Get balance information
+                            balance_native = addr_data.metadata.get('balance_native', 0)
+                            balance_usd = addr_data.metadata.get('balance_usd', 0)
+                            
+                            # If no balance info, use the batched enrichment result
+                            if balance_usd == 0 and not self.dry_run:
+                                balance_result = enriched_balances.get((addr_data.address, addr_data.blockchain))
+                                if balance_result:
+                                    balance_native, balance_usd = balance_result
+                            
+                            # Only include if meets minimum threshold (must have valid positive balance)
+                            if balance_usd is not None and balance_usd > 0 and balance_usd >= self.min_balance_usd:
+                                whale_address = WhaleAddress(
+                                    address=addr_data.address,
+                                    blockchain=addr_data.blockchain,
+                                    balance_native=balance_native,
+                                    balance_usd=balance_usd,
+                                    source_system=addr_data.source_system,
+                                    discovery_method=addr_data.metadata.get('detection_method', 'comprehensive_discovery'),
+                                    confidence_score=addr_data.confidence_score,
+                                    metadata=addr_data.metadata,
+                                    discovered_at=datetime.utcnow()
+                                )
+                                all_whale_addresses.append(whale_address)
+                            else:
+                                # Log why address was skipped for debugging
+                                if balance_usd is None:
+                                    logger.debug(f"Skipped {addr_data.address}: No balance data available")
+                                elif balance_usd <= 0:
+                                    logger.debug(f"Skipped {addr_data.address}: Invalid balance ${balance_usd}")
+                                else:
+                                    logger.debug(f"Skipped {addr_data.address}: Balance ${balance_usd:,.0f} below threshold ${self.min_balance_usd:,.0f}")
+                        
+                        except Exception as e:
+                            logger.warning(f"Failed to process address {addr_data.address}: {e}")
+                            continue
                     
-                    logger.info(f"API {chain}: Added {len(enriched_whales)} qualified whales")
+                    logger.info(f"📈 Processed {len(all_whale_addresses)} qualifying whale addresses from comprehensive discovery")
                     
                 except Exception as e:
-                    logger.error(f"API discovery failed for {chain}: {e}")
-                    continue
+                    logger.error(f"Comprehensive discovery failed: {e}")
+            
+            # Phase 2: Enhanced BigQuery Discovery (if needed for more addresses)
+            if len(all_whale_addresses) < 10000:
+                logger.info("📊 Phase 2: Enhanced BigQuery whale discovery")
+                
+                for chain in self.target_chains:
+                    if len(all_whale_addresses) >= 10000:
+                        break
+                        
+                    try:
+                        # Get more candidates from BigQuery
+                        candidates = await self._discover_candidates_bigquery(chain, limit=3000)
+                        logger.info(f"BigQuery {chain}: Found {len(candidates)} whale candidates")
+                        
+                        # Enrich and filter
+                        enriched_whales = await self._enrich_and_filter_candidates(candidates, chain)
+                        all_whale_addresses.extend(enriched_whales)
+                        
+                        logger.info(f"BigQuery {chain}: Added {len(enriched_whales)} qualified whales")
+                        
+                    except Exception as e:
+                        logger.error(f"BigQuery discovery failed for {chain}: {e}")
+                        continue
+            
+            # Phase 3: API-based Discovery (additional sources)
+            if len(all_whale_addresses) < 10000:
+                logger.info("📊 Phase 3: API-based whale discovery")
+                
+                for chain in self.target_chains:
+                    if len(all_whale_addresses) >= 10000:
+                        break
+                        
+                    try:
+                        # Get more candidates from APIs
+                        candidates = await self._discover_candidates_apis(chain, limit=2000)
+                        logger.info(f"API {chain}: Found {len(candidates)} whale candidates")
+                        
+                        # Enrich and filter
+                        enriched_whales = await self._enrich_and_filter_candidates(candidates, chain)
+                        all_whale_addresses.extend(enriched_whales)
+                        
+                        logger.info(f"API {chain}: Added {len(enriched_whales)} qualified whales")
+                        
+                    except Exception as e:
+                        logger.error(f"API discovery failed for {chain}: {e}")
+                        continue
+        finally:
+            # Release the enricher's HTTP session even if discovery fails
+            await self.balance_enricher.close()
         
         # Remove duplicates while preserving order and highest confidence
         unique_whales = self._deduplicate_whale_addresses(all_whale_addresses)
@@ -1414,69 +1611,43 @@ class WhaleDiscoveryAgent:
         
         logger.info(f"💰 Starting enrichment for {len(candidates)} {chain} candidates...")
         
-        # Process candidates in batches for better performance
-        batch_size = 10  # Reduced from 50 to prevent API overload
-        total_batches = (len(candidates) + batch_size - 1) // batch_size
+        # One batched pass: multi-address endpoints, shared session, per-provider token buckets
+        started = time.perf_counter()
+        balances = await self.balance_enricher.enrich_balances(candidates, chain)
+        elapsed = time.perf_counter() - started
+        logger.info(f"Enriched {len(balances)} {chain} candidates in {elapsed:.1f}s "
+                    f"({len(balances) / max(elapsed, 1e-9):.0f} addresses/sec)")
         
-        for batch_num in range(total_batches):
-            start_idx = batch_num * batch_size
-            end_idx = min(start_idx + batch_size, len(candidates))
-            batch_candidates = candidates[start_idx:end_idx]
-            
-            logger.info(f"Processing batch {batch_num + 1}/{total_batches} ({len(batch_candidates)} addresses)")
-            
-            # Process batch in parallel
-            tasks = []
-            for address in batch_candidates:
-                task = self.balance_enricher.enrich_address_balance(address, chain)
-                tasks.append(task)
-            
-            try:
-                batch_results = await asyncio.gather(*tasks, return_exceptions=True)
+        for address in candidates:
+            result = balances.get(address)
+            if result is None:
+                continue
                 
-                for i, result in enumerate(batch_results):
-                    address = batch_candidates[i]
-                    
-                    if isinstance(result, Exception):
-                        logger.warning(f"Failed to enrich {address} on {chain}: {result}")
-                        continue
-                    
-                    if result is None:
-                        continue
-                        
-                    enriched_count += 1
-                    balance_native, balance_usd = result
-                    
-                    # Check if address qualifies as whale (minimum balance check only)
-                    if balance_usd is not None and balance_usd > 0 and balance_usd >= self.min_balance_usd:
-                        whale_address = WhaleAddress(
-                            address=address,
-                            blockchain=chain,
-                            balance_native=balance_native,
-                            balance_usd=balance_usd,
-                            source_system='whale_discovery_agent',
-                            discovery_method=f'{chain}_api_bigquery_combined',
-                            confidence_score=0.8,  # High confidence for enriched balances
-                            metadata={
-                                'discovery_chain': chain,
-                                'balance_enrichment_successful': True,
-                                'enrichment_timestamp': get_current_timestamp(),
-                                'min_balance_threshold': self.min_balance_usd,
-                                'meets_whale_criteria': True
-                            },
-                            discovered_at=datetime.utcnow()
-                        )
-                        
-                        whale_addresses.append(whale_address)
-                        logger.info(f"✅ Whale found: {address} on {chain} - ${balance_usd:,.0f} ({balance_native:.4f} {chain.upper()})")
+            enriched_count += 1
+            balance_native, balance_usd = result
+            
+            # Check if address qualifies as whale (minimum balance check only)
+            if balance_usd is not None and balance_usd > 0 and balance_usd >= self.min_balance_usd:
+                whale_address = WhaleAddress(
+                    address=address,
+                    blockchain=chain,
+                    balance_native=balance_native,
+                    balance_usd=balance_usd,
+                    source_system='whale_discovery_agent',
+                    discovery_method=f'{chain}_api_bigquery_combined',
+                    confidence_score=0.8,  # High confidence for enriched balances
+                    metadata={
+                        'discovery_chain': chain,
+                        'balance_enrichment_successful': True,
+                        'enrichment_timestamp': get_current_timestamp(),
+                        'min_balance_threshold': self.min_balance_usd,
+                        'meets_whale_criteria': True
+                    },
+                    discovered_at=datetime.utcnow()
+                )
                 
-                # Add longer delay between batches to respect API limits
-                if batch_num < total_batches - 1:
-                    await asyncio.sleep(2.0)  # Increased from 0.5 to 2.0 seconds
-                    
-            except Exception as e:
-                logger.error(f"Batch enrichment failed for {chain} batch {batch_num + 1}: {e}")
-                continue
+                whale_addresses.append(whale_address)
+                logger.info(f"✅ Whale found: {address} on {chain} - ${balance_usd:,.0f} ({balance_native:.4f} {chain.upper()})")
         
         logger.info(f"🎯 Enrichment completed for {chain}:")
         logger.info(f"  - Candidates processed: {len(candidates)}")
@@ -1495,33 +1666,25 @@ class WhaleDiscoveryAgent:
             logger.info(f"DRY RUN: Would store {len(whale_addresses)} whale addresses")
             return len(whale_addresses)
         
-        stored_count = 0
+        from utils.address_writer import AddressBulkWriter
         
+        # One upsert per chunk on (address, blockchain); merge rules keep the
+        # higher confidence and the most recent balance of new vs stored rows
+        writer = AddressBulkWriter(self.supabase)
+        rows = []
         for whale in whale_addresses:
             try:
-                # Check if address already exists
-                existing = self.supabase.table('addresses').select('id').eq('address', whale.address).eq('blockchain', whale.blockchain).execute()
-                
-                if existing.data:
-                    # Update existing record
-                    update_data = whale.to_supabase_dict()
-                    result = self.supabase.table('addresses').update(update_data).eq('id', existing.data[0]['id']).execute()
-                    logger.info(f"Updated existing whale address: {whale.address}")
-                else:
-                    # Insert new record
-                    insert_data = whale.to_supabase_dict()
-                    result = self.supabase.table('addresses').insert(insert_data).execute()
-                    logger.info(f"Inserted new whale address: {whale.address}")
-                
-                stored_count += 1
-                
+                rows.append(whale.to_supabase_dict())
             except Exception as e:
-                logger.error(f"Failed to store whale address {whale.address}: {e}")
+                logger.error(f"Failed to prepare whale address {whale.address}: {e}")
                 self.stats['errors'] += 1
-                continue
+        
+        result = await asyncio.get_event_loop().run_in_executor(None, writer.write, rows)
+        stored_count = result['written']
+        self.stats['errors'] += result['failed']
         
         self.stats['stored_addresses'] = stored_count
-        logger.info(f"Successfully stored {stored_count} whale addresses")
+        logger.info(f"Successfully stored {stored_count} whale addresses ({result['rows_per_sec']} rows/sec)")
         return stored_count
     
     def print_statistics(self):